@@ -7,6 +7,7 @@ from flask_apscheduler import APScheduler
 
 from lighthouse.hooks.cherrypick_test_data import inserted_cherrypick_test_data_hook
 from lighthouse.hooks.events import insert_events_hook, inserted_events_hook
+from lighthouse.hooks.streaming import stream_eve_resource_hook
 from lighthouse.validator import LighthouseValidator
 
 scheduler = APScheduler()
@@ -22,6 +23,9 @@ def create_app() -> Eve:
     app.on_inserted_events += inserted_events_hook
     app.on_inserted_cherrypick_test_data += inserted_cherrypick_test_data_hook
 
+    # Fired before Eve handles a request, to stream resources as NDJSON when asked to
+    app.before_request(stream_eve_resource_hook)
+
     # setup logging
     logging.config.dictConfig(app.config["LOGGING"])
 
@@ -29,8 +33,68 @@ def create_app() -> Eve:
         scheduler.init_app(app)
         scheduler.start()
 
+    if app.config.get("CIRCUIT_BREAKERS_ENABLED", False):
+        from lighthouse.classes.circuit_breaker import CircuitBreakers
+
+        app.extensions["circuit_breakers"] = CircuitBreakers(app, app.config)
+
+    from lighthouse.classes.http_clients import HttpClients
+
+    # one pooled client per downstream service, shared by every request to the app
+    app.extensions["http_clients"] = HttpClients(app.config, app.extensions.get("circuit_breakers"))
+
+    from lighthouse.db.dart import DartConnectionPool
+
+    # connections are only opened when DART is first queried
+    app.extensions["dart_connection_pool"] = DartConnectionPool(
+        app.config["DART_SQL_SERVER_CONNECTION_STRING"],
+        max_size=app.config["DART_POOL_MAX_SIZE"],
+        timeout_seconds=app.config["DART_POOL_TIMEOUT_SECONDS"],
+        health_check_seconds=app.config["DART_POOL_HEALTH_CHECK_SECONDS"],
+    )
+
+    from lighthouse.db.mlwh import create_mlwh_engine
+
+    # as for DART, connections are only opened when the MLWH is first queried
+    app.extensions["mlwh_engine"] = create_mlwh_engine(
+        app.config["WAREHOUSES_RO_CONN_STRING"],
+        app.config["MLWH_DB"],
+        pool_size=app.config["MLWH_POOL_SIZE"],
+        pool_timeout_seconds=app.config["MLWH_POOL_TIMEOUT_SECONDS"],
+    )
+
+    from lighthouse.classes.background_jobs import BackgroundJobs
+
+    app.extensions["background_jobs"] = BackgroundJobs(
+        app,
+        max_workers=app.config["BACKGROUND_JOBS_MAX_WORKERS"],
+        max_pending=app.config["BACKGROUND_JOBS_MAX_PENDING"],
+        ttl_seconds=app.config["BACKGROUND_JOBS_TTL_SECONDS"],
+    )
+
     setup_routes(app)
 
+    from lighthouse.cli import setup_cli
+
+    setup_cli(app)
+
+    if app.config.get("MONGO_ENSURE_INDEXES", False):
+        from lighthouse.db.mongo import ensure_indexes
+
+        with app.app_context():
+            ensure_indexes(app.data.driver.db)
+
+    if app.config.get("PLATE_SUMMARIES_WATCH", False):
+        from lighthouse.classes.plate_summaries_watcher import PlateSummariesWatcher
+
+        PlateSummariesWatcher(app).start()
+
+    if app.config.get("PLATE_CACHE_ENABLED", False):
+        from lighthouse.classes.plate_cache import PlateCache, PlateCacheInvalidator
+
+        app.extensions["plate_cache"] = PlateCache(app.config["PLATE_CACHE_MAX_SIZE_BYTES"])
+        PlateCacheInvalidator(app, app.extensions["plate_cache"]).start()
+
     @app.get("/health")
     def _():
         """Confirms the health of Lighthouse by confirming it is responding to requests."""
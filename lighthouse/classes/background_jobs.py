@@ -0,0 +1,325 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from uuid import uuid4
+
+from eve import Eve
+from flask import json
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from lighthouse.constants.fields import FIELD_MONGO_ID
+from lighthouse.types import FlaskResponse
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND_JOBS_COLLECTION = "background_jobs"
+BACKGROUND_JOB_LOCKS_COLLECTION = "background_job_locks"
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_COMPLETED = "completed"
+JOB_STATUS_FAILED = "failed"
+
+# the job being run, as (jobs, job_id), so that its stages can record their progress; a context variable rather than a
+#   thread local so that it can be passed on to the threads a job starts with `contextvars.copy_context`
+_current_job: ContextVar[Optional[Tuple["BackgroundJobs", str]]] = ContextVar("current_job", default=None)
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the pool of workers already has as many jobs as it can hold."""
+
+    pass
+
+
+class BackgroundJobs:
+    """Runs jobs, i.e. the work of a request, in a bounded pool of worker threads so that the request can be answered
+    before the work is done.
+
+    The state of each job is kept in the background_jobs collection so that it can be read from any process: it is
+    queued, then running, then completed with the response of the job (whatever its status code) or failed if the job
+    raised. Jobs are removed by a TTL index once their `expires_at` has passed (see lighthouse/db/mongo.py), which also
+    removes the jobs of a process which stopped before running them.
+
+    At most `max_workers` jobs run at a time, and at most `max_pending` more are queued; beyond that `submit` raises a
+    JobQueueFullError so that the caller can ask the client to try again later instead of queueing work without bound.
+
+    Jobs which should not run more than once at a time, e.g. creating a report, are submitted with `submit_coalesced`:
+    while such a job is queued or running, in any process, a job submitted with the same key is not queued and the id of
+    the job in progress is returned instead.
+    """
+
+    def __init__(self, app: Eve, max_workers: int, max_pending: int, ttl_seconds: int):
+        self._app = app
+        self._ttl = timedelta(seconds=ttl_seconds)
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="background-job")
+
+    def submit(self, job_type: str, job: Callable[..., FlaskResponse], *args: Any, **details: Any) -> str:
+        """Queue a job.
+
+        Arguments:
+            job_type (str): the type of the job, e.g. "plate", which is checked when the job is read.
+            job (Callable[..., FlaskResponse]): the job, run within the app context.
+            *args (Any): the arguments of the job.
+            **details (Any): details of the job stored with it, e.g. the barcode of the plate.
+
+        Raises:
+            JobQueueFullError: if there are already as many jobs as the pool can hold.
+
+        Returns:
+            str: the id of the job.
+        """
+        return self._submit(str(uuid4()), job_type, job, args, details)
+
+    def submit_coalesced(
+        self,
+        job_type: str,
+        key: str,
+        lock_seconds: float,
+        job: Callable[..., FlaskResponse],
+        *args: Any,
+        **details: Any,
+    ) -> Tuple[str, bool]:
+        """Queue a job unless a job with the same key is already queued or running, in which case the id of that job is
+        returned instead.
+
+        The key is held by a lock in the background_job_locks collection, so that the jobs of all the processes are
+        coalesced, until the job completes. A lock left by a process which stopped before completing its job expires
+        after `lock_seconds`.
+
+        Arguments:
+            job_type (str): the type of the job, e.g. "report", which is checked when the job is read.
+            key (str): the key of the job; at most one job with the key is queued or running at a time.
+            lock_seconds (float): how long the job can hold its key, which should be longer than the job takes.
+            job (Callable[..., FlaskResponse]): the job, run within the app context.
+            *args (Any): the arguments of the job.
+            **details (Any): details of the job stored with it.
+
+        Raises:
+            JobQueueFullError: if there are already as many jobs as the pool can hold.
+
+        Returns:
+            Tuple[str, bool]: the id of the job and whether it is a job which was already in progress.
+        """
+        locks = self._locks()
+        now = datetime.now(timezone.utc)
+
+        # the lock of a job whose process stopped before completing it is taken over once it has expired
+        locks.delete_one({FIELD_MONGO_ID: key, "expires_at": {"$lte": now}})
+
+        job_id = str(uuid4())
+        try:
+            locks.insert_one(
+                {
+                    FIELD_MONGO_ID: key,
+                    "job_id": job_id,
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=lock_seconds),
+                }
+            )
+        except DuplicateKeyError:
+            if (lock := locks.find_one({FIELD_MONGO_ID: key})) is None:
+                # the job in progress completed in the meantime
+                return self.submit_coalesced(job_type, key, lock_seconds, job, *args, **details)
+
+            logger.info(f"Coalesced the {job_type} job onto job {lock['job_id']}")
+
+            return lock["job_id"], True
+
+        try:
+            return self._submit(job_id, job_type, job, args, details, lock_key=key), False
+        except BaseException:
+            self._release_lock(key, job_id)
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _submit(
+        self,
+        job_id: str,
+        job_type: str,
+        job: Callable[..., FlaskResponse],
+        args: tuple,
+        details: Dict[str, Any],
+        lock_key: Optional[str] = None,
+    ) -> str:
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFullError(f"Unable to queue the {job_type} job, too many jobs are in progress")
+
+        try:
+            now = datetime.now(timezone.utc)
+
+            self._collection().insert_one(
+                {
+                    FIELD_MONGO_ID: job_id,
+                    "type": job_type,
+                    "status": JOB_STATUS_QUEUED,
+                    "details": details,
+                    "created_at": now,
+                    "expires_at": now + self._ttl,
+                }
+            )
+
+            self._executor.submit(self._run, job_id, job, args, lock_key)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        logger.info(f"Queued {job_type} job {job_id}")
+
+        return job_id
+
+    def _run(self, job_id: str, job: Callable[..., FlaskResponse], args: tuple, lock_key: Optional[str]) -> None:
+        current_job = _current_job.set((self, job_id))
+        try:
+            with self._app.app_context():
+                try:
+                    self._update(job_id, status=JOB_STATUS_RUNNING, started_at=datetime.now(timezone.utc))
+
+                    try:
+                        body, status = job(*args)
+                    except Exception as e:
+                        logger.error(f"Job {job_id} failed")
+                        logger.exception(e)
+
+                        self._update(job_id, status=JOB_STATUS_FAILED, errors=[f"{type(e).__name__}: {e}"])
+                    else:
+                        # stored as JSON as the keys of a response are not necessarily valid mongo field names
+                        self._update(
+                            job_id,
+                            status=JOB_STATUS_COMPLETED,
+                            response_body=json.dumps(body),
+                            response_status=int(status),
+                        )
+                finally:
+                    if lock_key is not None:
+                        self._release_lock(lock_key, job_id)
+        except Exception as e:
+            # the state of the job could not be stored; it will be removed once it expires
+            logger.error(f"Unable to record the state of job {job_id}")
+            logger.exception(e)
+        finally:
+            _current_job.reset(current_job)
+            self._slots.release()
+
+    def _record_progress(self, job_id: str, stage: str, **fields: Any) -> None:
+        try:
+            progress = {f"progress.{stage}.{field}": value for field, value in fields.items()}
+
+            self._collection().update_one({FIELD_MONGO_ID: job_id}, {"$set": progress})
+        except PyMongoError as e:
+            # the progress of a job is only informative, so the job carries on without it
+            logger.warning(f"Unable to record the progress of job {job_id}: {e}")
+
+    def _release_lock(self, key: str, job_id: str) -> None:
+        self._locks().delete_one({FIELD_MONGO_ID: key, "job_id": job_id})
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        if fields["status"] in (JOB_STATUS_COMPLETED, JOB_STATUS_FAILED):
+            fields["completed_at"] = datetime.now(timezone.utc)
+            # keep the result of a job for the TTL from when it completed
+            fields["expires_at"] = fields["completed_at"] + self._ttl
+
+        self._collection().update_one({FIELD_MONGO_ID: job_id}, {"$set": fields})
+
+    def _collection(self) -> Collection:
+        return self._app.data.driver.db[BACKGROUND_JOBS_COLLECTION]
+
+    def _locks(self) -> Collection:
+        return self._app.data.driver.db[BACKGROUND_JOB_LOCKS_COLLECTION]
+
+
+@contextmanager
+def job_stage(stage: str) -> Iterator[None]:
+    """Record the progress of a stage of the job being run under "progress" in the job: running while the block runs,
+    then completed or failed. Outside of a job nothing is recorded.
+
+    Arguments:
+        stage (str): the name of the stage, e.g. "mongo".
+    """
+    if (current := _current_job.get()) is None:
+        yield
+        return
+
+    jobs, job_id = current
+    jobs._record_progress(job_id, stage, status=JOB_STATUS_RUNNING, started_at=datetime.now(timezone.utc))
+    try:
+        yield
+    except BaseException:
+        jobs._record_progress(job_id, stage, status=JOB_STATUS_FAILED, completed_at=datetime.now(timezone.utc))
+        raise
+
+    jobs._record_progress(job_id, stage, status=JOB_STATUS_COMPLETED, completed_at=datetime.now(timezone.utc))
+
+
+def get_background_job(app: Eve, job_id: str, job_type: str) -> Optional[Dict[str, Any]]:
+    """Get the state of a job.
+
+    Arguments:
+        app (Eve): the app.
+        job_id (str): the id of the job.
+        job_type (str): the type of the job; a job of another type is not returned.
+
+    Returns:
+        Optional[Dict[str, Any]]: the job, with the response of a completed job under "response" and
+        "response_status" and the progress of its stages, if any, under "progress"; None if there is no such job.
+    """
+    document = app.data.driver.db[BACKGROUND_JOBS_COLLECTION].find_one({FIELD_MONGO_ID: job_id, "type": job_type})
+    if document is None:
+        return None
+
+    job = {
+        "id": document[FIELD_MONGO_ID],
+        "type": document["type"],
+        "status": document["status"],
+        "details": document.get("details", {}),
+        **{field: document[field] for field in ("created_at", "started_at", "completed_at") if field in document},
+    }
+
+    if "response_body" in document:
+        job["response"] = json.loads(document["response_body"])
+        job["response_status"] = document["response_status"]
+
+    if "progress" in document:
+        job["progress"] = document["progress"]
+
+    if "errors" in document:
+        job["errors"] = document["errors"]
+
+    return job
+
+
+def wait_for_background_job(
+    app: Eve, job_id: str, job_type: str, timeout_seconds: float, poll_interval_seconds: float
+) -> Optional[Dict[str, Any]]:
+    """Wait for a job, which may be run by another process, to complete or fail.
+
+    Arguments:
+        app (Eve): the app.
+        job_id (str): the id of the job.
+        job_type (str): the type of the job.
+        timeout_seconds (float): how long to wait for the job.
+        poll_interval_seconds (float): how often to read the state of the job.
+
+    Returns:
+        Optional[Dict[str, Any]]: the job once it has completed or failed, see `get_background_job`; None if there is no
+        such job or it did not complete in time.
+    """
+    deadline = time.monotonic() + timeout_seconds
+    while (job := get_background_job(app, job_id, job_type)) is not None:
+        if job["status"] in (JOB_STATUS_COMPLETED, JOB_STATUS_FAILED):
+            return job
+
+        if time.monotonic() >= deadline:
+            return None
+
+        time.sleep(poll_interval_seconds)
+
+    return None
@@ -0,0 +1,301 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, Mapping, Optional, Tuple, Type
+
+import requests
+from eve import Eve
+from flask import current_app as app
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from lighthouse.constants.fields import FIELD_MONGO_ID
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_BREAKERS_COLLECTION = "circuit_breakers"
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of calling a downstream service whose circuit breaker is open. It is a ConnectionError so that the
+    callers of a service handle a fast failure as they handle the service being unreachable.
+    """
+
+    pass
+
+
+class CircuitBreaker:
+    """A circuit breaker for a downstream service, shared by every process of Lighthouse through the circuit_breakers
+    collection.
+
+    The circuit is closed while the service works. Once `failure_threshold` consecutive calls have failed, it opens and
+    calls fail fast, without waiting for the service, for `reset_timeout_seconds`. The first call after that is a probe:
+    the circuit is half-open while it runs, failing any other call fast, and is then closed if the probe succeeded or
+    opened again if it failed. A probe which does not complete within `reset_timeout_seconds` is replaced by the next
+    call.
+
+    The state is read from mongo at most every `state_cache_seconds`, so that calls do not each pay for a query. When
+    mongo cannot be reached the circuit is treated as closed: the breaker protects Lighthouse from a failing service, it
+    should not make a working one unavailable.
+    """
+
+    def __init__(
+        self,
+        app: Eve,
+        name: str,
+        failure_threshold: int,
+        reset_timeout_seconds: float,
+        state_cache_seconds: float,
+    ):
+        self._app = app
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.state_cache_seconds = state_cache_seconds
+
+        self._lock = threading.Lock()
+        self._collection_: Optional[Collection] = None
+        self._cached_state: Optional[Dict[str, Any]] = None
+        self._cached_at = 0.0
+
+    def allow_request(self) -> bool:
+        """Whether a call to the service can be made. A call which is allowed must be followed by `record_success` or
+        `record_failure`.
+
+        Returns:
+            bool: False if the circuit is open, or half-open with a probe in progress.
+        """
+        try:
+            state = self._state()
+            now = time.time()
+
+            if state["state"] == CIRCUIT_CLOSED:
+                return True
+
+            if state["state"] == CIRCUIT_OPEN and state["open_until"] > now:
+                return False
+
+            if state["state"] == CIRCUIT_HALF_OPEN and state["probe_until"] > now:
+                return False
+
+            # the circuit has been open long enough, so try to become the probe
+            probe = self._collection().find_one_and_update(
+                {
+                    FIELD_MONGO_ID: self.name,
+                    "$or": [
+                        {"state": CIRCUIT_OPEN, "open_until": {"$lte": now}},
+                        {"state": CIRCUIT_HALF_OPEN, "probe_until": {"$lte": now}},
+                    ],
+                },
+                {"$set": {"state": CIRCUIT_HALF_OPEN, "probe_until": now + self.reset_timeout_seconds}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if probe is None:
+                self._invalidate()
+
+                return False
+
+            logger.info(f"Probing {self.name} as its circuit is half-open")
+            self._cache(probe)
+
+            return True
+        except PyMongoError as e:
+            logger.error(f"Unable to read the circuit breaker state of {self.name}, allowing the call")
+            logger.exception(e)
+
+            return True
+
+    @contextmanager
+    def guard(self, failures: Tuple[Type[BaseException], ...] = (Exception,)) -> Iterator[None]:
+        """Protect a call to the service: fail fast if the circuit does not allow it, otherwise record its outcome.
+
+        Arguments:
+            failures (Tuple[Type[BaseException], ...]): the exceptions which mean that the service failed.
+
+        Raises:
+            CircuitOpenError: if the circuit does not allow the call.
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"The circuit of {self.name} is open, not calling it")
+
+        try:
+            yield
+        except failures:
+            self.record_failure()
+            raise
+
+        self.record_success()
+
+    def record_success(self) -> None:
+        with self._lock:
+            cached = self._cached_state
+
+        # most calls succeed while the circuit is closed, which does not need a write
+        if cached is not None and cached["state"] == CIRCUIT_CLOSED and cached["failures"] == 0:
+            return
+
+        try:
+            state = self._collection().find_one_and_update(
+                {FIELD_MONGO_ID: self.name, "state": {"$in": [CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN]}},
+                {"$set": {"state": CIRCUIT_CLOSED, "failures": 0}},
+            )
+            if state is not None and state["state"] == CIRCUIT_HALF_OPEN:
+                logger.info(f"Closing the circuit of {self.name} after a successful probe")
+
+            self._invalidate()
+        except PyMongoError as e:
+            logger.error(f"Unable to record a successful call to {self.name}")
+            logger.exception(e)
+
+    def record_failure(self) -> None:
+        now = time.time()
+        try:
+            # a failed probe opens the circuit again
+            reopened = self._collection().update_one(
+                {FIELD_MONGO_ID: self.name, "state": CIRCUIT_HALF_OPEN},
+                {"$set": {"state": CIRCUIT_OPEN, "open_until": now + self.reset_timeout_seconds}},
+            )
+            if reopened.modified_count:
+                logger.warning(f"Re-opening the circuit of {self.name} after a failed probe")
+                self._invalidate()
+
+                return
+
+            try:
+                state = self._collection().find_one_and_update(
+                    {FIELD_MONGO_ID: self.name, "state": CIRCUIT_CLOSED},
+                    {"$inc": {"failures": 1}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:
+                # the circuit is open, e.g. opened by another process while this call was failing
+                state = None
+
+            if state is not None and state["failures"] >= self.failure_threshold:
+                # only one of the processes which see the threshold reached opens the circuit
+                opened = self._collection().update_one(
+                    {FIELD_MONGO_ID: self.name, "state": CIRCUIT_CLOSED, "failures": {"$gte": self.failure_threshold}},
+                    {"$set": {"state": CIRCUIT_OPEN, "open_until": now + self.reset_timeout_seconds}},
+                )
+                if opened.modified_count:
+                    logger.warning(f"Opening the circuit of {self.name} after {state['failures']} failed calls")
+
+            self._invalidate()
+        except PyMongoError as e:
+            logger.error(f"Unable to record a failed call to {self.name}")
+            logger.exception(e)
+
+    def state(self) -> Dict[str, Any]:
+        """The current state of the circuit, read from mongo.
+
+        Returns:
+            Dict[str, Any]: the state ("closed", "open" or "half_open"), the number of consecutive failures and, while
+            the circuit is open, the number of seconds until a probe is allowed.
+        """
+        self._invalidate()
+        state = self._state()
+
+        report = {"state": state["state"], "failures": state["failures"]}
+        if state["state"] == CIRCUIT_OPEN:
+            report["retry_in_seconds"] = max(0, round(state["open_until"] - time.time(), 3))
+
+        return report
+
+    def reset(self) -> None:
+        self._collection().update_one(
+            {FIELD_MONGO_ID: self.name},
+            {"$set": {"state": CIRCUIT_CLOSED, "failures": 0}, "$unset": {"open_until": "", "probe_until": ""}},
+        )
+        self._invalidate()
+
+    def _state(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._cached_state is not None and time.monotonic() - self._cached_at < self.state_cache_seconds:
+                return self._cached_state
+
+        state = self._collection().find_one({FIELD_MONGO_ID: self.name})
+        if state is None:
+            state = self._collection().find_one_and_update(
+                {FIELD_MONGO_ID: self.name},
+                {"$setOnInsert": {"state": CIRCUIT_CLOSED, "failures": 0}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+
+        self._cache(state)
+
+        return state
+
+    def _cache(self, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self._cached_state = state
+            self._cached_at = time.monotonic()
+
+    def _invalidate(self) -> None:
+        with self._lock:
+            self._cached_state = None
+
+    def _collection(self) -> Collection:
+        # resolved once within the app context, as calls can be made from threads outside of it
+        if self._collection_ is None:
+            with self._app.app_context():
+                self._collection_ = self._app.data.driver.db[CIRCUIT_BREAKERS_COLLECTION]
+
+        return self._collection_
+
+
+class CircuitBreakers:
+    """The registry of the circuit breakers, one per downstream service in the CIRCUIT_BREAKERS config. The settings of
+    each service override those in CIRCUIT_BREAKER_DEFAULTS.
+    """
+
+    def __init__(self, app: Eve, config: Mapping[str, Any]):
+        defaults = config["CIRCUIT_BREAKER_DEFAULTS"]
+
+        self._breakers: Dict[str, CircuitBreaker] = {
+            name: CircuitBreaker(app, name=name, **{**defaults, **settings})
+            for name, settings in config["CIRCUIT_BREAKERS"].items()
+        }
+
+    def __getitem__(self, name: str) -> CircuitBreaker:
+        return self._breakers[name]
+
+    def get(self, name: str) -> Optional[CircuitBreaker]:
+        return self._breakers.get(name)
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        states = {}
+        for name, breaker in self._breakers.items():
+            try:
+                states[name] = breaker.state()
+            except PyMongoError as e:
+                logger.exception(e)
+                states[name] = {"state": "unknown"}
+
+        return states
+
+
+def circuit_breaker_guard(
+    service: str, failures: Tuple[Type[BaseException], ...] = (Exception,)
+) -> ContextManager[None]:
+    """Protect a call to a service with its circuit breaker, from the registry of the current app; a no-op when circuit
+    breakers are disabled.
+
+    Arguments:
+        service (str): the name of the service, e.g. SERVICE_DART.
+        failures (Tuple[Type[BaseException], ...]): the exceptions which mean that the service failed.
+
+    Returns:
+        ContextManager[None]: the guard of the call.
+    """
+    if (breakers := app.extensions.get("circuit_breakers")) is None or (breaker := breakers.get(service)) is None:
+        return nullcontext()
+
+    return breaker.guard(failures)
@@ -0,0 +1,117 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple, cast
+
+from eve import Eve
+from flask import current_app as app
+
+from lighthouse.constants.fields import (
+    FIELD_COG_BARCODE,
+    FIELD_DART_LH_SAMPLE_UUID,
+    FIELD_LAB_ID,
+    FIELD_LH_SAMPLE_UUID,
+    FIELD_PLATE_BARCODE,
+    FIELD_RESULT,
+    FIELD_RNA_ID,
+    FIELD_ROOT_SAMPLE_ID,
+    FIELD_SOURCE,
+)
+from lighthouse.helpers.dart import DART_SAMPLES_COLUMN_INDEX, row_is_normal_sample, row_to_dict
+from lighthouse.types import SampleDoc
+
+logger = logging.getLogger(__name__)
+
+# the fields of a sample needed to create a cherrypicked plate or to record its failure
+CHERRYPICKED_SAMPLE_PROJECTION = {
+    field: 1
+    for field in (
+        FIELD_LH_SAMPLE_UUID,
+        FIELD_ROOT_SAMPLE_ID,
+        FIELD_RNA_ID,
+        FIELD_LAB_ID,
+        FIELD_RESULT,
+        FIELD_COG_BARCODE,
+        FIELD_PLATE_BARCODE,
+        FIELD_SOURCE,
+    )
+}
+
+LH_SAMPLE_UUID_INDEX = DART_SAMPLES_COLUMN_INDEX[FIELD_DART_LH_SAMPLE_UUID]
+
+
+class DartSamplesJoin:
+    """The rows of a destination plate in DART joined with their samples in mongo.
+
+    The rows are partitioned once into sample rows and control rows. The samples of the sample rows are found with a
+    single `$in` query on their `lh_sample_uuid`, projected to the fields a cherrypicked plate needs, and each row is
+    joined with its sample through a dict keyed on that uuid instead of a scan of the samples.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[Any, ...]]):
+        self.sample_rows: List[Tuple[Any, ...]] = []
+        self.control_rows: List[Tuple[Any, ...]] = []
+        for row in rows:
+            (self.sample_rows if row_is_normal_sample(row) else self.control_rows).append(row)
+
+        self.samples: List[SampleDoc] = []
+        self._samples_by_uuid: Dict[str, SampleDoc] = {}
+
+    def find_samples(self) -> List[SampleDoc]:
+        """Find the samples of the sample rows in the samples collection; no query is made when there are none.
+
+        Returns:
+            List[SampleDoc]: the samples found, projected to CHERRYPICKED_SAMPLE_PROJECTION.
+        """
+        DartSamplesJoin.find_samples_of_joins([self])
+
+        return self.samples
+
+    @staticmethod
+    def find_samples_of_joins(joins: List["DartSamplesJoin"]) -> None:
+        """Find the samples of the sample rows of several joins, e.g. of several destination plates, with a single
+        query; no query is made when there are no sample rows.
+
+        Arguments:
+            joins (List[DartSamplesJoin]): the joins, whose `samples` are set to those found for their rows.
+        """
+        uuids = list({row[LH_SAMPLE_UUID_INDEX] for join in joins for row in join.sample_rows})
+
+        samples_by_uuid: Dict[str, SampleDoc] = {}
+        if uuids:
+            samples_collection = cast(Eve, app).data.driver.db.samples
+
+            samples_by_uuid = {
+                sample[FIELD_LH_SAMPLE_UUID]: sample
+                for sample in samples_collection.find(
+                    {FIELD_LH_SAMPLE_UUID: {"$in": uuids}}, CHERRYPICKED_SAMPLE_PROJECTION
+                )
+            }
+
+        for join in joins:
+            join._samples_by_uuid = {
+                uuid: samples_by_uuid[uuid]
+                for row in join.sample_rows
+                if (uuid := row[LH_SAMPLE_UUID_INDEX]) in samples_by_uuid
+            }
+            join.samples = list(join._samples_by_uuid.values())
+
+        logger.info(f"{len(samples_by_uuid)} samples found for {len(uuids)} DART sample rows")
+
+    def has_matching_sample_numbers(self) -> bool:
+        return len(self.samples) == len(self.sample_rows)
+
+    def sample_for_row(self, row: Tuple[Any, ...]) -> Optional[SampleDoc]:
+        return self._samples_by_uuid.get(row[LH_SAMPLE_UUID_INDEX])
+
+    def joined_samples(self) -> List[Dict[str, Any]]:
+        """The rows joined with their samples, in the format expected by `map_to_ss_columns`.
+
+        Returns:
+            List[Dict[str, Any]]: a {"row": ..., "sample": ...} dict per sample row, with the sample None if it was not
+            found, followed by one per control row, with the sample None.
+        """
+        return [{"row": row_to_dict(row), "sample": self.sample_for_row(row)} for row in self.sample_rows] + [
+            {"row": row_to_dict(row), "sample": None} for row in self.control_rows
+        ]
+
+    def control_rows_as_dicts(self) -> List[Dict[str, Any]]:
+        return [row_to_dict(row) for row in self.control_rows]
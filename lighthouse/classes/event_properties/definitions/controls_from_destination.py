@@ -44,9 +44,9 @@ class ControlsFromDestination(EventPropertyAbstract, MongoServiceMixin):
                 val.append(well)
         return val
 
-    def _mapping_with_controls(self):
+    def _mapping_with_controls(self, controls):
         mapping = {}
-        for control in self._well_controls():
+        for control in controls:
             mapping[control["destination_coordinate"]] = control
         return mapping
 
@@ -55,7 +55,7 @@ class ControlsFromDestination(EventPropertyAbstract, MongoServiceMixin):
         with self.retrieval_scope():
             val = self._well_controls()
             self._is_valid_positive_and_negative_present(val)
-            return self._mapping_with_controls()
+            return self._mapping_with_controls(val)
 
     def add_to_warehouse_message(self, message: WarehouseMessage):
         for control in self.value.values():
@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import requests
+from flask import current_app as app
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from lighthouse.classes.circuit_breaker import CircuitBreaker, CircuitBreakers, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceClient:
+    """A pooled HTTP client for one downstream service.
+
+    Requests share a `requests.Session` so that connections (and their TLS sessions) are kept alive and reused. Every
+    request is given the connect and read timeouts of the service unless the caller passes its own. Connection errors
+    are retried for every method since the request was not sent, while failed responses (e.g. 503) are only retried for
+    idempotent methods, with exponential backoff.
+
+    When the service has a circuit breaker, requests fail fast with a CircuitOpenError while its circuit is open.
+    Connection errors, timeouts and 5xx responses count as failures of the service.
+
+    The latency of every request and the number of failed ones are counted so that they can be reported per service.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connect_timeout: float,
+        read_timeout: float,
+        retries: int,
+        backoff_factor: float,
+        retry_statuses: Tuple[int, ...],
+        pool_maxsize: int,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=retry_statuses,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.server_errors = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+
+        if self.breaker is not None and not self.breaker.allow_request():
+            with self._lock:
+                self.rejected += 1
+
+            raise CircuitOpenError(f"The circuit of {self.name} is open, not calling it")
+
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException as e:
+            self._record(time.perf_counter() - start, failed=True)
+            logger.debug(f"{method} request to {self.name} failed: {e}")
+            raise
+
+        self._record(time.perf_counter() - start, failed=False, server_error=response.status_code >= 500)
+
+        return response
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "server_errors": self.server_errors,
+                "rejected": self.rejected,
+                "total_seconds": round(self.total_seconds, 6),
+                "mean_seconds": round(self.total_seconds / self.requests, 6) if self.requests else 0.0,
+                "max_seconds": round(self.max_seconds, 6),
+            }
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _record(self, seconds: float, failed: bool, server_error: bool = False) -> None:
+        if self.breaker is not None:
+            if failed or server_error:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+        with self._lock:
+            self.requests += 1
+            self.errors += int(failed)
+            self.server_errors += int(server_error)
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+
+class HttpClients:
+    """The registry of the clients of the downstream services, one per service in the HTTP_CLIENTS config. The settings
+    of each service override those in HTTP_CLIENT_DEFAULTS, and each client uses the circuit breaker of its service if
+    there is one.
+    """
+
+    def __init__(self, config: Mapping[str, Any], circuit_breakers: Optional[CircuitBreakers] = None):
+        defaults = config["HTTP_CLIENT_DEFAULTS"]
+
+        self._clients: Dict[str, ServiceClient] = {
+            name: ServiceClient(
+                name=name,
+                breaker=circuit_breakers.get(name) if circuit_breakers is not None else None,
+                **{**defaults, **settings},
+            )
+            for name, settings in config["HTTP_CLIENTS"].items()
+        }
+
+    def __getitem__(self, name: str) -> ServiceClient:
+        return self._clients[name]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: client.stats() for name, client in self._clients.items()}
+
+    def close(self) -> None:
+        for client in self._clients.values():
+            client.close()
+
+
+def http_client(service: str) -> ServiceClient:
+    """The client of a downstream service, from the registry of the current app.
+
+    Arguments:
+        service (str): the name of the service, e.g. HTTP_SERVICE_SEQUENCESCAPE.
+
+    Returns:
+        ServiceClient: the pooled client of the service.
+    """
+    return app.extensions["http_clients"][service]
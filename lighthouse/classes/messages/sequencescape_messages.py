@@ -4,7 +4,8 @@ from typing import Dict
 import requests
 from flask import current_app as app
 
-from lighthouse.constants.config import SS_UUID_PLATE_PURPOSE, SS_UUID_STUDY
+from lighthouse.classes.http_clients import http_client
+from lighthouse.constants.config import HTTP_SERVICE_SEQUENCESCAPE, SS_UUID_PLATE_PURPOSE, SS_UUID_STUDY
 from lighthouse.messages.message import Message
 
 logger = logging.getLogger(__name__)
@@ -72,7 +73,7 @@ class SequencescapeMessage(Message):
         logger.info(f"Sending request to: {ss_url}")
 
         try:
-            response = requests.post(ss_url, data=data, headers=headers)
+            response = http_client(HTTP_SERVICE_SEQUENCESCAPE).post(ss_url, data=data, headers=headers)
 
             logger.debug(f"Response status code: {response.status_code}")
 
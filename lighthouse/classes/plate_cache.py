@@ -0,0 +1,283 @@
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from eve import Eve
+from pymongo.errors import PyMongoError
+
+from lighthouse.helpers.plate_summaries import PLATE_SUMMARIES_COLLECTION, plate_barcodes_for_change
+
+logger = logging.getLogger(__name__)
+
+
+class PlateCache:
+    """An in-process LRU cache of formatted plate lookups, keyed on the plate barcode and a variant describing the
+    lookup (plate type and fields rendered). The cache is bounded by the approximate memory used by the cached plates.
+
+    The cache is only used while it is active, i.e. while a PlateCacheInvalidator is listening for changes to the
+    plates; it is emptied whenever it is (de)activated so that no change can be missed.
+
+    A plate is computed outside of the cache's lock so a change may be invalidated while the plate is being computed.
+    To avoid caching stale plates, take the generation of the cache before computing a plate and pass it to `put`: the
+    plate is not stored if it has been invalidated since.
+    """
+
+    # once this many barcodes have been invalidated, forget them and treat every plate being computed as invalidated
+    MAX_INVALIDATED_BARCODES = 10000
+
+    def __init__(self, max_size_bytes: int):
+        self.max_size_bytes = max_size_bytes
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Tuple[str, Hashable], Tuple[Any, int]] = OrderedDict()
+        self._variants: Dict[str, Set[Hashable]] = {}
+        self._size_bytes = 0
+        self._active = False
+
+        # generations used to detect plates invalidated while they were computed
+        self._generation = 0
+        self._floor_generation = 0
+        self._invalidated_at: Dict[str, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    def activate(self) -> None:
+        with self._lock:
+            self._clear()
+            self._active = True
+
+    def deactivate(self) -> None:
+        with self._lock:
+            self._active = False
+            self._clear()
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def get(self, barcode: str, variant: Hashable) -> Optional[Any]:
+        with self._lock:
+            if (entry := self._entries.get((barcode, variant))) is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end((barcode, variant))
+            self.hits += 1
+
+            return entry[0]
+
+    def put(self, barcode: str, variant: Hashable, plate: Any, generation: int) -> bool:
+        """Store a plate unless it has been invalidated since `generation` was taken.
+
+        Arguments:
+            barcode (str): the barcode of the plate.
+            variant (Hashable): the variant of the lookup.
+            plate (Any): the formatted plate.
+            generation (int): the generation of the cache taken before the plate was computed.
+
+        Returns:
+            bool: whether the plate was stored.
+        """
+        size = deep_sizeof(plate)
+
+        with self._lock:
+            if (
+                not self._active
+                or generation < self._floor_generation
+                or self._invalidated_at.get(barcode, -1) > generation
+                or size > self.max_size_bytes
+            ):
+                return False
+
+            key = (barcode, variant)
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (plate, size)
+            self._variants.setdefault(barcode, set()).add(variant)
+            self._size_bytes += size
+
+            while self._size_bytes > self.max_size_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+            return True
+
+    def invalidate(self, barcodes: Iterable[str]) -> None:
+        with self._lock:
+            self._generation += 1
+
+            for barcode in barcodes:
+                self._invalidated_at[barcode] = self._generation
+                for variant in self._variants.get(barcode, set()).copy():
+                    self._remove((barcode, variant))
+                    self.invalidations += 1
+
+            if len(self._invalidated_at) > self.MAX_INVALIDATED_BARCODES:
+                self._floor_generation = self._generation
+                self._invalidated_at = {}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self._active,
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+                "max_size_bytes": self.max_size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _clear(self) -> None:
+        self.invalidations += len(self._entries)
+
+        self._entries.clear()
+        self._variants = {}
+        self._size_bytes = 0
+
+        self._generation += 1
+        self._floor_generation = self._generation
+        self._invalidated_at = {}
+
+    def _remove(self, key: Tuple[str, Hashable]) -> None:
+        _, size = self._entries.pop(key)
+        self._size_bytes -= size
+
+        barcode, variant = key
+        self._variants[barcode].discard(variant)
+        if not self._variants[barcode]:
+            del self._variants[barcode]
+
+
+class PlateCacheInvalidator:
+    """Keeps a PlateCache consistent with the database by listening to a change stream on the collections plates are
+    formatted from, and invalidating every plate touched by a change. The cache is active only while the stream is open.
+
+    Changes which cannot be traced to plates, e.g. deletes without a pre-image or dropped collections, empty the cache.
+    """
+
+    WATCHED_COLLECTIONS = ("samples", "priority_samples", "source_plates", PLATE_SUMMARIES_COLLECTION)
+
+    # operations which change a collection as a whole
+    COLLECTION_OPERATION_TYPES = ("drop", "dropDatabase", "rename", "invalidate")
+
+    # how long to wait for a change before checking whether the invalidator has been stopped
+    MAX_AWAIT_TIME_MS = 1000
+    # how long to wait before re-opening the stream after an error
+    RETRY_INTERVAL_SECONDS = 5
+
+    def __init__(self, app: Eve, cache: PlateCache):
+        self._app = app
+        self._cache = cache
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        logger.info("Starting the plate cache invalidator")
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="plate-cache-invalidator", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        logger.info("Stopping the plate cache invalidator")
+
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        with self._app.app_context():
+            while not self._stop_event.is_set():
+                try:
+                    self._watch()
+                except PyMongoError as e:
+                    logger.error("The plate cache change stream failed, re-opening it")
+                    logger.exception(e)
+
+                    self._stop_event.wait(self.RETRY_INTERVAL_SECONDS)
+                finally:
+                    self._cache.deactivate()
+
+    def _watch(self) -> None:
+        db = self._app.data.driver.db
+
+        with db.watch(
+            pipeline=[{"$match": {"ns.coll": {"$in": list(self.WATCHED_COLLECTIONS)}}}],
+            full_document="updateLookup",
+            full_document_before_change="whenAvailable",
+            max_await_time_ms=self.MAX_AWAIT_TIME_MS,
+        ) as stream:
+            # changes made before the stream was opened are not seen, so start from an empty cache
+            self._cache.activate()
+
+            while stream.alive and not self._stop_event.is_set():
+                if (change := stream.try_next()) is None:
+                    continue
+
+                if (barcodes := plate_barcodes_for_cache_change(change)) is None:
+                    logger.debug(f"Clearing the plate cache after a '{change.get('operationType')}' change")
+                    self._cache.clear()
+                elif barcodes:
+                    self._cache.invalidate(barcodes)
+
+
+def plate_barcodes_for_cache_change(change: Dict[str, Any]) -> Optional[Set[str]]:
+    """Determine which cached plates are affected by a change event.
+
+    Arguments:
+        change (Dict[str, Any]): a change event from the stream opened by PlateCacheInvalidator.
+
+    Returns:
+        Optional[Set[str]]: the barcodes of the affected plates, or None when they cannot be determined and the whole
+        cache needs to be cleared.
+    """
+    operation_type = change.get("operationType")
+
+    if operation_type in PlateCacheInvalidator.COLLECTION_OPERATION_TYPES:
+        return None
+
+    if change.get("ns", {}).get("coll") == PLATE_SUMMARIES_COLLECTION:
+        return {change["documentKey"]["_id"]} if "documentKey" in change else None
+
+    # without a pre-image, the plate a document belonged to is unknown when it is deleted or when the field linking it
+    #   to its plate is updated
+    if change.get("fullDocumentBeforeChange") is None:
+        if operation_type == "delete":
+            return None
+
+        updated_fields = change.get("updateDescription", {}).get("updatedFields", {})
+        if any(field in updated_fields for field in ("plate_barcode", "barcode", "sample_id")):
+            return None
+
+    return plate_barcodes_for_change(change)
+
+
+def deep_sizeof(value: Any) -> int:
+    """Approximate the memory used by a value and everything it contains."""
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(key) + deep_sizeof(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(deep_sizeof(item) for item in value)
+
+    return size
@@ -0,0 +1,76 @@
+import re
+from typing import Any, Dict, Optional, Tuple
+
+
+class PlateLayout:
+    """The geometry of a plate: its rows and columns and the coordinates of its wells.
+
+    The coordinates of every well are precomputed, padded (e.g. "A01") and unpadded (e.g. "A1"), together with lookup
+    tables from either form to the index of the well, so that converting or validating a coordinate is a dict lookup.
+    Wells are indexed row by row, i.e. A1 is 0, A2 is 1, ..., B1 is the number of columns.
+    """
+
+    def __init__(self, rows: int, columns: int):
+        self.rows = rows
+        self.columns = columns
+        self.size = rows * columns
+
+        row_names = [chr(ord("A") + row) for row in range(rows)]
+        column_width = len(str(columns))
+
+        self.padded_coordinates: Tuple[str, ...] = tuple(
+            f"{row_name}{column:0{column_width}d}" for row_name in row_names for column in range(1, columns + 1)
+        )
+        self.unpadded_coordinates: Tuple[str, ...] = tuple(
+            f"{row_name}{column}" for row_name in row_names for column in range(1, columns + 1)
+        )
+
+        self.index_by_coordinate: Dict[str, int] = {
+            **{coordinate: index for index, coordinate in enumerate(self.padded_coordinates)},
+            **{coordinate: index for index, coordinate in enumerate(self.unpadded_coordinates)},
+        }
+        self.unpadded_by_coordinate: Dict[str, str] = {
+            coordinate: self.unpadded_coordinates[index] for coordinate, index in self.index_by_coordinate.items()
+        }
+        self.padded_by_coordinate: Dict[str, str] = {
+            coordinate: self.padded_coordinates[index] for coordinate, index in self.index_by_coordinate.items()
+        }
+
+    def __repr__(self) -> str:
+        return f"PlateLayout(rows={self.rows}, columns={self.columns})"
+
+    def index(self, coordinate: str) -> Optional[int]:
+        """The index of the well with the given coordinate, padded or not; None if the plate has no such well."""
+        return self.index_by_coordinate.get(coordinate)
+
+    def unpad(self, coordinate: str) -> Optional[str]:
+        """The unpadded form of a coordinate, e.g. "A01" => "A1"; None if the plate has no such well."""
+        return self.unpadded_by_coordinate.get(coordinate)
+
+    def pad(self, coordinate: str) -> Optional[str]:
+        """The padded form of a coordinate, e.g. "A1" => "A01"; None if the plate has no such well."""
+        return self.padded_by_coordinate.get(coordinate)
+
+
+PLATE_LAYOUT_96 = PlateLayout(rows=8, columns=12)
+PLATE_LAYOUT_384 = PlateLayout(rows=16, columns=24)
+
+# the coordinates of a 96 well plate are also coordinates of a 384 well plate and have the same padded and unpadded
+#   forms, so the 384 well tables can convert the coordinates of either
+UNPADDED_COORDINATES: Dict[str, str] = PLATE_LAYOUT_384.unpadded_by_coordinate
+
+UNPAD_PATTERN = re.compile(r"0(\d+)$")
+
+
+def unpad_coordinate(coordinate: Any) -> Any:
+    """Strip any leading zeros from the column of a coordinate, e.g. A01 => A1. Coordinates of 96 and 384 well plates
+    are looked up in a precomputed table; anything else which is a string falls back to a regex and anything which is
+    not a string is returned as it is.
+    """
+    if not isinstance(coordinate, str):
+        return coordinate
+
+    if (unpadded := UNPADDED_COORDINATES.get(coordinate)) is not None:
+        return unpadded
+
+    return UNPAD_PATTERN.sub(r"\1", coordinate) if coordinate else coordinate
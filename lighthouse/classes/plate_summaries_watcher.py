@@ -0,0 +1,113 @@
+import logging
+import threading
+from typing import Any, Dict, Optional, Set
+
+from eve import Eve
+from pymongo.errors import PyMongoError
+
+from lighthouse.classes.plate_cache import plate_barcodes_for_cache_change
+from lighthouse.constants.fields import FIELD_MONGO_ID
+from lighthouse.helpers.plate_summaries import rebuild_plate_summaries, refresh_plate_summaries
+
+logger = logging.getLogger(__name__)
+
+
+class PlateSummariesWatcher:
+    """Keeps the plate_summaries collection up to date by listening to a change stream on the samples and
+    priority_samples collections and refreshing the summary of every plate touched by a change.
+
+    The resume token of the stream is stored after each batch of changes is processed so that the watcher carries on
+    where it left off after a restart. If the token is no longer in the oplog the summaries need to be rebuilt with
+    `flask plate-summaries rebuild`.
+
+    Changes which cannot be traced to plates, e.g. deletes without a pre-image or dropped collections, rebuild all the
+    summaries. Pre-images are enabled on the watched collections by `flask mongo ensure-indexes`.
+    """
+
+    WATCHED_COLLECTIONS = ("samples", "priority_samples")
+    RESUME_TOKENS_COLLECTION = "change_stream_resume_tokens"
+    RESUME_TOKEN_ID = "plate_summaries"
+
+    # the maximum number of plates to collect from the stream before refreshing their summaries
+    MAX_BATCH_SIZE = 100
+    # how long to wait for a change before refreshing the plates collected so far
+    MAX_AWAIT_TIME_MS = 1000
+    # how long to wait before re-opening the stream after an error
+    RETRY_INTERVAL_SECONDS = 5
+
+    def __init__(self, app: Eve):
+        self._app = app
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        logger.info("Starting the plate summaries change stream watcher")
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="plate-summaries-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        logger.info("Stopping the plate summaries change stream watcher")
+
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        with self._app.app_context():
+            while not self._stop_event.is_set():
+                try:
+                    self._watch()
+                except PyMongoError as e:
+                    logger.error("The plate summaries change stream failed, re-opening it")
+                    logger.exception(e)
+
+                    self._stop_event.wait(self.RETRY_INTERVAL_SECONDS)
+
+    def _watch(self) -> None:
+        db = self._app.data.driver.db
+
+        with db.watch(
+            pipeline=[{"$match": {"ns.coll": {"$in": list(self.WATCHED_COLLECTIONS)}}}],
+            full_document="updateLookup",
+            full_document_before_change="whenAvailable",
+            resume_after=self._load_resume_token(),
+            max_await_time_ms=self.MAX_AWAIT_TIME_MS,
+        ) as stream:
+            saved_token = None
+            while stream.alive and not self._stop_event.is_set():
+                barcodes: Set[str] = set()
+                rebuild = False
+
+                while len(barcodes) < self.MAX_BATCH_SIZE and (change := stream.try_next()) is not None:
+                    if (change_barcodes := plate_barcodes_for_cache_change(change)) is None:
+                        logger.warning(f"Rebuilding the plate summaries after a '{change.get('operationType')}' change")
+                        rebuild = True
+                    else:
+                        barcodes |= change_barcodes
+
+                if rebuild:
+                    rebuild_plate_summaries()
+                elif barcodes:
+                    refresh_plate_summaries(barcodes)
+
+                if stream.resume_token is not None and stream.resume_token != saved_token:
+                    self._save_resume_token(stream.resume_token)
+                    saved_token = stream.resume_token
+
+    def _load_resume_token(self) -> Optional[Dict[str, Any]]:
+        resume_tokens = self._app.data.driver.db[self.RESUME_TOKENS_COLLECTION]
+
+        if (document := resume_tokens.find_one({FIELD_MONGO_ID: self.RESUME_TOKEN_ID})) is not None:
+            return document.get("token")
+
+        return None
+
+    def _save_resume_token(self, token: Dict[str, Any]) -> None:
+        resume_tokens = self._app.data.driver.db[self.RESUME_TOKENS_COLLECTION]
+
+        resume_tokens.replace_one({FIELD_MONGO_ID: self.RESUME_TOKEN_ID}, {"token": token}, upsert=True)
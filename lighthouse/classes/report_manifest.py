@@ -0,0 +1,145 @@
+import fcntl
+import json
+import logging
+import os
+import pathlib
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List
+
+from openpyxl import load_workbook
+
+logger = logging.getLogger(__name__)
+
+REPORT_MANIFEST = "reports_manifest.json"
+
+# the reports listed, by their naming convention
+REPORT_FILENAME_PATTERN = re.compile(r"^\d{6}_\d{4}_(positives|fit_to_pick)_with_locations.xlsx$")
+
+
+class ReportManifest:
+    """The details of the reports in REPORTS_DIR (size, when each was created and the number of rows of each sheet),
+    kept in a JSON file next to them so that the reports can be listed without reading the directory and every file.
+
+    The manifest is updated by `create_report` and `delete_reports`, holding a lock on the manifest so that the updates
+    of several processes are not lost, and replaced in one step so that it can be read without the lock. Reports added
+    or removed by other means are picked up by `reconcile`, e.g. with `flask reports reconcile-manifest`, and a missing
+    manifest is rebuilt from the reports in the directory before it is read or updated.
+    """
+
+    def __init__(self, directory: pathlib.Path):
+        self.directory = directory
+
+    def reports(self) -> List[Dict[str, Any]]:
+        """The reports, newest first.
+
+        Returns:
+            List[Dict[str, Any]]: the filename, size in bytes, creation time (ISO format) and rows of each sheet of each
+            report.
+        """
+        try:
+            manifest = self._read()
+        except FileNotFoundError:
+            self.reconcile()
+
+            manifest = self._read()
+
+        reports = [{"filename": filename, **report} for filename, report in manifest.items()]
+
+        return sorted(reports, key=lambda report: (report["created_at"], report["filename"]), reverse=True)
+
+    def add(self, report_path: pathlib.PurePath, rows: Dict[str, int]) -> None:
+        """Add a report which has just been written.
+
+        Arguments:
+            report_path (pathlib.PurePath): the path of the report.
+            rows (Dict[str, int]): the number of rows written to each sheet of the report.
+        """
+        with self._update() as reports:
+            reports[os.path.basename(report_path)] = {**self._stat(report_path), "rows": rows}
+
+    def remove(self, filenames: Iterable[str]) -> None:
+        """Remove reports which have been deleted."""
+        with self._update() as reports:
+            for filename in filenames:
+                reports.pop(filename, None)
+
+    def reconcile(self) -> int:
+        """Rebuild the manifest from the reports in the directory. The rows of a report already in the manifest are
+        kept if its size has not changed; those of the other reports are counted from their workbook.
+
+        Returns:
+            int: the number of reports in the manifest.
+        """
+        with self._update() as reports:
+            self._reconcile(reports)
+
+            return len(reports)
+
+    @contextmanager
+    def _update(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        path = self.directory.joinpath(REPORT_MANIFEST)
+        with open(f"{path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            try:
+                reports = self._read()
+            except FileNotFoundError:
+                logger.info(f"The report manifest {path} does not exist, rebuilding it from the reports on disk")
+
+                reports = {}
+                self._reconcile(reports)
+
+            yield reports
+
+            with open(f"{path}.tmp", "w") as manifest_file:
+                json.dump(reports, manifest_file, indent=2)
+
+            os.replace(f"{path}.tmp", path)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        with open(self.directory.joinpath(REPORT_MANIFEST)) as manifest_file:
+            return json.load(manifest_file)
+
+    def _reconcile(self, reports: Dict[str, Dict[str, Any]]) -> None:
+        filenames = sorted(filter(REPORT_FILENAME_PATTERN.match, os.listdir(self.directory)))
+
+        for filename in set(reports) - set(filenames):
+            logger.info(f"Removing {filename} from the report manifest, it is no longer on disk")
+
+            reports.pop(filename)
+
+        for filename in filenames:
+            report_path = self.directory.joinpath(filename)
+            stat = self._stat(report_path)
+
+            if (known := reports.get(filename)) is not None and known["size"] == stat["size"]:
+                continue
+
+            logger.info(f"Adding {filename} to the report manifest")
+
+            reports[filename] = {**stat, "rows": _count_rows(report_path)}
+
+    @staticmethod
+    def _stat(report_path: pathlib.PurePath) -> Dict[str, Any]:
+        stat = os.stat(report_path)
+
+        return {"size": stat.st_size, "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat()}
+
+
+def _count_rows(report_path: pathlib.PurePath) -> Dict[str, int]:
+    try:
+        workbook = load_workbook(report_path, read_only=True)
+    except Exception as e:
+        logger.warning(f"Unable to count the rows of {report_path}: {e}")
+
+        return {}
+
+    try:
+        # the first row of each sheet is its header
+        return {sheet.title: max(sum(1 for _ in sheet.iter_rows(values_only=True)) - 1, 0) for sheet in workbook}
+    finally:
+        workbook.close()
@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import pathlib
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+from uuid import uuid4
+
+import pandas as pd
+from pandas import DataFrame
+from pymongo.database import Database
+
+from lighthouse.constants.fields import FIELD_DATE_TESTED, FIELD_FILTERED_POSITIVE, FIELD_MONGO_ID, FIELD_SAMPLE_ID
+from lighthouse.helpers.reports import concat_report_frames
+
+logger = logging.getLogger(__name__)
+
+REPORT_PARTITIONS_DIR = "partitions"
+REPORT_PARTITIONS_MANIFEST = "manifest.json"
+# the partitions written by another version hold other columns, and are all computed again
+REPORT_PARTITIONS_VERSION = 2
+
+# set on the samples by crawler when they are imported or updated, and on the priority samples by Eve
+FIELD_SAMPLE_UPDATED_AT = "updated_at"
+FIELD_EVE_UPDATED = "_updated"
+
+
+class ReportPartitions:
+    """The fit to pick samples of the report, as read from mongo, partitioned by the day the samples were tested, each
+    partition kept as a pickled DataFrame in a directory under REPORTS_DIR. Only columns derived from mongo are kept:
+    the locations and cherrypicked status of the samples change outside of mongo, so they are joined on every run.
+
+    A run of the report only recomputes the partitions which are missing, which were touched since the last run (see
+    `find_touched_test_dates`), which no longer hold as many samples as mongo has for their day (see
+    `count_samples_by_test_date`), e.g. as samples were deleted or tested on another day, or which are older than
+    `max_age_seconds`. The manifest records when each partition was computed, its number of rows and when the last run
+    started.
+    """
+
+    def __init__(self, directory: pathlib.Path, max_age_seconds: float):
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+
+        self._manifest = self._read_manifest()
+
+    @property
+    def last_run_at(self) -> Optional[datetime]:
+        last_run_at = self._manifest.get("last_run_at")
+
+        return datetime.fromisoformat(last_run_at) if last_run_at else None
+
+    def dates_to_compute(self, window: List[date], touched: Set[date], full: bool = False) -> List[date]:
+        """The days of the report window whose partitions need to be computed.
+
+        Arguments:
+            window (List[date]): the days of the report window.
+            touched (Set[date]): the days with samples changed since the last run.
+            full (bool): recompute all the partitions of the window.
+
+        Returns:
+            List[date]: the days, in the order of the window.
+        """
+        now = datetime.now(tz=timezone.utc)
+
+        return [day for day in window if full or day in touched or self._is_stale(day, now)]
+
+    def dates_with_other_counts(self, window: List[date], counts: Dict[date, int]) -> Set[date]:
+        """The days of the report window whose partitions do not hold as many samples as mongo has for the day. Samples
+        which were deleted, or whose test date changed, leave no trace on the day they were in but change its count.
+
+        Arguments:
+            window (List[date]): the days of the report window.
+            counts (Dict[date, int]): the number of fit to pick samples of each day in mongo, see
+            `count_samples_by_test_date`.
+
+        Returns:
+            Set[date]: the days with a partition and another count.
+        """
+        return {
+            day
+            for day in window
+            if (partition := self._manifest["partitions"].get(day.isoformat())) is not None
+            and partition["rows"] != counts.get(day, 0)
+        }
+
+    def write(self, report: DataFrame, days: Iterable[date], computed_at: datetime) -> None:
+        """Write the partitions of the given days from the samples read for those days. A day without any samples has
+        an empty partition, so that it is not computed again until it is touched.
+
+        Arguments:
+            report (DataFrame): the samples of the days.
+            days (Iterable[date]): the days which were computed.
+            computed_at (datetime): when the computation started.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        by_day = {day.date(): partition for day, partition in report.groupby(report[FIELD_DATE_TESTED].dt.normalize())}
+
+        for day in days:
+            partition = by_day.get(day, report.iloc[0:0])
+            # the categories of the whole report would otherwise be stored with each partition
+            partition = partition.assign(
+                **{
+                    column: partition[column].cat.remove_unused_categories()
+                    for column in partition.columns
+                    if isinstance(partition[column].dtype, pd.CategoricalDtype)
+                }
+            )
+
+            path = self._path(day)
+            # written to a file of its own, as a full run and an incremental run can write the same partition, then
+            # replaced in one step so that a run reading the partition never sees it half written
+            partition.to_pickle(tmp_path := f"{path}.{uuid4().hex}.tmp")
+            os.replace(tmp_path, path)
+
+            self._manifest["partitions"][day.isoformat()] = {
+                "computed_at": computed_at.isoformat(),
+                "rows": len(partition.index),
+            }
+
+    def read(self, days: Iterable[date]) -> DataFrame:
+        """The samples of the report, from the partitions of the given days.
+
+        Arguments:
+            days (Iterable[date]): the days of the report window, which must all have been computed.
+
+        Returns:
+            DataFrame: the rows of the partitions, in the order of the days.
+        """
+        frames = [pd.read_pickle(self._path(day)) for day in days]
+
+        return concat_report_frames(frames)
+
+    def drop_before(self, first_day: date) -> None:
+        """Remove the partitions of the days which have left the report window."""
+        for day in [day for day in self._manifest["partitions"] if date.fromisoformat(day) < first_day]:
+            logger.debug(f"Removing the report partition of {day}")
+
+            self._manifest["partitions"].pop(day)
+            self._path(date.fromisoformat(day)).unlink(missing_ok=True)
+
+    def save(self, run_started_at: datetime) -> None:
+        """Record the run in the manifest; the next run looks for samples changed since it started."""
+        self._manifest["last_run_at"] = run_started_at.isoformat()
+
+        path = self.directory.joinpath(REPORT_PARTITIONS_MANIFEST)
+        with open(tmp_path := f"{path}.{uuid4().hex}.tmp", "w") as manifest_file:
+            json.dump(self._manifest, manifest_file, indent=2)
+
+        os.replace(tmp_path, path)
+
+    def _is_stale(self, day: date, now: datetime) -> bool:
+        if (partition := self._manifest["partitions"].get(day.isoformat())) is None or not self._path(day).exists():
+            return True
+
+        return now - datetime.fromisoformat(partition["computed_at"]) > timedelta(seconds=self.max_age_seconds)
+
+    def _path(self, day: date) -> pathlib.Path:
+        return self.directory.joinpath(f"{day.isoformat()}.pkl")
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.directory.joinpath(REPORT_PARTITIONS_MANIFEST)) as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError):
+            # without a manifest every partition is computed again
+            manifest = {}
+
+        if manifest.get("version") != REPORT_PARTITIONS_VERSION:
+            manifest = {"version": REPORT_PARTITIONS_VERSION}
+
+        manifest.setdefault("partitions", {})
+
+        return manifest
+
+
+def find_touched_test_dates(db: Database, since: datetime, window_start: datetime) -> Set[date]:
+    """Find the days of the report window with samples which changed since a run, either themselves or through their
+    priority sample.
+
+    Arguments:
+        db (Database): the mongo database.
+        since (datetime): when the run started.
+        window_start (datetime): the start of the report window.
+
+    Returns:
+        Set[date]: the days the changed samples were tested.
+    """
+    in_window = {FIELD_DATE_TESTED: {"$type": "date", "$gte": window_start}}
+
+    changed_sample_ids = [
+        priority_sample[FIELD_SAMPLE_ID]
+        for priority_sample in db.priority_samples.find({FIELD_EVE_UPDATED: {"$gte": since}}, {FIELD_SAMPLE_ID: 1})
+        if FIELD_SAMPLE_ID in priority_sample
+    ]
+
+    queries = [{FIELD_SAMPLE_UPDATED_AT: {"$gte": since}, **in_window}]
+    if changed_sample_ids:
+        queries.append({FIELD_MONGO_ID: {"$in": changed_sample_ids}, **in_window})
+
+    # the distinct days the samples were tested
+    group_by_day = {
+        "$group": {FIELD_MONGO_ID: {"$dateToString": {"format": "%Y-%m-%d", "date": f"${FIELD_DATE_TESTED}"}}}
+    }
+
+    touched = set()
+    for query in queries:
+        for day in db.samples.aggregate([{"$match": query}, group_by_day]):
+            touched.add(date.fromisoformat(day[FIELD_MONGO_ID]))
+
+    logger.info(f"{len(touched)} days of the report window with samples changed since {since.isoformat()}")
+
+    return touched
+
+
+def count_samples_by_test_date(db: Database, window_start: datetime) -> Dict[date, int]:
+    """Count the fit to pick samples of each day of the report window, i.e. the rows the partition of each day would
+    have if computed now. The samples are matched as the report reads them, so that the count is answered from the
+    filtered positive and date tested index.
+
+    Arguments:
+        db (Database): the mongo database.
+        window_start (datetime): the start of the report window.
+
+    Returns:
+        Dict[date, int]: the number of samples of each day with any.
+    """
+    pipeline = [
+        {"$match": {FIELD_FILTERED_POSITIVE: True, FIELD_DATE_TESTED: {"$type": "date", "$gte": window_start}}},
+        {
+            "$group": {
+                FIELD_MONGO_ID: {"$dateToString": {"format": "%Y-%m-%d", "date": f"${FIELD_DATE_TESTED}"}},
+                "count": {"$sum": 1},
+            }
+        },
+    ]
+
+    return {date.fromisoformat(day[FIELD_MONGO_ID]): day["count"] for day in db.samples.aggregate(pipeline)}
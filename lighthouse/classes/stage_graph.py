@@ -0,0 +1,103 @@
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Tuple, cast
+
+from eve import Eve
+from flask import current_app as app
+
+from lighthouse.classes.background_jobs import job_stage
+
+logger = logging.getLogger(__name__)
+
+
+class StageGraph:
+    """A small graph of stages, e.g. the sources of a report, which are run in a pool of threads as soon as the stages
+    they depend on have completed, so that independent stages, typically queries of different services, run
+    concurrently and the graph takes as long as its slowest chain of stages rather than the sum of all of them.
+
+    Each stage runs within the app context and is given the results of the stages it depends on, in the order they are
+    listed. The wall time of each stage is logged and kept in `timings`, and when the graph is run by a background job
+    the progress of each stage is recorded in the job (see `job_stage`). If a stage raises, no further stage is started
+    and the exception is raised by `run` once the stages already running have completed.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timings: Dict[str, float] = {}
+
+        self._stages: Dict[str, Tuple[Callable[..., Any], Tuple[str, ...]]] = {}
+
+    def add(self, name: str, stage: Callable[..., Any], depends_on: Iterable[str] = ()) -> None:
+        """Add a stage to the graph.
+
+        Arguments:
+            name (str): the name of the stage, which its result is returned under.
+            stage (Callable[..., Any]): the stage, called with the results of the stages it depends on.
+            depends_on (Iterable[str]): the names of the stages it depends on, which must already have been added.
+
+        Raises:
+            ValueError: if there is already a stage with the name or a stage it depends on has not been added.
+        """
+        depends_on = tuple(depends_on)
+
+        if name in self._stages:
+            raise ValueError(f"The {self.name} stage {name} has already been added")
+
+        if missing := [dependency for dependency in depends_on if dependency not in self._stages]:
+            raise ValueError(f"The {self.name} stage {name} depends on stages which have not been added: {missing}")
+
+        self._stages[name] = (stage, depends_on)
+
+    def run(self) -> Dict[str, Any]:
+        """Run the stages, each once those it depends on have completed.
+
+        Returns:
+            Dict[str, Any]: the result of each stage, by name.
+        """
+        flask_app = cast(Eve, app)._get_current_object()  # type: ignore
+
+        started_at = time.perf_counter()
+        results: Dict[str, Any] = {}
+        pending = dict(self._stages)
+
+        with ThreadPoolExecutor(max_workers=max(len(pending), 1), thread_name_prefix=f"{self.name}-stage") as executor:
+            running: Dict[Future, str] = {}
+
+            def submit_ready_stages() -> None:
+                for name, (stage, depends_on) in list(pending.items()):
+                    if all(dependency in results for dependency in depends_on):
+                        del pending[name]
+
+                        arguments = [results[dependency] for dependency in depends_on]
+                        # copied so that the stage records its progress in the job running the graph, if any
+                        context = contextvars.copy_context()
+                        future = executor.submit(context.run, self._run_stage, flask_app, name, stage, arguments)
+                        running[future] = name
+
+            submit_ready_stages()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+
+                submit_ready_stages()
+
+        logger.info(
+            f"{self.name} stages completed in {time.perf_counter() - started_at:.2f}s ("
+            + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items())
+            + ")"
+        )
+
+        return results
+
+    def _run_stage(self, flask_app: Eve, name: str, stage: Callable[..., Any], arguments: List[Any]) -> Any:
+        started_at = time.perf_counter()
+        try:
+            with flask_app.app_context(), job_stage(name):
+                return stage(*arguments)
+        finally:
+            self.timings[name] = time.perf_counter() - started_at
+
+            logger.info(f"{self.name} stage {name} ran for {self.timings[name]:.2f}s")
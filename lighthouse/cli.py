@@ -0,0 +1,56 @@
+"""Commands which can be run with the flask CLI, e.g. `flask plate-summaries rebuild`"""
+
+from typing import cast
+
+import click
+from eve import Eve
+from flask import current_app as app
+from flask.cli import AppGroup
+
+from lighthouse.db.mongo import ensure_indexes, find_collection_scans
+from lighthouse.helpers.plate_summaries import rebuild_plate_summaries
+from lighthouse.helpers.reports import get_report_manifest
+
+plate_summaries_cli = AppGroup("plate-summaries", help="Manage the plate_summaries collection.")
+mongo_cli = AppGroup("mongo", help="Manage the mongo indexes used by Lighthouse.")
+reports_cli = AppGroup("reports", help="Manage the fit to pick reports.")
+
+
+@plate_summaries_cli.command("rebuild")
+@click.option("--batch-size", default=500, show_default=True, help="Number of plates to summarise per aggregation.")
+def rebuild_plate_summaries_command(batch_size: int) -> None:
+    """Rebuild the summaries of all the plates from the samples and priority_samples collections."""
+    count = rebuild_plate_summaries(batch_size=batch_size)
+
+    click.echo(f"Rebuilt the summaries of {count} plates")
+
+
+@mongo_cli.command("ensure-indexes")
+def ensure_indexes_command() -> None:
+    """Create the indexes which support Lighthouse's queries."""
+    index_names = ensure_indexes(cast(Eve, app).data.driver.db)
+
+    click.echo(f"Ensured {len(index_names)} indexes: {', '.join(index_names)}")
+
+
+@mongo_cli.command("check-indexes")
+def check_indexes_command() -> None:
+    """Explain each of Lighthouse's queries and fail if any of them would scan a whole collection."""
+    if collection_scans := find_collection_scans(cast(Eve, app).data.driver.db):
+        raise click.ClickException(f"These queries use a collection scan: {', '.join(collection_scans)}")
+
+    click.echo("No queries use a collection scan")
+
+
+@reports_cli.command("reconcile-manifest")
+def reconcile_manifest_command() -> None:
+    """Rebuild the report manifest from the reports on disk."""
+    count = get_report_manifest().reconcile()
+
+    click.echo(f"The report manifest lists {count} reports")
+
+
+def setup_cli(app) -> None:
+    app.cli.add_command(plate_summaries_cli)
+    app.cli.add_command(mongo_cli)
+    app.cli.add_command(reports_cli)
@@ -11,6 +11,24 @@ from lighthouse.constants.config import *
 ###
 REPORTS_DIR = "data/reports"
 REPORT_WINDOW_SIZE = 84  # The window size when generating the fit to pick samples report
+# The number of fit to pick samples read from mongo, and held as dicts, at a time when generating the report
+REPORT_INGEST_BATCH_SIZE = 10000
+# The samples of the report are kept in partitions by test date under REPORTS_DIR/partitions, and a run only reads from
+#   mongo the partitions with samples changed since the last run, whose count of samples in mongo changed (for samples
+#   which were deleted or moved to another day) or read more than REPORT_PARTITION_MAX_AGE_SECONDS ago. Locations and
+#   cherrypicked status are looked up on every run
+REPORT_PARTITIONS_ENABLED = True
+REPORT_PARTITION_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+# The reports in REPORTS_DIR are listed from a manifest kept up to date as reports are created and deleted; GET /reports
+#   serves REPORTS_PAGE_SIZE reports per page when a page is asked for
+REPORT_MANIFEST_ENABLED = True
+REPORTS_PAGE_SIZE = 25
+# Reports are created by background jobs, whether asked for by POST /reports/new or by the scheduler. A report job holds
+#   a lock, so that the reports asked for while it is in progress are coalesced onto it, for at most
+#   REPORT_JOB_LOCK_SECONDS. A synchronous request waits for its job, reading its state every
+#   REPORT_JOB_POLL_INTERVAL_SECONDS
+REPORT_JOB_LOCK_SECONDS = 2 * 60 * 60
+REPORT_JOB_POLL_INTERVAL_SECONDS = 1
 # If we're running in a container, then instead of localhost we want host.docker.internal, you can specify this in the
 # .env file you use for docker. eg: LOCALHOST=host.docker.internal
 LOCALHOST = os.environ.get("LOCALHOST", "127.0.0.1")
@@ -100,6 +118,99 @@ MONGO_OPTIONS = {
     "tz_aware": False,  # we are not interested in storing "aware" datetimes at present
     "uuidRepresentation": "standard",  # this is needed to avoid a KeyError in Eve 2.0
 }
+# When True, the indexes which support Lighthouse's queries (see lighthouse/db/mongo.py) are created when the app
+#   starts. Building an index on a large collection is slow, so they are created at deploy time with
+#   `flask mongo ensure-indexes` instead.
+MONGO_ENSURE_INDEXES = False
+
+###
+# plate summaries config
+###
+# When True, source plate lookups on /plates read the pre-calculated plate_summaries collection instead of running the
+#   fit to pick aggregation. The collection must first be built with `flask plate-summaries rebuild`.
+PLATE_SUMMARIES_ENABLED = False
+# When True, a change stream listener is started with the app to keep the plate_summaries collection up to date. Only
+#   one process should run the listener. Deletes are traced to their plates through change stream pre-images, which
+#   `flask mongo ensure-indexes` enables; without them a delete rebuilds all the summaries.
+PLATE_SUMMARIES_WATCH = False
+
+###
+# plate cache config
+###
+# When True, source plate lookups on /plates are cached in memory by each process. Each process runs a change stream
+#   listener on the samples, priority_samples, source_plates and plate_summaries collections to invalidate the cached
+#   plates; the cache is bypassed while the listener is not running.
+PLATE_CACHE_ENABLED = False
+# The approximate memory the cached plates may use in each process, in bytes
+PLATE_CACHE_MAX_SIZE_BYTES = 64 * 1024 * 1024
+
+###
+# streaming config
+###
+# The number of plates formatted at a time when /plates streams its response (see lighthouse/helpers/streaming.py)
+PLATES_STREAM_BATCH_SIZE = 50
+
+###
+# Background jobs config
+###
+# Requests run in the background (e.g. POST /plates/new?async=1) are run by a pool of BACKGROUND_JOBS_MAX_WORKERS
+#   threads per process, queueing up to BACKGROUND_JOBS_MAX_PENDING more jobs. The state and result of a job are kept
+#   for BACKGROUND_JOBS_TTL_SECONDS after it completed
+BACKGROUND_JOBS_MAX_WORKERS = 4
+BACKGROUND_JOBS_MAX_PENDING = 20
+BACKGROUND_JOBS_TTL_SECONDS = 24 * 60 * 60
+
+###
+# Idempotency config
+###
+# Retries of the requests which create plates are answered with the response of the first request, see
+#   lighthouse/helpers/idempotency.py. A duplicate of a request in progress waits up to IDEMPOTENCY_WAIT_SECONDS for it
+IDEMPOTENCY_ENABLED = True
+IDEMPOTENCY_KEY_TTL_SECONDS = 60 * 60
+IDEMPOTENCY_LEASE_SECONDS = 5 * 60
+IDEMPOTENCY_WAIT_SECONDS = 30
+IDEMPOTENCY_POLL_INTERVAL_SECONDS = 0.5
+
+###
+# HTTP clients config
+###
+# Each downstream service is called through a pooled client (see lighthouse/classes/http_clients.py) with these
+#   settings, overridden per service in HTTP_CLIENTS. Timeouts are in seconds; connection errors, and the statuses in
+#   retry_statuses for idempotent requests, are retried with exponential backoff
+HTTP_CLIENT_DEFAULTS = {
+    "connect_timeout": 5,
+    "read_timeout": 30,
+    "retries": 2,
+    "backoff_factor": 0.5,
+    "retry_statuses": (502, 503, 504),
+    "pool_maxsize": 10,
+}
+HTTP_CLIENTS = {
+    HTTP_SERVICE_SEQUENCESCAPE: {"read_timeout": 120},
+    HTTP_SERVICE_CHERRYTRACK: {},
+    HTTP_SERVICE_LABWHERE: {},
+    HTTP_SERVICE_CRAWLER: {"read_timeout": 60},
+}
+
+###
+# Circuit breakers config
+###
+# The calls to each downstream service fail fast once failure_threshold consecutive calls have failed, until a call is
+#   allowed through again after reset_timeout_seconds (see lighthouse/classes/circuit_breaker.py). The state of the
+#   breakers is shared by the processes through mongo, and read at most every state_cache_seconds
+CIRCUIT_BREAKERS_ENABLED = True
+CIRCUIT_BREAKER_DEFAULTS = {
+    "failure_threshold": 5,
+    "reset_timeout_seconds": 30,
+    "state_cache_seconds": 1,
+}
+CIRCUIT_BREAKERS = {
+    HTTP_SERVICE_SEQUENCESCAPE: {},
+    HTTP_SERVICE_CHERRYTRACK: {},
+    HTTP_SERVICE_LABWHERE: {},
+    HTTP_SERVICE_CRAWLER: {},
+    SERVICE_DART: {},
+}
 
 ###
 # Crawler config
@@ -116,6 +227,13 @@ CHERRYTRACK_URL = f"http://{LOCALHOST}:3020"
 ###
 LABWHERE_URL = f"https://{LOCALHOST}:3010"
 LABWHERE_DESTROYED_BARCODE = os.environ.get("LABWHERE_DESTROYED_BARCODE", "lw-heron-destroyed-17338")
+# The locations of the plates in the report are requested in batches, several at a time, and cached in the
+#   labware_locations collection, so that a plate located in the last LABWHERE_LOCATIONS_CACHE_TTL_SECONDS is not
+#   requested again
+LABWHERE_LOCATIONS_BATCH_SIZE = 500
+LABWHERE_LOCATIONS_MAX_WORKERS = 4
+LABWHERE_LOCATIONS_CACHE_ENABLED = True
+LABWHERE_LOCATIONS_CACHE_TTL_SECONDS = 4 * 60 * 60
 
 ###
 # Sequencescape config
@@ -132,6 +250,17 @@ SS_PLATE_CONFIG = {
 }
 SS_UUIDS_CHERRYPICKED = {SS_UUID_PLATE_PURPOSE: "", SS_UUID_STUDY: ""}
 SS_PLATE_CREATION_ENDPOINT = f"{ SS_URL }/api/v2/heron/plates"
+# Destination plates are looked up in Sequencescape with batches of barcodes, running a few batches at a time
+SS_LABWARE_LOOKUP_BATCH_SIZE = 25
+SS_LABWARE_LOOKUP_MAX_WORKERS = 4
+# Samples are checked for in Sequencescape by UUID in batches, running a few batches at a time. Each request is retried
+#   by the Sequencescape client (see HTTP_CLIENT_DEFAULTS)
+SS_SAMPLES_LOOKUP_BATCH_SIZE = 50
+SS_SAMPLES_LOOKUP_MAX_WORKERS = 4
+# POST /cherrypicked-plates/bulk-create creates up to CHERRYPICKED_BULK_MAX_BARCODES cherrypicked plates per request,
+#   sending up to CHERRYPICKED_BULK_MAX_WORKERS of them to Sequencescape at a time
+CHERRYPICKED_BULK_MAX_BARCODES = 20
+CHERRYPICKED_BULK_MAX_WORKERS = 4
 
 ###
 # MLWH config
@@ -147,6 +276,12 @@ MLWH_SAMPLE_TABLE = "sample"
 MLWH_STOCK_RESOURCES_TABLE = "stock_resource"
 MLWH_STUDY_TABLE = "study"
 
+# The MLWH is read through a pool of MLWH_POOL_SIZE connections, waiting at most MLWH_POOL_TIMEOUT_SECONDS for a free
+#   one; the chunks of the query for the cherrypicked samples of the report run MLWH_QUERY_MAX_WORKERS at a time
+MLWH_POOL_SIZE = 4
+MLWH_POOL_TIMEOUT_SECONDS = 30
+MLWH_QUERY_MAX_WORKERS = 4
+
 EVENT_WH_SUBJECTS_TABLE = "subjects"
 EVENT_WH_ROLES_TABLE = "roles"
 EVENT_WH_EVENTS_TABLE = "events"
@@ -191,6 +326,13 @@ DART_SQL_SERVER_CONNECTION_STRING = (
     f"PWD={DART_SQL_SERVER_PASSWORD}"
 )
 
+# the connections to DART are pooled (see lighthouse/db/dart.py): at most DART_POOL_MAX_SIZE are open, a query waits
+#   at most DART_POOL_TIMEOUT_SECONDS for a free one, and a connection idle for more than
+#   DART_POOL_HEALTH_CHECK_SECONDS is checked before it is used
+DART_POOL_MAX_SIZE = 5
+DART_POOL_TIMEOUT_SECONDS = 10
+DART_POOL_HEALTH_CHECK_SECONDS = 60
+
 ###
 # Broker config
 ###
@@ -29,6 +29,12 @@ SCHEDULER_RUN = False
 # General config
 ###
 REPORTS_DIR = "tests/data/reports"
+# small enough for the fit to pick samples of the fixtures to be read in several batches
+REPORT_INGEST_BATCH_SIZE = 3
+# the reports folder of the tests holds the reports the tests expect, so only the tests of the manifest enable it
+REPORT_MANIFEST_ENABLED = False
+# read the state of a report job which is waited for without pausing for long
+REPORT_JOB_POLL_INTERVAL_SECONDS = 0.01
 
 ###
 # mongo config
@@ -56,6 +62,8 @@ EVENTS_WH_DB = "event_warehouse_test"
 
 WAREHOUSES_RO_CONN_STRING = f"root@{LOCALHOST}"
 WAREHOUSES_RW_CONN_STRING = f"root@{LOCALHOST}"
+# the chunks are queried one at a time so that the mocked query results are returned in order
+MLWH_QUERY_MAX_WORKERS = 1
 
 ###
 # DART config
@@ -115,3 +123,14 @@ SS_PLATE_CONFIG = {
     },
 }
 SS_UUIDS_CHERRYPICKED = {SS_UUID_PLATE_PURPOSE: "cherrypicked_purpose", SS_UUID_STUDY: "cherrypicked_study"}
+
+###
+# HTTP clients config
+###
+HTTP_CLIENT_DEFAULTS = {**HTTP_CLIENT_DEFAULTS, "backoff_factor": 0}
+
+###
+# Idempotency config
+###
+IDEMPOTENCY_WAIT_SECONDS = 0
+IDEMPOTENCY_POLL_INTERVAL_SECONDS = 0
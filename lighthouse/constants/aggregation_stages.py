@@ -117,3 +117,58 @@ FACETS_REPORT = {
         ],
     }
 }
+
+# Expression which is true when the current document (after merging in the priority_samples fields) is "fit to pick" -
+#   the same rule as the "$match" stage in STAGES_FIT_TO_PICK_SAMPLES
+EXPRESSION_IS_FIT_TO_PICK: Final[Dict[str, Any]] = {
+    "$or": [
+        {"$eq": [f"${FIELD_FILTERED_POSITIVE}", True]},
+        {"$eq": [f"${FIELD_MUST_SEQUENCE}", True]},
+    ]
+}
+
+"""
+Stages for mongo aggregation pipeline to calculate the fit to pick counts for many plates in a single query. The
+pipeline should be preceded by a "$match" on the plate barcodes of interest. All the samples of a plate are grouped into
+a single document with '_id' set to the plate barcode, which means:
+- a plate without any samples will not have a document in the output
+- a plate with samples but none fit to pick will have a document with counts of 0
+The fields of each document use the same names as the facets in STAGES_FIT_TO_PICK_SAMPLES. The samples themselves are
+not included; use STAGES_FIT_TO_PICK_SAMPLES_BY_PLATE when they are needed.
+"""
+STAGES_FIT_TO_PICK_COUNTS_BY_PLATE: Final[List[Dict[str, Any]]] = [
+    # merge in the priority_samples fields in the same way as for a single plate
+    *STAGES_FIT_TO_PICK_SAMPLES[:3],
+    {
+        "$group": {
+            "_id": f"${FIELD_PLATE_BARCODE}",
+            FACET_COUNT_FIT_TO_PICK_SAMPLES: {"$sum": {"$cond": [EXPRESSION_IS_FIT_TO_PICK, 1, 0]}},
+            FACET_COUNT_FILTERED_POSITIVE: {"$sum": {"$cond": [{"$eq": [f"${FIELD_FILTERED_POSITIVE}", True]}, 1, 0]}},
+            FACET_COUNT_MUST_SEQUENCE: {"$sum": {"$cond": [{"$eq": [f"${FIELD_MUST_SEQUENCE}", True]}, 1, 0]}},
+            # preferentially_sequence samples are only counted when they are also fit to pick
+            FACET_COUNT_PREFERENTIALLY_SEQUENCE: {
+                "$sum": {
+                    "$cond": [
+                        {"$and": [EXPRESSION_IS_FIT_TO_PICK, {"$eq": [f"${FIELD_PREFERENTIALLY_SEQUENCE}", True]}]},
+                        1,
+                        0,
+                    ]
+                }
+            },
+        }
+    },
+]
+
+"""
+As STAGES_FIT_TO_PICK_COUNTS_BY_PLATE but each document also includes the fit to pick samples of the plate.
+"""
+STAGES_FIT_TO_PICK_SAMPLES_BY_PLATE: Final[List[Dict[str, Any]]] = [
+    *STAGES_FIT_TO_PICK_COUNTS_BY_PLATE[:-1],
+    {
+        "$group": {
+            **STAGES_FIT_TO_PICK_COUNTS_BY_PLATE[-1]["$group"],
+            # $$REMOVE makes $push skip the documents which are not fit to pick
+            FACET_FIT_TO_PICK_SAMPLES: {"$push": {"$cond": [EXPRESSION_IS_FIT_TO_PICK, "$$ROOT", "$$REMOVE"]}},
+        }
+    },
+]
@@ -4,3 +4,11 @@ SS_UUID_PLATE_PURPOSE = "plate_purpose"
 SS_UUID_STUDY = "study"
 SS_FILTER_FIT_TO_PICK = "filter_fit_to_pick"
 SS_ONLY_SUBMIT_NEW_SAMPLES = "only_submit_new_samples"
+
+# Names of the downstream services in HTTP_CLIENTS
+HTTP_SERVICE_SEQUENCESCAPE = "sequencescape"
+HTTP_SERVICE_CHERRYTRACK = "cherrytrack"
+HTTP_SERVICE_LABWHERE = "labwhere"
+HTTP_SERVICE_CRAWLER = "crawler"
+# Name of the DART database in CIRCUIT_BREAKERS, next to the HTTP services
+SERVICE_DART = "dart"
@@ -1,13 +1,27 @@
 # arguments to extract from a request
 ARG_BARCODE = "barcode"
+ARG_BARCODES = "barcodes"
 ARG_EXCLUDE = "_exclude"
 ARG_FAILURE_TYPE = "failure_type"
+ARG_FIELDS = "_fields"
+ARG_FULL = "full"
+ARG_MAX_RESULTS = "max_results"
+ARG_PAGE = "page"
 ARG_ROBOT_SERIAL = "robot"
+ARG_STREAM = "_stream"
 ARG_TYPE = "_type"
 ARG_TYPE_DESTINATION = "destination"
 ARG_TYPE_SOURCE = "source"
 ARG_USER_ID = "user_id"
 ARG_USER = "user"
+# run a request in the background, answering with the id of a job to poll for its result
+ARG_ASYNC = "async"
+
+# newline delimited JSON, used to stream responses one document per line
+MIMETYPE_NDJSON = "application/x-ndjson"
+
+# the request header with which clients identify the retries of a request (see lighthouse/helpers/idempotency.py)
+HEADER_IDEMPOTENCY_KEY = "Idempotency-Key"
 
 # Columns that should appear in the fit to pick samples report and the order in which they will appear
 REPORT_COLUMNS = [
@@ -1,4 +1,9 @@
 import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 import pyodbc
 from flask import current_app as app
@@ -12,6 +17,148 @@ def create_dart_connection():
     return pyodbc.connect(app.config["DART_SQL_SERVER_CONNECTION_STRING"])
 
 
+class DartConnectionPool:
+    """A pool of connections to DART, so that a query does not pay for a new connection (and its login) each time.
+
+    Connections are opened when needed, up to `max_size`, and a query waits at most `timeout_seconds` for one to be
+    free. A connection which has been idle for more than `health_check_seconds` is checked with a trivial query before
+    it is handed out, and replaced if the check fails; a connection on which a pyodbc error was raised is closed rather
+    than returned to the pool. The connections are in autocommit mode as they are only used to read.
+
+    The time spent opening connections and the time for which connections are used, i.e. spent querying, are recorded
+    separately, see `stats`.
+    """
+
+    def __init__(self, connection_string: str, max_size: int, timeout_seconds: float, health_check_seconds: float):
+        self._connection_string = connection_string
+        self.max_size = max_size
+        self.timeout_seconds = timeout_seconds
+        self.health_check_seconds = health_check_seconds
+
+        # the most recently used connection is handed out first, so that the others can go idle and be closed by DART
+        self._idle: "queue.LifoQueue[Tuple[Any, float]]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "connections_opened": 0,
+            "connections_discarded": 0,
+            "health_check_failures": 0,
+            "connect_seconds": 0.0,
+            "queries": 0,
+            "query_seconds": 0.0,
+        }
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Check a connection out of the pool for the duration of the block.
+
+        Raises:
+            pyodbc.OperationalError: if no connection is free within `timeout_seconds`.
+            pyodbc.Error: if a connection cannot be opened.
+
+        Returns:
+            Iterator[Any]: the connection.
+        """
+        if not self._slots.acquire(timeout=self.timeout_seconds):
+            raise pyodbc.OperationalError(f"No DART connection was free within {self.timeout_seconds}s")
+
+        connection = None
+        try:
+            connection = self._checkout()
+
+            started_at = time.perf_counter()
+            try:
+                yield connection
+            finally:
+                self._record(queries=1, query_seconds=time.perf_counter() - started_at)
+        except pyodbc.Error:
+            # the connection may be broken, so do not hand it out again
+            self._discard(connection)
+            connection = None
+            raise
+        finally:
+            if connection is not None:
+                self._idle.put((connection, time.monotonic()))
+
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+
+        stats["idle_connections"] = self._idle.qsize()
+        stats["mean_connect_seconds"] = (
+            round(stats["connect_seconds"] / stats["connections_opened"], 6) if stats["connections_opened"] else 0.0
+        )
+        stats["mean_query_seconds"] = round(stats["query_seconds"] / stats["queries"], 6) if stats["queries"] else 0.0
+
+        return stats
+
+    def close(self) -> None:
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+
+            self._discard(connection)
+
+    def _checkout(self) -> Any:
+        while True:
+            try:
+                connection, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            if time.monotonic() - idle_since < self.health_check_seconds or self._is_healthy(connection):
+                return connection
+
+            self._record(health_check_failures=1)
+            self._discard(connection)
+
+    def _connect(self) -> Any:
+        started_at = time.perf_counter()
+
+        connection = pyodbc.connect(self._connection_string, autocommit=True)
+
+        connect_seconds = time.perf_counter() - started_at
+        self._record(connections_opened=1, connect_seconds=connect_seconds)
+        logger.info(f"Connected to DART in {connect_seconds:.3f}s")
+
+        return connection
+
+    def _is_healthy(self, connection: Any) -> bool:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1").fetchone()
+
+            return True
+        except pyodbc.Error as e:
+            logger.warning(f"Discarding a DART connection which failed its health check: {e}")
+
+            return False
+
+    def _discard(self, connection: Optional[Any]) -> None:
+        if connection is None:
+            return
+
+        self._record(connections_discarded=1)
+        try:
+            connection.close()
+        except pyodbc.Error:
+            pass
+
+    def _record(self, **increments: float) -> None:
+        with self._lock:
+            for stat, increment in increments.items():
+                self._stats[stat] += increment
+
+
+def dart_connection_pool() -> DartConnectionPool:
+    """The pool of connections to DART of the current app."""
+    return app.extensions["dart_connection_pool"]
+
+
 def load_sql_server_script(script_path: str) -> None:
     logger.info("Executing DART SQL script")
 
@@ -0,0 +1,109 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import sqlalchemy
+from flask import current_app as app
+from pandas import DataFrame, concat
+from sqlalchemy.engine.base import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+
+def create_mlwh_engine(connection_string: str, database: str, pool_size: int, pool_timeout_seconds: float) -> Engine:
+    """Create the engine, and its pool of connections, used to query the MLWH. No connection is made until the MLWH is
+    first queried. There is no overflow beyond `pool_size` so that concurrent queries cannot open more connections than
+    the MLWH expects from Lighthouse.
+
+    Arguments:
+        connection_string (str): connection string defining host, port, username and password.
+        database (str): the MLWH database.
+        pool_size (int): the number of connections in the pool.
+        pool_timeout_seconds (float): how long a query waits for a connection to be free.
+
+    Returns:
+        Engine: a SQLAlchemy engine.
+    """
+    return sqlalchemy.create_engine(
+        f"mysql+pymysql://{connection_string}/{database}",
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=pool_timeout_seconds,
+        pool_recycle=3600,
+        pool_pre_ping=True,
+    )
+
+
+def mlwh_engine() -> Engine:
+    """The engine used to query the MLWH of the current app."""
+    return app.extensions["mlwh_engine"]
+
+
+def read_sql_streamed(connection: Connection, sql: str, params: Dict[str, Any], fetch_size: int) -> DataFrame:
+    """Run a query with a server side cursor, so that its rows are fetched `fetch_size` at a time instead of being
+    buffered by the driver, and return them as a DataFrame.
+
+    Arguments:
+        connection (Connection): the connection to run the query on.
+        sql (str): the query, with parameters in the driver's format, e.g. %(root_sample_ids)s.
+        params (Dict[str, Any]): the parameters of the query.
+        fetch_size (int): the number of rows fetched at a time.
+
+    Returns:
+        DataFrame: the rows, with the columns of the query even when there are none.
+    """
+    result = connection.execution_options(stream_results=True).exec_driver_sql(sql, params)
+
+    columns = list(result.keys())
+    frames = []
+    while rows := result.fetchmany(fetch_size):
+        frames.append(DataFrame.from_records(rows, columns=columns))
+
+    return concat(frames, ignore_index=True) if frames else DataFrame(columns=columns)
+
+
+def read_sql_in_chunks(
+    engine: Engine,
+    sql: str,
+    chunk_param: str,
+    values: Sequence[Any],
+    chunk_size: int,
+    params: Optional[Dict[str, Any]] = None,
+    max_workers: int = 1,
+    fetch_size: int = 10000,
+) -> DataFrame:
+    """Run a query with an IN parameter once per chunk of its values, up to `max_workers` chunks at a time on the
+    connections of the engine. The rows of the chunks are concatenated and deduplicated once, in the order of the
+    chunks, as a value can match the same rows as a value of another chunk.
+
+    Arguments:
+        engine (Engine): the engine whose pool the connections are taken from.
+        sql (str): the query, with parameters in the driver's format, e.g. %(root_sample_ids)s.
+        chunk_param (str): the name of the parameter given the values of each chunk, as a tuple.
+        values (Sequence[Any]): the values to chunk.
+        chunk_size (int): the number of values in each chunk.
+        params (Optional[Dict[str, Any]]): the other parameters of the query, given to each chunk.
+        max_workers (int): the number of chunks queried at a time.
+        fetch_size (int): the number of rows fetched at a time, see `read_sql_streamed`.
+
+    Returns:
+        DataFrame: the distinct rows of all the chunks; empty, without columns, when there are no values.
+    """
+    chunks = [tuple(values[x : (x + chunk_size)]) for x in range(0, len(values), chunk_size)]  # noqa: E203
+    if not chunks:
+        return DataFrame()
+
+    def read_chunk(chunk: tuple) -> DataFrame:
+        started_at = time.perf_counter()
+        with engine.connect() as connection:
+            frame = read_sql_streamed(connection, sql, {**(params or {}), chunk_param: chunk}, fetch_size)
+
+        logger.debug(f"{len(frame.index)} rows for {len(chunk)} values in {time.perf_counter() - started_at:.3f}s")
+
+        return frame
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks)), thread_name_prefix="mlwh-chunk") as executor:
+        frames: List[DataFrame] = list(executor.map(read_chunk, chunks))
+
+    return concat(frames, ignore_index=True).drop_duplicates().reset_index(drop=True)
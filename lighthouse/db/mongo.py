@@ -0,0 +1,285 @@
+"""Indexes and query shapes for the mongo collections read by Lighthouse
+
+MONGO_INDEXES declares the indexes which support the queries Lighthouse makes and MONGO_QUERY_SHAPES lists those queries
+(with example values) so that their query plans can be checked with `find_collection_scans`. When adding a new query to
+the helpers or services, add its shape here and, if needed, the index which supports it.
+"""
+
+import logging
+from typing import Any, Dict, Final, List, Set, Tuple
+
+from pymongo import ASCENDING
+from pymongo.collation import Collation
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+
+from lighthouse.constants.fields import (
+    FIELD_BARCODE,
+    FIELD_DATE_TESTED,
+    FIELD_EVENT_UUID,
+    FIELD_FILTERED_POSITIVE,
+    FIELD_LH_SAMPLE_UUID,
+    FIELD_LH_SOURCE_PLATE_UUID,
+    FIELD_PLATE_BARCODE,
+    FIELD_PROCESSED,
+    FIELD_RESULT,
+    FIELD_SAMPLE_ID,
+)
+
+logger = logging.getLogger(__name__)
+
+# Centre names are matched case insensitively, which is done with a collation (strength 2 ignores case) so that the
+#   query can use an index with the same collation
+CENTRE_NAME_COLLATION: Final[Collation] = Collation(locale="en", strength=2)
+
+# Error codes returned when an index with the same keys or name already exists with different options, e.g. when it was
+#   created by crawler
+INDEX_CONFLICT_ERROR_CODES: Final[Set[int]] = {85, 86}
+
+# Collections read through change streams by the plate summaries watcher and the plate cache invalidator. With
+#   pre-images enabled their change events carry the document before a delete, which links it back to its plate
+PRE_IMAGE_COLLECTIONS: Final[Tuple[str, ...]] = ("samples", "priority_samples", "source_plates")
+
+MONGO_INDEXES: Final[Dict[str, List[Dict[str, Any]]]] = {
+    "samples": [
+        {"keys": [(FIELD_PLATE_BARCODE, ASCENDING)]},
+        {"keys": [(FIELD_LH_SAMPLE_UUID, ASCENDING)]},
+        {"keys": [(FIELD_LH_SOURCE_PLATE_UUID, ASCENDING), (FIELD_RESULT, ASCENDING)]},
+        {"keys": [(FIELD_FILTERED_POSITIVE, ASCENDING), (FIELD_DATE_TESTED, ASCENDING)]},
+        {"keys": [("updated_at", ASCENDING)]},
+    ],
+    "source_plates": [
+        {"keys": [(FIELD_BARCODE, ASCENDING)]},
+    ],
+    "events": [
+        {"keys": [(FIELD_EVENT_UUID, ASCENDING)]},
+    ],
+    "priority_samples": [
+        {"keys": [(FIELD_SAMPLE_ID, ASCENDING), (FIELD_PROCESSED, ASCENDING)]},
+    ],
+    "centres": [
+        {"keys": [("name", ASCENDING)], "collation": CENTRE_NAME_COLLATION},
+    ],
+    # a TTL index: each key is removed once its expires_at has passed (see lighthouse/helpers/idempotency.py)
+    "idempotency_keys": [
+        {"keys": [("expires_at", ASCENDING)], "expireAfterSeconds": 0},
+    ],
+    # a TTL index: each job is removed once its expires_at has passed (see lighthouse/classes/background_jobs.py)
+    "background_jobs": [
+        {"keys": [("expires_at", ASCENDING)], "expireAfterSeconds": 0},
+    ],
+    # a TTL index: a lock left by a process which stopped before completing its job is removed once it has expired (see
+    #   lighthouse/classes/background_jobs.py)
+    "background_job_locks": [
+        {"keys": [("expires_at", ASCENDING)], "expireAfterSeconds": 0},
+    ],
+    # a TTL index: each location is removed once its expires_at has passed (see lighthouse/helpers/labwhere.py)
+    "labware_locations": [
+        {"keys": [("expires_at", ASCENDING)], "expireAfterSeconds": 0},
+    ],
+}
+
+# The options of MONGO_INDEXES which are passed on to create_index
+INDEX_OPTIONS: Final[Tuple[str, ...]] = ("collation", "expireAfterSeconds")
+
+# The shapes of the queries made by Lighthouse, with example values. Aggregations are represented by the query of their
+#   first stage, and $lookup stages by the query they make on the joined collection.
+MONGO_QUERY_SHAPES: Final[List[Dict[str, Any]]] = [
+    {
+        "name": "samples by plate barcode",
+        "used_by": "helpers/general.py, helpers/plates.py, helpers/reports.py, classes/services/mongo.py",
+        "collection": "samples",
+        "filter": {FIELD_PLATE_BARCODE: "plate_123"},
+    },
+    {
+        "name": "samples by plate barcodes",
+        "used_by": "helpers/general.py",
+        "collection": "samples",
+        "filter": {FIELD_PLATE_BARCODE: {"$in": ["plate_123", "plate_456"]}},
+    },
+    {
+        "name": "samples by lh_sample_uuid",
+        "used_by": "helpers/plates.py, classes/services/mongo.py",
+        "collection": "samples",
+        "filter": {FIELD_LH_SAMPLE_UUID: {"$in": ["0a53e7b6-7ce8-4ebc-95c3-02dd64942531"]}},
+    },
+    {
+        "name": "samples by source plate uuid",
+        "used_by": "helpers/mongo.py",
+        "collection": "samples",
+        "filter": {FIELD_LH_SOURCE_PLATE_UUID: "bba490a1-9858-49e5-a096-ee386f99fc38"},
+    },
+    {
+        "name": "positive samples by source plate uuid",
+        "used_by": "helpers/mongo.py, classes/services/mongo.py",
+        "collection": "samples",
+        "filter": {
+            FIELD_LH_SOURCE_PLATE_UUID: "bba490a1-9858-49e5-a096-ee386f99fc38",
+            FIELD_RESULT: {"$regex": "^positive", "$options": "i"},
+        },
+    },
+    {
+        "name": "fit to pick samples for the report",
+        "used_by": "helpers/reports.py",
+        "collection": "samples",
+        "filter": {
+            FIELD_FILTERED_POSITIVE: True,
+            FIELD_DATE_TESTED: {"$exists": True, "$nin": [None, ""], "$type": "date", "$gte": "2020-01-01"},
+        },
+    },
+    {
+        "name": "plates of the fit to pick samples for the report",
+        "used_by": "helpers/reports.py",
+        "collection": "samples",
+        "filter": {
+            FIELD_FILTERED_POSITIVE: True,
+            FIELD_DATE_TESTED: {"$type": "date", "$gte": "2020-01-01"},
+            FIELD_PLATE_BARCODE: {"$nin": ["", None]},
+        },
+    },
+    {
+        "name": "fit to pick samples counted by test date",
+        "used_by": "classes/report_partitions.py",
+        "collection": "samples",
+        "filter": {FIELD_FILTERED_POSITIVE: True, FIELD_DATE_TESTED: {"$type": "date", "$gte": "2020-01-01"}},
+    },
+    {
+        "name": "samples updated since the last report",
+        "used_by": "classes/report_partitions.py",
+        "collection": "samples",
+        "filter": {"updated_at": {"$gte": "2020-01-01"}, FIELD_DATE_TESTED: {"$type": "date", "$gte": "2020-01-01"}},
+    },
+    {
+        "name": "source plate by barcode",
+        "used_by": "helpers/mongo.py, helpers/plates.py, classes/services/mongo.py",
+        "collection": "source_plates",
+        "filter": {FIELD_BARCODE: {"$in": ["plate_123"]}},
+    },
+    {
+        "name": "event by uuid",
+        "used_by": "helpers/mongo.py",
+        "collection": "events",
+        "filter": {FIELD_EVENT_UUID: "1770dbcd-0abf-4293-ac62-dd26964f80b0"},
+    },
+    {
+        "name": "processed priority sample by sample id",
+        "used_by": "constants/aggregation_stages.py ($lookup)",
+        "collection": "priority_samples",
+        "filter": {FIELD_SAMPLE_ID: "5f562d9931d9959b92544728", FIELD_PROCESSED: True},
+    },
+    {
+        "name": "cached labware locations by barcode",
+        "used_by": "helpers/labwhere.py",
+        "collection": "labware_locations",
+        "filter": {"_id": {"$in": ["plate_123"]}, "expires_at": {"$gt": "2020-01-01"}},
+    },
+    {
+        "name": "centre by name",
+        "used_by": "helpers/plates.py",
+        "collection": "centres",
+        "filter": {"name": "CENTRE_1"},
+        "collation": CENTRE_NAME_COLLATION,
+    },
+]
+
+
+def ensure_indexes(db: Database) -> List[str]:
+    """Create the indexes in MONGO_INDEXES which do not exist yet. Creating an index which already exists is a no-op.
+
+    Arguments:
+        db (Database): the mongo database.
+
+    Returns:
+        List[str]: the names of the indexes ensured.
+    """
+    logger.info("Ensuring mongo indexes")
+
+    index_names = []
+    for collection_name, indexes in MONGO_INDEXES.items():
+        for index in indexes:
+            options = {option: index[option] for option in INDEX_OPTIONS if option in index}
+            try:
+                index_names.append(db[collection_name].create_index(index["keys"], **options))
+            except OperationFailure as e:
+                if e.code not in INDEX_CONFLICT_ERROR_CODES:
+                    raise
+
+                # an equivalent index exists with another name or options, which is fine for the query planner
+                logger.warning(f"Not creating index {index['keys']} on '{collection_name}': {e.details}")
+
+    logger.debug(f"Mongo indexes ensured: {index_names}")
+
+    enable_change_stream_pre_images(db)
+
+    return index_names
+
+
+def enable_change_stream_pre_images(db: Database) -> List[str]:
+    """Enable change stream pre-images on the collections in PRE_IMAGE_COLLECTIONS. Enabling them again is a no-op.
+
+    Pre-images need MongoDB 6.0; when they cannot be enabled the change stream listeners fall back to rebuilding the
+    plate summaries or clearing the plate cache when a document is deleted.
+
+    Arguments:
+        db (Database): the mongo database.
+
+    Returns:
+        List[str]: the names of the collections with pre-images enabled.
+    """
+    collection_names = []
+    for collection_name in PRE_IMAGE_COLLECTIONS:
+        try:
+            db.command("collMod", collection_name, changeStreamPreAndPostImages={"enabled": True})
+            collection_names.append(collection_name)
+        except OperationFailure as e:
+            logger.warning(f"Not enabling change stream pre-images on '{collection_name}': {e.details}")
+
+    return collection_names
+
+
+def explain_query_shape(db: Database, query_shape: Dict[str, Any]) -> Set[str]:
+    """Get the stages of the winning plan for a query shape.
+
+    Arguments:
+        db (Database): the mongo database.
+        query_shape (Dict[str, Any]): a query shape from MONGO_QUERY_SHAPES.
+
+    Returns:
+        Set[str]: the names of the stages in the winning plan, e.g. {"FETCH", "IXSCAN"}.
+    """
+    options = {"collation": query_shape["collation"]} if "collation" in query_shape else {}
+
+    explanation = db[query_shape["collection"]].find(query_shape["filter"], **options).explain()
+
+    return _plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+
+
+def find_collection_scans(db: Database) -> List[str]:
+    """Find the query shapes which would be answered with a collection scan.
+
+    Arguments:
+        db (Database): the mongo database.
+
+    Returns:
+        List[str]: the names of the query shapes which use a COLLSCAN.
+    """
+    return [
+        query_shape["name"] for query_shape in MONGO_QUERY_SHAPES if "COLLSCAN" in explain_query_shape(db, query_shape)
+    ]
+
+
+def _plan_stages(plan: Any) -> Set[str]:
+    # the plan is a tree of stages nested under "inputStage", "inputStages" or "queryPlan" depending on the stage and
+    #   the query engine used, so collect the stage names from every level
+    stages: Set[str] = set()
+
+    if isinstance(plan, dict):
+        if isinstance(stage := plan.get("stage"), str):
+            stages.add(stage)
+        for value in plan.values():
+            stages |= _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            stages |= _plan_stages(value)
+
+    return stages
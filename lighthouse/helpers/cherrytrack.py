@@ -1,6 +1,9 @@
 import requests
 from flask import current_app as app
 
+from lighthouse.classes.http_clients import http_client
+from lighthouse.constants.config import HTTP_SERVICE_CHERRYTRACK
+
 # TODO: You can drop the _from_cherrytrack since these methods are namespaced
 
 
@@ -17,7 +20,7 @@ def get_automation_system_run_info_from_cherrytrack(run_id: int) -> requests.Res
     Returns:
         requests.Response: the response from the request to Cherrytrack.
     """
-    return requests.get(f"{app.config['CHERRYTRACK_URL']}/automation-system-runs/{run_id}")
+    return http_client(HTTP_SERVICE_CHERRYTRACK).get(f"{app.config['CHERRYTRACK_URL']}/automation-system-runs/{run_id}")
 
 
 def get_samples_from_source_plate_barcode_from_cherrytrack(source_plate_barcode: str) -> requests.Response:
@@ -33,8 +36,12 @@ def get_samples_from_source_plate_barcode_from_cherrytrack(source_plate_barcode:
     Returns:
         requests.Response: the response from the request to Cherrytrack.
     """
-    return requests.get(f"{app.config['CHERRYTRACK_URL']}/source-plates/{source_plate_barcode}")
+    return http_client(HTTP_SERVICE_CHERRYTRACK).get(
+        f"{app.config['CHERRYTRACK_URL']}/source-plates/{source_plate_barcode}"
+    )
 
 
 def get_wells_from_destination_barcode_from_cherrytrack(destination_plate_barcode: str) -> requests.Response:
-    return requests.get(f"{app.config['CHERRYTRACK_URL']}/destination-plates/{destination_plate_barcode}")
+    return http_client(HTTP_SERVICE_CHERRYTRACK).get(
+        f"{app.config['CHERRYTRACK_URL']}/destination-plates/{destination_plate_barcode}"
+    )
@@ -1,76 +1,186 @@
 import logging
-from typing import Any, List
+import time
+from typing import Any, Dict, List, Tuple
 
+import pyodbc
 from flask import current_app as app
 
+from lighthouse.classes.circuit_breaker import circuit_breaker_guard
+from lighthouse.constants.config import SERVICE_DART
 from lighthouse.constants.fields import (
     FIELD_DART_CONTROL,
     FIELD_DART_DESTINATION_BARCODE,
+    FIELD_DART_DESTINATION_COORDINATE,
     FIELD_DART_LAB_ID,
+    FIELD_DART_LH_SAMPLE_UUID,
     FIELD_DART_RNA_ID,
     FIELD_DART_ROOT_SAMPLE_ID,
     FIELD_DART_RUN_ID,
+    FIELD_DART_SOURCE_BARCODE,
+    FIELD_DART_SOURCE_COORDINATE,
 )
-from lighthouse.db.dart import create_dart_connection
+from lighthouse.db.dart import dart_connection_pool
 
 logger = logging.getLogger(__name__)
 
+# the columns selected from the DART view, in the order of the values of the rows returned
+DART_SAMPLES_COLUMNS: Tuple[str, ...] = (
+    FIELD_DART_DESTINATION_BARCODE,
+    FIELD_DART_DESTINATION_COORDINATE,
+    FIELD_DART_SOURCE_BARCODE,
+    FIELD_DART_SOURCE_COORDINATE,
+    FIELD_DART_CONTROL,
+    FIELD_DART_ROOT_SAMPLE_ID,
+    FIELD_DART_RNA_ID,
+    FIELD_DART_LAB_ID,
+    FIELD_DART_LH_SAMPLE_UUID,
+)
+DART_SAMPLES_COLUMN_INDEX: Dict[str, int] = {column: index for index, column in enumerate(DART_SAMPLES_COLUMNS)}
 
-def get_samples_for_destination_barcode(connection: Any, destination_barcode: str) -> List[Any]:
-    """Get the samples for a destination barcode from DART.
+
+def row_is_normal_sample(row: Tuple[Any, ...]) -> bool:
+    control_value = row[DART_SAMPLES_COLUMN_INDEX[FIELD_DART_CONTROL]]
+    return control_value is None or control_value == "NULL" or control_value == ""
+
+
+def row_to_dict(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    columns = [
+        FIELD_DART_DESTINATION_BARCODE,
+        FIELD_DART_DESTINATION_COORDINATE,
+        FIELD_DART_SOURCE_BARCODE,
+        FIELD_DART_SOURCE_COORDINATE,
+        FIELD_DART_CONTROL,
+        FIELD_DART_ROOT_SAMPLE_ID,
+        FIELD_DART_RNA_ID,
+        FIELD_DART_LAB_ID,
+    ]
+    return {column: row[DART_SAMPLES_COLUMN_INDEX[column]] for column in columns}
+
+
+def destination_samples_query(view: str, number_of_barcodes: int = 1) -> str:
+    """The query for the samples of destination plates, each from its latest run, with the barcodes as its parameters.
+
+    The text of the query only depends on the view and the number of barcodes so that SQL Server can cache its plan and
+    reuse it. The latest run of each plate is found in the same pass over the rows of the plates as the samples, with a
+    window function, rather than by a second query on the view.
 
     Arguments:
-        connection (Any): the connection to the DART database.
-        destination_barcode (str): destination barcode to get samples for.
+        view (str): the DART view to query, i.e. the DART_RESULT_VIEW config.
+        number_of_barcodes (int): the number of destination barcodes queried for.
 
     Returns:
-        List[Any]: from pyodbc documentation: "Returns a list of all the remaining rows in the query."
+        str: the query.
     """
-    logger.info(
-        f"SELECT-ing from DART '{app.config['DART_RESULT_VIEW']}' view for "
-        f"{FIELD_DART_DESTINATION_BARCODE}: {destination_barcode}"
-    )
-    cursor = connection.cursor()
-
-    cursor.execute(
-        f"SELECT * FROM {app.config['DART_RESULT_VIEW']}"
-        f" WHERE [{FIELD_DART_DESTINATION_BARCODE}]='{destination_barcode}'"
+    columns = ", ".join(f"[{column}]" for column in DART_SAMPLES_COLUMNS)
+    barcodes_filter = "= ?" if number_of_barcodes == 1 else f"IN ({', '.join('?' * number_of_barcodes)})"
+
+    return (
+        f"SELECT {columns} FROM ("
+        f" SELECT {columns}, [{FIELD_DART_RUN_ID}],"
+        f"  MAX([{FIELD_DART_RUN_ID}]) OVER (PARTITION BY [{FIELD_DART_DESTINATION_BARCODE}]) AS [latest_run_id]"
+        f" FROM {view}"
+        f" WHERE [{FIELD_DART_DESTINATION_BARCODE}] {barcodes_filter}"
+        f") AS [plate_rows]"
+        f" WHERE [{FIELD_DART_RUN_ID}] = [latest_run_id]"
         f" AND (([{FIELD_DART_ROOT_SAMPLE_ID}] IS NOT NULL"
-        f" AND [{FIELD_DART_ROOT_SAMPLE_ID}]<>''"
+        f" AND [{FIELD_DART_ROOT_SAMPLE_ID}] <> ''"
         f" AND [{FIELD_DART_RNA_ID}] IS NOT NULL"
         f" AND [{FIELD_DART_RNA_ID}] <> ''"
         f" AND [{FIELD_DART_LAB_ID}] IS NOT NULL"
         f" AND [{FIELD_DART_LAB_ID}] <> '')"
         f" OR ([{FIELD_DART_CONTROL}] IS NOT NULL AND [{FIELD_DART_CONTROL}] <> ''))"
-        f" AND [{FIELD_DART_RUN_ID}]=("
-        f"  SELECT MAX([{FIELD_DART_RUN_ID}])"
-        f"  FROM {app.config['DART_RESULT_VIEW']}"
-        f"  WHERE [{FIELD_DART_DESTINATION_BARCODE}]='{destination_barcode}');"
     )
 
-    rows: List[Any] = cursor.fetchall()
 
-    logger.info(f"{len(rows)} samples found in DART view")
+def get_samples_for_destination_barcode(connection: Any, destination_barcode: str) -> List[Tuple[Any, ...]]:
+    """Get the samples for a destination barcode from DART.
 
-    return rows
+    Arguments:
+        connection (Any): the connection to the DART database.
+        destination_barcode (str): destination barcode to get samples for.
+
+    Returns:
+        List[Tuple[Any, ...]]: the samples, with their values in the order of DART_SAMPLES_COLUMNS.
+    """
+    return get_samples_for_destination_barcodes(connection, [destination_barcode])[destination_barcode]
 
 
-def find_dart_source_samples_rows(barcode: str) -> List[Any]:
-    """Find the samples in DART for a given barcode.
+def get_samples_for_destination_barcodes(
+    connection: Any, destination_barcodes: List[str]
+) -> Dict[str, List[Tuple[Any, ...]]]:
+    """Get the samples for destination barcodes from DART, with a single query.
+
+    Arguments:
+        connection (Any): the connection to the DART database.
+        destination_barcodes (List[str]): destination barcodes to get samples for.
+
+    Returns:
+        Dict[str, List[Tuple[Any, ...]]]: the samples of each barcode, with their values in the order of
+        DART_SAMPLES_COLUMNS; an empty list for a barcode without samples.
+    """
+    logger.info(
+        f"SELECT-ing from DART '{app.config['DART_RESULT_VIEW']}' view for "
+        f"{FIELD_DART_DESTINATION_BARCODE}: {', '.join(destination_barcodes)}"
+    )
+    samples: Dict[str, List[Tuple[Any, ...]]] = {barcode: [] for barcode in destination_barcodes}
+    if not destination_barcodes:
+        return samples
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            destination_samples_query(app.config["DART_RESULT_VIEW"], len(destination_barcodes)),
+            *destination_barcodes,
+        )
+
+        # DART compares barcodes case insensitively, so its rows are matched to the barcodes given in the same way
+        barcodes_by_key = {barcode.lower(): barcode for barcode in destination_barcodes}
+        for row in cursor.fetchall():
+            row = tuple(row)
+            samples[barcodes_by_key[row[DART_SAMPLES_COLUMN_INDEX[FIELD_DART_DESTINATION_BARCODE]].lower()]].append(row)
+
+    logger.info(f"{sum(map(len, samples.values()))} samples found in DART view")
+
+    return samples
+
+
+def find_dart_source_samples_rows(barcode: str) -> List[Tuple[Any, ...]]:
+    """Find the samples in DART for a given barcode, using a connection from the pool of the app.
 
     Arguments:
         barcode (str): barcode to query.
 
     Returns:
-        List[Any]: rows of samples.
+        List[Tuple[Any, ...]]: rows of samples, with their values in the order of DART_SAMPLES_COLUMNS.
     """
     logger.info(f"Querying samples for destination plate with barcode: {barcode}")
 
-    # "Connections are automatically closed when they are deleted (typically when they go out of scope) so you should
-    #   not normally need to call this (.close())
-    #   https://github.com/mkleehammer/pyodbc/wiki/Connection#close
-    connection = create_dart_connection()
+    return find_dart_source_samples_rows_for_barcodes([barcode])[barcode]
+
+
+def find_dart_source_samples_rows_for_barcodes(barcodes: List[str]) -> Dict[str, List[Tuple[Any, ...]]]:
+    """Find the samples in DART for destination barcodes with a single query, using a connection from the pool of the
+    app.
 
-    samples = get_samples_for_destination_barcode(connection, barcode)
+    Arguments:
+        barcodes (List[str]): barcodes to query.
+
+    Returns:
+        Dict[str, List[Tuple[Any, ...]]]: rows of samples for each barcode, with their values in the order of
+        DART_SAMPLES_COLUMNS.
+    """
+    # fail fast while DART is failing, rather than waiting for the connection to time out
+    with circuit_breaker_guard(SERVICE_DART, failures=(pyodbc.Error,)):
+        pool = dart_connection_pool()
+
+        started_at = time.perf_counter()
+        with pool.connection() as connection:
+            connected_at = time.perf_counter()
+
+            samples = get_samples_for_destination_barcodes(connection, barcodes)
+
+    logger.info(
+        f"DART samples of {len(barcodes)} plates: connection in {connected_at - started_at:.3f}s, "
+        f"query in {time.perf_counter() - connected_at:.3f}s"
+    )
 
     return samples
@@ -4,7 +4,11 @@ from typing import Any, Dict, List, Optional, Tuple, Union, cast
 from eve import Eve
 from flask import current_app as app
 
-from lighthouse.constants.aggregation_stages import STAGES_FIT_TO_PICK_SAMPLES
+from lighthouse.constants.aggregation_stages import (
+    STAGES_FIT_TO_PICK_COUNTS_BY_PLATE,
+    STAGES_FIT_TO_PICK_SAMPLES,
+    STAGES_FIT_TO_PICK_SAMPLES_BY_PLATE,
+)
 from lighthouse.constants.fields import FIELD_PLATE_BARCODE
 from lighthouse.constants.general import (
     FACET_COUNT_FILTERED_POSITIVE,
@@ -61,6 +65,40 @@ def get_fit_to_pick_samples_and_counts(
     )
 
 
+def get_fit_to_pick_samples_and_counts_for_plates(
+    plate_barcodes: List[str], include_samples: bool = True
+) -> Dict[str, Dict[str, Any]]:
+    """Get the fit to pick samples and counts for many plates using a single aggregation, instead of running
+    `get_fit_to_pick_samples_and_counts` once per plate.
+
+    Args:
+        plate_barcodes (List[str]): the barcodes of the plates to look for.
+        include_samples (bool, optional): whether to return the fit to pick samples; when False only the counts are
+            calculated and no sample documents are returned by mongo. Defaults to True.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: the results keyed on plate barcode. Each result has the fit to pick samples and
+        counts keyed on the same names as the facets used by `get_fit_to_pick_samples_and_counts`. Plates without any
+        samples are not present in the results.
+    """
+    if not plate_barcodes:
+        return {}
+
+    samples_collection = cast(Eve, app).data.driver.db.samples
+
+    pipeline: List[Dict[str, Any]] = [{"$match": {FIELD_PLATE_BARCODE: {"$in": list(set(plate_barcodes))}}}]
+
+    pipeline.extend(STAGES_FIT_TO_PICK_SAMPLES_BY_PLATE if include_samples else STAGES_FIT_TO_PICK_COUNTS_BY_PLATE)
+
+    pretty(logger, pipeline)
+
+    results = {result.pop("_id"): result for result in samples_collection.aggregate(pipeline)}
+
+    logger.debug(f"Fit to pick results found for {len(results)} of {len(plate_barcodes)} plates")
+
+    return results
+
+
 def has_plate_map_data(plate_barcode: str) -> bool:
     """Determines whether there is plate map data for the provided barcode. Currently just a `count_documents` using
     the barcode and a limit of 1 to try keep it as fast as possible.
@@ -81,6 +119,27 @@ def has_plate_map_data(plate_barcode: str) -> bool:
     return False
 
 
+def get_plate_barcodes_with_plate_map_data(plate_barcodes: List[str]) -> List[str]:
+    """Determines which of the provided barcodes have plate map data. This is a single `distinct` on the plate barcode
+    which can be answered from the index on the field alone, without fetching any sample documents.
+
+    Args:
+        plate_barcodes (List[str]): the barcodes of the plates to look for.
+
+    Returns:
+        List[str]: the barcodes for which documents were found.
+    """
+    if not plate_barcodes:
+        return []
+
+    samples_collection = cast(Eve, app).data.driver.db.samples
+
+    return cast(
+        List[str],
+        samples_collection.distinct(FIELD_PLATE_BARCODE, {FIELD_PLATE_BARCODE: {"$in": list(set(plate_barcodes))}}),
+    )
+
+
 def is_integer(param: Optional[str]) -> bool:
     """
     Function that returns if the string provided can represent an integer.
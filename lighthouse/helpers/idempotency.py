@@ -0,0 +1,269 @@
+"""Make the endpoints which create plates idempotent, so that a retried request does not repeat the work of the first
+
+A request is identified by the Idempotency-Key header when the client sends one, or else by a key derived from the
+request by the endpoint (e.g. the barcode and type of the plate). The first request for a key claims it in the
+idempotency_keys collection and runs; a duplicate received while it runs waits for its result and a duplicate received
+once it has completed is answered with the stored response. Only successful responses are stored: a failed request did
+not create anything, so its key is released and a retry runs again.
+
+A route which answers 202 and does its work in a background job stores the 202, so that a retry is pointed at the same
+job. The job is given the claim of the request (see current_idempotency_claim) and releases it with
+release_idempotency_claim if it fails, so that a retry then submits a new job.
+
+Keys expire IDEMPOTENCY_KEY_TTL_SECONDS after the request completed, through a TTL index on `expires_at` (see
+lighthouse/db/mongo.py). A key claimed by a request which has not completed within IDEMPOTENCY_LEASE_SECONDS, e.g.
+because the process running it died, can be claimed by the next request.
+"""
+
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Optional, Tuple, cast
+from uuid import uuid4
+
+from eve import Eve
+from flask import current_app as app
+from flask import g, json, request
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from lighthouse.constants.fields import FIELD_MONGO_ID
+from lighthouse.constants.general import HEADER_IDEMPOTENCY_KEY
+from lighthouse.types import FlaskResponse
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEYS_COLLECTION = "idempotency_keys"
+
+FIELD_IDEMPOTENCY_STATUS = "status"
+FIELD_IDEMPOTENCY_OWNER = "owner"
+FIELD_IDEMPOTENCY_FINGERPRINT = "fingerprint"
+FIELD_IDEMPOTENCY_RESPONSE_BODY = "response_body"
+FIELD_IDEMPOTENCY_RESPONSE_STATUS = "response_status"
+FIELD_IDEMPOTENCY_LEASE_EXPIRES_AT = "lease_expires_at"
+FIELD_IDEMPOTENCY_EXPIRES_AT = "expires_at"
+
+IDEMPOTENCY_STATUS_IN_PROGRESS = "in_progress"
+IDEMPOTENCY_STATUS_COMPLETED = "completed"
+
+
+def idempotency_keys_collection() -> Collection:
+    return cast(Eve, app).data.driver.db[IDEMPOTENCY_KEYS_COLLECTION]
+
+
+def idempotent(
+    scope: str, derive_key: Callable[[], Optional[str]]
+) -> Callable[[Callable[[], FlaskResponse]], Callable[[], FlaskResponse]]:
+    """Decorate a Flask route so that duplicates of a request are answered with the response of the first.
+
+    Arguments:
+        scope (str): the name of the endpoint, which namespaces its keys.
+        derive_key (Callable[[], Optional[str]]): returns the key of the current request when it has no Idempotency-Key
+        header; None to run the request without idempotency, e.g. when it is invalid.
+
+    Returns:
+        Callable: the decorator.
+    """
+
+    def decorator(route: Callable[[], FlaskResponse]) -> Callable[[], FlaskResponse]:
+        @wraps(route)
+        def wrapper() -> FlaskResponse:
+            if not app.config.get("IDEMPOTENCY_ENABLED", False):
+                return route()
+
+            if (client_key := request.headers.get(HEADER_IDEMPOTENCY_KEY)) is not None:
+                # the same key sent with another request is a client error, so compare the requests
+                key, fingerprint = client_key, _request_fingerprint()
+            elif (derived_key := derive_key()) is not None:
+                key, fingerprint = derived_key, None
+            else:
+                return route()
+
+            return run_idempotently(f"{scope}:{key}", fingerprint, route)
+
+        return wrapper
+
+    return decorator
+
+
+def run_idempotently(key: str, fingerprint: Optional[str], route: Callable[[], FlaskResponse]) -> FlaskResponse:
+    """Run a route unless a request with the same key has run or is running, in which case its response is returned.
+
+    Arguments:
+        key (str): the key of the request, including its scope.
+        fingerprint (Optional[str]): a hash of the request, checked against the request which claimed the key.
+        route (Callable[[], FlaskResponse]): the route to run.
+
+    Returns:
+        FlaskResponse: the response of the route, or the stored response of the request which claimed the key.
+    """
+    owner = str(uuid4())
+
+    try:
+        response = _claim_or_wait(key, fingerprint, owner)
+    except PyMongoError as e:
+        # idempotency protects against retries, it should not make the endpoint unavailable
+        logger.error(f"Unable to claim idempotency key '{key}', running the request anyway")
+        logger.exception(e)
+
+        return route()
+
+    if response is not None:
+        return response
+
+    g.idempotency_claim = (key, owner)
+    try:
+        body, status = route()
+    except Exception:
+        _release(key, owner)
+        raise
+
+    _store_or_release(key, owner, body, status)
+
+    return body, status
+
+
+def current_idempotency_claim() -> Optional[Tuple[str, str]]:
+    """The claim of the request being run idempotently, for a route which hands the request over to a background job.
+
+    Returns:
+        Optional[Tuple[str, str]]: the key and owner of the claim; None if the request is not run idempotently.
+    """
+    return g.get("idempotency_claim")
+
+
+def release_idempotency_claim(key: str, owner: str) -> None:
+    """Release the claim of a request so that a retry runs again, e.g. when the job it submitted failed. Nothing is
+    released if the key has since been claimed by another request.
+
+    Arguments:
+        key (str): the key of the request, including its scope.
+        owner (str): the owner of the claim.
+    """
+    try:
+        _release(key, owner)
+    except PyMongoError as e:
+        # a retry will run again once the key expires
+        logger.error(f"Unable to release idempotency key '{key}'")
+        logger.exception(e)
+
+
+def _claim_or_wait(key: str, fingerprint: Optional[str], owner: str) -> Optional[FlaskResponse]:
+    # returns None once the key is claimed by this request, otherwise the response to answer the request with: that of
+    #   the request which claimed the key, or an error if it is a different request or still in progress
+    deadline = time.monotonic() + app.config["IDEMPOTENCY_WAIT_SECONDS"]
+    while (existing := _claim(key, fingerprint, owner)) is not None:
+        if fingerprint is not None and existing.get(FIELD_IDEMPOTENCY_FINGERPRINT) != fingerprint:
+            msg = f"The {HEADER_IDEMPOTENCY_KEY} '{key}' has already been used for a different request"
+
+            return {"errors": [msg]}, HTTPStatus.UNPROCESSABLE_ENTITY
+
+        if existing[FIELD_IDEMPOTENCY_STATUS] == IDEMPOTENCY_STATUS_COMPLETED:
+            logger.info(f"Returning the stored response for idempotency key '{key}'")
+
+            return (
+                json.loads(existing[FIELD_IDEMPOTENCY_RESPONSE_BODY]),
+                existing[FIELD_IDEMPOTENCY_RESPONSE_STATUS],
+            )
+
+        if time.monotonic() >= deadline:
+            msg = f"A request with the idempotency key '{key}' is still in progress, try again later"
+
+            return {"errors": [msg]}, HTTPStatus.CONFLICT
+
+        logger.debug(f"Waiting for the request in progress with idempotency key '{key}'")
+        time.sleep(app.config["IDEMPOTENCY_POLL_INTERVAL_SECONDS"])
+
+    return None
+
+
+def _store_or_release(key: str, owner: str, body: Dict[str, Any], status: int) -> None:
+    # only a successful response is stored, a failed request did not create anything and is run again when retried
+    try:
+        if HTTPStatus.OK <= status < HTTPStatus.MULTIPLE_CHOICES:
+            _complete(key, owner, body, status)
+        else:
+            _release(key, owner)
+    except PyMongoError as e:
+        # the request has run, so return its response; a retry will run again once the claim expires
+        logger.error(f"Unable to store the response for idempotency key '{key}'")
+        logger.exception(e)
+
+
+def _claim(key: str, fingerprint: Optional[str], owner: str) -> Optional[Dict[str, Any]]:
+    # returns None when the key was claimed by this request, otherwise the document of the request which claimed it
+    now = datetime.now(timezone.utc)
+    claim = {
+        FIELD_IDEMPOTENCY_STATUS: IDEMPOTENCY_STATUS_IN_PROGRESS,
+        FIELD_IDEMPOTENCY_OWNER: owner,
+        FIELD_IDEMPOTENCY_FINGERPRINT: fingerprint,
+        FIELD_IDEMPOTENCY_LEASE_EXPIRES_AT: now + timedelta(seconds=app.config["IDEMPOTENCY_LEASE_SECONDS"]),
+        # also set on the claim so that the keys of requests which never completed are removed
+        FIELD_IDEMPOTENCY_EXPIRES_AT: now + timedelta(seconds=app.config["IDEMPOTENCY_KEY_TTL_SECONDS"]),
+    }
+
+    try:
+        idempotency_keys_collection().insert_one({FIELD_MONGO_ID: key, **claim})
+
+        return None
+    except DuplicateKeyError:
+        pass
+
+    # the TTL monitor only runs every minute, and a lease can expire, so a key may be claimed again while it exists
+    taken_over = idempotency_keys_collection().find_one_and_update(
+        {
+            FIELD_MONGO_ID: key,
+            "$or": [
+                {FIELD_IDEMPOTENCY_EXPIRES_AT: {"$lte": now}},
+                {
+                    FIELD_IDEMPOTENCY_STATUS: IDEMPOTENCY_STATUS_IN_PROGRESS,
+                    FIELD_IDEMPOTENCY_LEASE_EXPIRES_AT: {"$lte": now},
+                },
+            ],
+        },
+        {"$set": claim},
+        return_document=ReturnDocument.AFTER,
+    )
+    if taken_over is not None:
+        logger.warning(f"Claimed the expired idempotency key '{key}'")
+
+        return None
+
+    if (existing := idempotency_keys_collection().find_one({FIELD_MONGO_ID: key})) is None:
+        # released in the meantime, so try again
+        return _claim(key, fingerprint, owner)
+
+    return existing
+
+
+def _complete(key: str, owner: str, body: Dict[str, Any], status: int) -> None:
+    idempotency_keys_collection().update_one(
+        {FIELD_MONGO_ID: key, FIELD_IDEMPOTENCY_OWNER: owner},
+        {
+            "$set": {
+                FIELD_IDEMPOTENCY_STATUS: IDEMPOTENCY_STATUS_COMPLETED,
+                # stored as JSON as the keys of a response are not necessarily valid mongo field names
+                FIELD_IDEMPOTENCY_RESPONSE_BODY: json.dumps(body),
+                FIELD_IDEMPOTENCY_RESPONSE_STATUS: int(status),
+                FIELD_IDEMPOTENCY_EXPIRES_AT: datetime.now(timezone.utc)
+                + timedelta(seconds=app.config["IDEMPOTENCY_KEY_TTL_SECONDS"]),
+            }
+        },
+    )
+
+
+def _release(key: str, owner: str) -> None:
+    idempotency_keys_collection().delete_one({FIELD_MONGO_ID: key, FIELD_IDEMPOTENCY_OWNER: owner})
+
+
+def _request_fingerprint() -> str:
+    fingerprint = hashlib.sha256()
+    for part in (request.method, request.path, request.query_string, request.get_data()):
+        fingerprint.update(part if isinstance(part, bytes) else part.encode())
+        fingerprint.update(b"\0")
+
+    return fingerprint.hexdigest()
@@ -3,13 +3,37 @@
 This file contains the following functions:
 
   * get_locations_from_labwhere - Make an API call to LabWhere to get locations
+  * get_labware_locations - Get the locations of many labwares, in concurrent batches and through a cache
   * set_locations_in_labwhere - Make an API call to LabWhere to update locations
 """
 
-from typing import List
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from typing import Dict, Iterable, List, Optional, cast
 
 import requests
+from eve import Eve
 from flask import current_app as app
+from pymongo import ReplaceOne
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+from lighthouse.classes.http_clients import http_client
+from lighthouse.constants.config import HTTP_SERVICE_LABWHERE
+from lighthouse.constants.fields import FIELD_MONGO_ID
+from lighthouse.exceptions import ReportCreationError
+
+logger = logging.getLogger(__name__)
+
+# The locations found in LabWhere, keyed on the labware barcode; each is removed once its expires_at has passed through
+#   a TTL index (see lighthouse/db/mongo.py)
+LABWARE_LOCATIONS_COLLECTION = "labware_locations"
+
+FIELD_LOCATION_BARCODE = "location_barcode"
+FIELD_LOCATED_AT = "located_at"
+FIELD_LOCATION_EXPIRES_AT = "expires_at"
 
 
 def get_locations_from_labwhere(labware_barcodes: List[str]) -> requests.Response:
@@ -25,12 +49,53 @@ def get_locations_from_labwhere(labware_barcodes: List[str]) -> requests.Respons
     Returns:
         requests.Response: the response from the request to LabWhere.
     """
-    return requests.post(
+    return http_client(HTTP_SERVICE_LABWHERE).post(
         f"{app.config['LABWHERE_URL']}/api/labwares_by_barcode?known=true",
         json={"barcodes": labware_barcodes},
     )
 
 
+def labware_locations_collection() -> Collection:
+    return cast(Eve, app).data.driver.db[LABWARE_LOCATIONS_COLLECTION]
+
+
+def get_labware_locations(labware_barcodes: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Get the locations of labwares from LabWhere.
+
+    Labwares located within the last LABWHERE_LOCATIONS_CACHE_TTL_SECONDS are read from the labware_locations collection
+    instead of LabWhere. The others are requested from LabWhere in batches of LABWHERE_LOCATIONS_BATCH_SIZE, up to
+    LABWHERE_LOCATIONS_MAX_WORKERS at a time, and cached; a labware which LabWhere does not know is cached too, without
+    a location, so that it is not requested again on each run. The cache is bypassed when it cannot be reached.
+
+    Arguments:
+        labware_barcodes (Iterable[str]): the barcodes of the labwares.
+
+    Raises:
+        ReportCreationError: if a response from LabWhere is not OK.
+
+    Returns:
+        Dict[str, Optional[str]]: the location barcode of each labware, "" for a labware which is not in a location and
+        None for a labware which LabWhere does not know.
+    """
+    barcodes = list(dict.fromkeys(labware_barcodes))
+    cache_enabled = app.config["LABWHERE_LOCATIONS_CACHE_ENABLED"]
+
+    locations = _cached_labware_locations(barcodes) if cache_enabled else {}
+    to_locate = [barcode for barcode in barcodes if barcode not in locations]
+
+    logger.info(f"{len(locations)} of {len(barcodes)} labware locations found in the cache")
+
+    if to_locate:
+        located = _locate_in_labwhere(to_locate)
+
+        if cache_enabled:
+            _cache_labware_locations(located)
+
+        locations.update(located)
+
+    return locations
+
+
 def set_locations_in_labwhere(
     labware_barcodes: List[str], location_barcode: str, user_barcode: str
 ) -> requests.Response:
@@ -53,7 +118,7 @@ def set_locations_in_labwhere(
     Returns:
         {requests.Response} -- The LabWhere response object
     """
-    return requests.post(
+    return http_client(HTTP_SERVICE_LABWHERE).post(
         f"{app.config['LABWHERE_URL']}/api/scans",
         json={
             "scan": {
@@ -63,3 +128,78 @@ def set_locations_in_labwhere(
             }
         },
     )
+
+
+def _locate_in_labwhere(labware_barcodes: List[str]) -> Dict[str, Optional[str]]:
+    batch_size = app.config["LABWHERE_LOCATIONS_BATCH_SIZE"]
+    batches = [
+        labware_barcodes[x : (x + batch_size)] for x in range(0, len(labware_barcodes), batch_size)  # noqa: E203
+    ]
+
+    flask_app = cast(Eve, app)._get_current_object()  # type: ignore
+
+    def locate(batch: List[str]) -> List[Dict[str, str]]:
+        with flask_app.app_context():
+            response = get_locations_from_labwhere(batch)
+
+        if response.status_code != HTTPStatus.OK:
+            raise ReportCreationError("Response from LabWhere is not OK")
+
+        return cast(List[Dict[str, str]], response.json())
+
+    logger.info(f"Getting locations from LabWhere for {len(labware_barcodes)} barcodes in {len(batches)} batches")
+
+    max_workers = min(app.config["LABWHERE_LOCATIONS_MAX_WORKERS"], len(batches))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="labwhere-locations") as executor:
+        records = [record for batch_records in executor.map(locate, batches) for record in batch_records]
+
+    # labwares which LabWhere does not know are not in its response
+    locations: Dict[str, Optional[str]] = dict.fromkeys(labware_barcodes)
+    locations.update({record["barcode"]: str(record["location_barcode"] or "") for record in records})
+
+    return locations
+
+
+def _cached_labware_locations(labware_barcodes: List[str]) -> Dict[str, Optional[str]]:
+    try:
+        return {
+            location[FIELD_MONGO_ID]: location[FIELD_LOCATION_BARCODE]
+            for location in labware_locations_collection().find(
+                {
+                    FIELD_MONGO_ID: {"$in": labware_barcodes},
+                    # the TTL monitor only runs once a minute
+                    FIELD_LOCATION_EXPIRES_AT: {"$gt": datetime.now(tz=timezone.utc)},
+                },
+                {FIELD_LOCATION_BARCODE: 1},
+            )
+        }
+    except PyMongoError as e:
+        logger.error("Unable to read the cached labware locations")
+        logger.exception(e)
+
+        return {}
+
+
+def _cache_labware_locations(locations: Dict[str, Optional[str]]) -> None:
+    located_at = datetime.now(tz=timezone.utc)
+    expires_at = located_at + timedelta(seconds=app.config["LABWHERE_LOCATIONS_CACHE_TTL_SECONDS"])
+
+    try:
+        labware_locations_collection().bulk_write(
+            [
+                ReplaceOne(
+                    {FIELD_MONGO_ID: barcode},
+                    {
+                        FIELD_LOCATION_BARCODE: location_barcode,
+                        FIELD_LOCATED_AT: located_at,
+                        FIELD_LOCATION_EXPIRES_AT: expires_at,
+                    },
+                    upsert=True,
+                )
+                for barcode, location_barcode in locations.items()
+            ],
+            ordered=False,
+        )
+    except PyMongoError as e:
+        logger.error("Unable to cache the labware locations")
+        logger.exception(e)
@@ -0,0 +1,179 @@
+"""Maintain the plate_summaries collection which holds the fit to pick summary of each source plate
+
+A summary document has '_id' set to the plate barcode and holds the same fields as a source plate lookup from /plates,
+which means a lookup can be answered by reading a single document instead of running the fit to pick aggregation.
+Plates without any samples do not have a summary. The summaries are kept up to date from change streams on the samples
+and priority_samples collections (see lighthouse.classes.plate_summaries_watcher) and can be rebuilt from scratch with
+the `flask plate-summaries rebuild` command.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, cast
+
+from eve import Eve
+from flask import current_app as app
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.collection import Collection
+
+from lighthouse.constants.fields import FIELD_BARCODE, FIELD_MONGO_ID, FIELD_PLATE_BARCODE, FIELD_SAMPLE_ID
+from lighthouse.constants.general import (
+    FACET_COUNT_FILTERED_POSITIVE,
+    FACET_COUNT_FIT_TO_PICK_SAMPLES,
+    FACET_COUNT_MUST_SEQUENCE,
+    FACET_COUNT_PREFERENTIALLY_SEQUENCE,
+    FACET_FIT_TO_PICK_SAMPLES,
+)
+from lighthouse.helpers.general import get_fit_to_pick_samples_and_counts_for_plates
+
+logger = logging.getLogger(__name__)
+
+PLATE_SUMMARIES_COLLECTION = "plate_summaries"
+
+FIELD_PLATE_SUMMARY_UPDATED_AT = "updated_at"
+
+
+def plate_summaries_collection() -> Collection:
+    return cast(Eve, app).data.driver.db[PLATE_SUMMARIES_COLLECTION]
+
+
+def build_plate_summary(barcode: str, results: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the summary document of a plate from its fit to pick results.
+
+    Arguments:
+        barcode (str): the barcode of the plate.
+        results (Dict[str, Any]): the results for the plate from `get_fit_to_pick_samples_and_counts_for_plates`.
+
+    Returns:
+        Dict[str, Any]: the summary document.
+    """
+    # imported here to avoid a circular import as the plates helpers read the summaries
+    from lighthouse.helpers.plates import pickable_sample_attributes
+
+    return {
+        FIELD_MONGO_ID: barcode,
+        "has_plate_map": True,
+        "count_fit_to_pick_samples": results.get(FACET_COUNT_FIT_TO_PICK_SAMPLES, 0),
+        "count_must_sequence": results.get(FACET_COUNT_MUST_SEQUENCE, 0),
+        "count_preferentially_sequence": results.get(FACET_COUNT_PREFERENTIALLY_SEQUENCE, 0),
+        "count_filtered_positive": results.get(FACET_COUNT_FILTERED_POSITIVE, 0),
+        "pickable_samples": [
+            pickable_sample_attributes(sample) for sample in results.get(FACET_FIT_TO_PICK_SAMPLES, [])
+        ],
+        FIELD_PLATE_SUMMARY_UPDATED_AT: datetime.now(),
+    }
+
+
+def refresh_plate_summaries(barcodes: Iterable[str]) -> int:
+    """Recalculate the summaries of the given plates and write them to the plate_summaries collection. The summary of
+    a plate which no longer has any samples is removed.
+
+    Arguments:
+        barcodes (Iterable[str]): the barcodes of the plates to refresh.
+
+    Returns:
+        int: the number of plates refreshed.
+    """
+    barcodes = [barcode for barcode in set(barcodes) if barcode]
+    if not barcodes:
+        return 0
+
+    results = get_fit_to_pick_samples_and_counts_for_plates(barcodes)
+
+    operations: List[Any] = []
+    for barcode in barcodes:
+        if (plate_results := results.get(barcode)) is not None:
+            operations.append(
+                ReplaceOne({FIELD_MONGO_ID: barcode}, build_plate_summary(barcode, plate_results), upsert=True)
+            )
+        else:
+            operations.append(DeleteOne({FIELD_MONGO_ID: barcode}))
+
+    plate_summaries_collection().bulk_write(operations, ordered=False)
+
+    logger.debug(f"Refreshed the summaries of {len(barcodes)} plates")
+
+    return len(barcodes)
+
+
+def rebuild_plate_summaries(batch_size: int = 500) -> int:
+    """Rebuild the plate_summaries collection from scratch, e.g. when bootstrapping the collection or after the change
+    stream listener has been stopped for longer than the oplog window.
+
+    Arguments:
+        batch_size (int, optional): the number of plates to summarise per aggregation. Defaults to 500.
+
+    Returns:
+        int: the number of plate summaries written.
+    """
+    logger.info("Rebuilding the plate summaries")
+
+    started_at = datetime.now()
+    samples_collection = cast(Eve, app).data.driver.db.samples
+
+    barcodes: List[str] = samples_collection.distinct(FIELD_PLATE_BARCODE, {FIELD_PLATE_BARCODE: {"$nin": ["", None]}})
+
+    for start in range(0, len(barcodes), batch_size):
+        refresh_plate_summaries(barcodes[start : (start + batch_size)])  # noqa: E203
+
+    # anything not refreshed by this rebuild belongs to a plate which no longer exists
+    deleted = plate_summaries_collection().delete_many({FIELD_PLATE_SUMMARY_UPDATED_AT: {"$lt": started_at}})
+
+    logger.info(f"Rebuilt {len(barcodes)} plate summaries, removed {deleted.deleted_count} stale summaries")
+
+    return len(barcodes)
+
+
+def get_plate_summaries(barcodes: List[str], fields: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Read the summaries of the given plates.
+
+    Arguments:
+        barcodes (List[str]): the barcodes of the plates.
+        fields (Optional[List[str]]): only return these fields of the summaries; all fields if None.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: the summaries keyed on plate barcode. Plates without a summary are not present.
+    """
+    projection = {FIELD_MONGO_ID: True, **{field: True for field in fields}} if fields is not None else None
+
+    return {
+        summary[FIELD_MONGO_ID]: summary
+        for summary in plate_summaries_collection().find({FIELD_MONGO_ID: {"$in": list(set(barcodes))}}, projection)
+    }
+
+
+def plate_barcodes_for_change(change: Dict[str, Any]) -> Set[str]:
+    """Determine which plates are affected by a change event from the samples, priority_samples or source_plates
+    collections.
+
+    Arguments:
+        change (Dict[str, Any]): a change event from a change stream opened with `full_document="updateLookup"` and
+            `full_document_before_change="whenAvailable"`.
+
+    Returns:
+        Set[str]: the barcodes of the affected plates.
+    """
+    collection_name = change.get("ns", {}).get("coll")
+
+    # deletes only carry the document before the change, and only when pre-images are enabled on the collection
+    documents = [doc for doc in (change.get("fullDocument"), change.get("fullDocumentBeforeChange")) if doc]
+
+    if collection_name == "samples":
+        return {barcode for doc in documents if (barcode := doc.get(FIELD_PLATE_BARCODE))}
+
+    if collection_name == "priority_samples":
+        sample_ids = {sample_id for doc in documents if (sample_id := doc.get(FIELD_SAMPLE_ID)) is not None}
+        if not sample_ids:
+            return set()
+
+        samples_collection = cast(Eve, app).data.driver.db.samples
+        samples = samples_collection.find(
+            {FIELD_MONGO_ID: {"$in": list(sample_ids)}}, {FIELD_PLATE_BARCODE: True, FIELD_MONGO_ID: False}
+        )
+
+        return {barcode for sample in samples if (barcode := sample.get(FIELD_PLATE_BARCODE))}
+
+    if collection_name == "source_plates":
+        return {barcode for doc in documents if (barcode := doc.get(FIELD_BARCODE))}
+
+    return set()
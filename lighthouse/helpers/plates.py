@@ -1,6 +1,9 @@
 import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from time import sleep
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union, cast
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar, Union, cast
 from uuid import uuid4
 
 import requests
@@ -8,7 +11,12 @@ from eve import Eve
 from flask import current_app as app
 
 from lighthouse.classes.beckman import Beckman
-from lighthouse.constants.config import SS_UUID_PLATE_PURPOSE, SS_UUID_STUDY
+from lighthouse.classes.circuit_breaker import CircuitOpenError
+from lighthouse.classes.dart_samples_join import DartSamplesJoin
+from lighthouse.classes.http_clients import http_client
+from lighthouse.classes.plate_cache import PlateCache
+from lighthouse.classes.plate_layout import unpad_coordinate
+from lighthouse.constants.config import HTTP_SERVICE_SEQUENCESCAPE, SS_UUID_PLATE_PURPOSE, SS_UUID_STUDY
 from lighthouse.constants.events import PE_BECKMAN_DESTINATION_CREATED, PE_BECKMAN_DESTINATION_FAILED
 from lighthouse.constants.fields import (
     FIELD_BARCODE,
@@ -17,10 +25,6 @@ from lighthouse.constants.fields import (
     FIELD_DART_CONTROL,
     FIELD_DART_DESTINATION_BARCODE,
     FIELD_DART_DESTINATION_COORDINATE,
-    FIELD_DART_LAB_ID,
-    FIELD_DART_LH_SAMPLE_UUID,
-    FIELD_DART_RNA_ID,
-    FIELD_DART_ROOT_SAMPLE_ID,
     FIELD_DART_SOURCE_BARCODE,
     FIELD_DART_SOURCE_COORDINATE,
     FIELD_LAB_ID,
@@ -47,7 +51,16 @@ from lighthouse.constants.fields import (
     FIELD_SS_SUPPLIER_NAME,
     FIELD_SS_UUID,
 )
-from lighthouse.constants.general import ARG_TYPE_DESTINATION, ARG_TYPE_SOURCE, BIOSCAN_PLATE_PURPOSE
+from lighthouse.constants.general import (
+    ARG_TYPE_DESTINATION,
+    ARG_TYPE_SOURCE,
+    BIOSCAN_PLATE_PURPOSE,
+    FACET_COUNT_FILTERED_POSITIVE,
+    FACET_COUNT_FIT_TO_PICK_SAMPLES,
+    FACET_COUNT_MUST_SEQUENCE,
+    FACET_COUNT_PREFERENTIALLY_SEQUENCE,
+    FACET_FIT_TO_PICK_SAMPLES,
+)
 from lighthouse.constants.jsonapi import (
     JS_ALIQUOTS,
     JS_ATTRIBUTES,
@@ -71,6 +84,7 @@ from lighthouse.constants.jsonapi import (
     JS_TYPE,
     JS_WELLS,
 )
+from lighthouse.db.mongo import CENTRE_NAME_COLLATION
 from lighthouse.exceptions import DataError, MissingCentreError, MissingSourceError, MultipleCentresError
 from lighthouse.helpers.dart import find_dart_source_samples_rows
 from lighthouse.helpers.events import (
@@ -80,8 +94,13 @@ from lighthouse.helpers.events import (
     construct_source_plate_message_subject,
     get_message_timestamp,
 )
-from lighthouse.helpers.general import get_fit_to_pick_samples_and_counts, has_plate_map_data
-from lighthouse.helpers.reports import unpad_coordinate
+from lighthouse.helpers.general import (
+    get_fit_to_pick_samples_and_counts,
+    get_fit_to_pick_samples_and_counts_for_plates,
+    get_plate_barcodes_with_plate_map_data,
+    has_plate_map_data,
+)
+from lighthouse.helpers.plate_summaries import get_plate_summaries
 from lighthouse.messages.message import Message
 from lighthouse.types import SampleDoc, SampleDocs
 
@@ -114,12 +133,13 @@ def get_centre_prefix(centre_name):
         #  get the centre collection
         centres = cast(Eve, app).data.driver.db.centres
 
-        # use a case insensitive search for the centre name
-        filter = {"name": {"$regex": f"^(?i){centre_name}$"}}
+        # use a case insensitive search for the centre name; the collation matches the index on the centre name,
+        #   unlike a case insensitive regex which scans the whole index
+        filter = {"name": centre_name}
 
-        assert centres.count_documents(filter) == 1
+        assert centres.count_documents(filter, collation=CENTRE_NAME_COLLATION) == 1
 
-        centre = centres.find_one(filter)
+        centre = centres.find_one(filter, collation=CENTRE_NAME_COLLATION)
 
         prefix = centre["prefix"]
 
@@ -158,111 +178,93 @@ def find_samples(query: Optional[Dict[str, Any]] = None) -> Optional[List[Sample
     return samples
 
 
-def row_is_normal_sample(row):
-    control_value = getattr(row, FIELD_DART_CONTROL)
-    return control_value is None or control_value == "NULL" or control_value == ""
-
-
-def rows_without_controls(rows):
-    return list(filter(lambda x: row_is_normal_sample(x), rows))
-
-
-def rows_with_controls(rows):
-    return list(filter(lambda x: not row_is_normal_sample(x), rows))
-
-
-def query_for_cherrypicked_samples(rows: Optional[List[SampleDoc]]) -> Optional[Dict[str, Any]]:
-    if rows is None or not rows:
-        return None
+def request_with_retries(
+    request_func: Callable, response_func: Callable[[Any], T], max_retries=3, backoff_seconds: float = 1
+) -> T:
+    attempt = 1
 
-    return {
-        "$or": [{FIELD_LH_SAMPLE_UUID: getattr(row, FIELD_DART_LH_SAMPLE_UUID)} for row in rows_without_controls(rows)]
-    }
+    while attempt <= max_retries:
+        LOGGER.debug(f"Starting attempt {attempt} of {max_retries}...")
 
+        try:
+            response = request_func()
 
-def equal_row_and_sample(row, sample):
-    return sample[FIELD_LH_SAMPLE_UUID] == getattr(row, FIELD_DART_LH_SAMPLE_UUID)
+            if response.status_code == 200:
+                return response_func(response)
 
+            LOGGER.debug(f"Attempt failed due to an invalid status code {response.status_code}.")
+        except CircuitOpenError:
+            # retrying would fail fast again, so give up rather than waiting for the circuit to be probed
+            LOGGER.debug("Attempt failed as the circuit of the service is open.")
+            break
+        except requests.ConnectionError:
+            LOGGER.debug("Attempt failed due to a connection error.")
 
-def find_sample_matching_row(row, samples):
-    return next((sample for sample in samples if equal_row_and_sample(row, sample)), None)
+        if attempt < max_retries:
+            # exponential backoff with full jitter so that concurrent requests do not retry in lockstep
+            delay = random.uniform(0, backoff_seconds * 2 ** (attempt - 1))
+            LOGGER.debug(f"Pausing {delay:.2f} seconds before trying again.")
+            sleep(delay)
 
+        attempt += 1
 
-def join_rows_with_samples(rows, samples):
-    return [
-        {"row": row_to_dict(row), "sample": find_sample_matching_row(row, samples)}
-        for row in rows_without_controls(rows)
-    ]
+    raise requests.ConnectionError("Unable to access Sequencescape.")
 
 
-def add_controls_to_samples(rows, samples):
-    control_samples = [{"row": row_to_dict(row), "sample": None} for row in rows_with_controls(rows)]
-    return samples + control_samples
+def filter_for_new_samples(samples: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Filter out the samples which already exist in Sequencescape. The sample UUIDs are looked up in batches of
+    SS_SAMPLES_LOOKUP_BATCH_SIZE with a `filter[uuid]=u1,u2` query, running up to SS_SAMPLES_LOOKUP_MAX_WORKERS queries
+    at a time. Each query is retried with exponential backoff by the Sequencescape client.
 
+    Arguments:
+        samples (List[Dict[str, str]]): the samples to filter.
 
-def check_matching_sample_numbers(rows, samples):
-    return len(samples) == len(rows_without_controls(rows))
+    Returns:
+        List[Dict[str, str]]: the samples which are not in Sequencescape, in the same order as given.
+    """
+    LOGGER.debug(f"Filtering for new samples in Sequencescape from a total of {len(samples)}.")
 
+    sample_uuids = list(dict.fromkeys(sample[FIELD_LH_SAMPLE_UUID] for sample in samples))
 
-def row_to_dict(row):
-    columns = [
-        FIELD_DART_DESTINATION_BARCODE,
-        FIELD_DART_DESTINATION_COORDINATE,
-        FIELD_DART_SOURCE_BARCODE,
-        FIELD_DART_SOURCE_COORDINATE,
-        FIELD_DART_CONTROL,
-        FIELD_DART_ROOT_SAMPLE_ID,
-        FIELD_DART_RNA_ID,
-        FIELD_DART_LAB_ID,
+    # read from the app config and the app's clients here as the lookups are run outside of the app context
+    ss_url = f"{app.config['SS_URL']}/api/v2/samples"
+    headers = _ss_headers()
+    ss_client = http_client(HTTP_SERVICE_SEQUENCESCAPE)
+    batch_size = app.config["SS_SAMPLES_LOOKUP_BATCH_SIZE"]
+    batches = [
+        sample_uuids[start : (start + batch_size)] for start in range(0, len(sample_uuids), batch_size)  # noqa: E203
     ]
-    obj = {}
-    for column in columns:
-        obj[column] = getattr(row, column)
-    return obj
-
 
-def request_with_retries(request_func: Callable, response_func: Callable[[Any], T], max_retries=3) -> T:
-    attempt = 1
+    def existing_sample_uuids(batch: List[str]) -> Set[str]:
+        # a page as big as the batch, so that all the samples found are returned
+        params = {"filter[uuid]": ",".join(batch), "fields[samples]": "uuid", "page[size]": len(batch)}
 
-    while attempt <= max_retries:
-        LOGGER.debug(f"Starting attempt {attempt} of {max_retries}...")
+        LOGGER.debug(f"Searching Sequencescape for {len(batch)} samples by UUID.")
 
+        # the client has already retried connection errors and failed responses by the time it returns
         try:
-            response = request_func()
-
-            if response.status_code == 200:
-                return response_func(response)
+            response = ss_client.get(ss_url, params=params, headers=headers)
+        except (requests.ConnectionError, CircuitOpenError):
+            raise requests.ConnectionError("Unable to access Sequencescape.")
 
-            LOGGER.debug(
-                f"Attempt failed due to an invalid status code {response.status_code}. "
-                "Pausing 1 second before trying again."
-            )
-            attempt += 1
-            sleep(1)
-        except requests.ConnectionError:
-            LOGGER.debug("Attempt failed due to a connection error. Pausing 1 second before trying again.")
-            attempt += 1
-            sleep(1)
-
-    raise requests.ConnectionError("Unable to access Sequencescape.")
+        if response.status_code != 200:
+            raise requests.ConnectionError("Unable to access Sequencescape.")
 
+        data = response.json()["data"]
 
-def filter_for_new_samples(samples: List[Dict[str, str]]) -> List[Dict[str, str]]:
-    def is_sample_new(sample: Dict[str, str]) -> bool:
-        sample_uuid = sample[FIELD_LH_SAMPLE_UUID]
-        ss_url = f"{app.config['SS_URL']}/api/v2/samples"
-        params = {"filter[uuid]": sample_uuid}
-        headers = _ss_headers()
+        # a single UUID does not need to be matched to the sample found
+        if len(batch) == 1:
+            return set(batch) if data else set()
 
-        LOGGER.debug(f"Searching Sequencescape for sample with UUID: '{sample_uuid}'.")
+        return {uuid for sample in data if (uuid := sample.get("attributes", {}).get("uuid"))}
 
-        return request_with_retries(
-            request_func=lambda: requests.get(ss_url, params=params, headers=headers),
-            response_func=lambda response: len(response.json()["data"]) == 0,
-        )
+    if len(batches) <= 1:
+        existing = set().union(*map(existing_sample_uuids, batches))
+    else:
+        with ThreadPoolExecutor(max_workers=min(len(batches), app.config["SS_SAMPLES_LOOKUP_MAX_WORKERS"])) as executor:
+            existing = set().union(*executor.map(existing_sample_uuids, batches))
 
-    LOGGER.debug(f"Filtering for new samples in Sequencescape from a total of {len(samples)}.")
-    filtered_samples = [sample for sample in samples if is_sample_new(sample)]
+    filtered_samples = [sample for sample in samples if sample[FIELD_LH_SAMPLE_UUID] not in existing]
     LOGGER.debug(f"{len(filtered_samples)} samples were not found in Sequencescape and therefore new.")
 
     return filtered_samples
@@ -271,7 +273,7 @@ def filter_for_new_samples(samples: List[Dict[str, str]]) -> List[Dict[str, str]
 def create_post_body(barcode: str, plate_config: dict, samples: List[Dict[str, str]]) -> Dict[str, Any]:
     LOGGER.debug(f"Creating POST body to send to Sequencescape for barcode '{barcode}'")
 
-    wells_content = {}
+    wells_content: Dict[str, Dict[str, Any]] = {}
     phenotype = None
     description = None
     for sample in samples:
@@ -323,7 +325,7 @@ def send_to_ss_heron_plates(body: Dict[str, Any]) -> requests.Response:
     LOGGER.info(f"Sending request to: {ss_url}")
 
     try:
-        response = requests.post(ss_url, json=body, headers=headers)
+        response = http_client(HTTP_SERVICE_SEQUENCESCAPE).post(ss_url, json=body, headers=headers)
 
         LOGGER.debug(f"Response status code: {response.status_code}")
 
@@ -336,16 +338,22 @@ class ControlLocations:
     def __init__(self, included: list) -> None:
         self.included = included
 
+        # index the included data so that each lookup is a dict access instead of a scan of the included list
+        self._included_by_type_and_id = {(elem[JS_TYPE], elem[JS_ID]): elem for elem in included}
+
     def _get_sample_control_type(self, sample_id: list) -> Optional[str]:
-        # Get the first sample
-        sample = next(elem for elem in self.included if elem[JS_TYPE] == JS_SAMPLES and elem[JS_ID] == sample_id)
+        sample = self._included_by_type_and_id[(JS_SAMPLES, sample_id)]
 
         # Return the control type of the sample, if sample is a control
         return sample[JS_ATTRIBUTES][JS_CONTROL_TYPE] if sample[JS_ATTRIBUTES][JS_CONTROL] is True else None
 
     def _get_control_types_for_aliquots(self, aliquot_ids: list) -> List[str]:
         # Get aliquots from included data
-        aliquots = [elem for elem in self.included if elem[JS_TYPE] == JS_ALIQUOTS and elem[JS_ID] in aliquot_ids]
+        aliquots = [
+            aliquot
+            for aliquot_id in aliquot_ids
+            if (aliquot := self._included_by_type_and_id.get((JS_ALIQUOTS, aliquot_id))) is not None
+        ]
 
         # Get the sample ids for the aliquot
         sample_ids = [aliquot[JS_RELATIONSHIPS][JS_SAMPLE][JS_DATA][JS_ID] for aliquot in aliquots]
@@ -363,16 +371,15 @@ class ControlLocations:
             # We expect there to only be one control per well
             return control_types[0] if len(control_types) == 1 else None
 
-        # Get wells from included data
-        wells = [elem for elem in self.included if elem[JS_TYPE] == JS_WELLS]
-
-        # For each well, get the control type for the well
-        # Create dict with key: well position, and value: control type
-        # control_types = { "A1": "pcr pos", "B1": None, .....}
-        control_types = {well[JS_ATTRIBUTES][JS_POSITION][JS_NAME]: get_control_type_for_well(well) for well in wells}
+        # For each well in the included data, get the control type for the well
+        # Create a dictionary with key: well position, and value: control type, for the wells which are controls
+        # control_types = { "A1": "pcr pos", "H12": "pcr neg" }
+        control_types: Dict[str, str] = {}
+        for well in (elem for elem in self.included if elem[JS_TYPE] == JS_WELLS):
+            if (control_type := get_control_type_for_well(well)) is not None:
+                control_types[well[JS_ATTRIBUTES][JS_POSITION][JS_NAME]] = control_type
 
-        # Filter out any wells which are not controls
-        return {k: v for (k, v) in control_types.items() if v is not None}
+        return control_types
 
 
 def convert_json_response_into_dict(barcode: str, json) -> dict:
@@ -433,7 +440,7 @@ def get_from_ss_plates_samples_info(plate_barcode: str) -> requests.Response:
 
     try:
         params = {"filter[barcode]": plate_barcode, "include": "purpose,receptacles.aliquots.sample"}
-        response = requests.get(f"{ss_url}", params=params, headers=headers)
+        response = http_client(HTTP_SERVICE_SEQUENCESCAPE).get(ss_url, params=params, headers=headers)
 
         LOGGER.debug(f"Response status code: {response.status_code}")
 
@@ -488,7 +495,7 @@ def create_cherrypicked_post_body(
 ):
     LOGGER.debug(f"Creating POST body to send to Sequencescape for cherrypicked plate with barcode '{barcode}'")
 
-    wells_content = {}
+    wells_content: Dict[str, Dict[str, Any]] = {}
     for sample in samples:
         content = {}
 
@@ -603,16 +610,14 @@ def construct_cherrypicking_plate_failed_message(
             LOGGER.info(msg)
             errors.append(msg)
         else:
-            mongo_samples = find_samples(query_for_cherrypicked_samples(dart_samples))
-            if mongo_samples is None:
-                return [f"No sample data found in Mongo matching DART samples in plate '{barcode}'"], None
+            join = DartSamplesJoin(dart_samples)
+            mongo_samples = join.find_samples()
 
-            if not check_matching_sample_numbers(dart_samples, mongo_samples):
+            if not join.has_matching_sample_numbers():
                 return [f"Mismatch in destination and source sample data for plate '{barcode}'"], None
 
             # Add sample subjects for control and non-control DART entries
-            dart_control_rows = [row_to_dict(row) for row in rows_with_controls(dart_samples)]
-            subjects.extend([__sample_subject_for_dart_control_row(r) for r in dart_control_rows])
+            subjects.extend([__sample_subject_for_dart_control_row(r) for r in join.control_rows_as_dicts()])
             subjects.extend([construct_mongo_sample_message_subject(s) for s in mongo_samples])
 
             # Add source plate subjects
@@ -743,11 +748,29 @@ def __sample_subject_for_dart_control_row(dart_control_row: Dict[str, str]) -> D
     }
 
 
+# The data which needs to be fetched from mongo to render each field of a source plate lookup; the plate map probe is
+#   the cheapest, followed by the fit to pick counts and then the fit to pick samples themselves
+SOURCE_PLATE_DATA_PLATE_MAP = "plate_map"
+SOURCE_PLATE_DATA_FIT_TO_PICK_COUNTS = "fit_to_pick_counts"
+SOURCE_PLATE_DATA_FIT_TO_PICK_SAMPLES = "fit_to_pick_samples"
+
+SOURCE_PLATE_FIELD_DEPENDENCIES: Dict[str, Optional[str]] = {
+    "plate_barcode": None,
+    "has_plate_map": SOURCE_PLATE_DATA_PLATE_MAP,
+    "count_fit_to_pick_samples": SOURCE_PLATE_DATA_FIT_TO_PICK_COUNTS,
+    "count_must_sequence": SOURCE_PLATE_DATA_FIT_TO_PICK_COUNTS,
+    "count_preferentially_sequence": SOURCE_PLATE_DATA_FIT_TO_PICK_COUNTS,
+    "count_filtered_positive": SOURCE_PLATE_DATA_FIT_TO_PICK_COUNTS,
+    "pickable_samples": SOURCE_PLATE_DATA_FIT_TO_PICK_SAMPLES,
+}
+
+
 def source_plate_field_generators(
     barcode: str,
 ) -> Dict[str, Callable[[], Union[str, bool, SampleDocs, Optional[int]]]]:
     """Creates an ungenerated response for a source plate lookup by creating lambda functions that can be called when
-    the associated field is needed.
+    the associated field is needed. The fit to pick aggregation is only run (once) when the first field needing it is
+    generated.
 
     Arguments:
         barcode (str): barcode of plate to get information for.
@@ -756,31 +779,116 @@ def source_plate_field_generators(
         Dict[str, Callable[[], Union[str, bool, SampleDocs, Optional[int]]]]: dict with lambda expresions to
         calculate the associated field when needed.
     """
-    (
-        fit_to_pick_samples,
-        count_fit_to_pick_samples,
-        count_must_sequence,
-        count_preferentially_sequence,
-        count_filtered_positive,
-    ) = get_fit_to_pick_samples_and_counts(barcode)
+
+    @lru_cache(maxsize=None)
+    def fit_to_pick_samples_and_counts():
+        return get_fit_to_pick_samples_and_counts(barcode)
+
+    def count_at(index: int) -> Callable[[], int]:
+        return lambda: (value if (value := fit_to_pick_samples_and_counts()[index]) is not None else 0)
 
     return {
         "plate_barcode": lambda: barcode,
         "has_plate_map": lambda: has_plate_map_data(barcode),
-        "count_fit_to_pick_samples": lambda: (
-            count_fit_to_pick_samples if count_fit_to_pick_samples is not None else 0
-        ),
-        "count_must_sequence": lambda: (count_must_sequence if count_must_sequence is not None else 0),
-        "count_preferentially_sequence": lambda: (
-            count_preferentially_sequence if count_preferentially_sequence is not None else 0
+        "count_fit_to_pick_samples": count_at(1),
+        "count_must_sequence": count_at(2),
+        "count_preferentially_sequence": count_at(3),
+        "count_filtered_positive": count_at(4),
+        "pickable_samples": lambda: list(
+            map(pickable_sample_attributes, cast(Iterable[SampleDoc], fit_to_pick_samples_and_counts()[0]))
         ),
-        "count_filtered_positive": lambda: (count_filtered_positive if count_filtered_positive is not None else 0),
+    }
+
+
+def source_plate_field_generators_from_results(
+    barcode: str, results: Optional[Dict[str, Any]]
+) -> Dict[str, Callable[[], Union[str, bool, SampleDocs, Optional[int]]]]:
+    """Creates an ungenerated response for a source plate lookup from the results of `fetch_source_plates_data`, which
+    have already been fetched for many plates at once.
+
+    Arguments:
+        barcode (str): barcode of plate to get information for.
+        results (Optional[Dict[str, Any]]): the fit to pick results for the plate; None if the plate has no samples.
+
+    Returns:
+        Dict[str, Callable[[], Union[str, bool, SampleDocs, Optional[int]]]]: dict with lambda expresions to
+        calculate the associated field when needed.
+    """
+    plate_results = results if results is not None else {}
+
+    return {
+        "plate_barcode": lambda: barcode,
+        # the results only include plates which have samples, i.e. plate map data
+        "has_plate_map": lambda: results is not None,
+        "count_fit_to_pick_samples": lambda: plate_results.get(FACET_COUNT_FIT_TO_PICK_SAMPLES, 0),
+        "count_must_sequence": lambda: plate_results.get(FACET_COUNT_MUST_SEQUENCE, 0),
+        "count_preferentially_sequence": lambda: plate_results.get(FACET_COUNT_PREFERENTIALLY_SEQUENCE, 0),
+        "count_filtered_positive": lambda: plate_results.get(FACET_COUNT_FILTERED_POSITIVE, 0),
         "pickable_samples": lambda: list(
-            map(pickable_sample_attributes, cast(Iterable[SampleDoc], fit_to_pick_samples))
+            map(pickable_sample_attributes, plate_results.get(FACET_FIT_TO_PICK_SAMPLES, []))
         ),
     }
 
 
+def source_plate_field_generators_from_summary(
+    barcode: str, summary: Optional[Dict[str, Any]]
+) -> Dict[str, Callable[[], Union[str, bool, SampleDocs, Optional[int]]]]:
+    """Creates an ungenerated response for a source plate lookup from the plate's document in the plate_summaries
+    collection.
+
+    Arguments:
+        barcode (str): barcode of plate to get information for.
+        summary (Optional[Dict[str, Any]]): the summary of the plate; None if the plate has no samples.
+
+    Returns:
+        Dict[str, Callable[[], Union[str, bool, SampleDocs, Optional[int]]]]: dict with lambda expresions to
+        calculate the associated field when needed.
+    """
+    plate_summary = summary if summary is not None else {}
+
+    return {
+        "plate_barcode": lambda: barcode,
+        "has_plate_map": lambda: summary is not None,
+        "count_fit_to_pick_samples": lambda: plate_summary.get("count_fit_to_pick_samples", 0),
+        "count_must_sequence": lambda: plate_summary.get("count_must_sequence", 0),
+        "count_preferentially_sequence": lambda: plate_summary.get("count_preferentially_sequence", 0),
+        "count_filtered_positive": lambda: plate_summary.get("count_filtered_positive", 0),
+        "pickable_samples": lambda: plate_summary.get("pickable_samples", []),
+    }
+
+
+def fetch_source_plates_data(barcodes: List[str], fields: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Plans and runs the queries needed to render the given fields for many source plates. Only the cheapest query
+    which can answer all the fields is run:
+    - the fit to pick samples aggregation if 'pickable_samples' is needed
+    - the fit to pick counts aggregation, which does not return any sample documents, if only counts are needed
+    - a plate map probe if only 'has_plate_map' is needed
+    - nothing if no field depends on mongo, e.g. only 'plate_barcode'
+
+    Arguments:
+        barcodes (List[str]): barcodes of the plates to fetch data for.
+        fields (List[str]): the fields which will be rendered.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: the results keyed on plate barcode, as expected by
+        `source_plate_field_generators_from_results`. Plates without any samples are not present in the results.
+    """
+    required_data = {SOURCE_PLATE_FIELD_DEPENDENCIES.get(field) for field in fields}
+
+    LOGGER.debug(f"Data required to render fields {fields}: {required_data - {None}}")
+
+    if SOURCE_PLATE_DATA_FIT_TO_PICK_SAMPLES in required_data:
+        return get_fit_to_pick_samples_and_counts_for_plates(barcodes)
+
+    if SOURCE_PLATE_DATA_FIT_TO_PICK_COUNTS in required_data:
+        return get_fit_to_pick_samples_and_counts_for_plates(barcodes, include_samples=False)
+
+    if SOURCE_PLATE_DATA_PLATE_MAP in required_data:
+        return {barcode: {} for barcode in get_plate_barcodes_with_plate_map_data(barcodes)}
+
+    return {}
+
+
 def destination_plate_field_generators(
     barcode: str,
 ) -> Dict[str, Callable[[], Union[str, bool]]]:
@@ -800,6 +908,26 @@ def destination_plate_field_generators(
     }
 
 
+def destination_plate_field_generators_from_results(
+    barcode: str, plates_exist: Dict[str, bool]
+) -> Dict[str, Callable[[], Union[str, bool]]]:
+    """Creates an ungenerated response for a destination plate lookup from the results of
+    `plates_exist_in_ss_with_barcodes`, which have already been fetched for many plates at once.
+
+    Arguments:
+        barcode (str): barcode of plate to get information for.
+        plates_exist (Dict[str, bool]): whether each plate exists in Sequencescape, keyed on barcode.
+
+    Returns:
+        Dict[str, Callable[[], Union[str, bool]]]: dict with lambda expresions to calculate the associated field when
+        needed.
+    """
+    return {
+        "plate_barcode": lambda: barcode,
+        "plate_exists": lambda: plates_exist[barcode],
+    }
+
+
 def plate_exists_in_ss_with_barcode(barcode: str) -> bool:
     """Check if a plate with given barcode exists in Sequencescape.
 
@@ -810,47 +938,91 @@ def plate_exists_in_ss_with_barcode(barcode: str) -> bool:
         bool: True if the plate exists, False otherwise.
     """
     LOGGER.debug("plate_exists_in_ss_with_barcode()")
-    try:
-        ss_url: str = app.config["SS_URL"]
-        params = {
-            "filter[barcode]": barcode,
-        }
-        headers = _ss_headers()
 
-        response = requests.get(f"{ss_url}/api/v2/labware", params=params, headers=headers)
+    return plates_exist_in_ss_with_barcodes([barcode])[barcode]
+
+
+def plates_exist_in_ss_with_barcodes(barcodes: List[str]) -> Dict[str, bool]:
+    """Check which of the plates with the given barcodes exist in Sequencescape. The barcodes are looked up in batches
+    of SS_LABWARE_LOOKUP_BATCH_SIZE with a `filter[barcode]=a,b,c` query, running up to SS_LABWARE_LOOKUP_MAX_WORKERS
+    queries at a time over a pooled session.
+
+    Arguments:
+        barcodes (List[str]): barcodes of plates to get information for.
+
+    Returns:
+        Dict[str, bool]: True for each barcode of a plate which exists, False otherwise.
+    """
+    unique_barcodes = list(dict.fromkeys(barcodes))
+    if not unique_barcodes:
+        return {}
+
+    # read from the app config and the app's clients here as the lookups are run outside of the app context
+    ss_url = f"{app.config['SS_URL']}/api/v2/labware"
+    headers = _ss_headers()
+    ss_client = http_client(HTTP_SERVICE_SEQUENCESCAPE)
+    batch_size = app.config["SS_LABWARE_LOOKUP_BATCH_SIZE"]
+    batches = [
+        unique_barcodes[start : (start + batch_size)]  # noqa: E203
+        for start in range(0, len(unique_barcodes), batch_size)
+    ]
+
+    def existing_barcodes(batch: List[str]) -> Set[str]:
+        try:
+            response = ss_client.get(ss_url, params={"filter[barcode]": ",".join(batch)}, headers=headers)
+        except requests.ConnectionError:
+            raise requests.ConnectionError("Unable to access Sequencescape")
 
         LOGGER.debug(f"Response status code: {response.status_code}")
 
-        assert "data" in response.json(), f"Expected 'data' in response: {response.json()}"
+        response_json = response.json()
 
-        if response.json()["data"]:
-            return True
+        assert "data" in response_json, f"Expected 'data' in response: {response_json}"
 
-        return False
-    except requests.ConnectionError:
-        raise requests.ConnectionError("Unable to access Sequencescape")
+        # a single barcode does not need to be matched to the labware found
+        if len(batch) == 1:
+            return set(batch) if response_json["data"] else set()
+
+        return {
+            barcode
+            for labware in response_json["data"]
+            for barcode in labware.get("attributes", {}).get("labware_barcode", {}).values()
+            if barcode
+        }
+
+    LOGGER.debug(f"Looking for {len(unique_barcodes)} plates in Sequencescape in {len(batches)} batches")
+
+    if len(batches) == 1:
+        found = existing_barcodes(batches[0])
+    else:
+        with ThreadPoolExecutor(max_workers=min(len(batches), app.config["SS_LABWARE_LOOKUP_MAX_WORKERS"])) as executor:
+            found = set().union(*executor.map(existing_barcodes, batches))
+
+    return {barcode: barcode in found for barcode in unique_barcodes}
 
 
 def format_plate(
-    barcode: str, exclude_props: Optional[List[str]] = None, plate_type: Optional[str] = ARG_TYPE_SOURCE
+    barcode: str,
+    exclude_props: Optional[List[str]] = None,
+    plate_type: Optional[str] = ARG_TYPE_SOURCE,
+    fields: Optional[List[str]] = None,
 ) -> Dict[str, Union[str, bool, SampleDocs, Optional[int]]]:
     """Used by flask route /plates to format each plate. Determines whether there is sample data for the barcode and if
     so, how many samples meet the fit to pick rules.
-    It accepts a exclude_props argument to exclude certain fields from the response if they are not needed.
+    It accepts a exclude_props argument to exclude certain fields from the response if they are not needed, and a
+    fields argument to only include the given fields. Only the queries needed by the remaining fields are run.
 
     Arguments:
         barcode (str): barcode of plate to get sample information for.
         exclude_props Optional[List[str]]: list of fields to exclude from the resulting object
+        plate_type Optional[str]: the type of the plate, either source or destination
+        fields Optional[List[str]]: list of fields to include in the resulting object; all fields if None
 
     Returns:
         Dict[str, Union[str, bool, Optional[int]]]: sample information for the plate barcode
     """
     LOGGER.info(f"Getting information for plate with barcode: {barcode}")
 
-    # To solve default mutable arguments issue:
-    # <https://florimond.dev/en/posts/2018/08/python-mutable-defaults-are-the-source-of-all-evil/>
-    exclude_props = exclude_props if exclude_props is not None else []
-
     # Obtain an dict with lambda expressions to generate required fields
     renderable: Dict[str, Any] = {}
     if plate_type == ARG_TYPE_DESTINATION:
@@ -858,12 +1030,125 @@ def format_plate(
     else:
         renderable = source_plate_field_generators(barcode)
 
-    formated_response: Dict[str, Any] = {}
-    for field in renderable:
-        if field not in exclude_props:
-            formated_response[field] = renderable[field]()
+    return _render_plate_fields(renderable, select_plate_fields(list(renderable), fields, exclude_props))
+
+
+def format_plates(
+    barcodes: List[str],
+    exclude_props: Optional[List[str]] = None,
+    plate_type: Optional[str] = ARG_TYPE_SOURCE,
+    fields: Optional[List[str]] = None,
+) -> List[Dict[str, Union[str, bool, SampleDocs, Optional[int]]]]:
+    """Used by flask route /plates to format many plates at once. For destination plates, the plates are looked up in
+    Sequencescape in batches (see `plates_exist_in_ss_with_barcodes`). For source plates, the sample information for all
+    the plates is fetched with a single query, and only the query needed by the requested fields is run (see
+    `fetch_source_plates_data`). When PLATE_SUMMARIES_ENABLED is set, the information is read from the pre-calculated
+    plate_summaries collection instead. When PLATE_CACHE_ENABLED is set, source plates are served from the in-process
+    plate cache where possible.
+
+    Arguments:
+        barcodes (List[str]): barcodes of plates to get sample information for.
+        exclude_props Optional[List[str]]: list of fields to exclude from each resulting object
+        plate_type Optional[str]: the type of the plates, either source or destination
+        fields Optional[List[str]]: list of fields to include in each resulting object; all fields if None
+
+    Returns:
+        List[Dict[str, Union[str, bool, SampleDocs, Optional[int]]]]: information for each plate barcode, in the same
+        order as the barcodes provided
+    """
+    if plate_type == ARG_TYPE_DESTINATION:
+        selected_fields = select_plate_fields(["plate_barcode", "plate_exists"], fields, exclude_props)
+        plates_exist = plates_exist_in_ss_with_barcodes(barcodes) if "plate_exists" in selected_fields else {}
+
+        return [
+            _render_plate_fields(
+                destination_plate_field_generators_from_results(barcode, plates_exist), selected_fields
+            )
+            for barcode in barcodes
+        ]
+
+    LOGGER.info(f"Getting information for {len(barcodes)} plates")
+
+    selected_fields = select_plate_fields(list(SOURCE_PLATE_FIELD_DEPENDENCIES), fields, exclude_props)
+
+    if (cache := active_plate_cache()) is None:
+        plates = _format_source_plates(barcodes, selected_fields)
+
+        return [plates[barcode] for barcode in barcodes]
+
+    variant = (ARG_TYPE_SOURCE, tuple(selected_fields))
+
+    plates = {}
+    for barcode in barcodes:
+        if barcode not in plates and (plate := cache.get(barcode, variant)) is not None:
+            plates[barcode] = plate
+
+    if missing_barcodes := [barcode for barcode in dict.fromkeys(barcodes) if barcode not in plates]:
+        # taken before reading the plates so that a plate changed in the meantime is not cached
+        generation = cache.generation()
+
+        for barcode, plate in _format_source_plates(missing_barcodes, selected_fields).items():
+            cache.put(barcode, variant, plate, generation)
+            plates[barcode] = plate
+
+    # the cached plates are shared, so each response gets its own copy
+    return [dict(plates[barcode]) for barcode in barcodes]
+
+
+def _format_source_plates(barcodes: List[str], selected_fields: List[str]) -> Dict[str, Dict[str, Any]]:
+    if app.config.get("PLATE_SUMMARIES_ENABLED", False):
+        summaries = get_plate_summaries(barcodes, fields=selected_fields)
+
+        return {
+            barcode: _render_plate_fields(
+                source_plate_field_generators_from_summary(barcode, summaries.get(barcode)), selected_fields
+            )
+            for barcode in barcodes
+        }
+
+    results = fetch_source_plates_data(barcodes, selected_fields)
+
+    return {
+        barcode: _render_plate_fields(
+            source_plate_field_generators_from_results(barcode, results.get(barcode)), selected_fields
+        )
+        for barcode in barcodes
+    }
+
+
+def active_plate_cache() -> Optional[PlateCache]:
+    """Get the cache of plate lookups if it is enabled and kept up to date by its change stream listener.
+
+    Returns:
+        Optional[PlateCache]: the cache, or None if it should not be used.
+    """
+    cache = app.extensions.get("plate_cache")
+
+    return cache if cache is not None and cache.active else None
+
+
+def select_plate_fields(
+    available_fields: List[str], fields: Optional[List[str]] = None, exclude_props: Optional[List[str]] = None
+) -> List[str]:
+    """Selects the fields to render for a plate lookup, keeping the order of the available fields.
+
+    Arguments:
+        available_fields (List[str]): all the fields which can be rendered for the plate type.
+        fields (Optional[List[str]]): only include these fields; all the available fields if None.
+        exclude_props (Optional[List[str]]): exclude these fields.
+
+    Returns:
+        List[str]: the fields to render.
+    """
+    # To solve default mutable arguments issue:
+    # <https://florimond.dev/en/posts/2018/08/python-mutable-defaults-are-the-source-of-all-evil/>
+    exclude_props = exclude_props if exclude_props is not None else []
+
+    return [field for field in available_fields if (fields is None or field in fields) and field not in exclude_props]
+
 
-    return formated_response
+def _render_plate_fields(renderable: Dict[str, Callable[[], Any]], fields: List[str]) -> Dict[str, Any]:
+    return {field: renderable[field]() for field in fields}
 
 
 def pickable_sample_attributes(sample: SampleDoc) -> SampleDoc:
@@ -2,22 +2,23 @@ import logging
 import math
 import os
 import pathlib
-import re
-from datetime import datetime, timedelta
-from http import HTTPStatus
-from typing import Dict, List, Optional, Tuple
+import resource
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-
-# we only need the create_engine method
-# but that can't be mocked
-# can't seem to mock it at the top because
-# it is outside the app context
-import sqlalchemy
 from flask import current_app as app
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
 from pandas import DataFrame, concat
+from pandas.api.types import union_categoricals
 from pymongo.collection import Collection
 
+from lighthouse.classes.plate_layout import unpad_coordinate
+from lighthouse.classes.report_manifest import REPORT_FILENAME_PATTERN, ReportManifest
 from lighthouse.constants.fields import (
     FIELD_COORDINATE,
     FIELD_DATE_TESTED,
@@ -27,13 +28,31 @@ from lighthouse.constants.fields import (
     FIELD_ROOT_SAMPLE_ID,
     FIELD_SOURCE,
 )
-from lighthouse.exceptions import ReportCreationError
-from lighthouse.helpers.labwhere import get_locations_from_labwhere
+from lighthouse.db.mlwh import mlwh_engine, read_sql_in_chunks
+from lighthouse.helpers.labwhere import get_labware_locations
 from lighthouse.sql_queries import SQL_MLWH_GET_CP_SAMPLES
 
 logger = logging.getLogger(__name__)
 PROJECT_ROOT = pathlib.Path(__file__).parent.parent.parent
 
+# the fields of the fit to pick samples in the report, of which those with few distinct values are held as categoricals
+FIT_TO_PICK_COLUMNS = (
+    FIELD_SOURCE,
+    FIELD_PLATE_BARCODE,
+    FIELD_ROOT_SAMPLE_ID,
+    FIELD_RESULT,
+    FIELD_DATE_TESTED,
+    FIELD_COORDINATE,
+)
+FIT_TO_PICK_CATEGORICAL_COLUMNS = (FIELD_SOURCE, FIELD_PLATE_BARCODE, FIELD_RESULT, FIELD_COORDINATE)
+# the columns the cherrypicked samples found in the MLWH are joined to the report on
+CHERRYPICKED_MERGE_KEYS = [FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE, "Result_lower", FIELD_COORDINATE]
+
+REPORT_SHEET_WITH_LOCATION = "FIT TO PICK WITH LOCATION"
+REPORT_SHEET_ALL = "ALL FIT TO PICK SAMPLES"
+# the number of rows of the report converted for the workbook at a time
+REPORT_WRITE_CHUNK_SIZE = 10000
+
 
 def get_reports_details(filename: Optional[str] = None) -> List[Dict[str, str]]:
     """Get the details of reports, including:
@@ -58,8 +77,7 @@ def get_reports_details(filename: Optional[str] = None) -> List[Dict[str, str]]:
         (_, _, files) = next(os.walk(REPORTS_PATH))
 
         # we only want files which match the report naming convention
-        report_pattern = re.compile(r"^\d{6}_\d{4}_(positives|fit_to_pick)_with_locations.xlsx$")
-        reports = filter(report_pattern.match, files)
+        reports = filter(REPORT_FILENAME_PATTERN.match, files)
 
     return [
         {
@@ -72,6 +90,35 @@ def get_reports_details(filename: Optional[str] = None) -> List[Dict[str, str]]:
     ]
 
 
+def list_reports_details() -> List[Dict[str, Any]]:
+    """Get the details of all the reports, newest first. When REPORT_MANIFEST_ENABLED, they are read from the report
+    manifest (see ReportManifest), which also has the number of rows of each sheet of the reports; otherwise each report
+    in the reports folder is read as by `get_reports_details`.
+
+    Returns:
+        List[Dict[str, Any]] -- list of report details
+    """
+    if not app.config["REPORT_MANIFEST_ENABLED"]:
+        # the names of the reports start with the time they were created
+        return sorted(get_reports_details(), key=lambda report: report["filename"], reverse=True)
+
+    return [
+        {
+            "filename": report["filename"],
+            "size": __convert_size(report["size"]),
+            "created": datetime.fromisoformat(report["created_at"]).strftime("%c"),
+            "download_url": f"{app.config['DOWNLOAD_REPORTS_URL']}/{report['filename']}",
+            "rows": report["rows"],
+        }
+        for report in get_report_manifest().reports()
+    ]
+
+
+def get_report_manifest() -> ReportManifest:
+    """The manifest of the reports in the reports folder."""
+    return ReportManifest(PROJECT_ROOT.joinpath(app.config["REPORTS_DIR"]))
+
+
 def get_new_report_name_and_path() -> Tuple[str, pathlib.PurePath]:
     """Get the name and path of a report which is being created.
 
@@ -86,38 +133,40 @@ def get_new_report_name_and_path() -> Tuple[str, pathlib.PurePath]:
     return report_name, report_path
 
 
-# Strip any leading zeros from the coordinate
-# eg. A01 => A1
-def unpad_coordinate(coordinate):
-    return re.sub(r"0(\d+)$", r"\1", coordinate) if (coordinate and isinstance(coordinate, str)) else coordinate
-
-
 def delete_reports(filenames: List[str]) -> None:
-    """Delete reports from the standard reports folder if they exist."""
+    """Delete reports from the standard reports folder if they exist, and from the report manifest."""
     for filename in filenames:
         full_path = f"{app.config['REPORTS_DIR']}/{filename}"
         if os.path.isfile(full_path):
             os.remove(full_path)
 
+    if app.config["REPORT_MANIFEST_ENABLED"]:
+        get_report_manifest().remove(filenames)
 
-def map_labware_to_location(labware_barcodes: List[str]) -> DataFrame:
-    logger.info(f"Getting locations from LabWhere for {len(labware_barcodes)} barcodes")
-    response = get_locations_from_labwhere(labware_barcodes)
 
-    if response.status_code != HTTPStatus.OK:
-        raise ReportCreationError("Response from LabWhere is not OK")
+def map_labware_to_location(labware_barcodes: List[str]) -> DataFrame:
+    """Map the plates of the report to their location barcodes in LabWhere, see `get_labware_locations`.
 
-    # create a plate_barcode to location_barcode mapping to join with samples; return None for samples where location
-    #   barcode is not present
-    labware_to_location_barcode = [
-        {
-            FIELD_PLATE_BARCODE: record["barcode"],
-            "location_barcode": str(record["location_barcode"] or ""),
-        }
-        for record in response.json()
-    ]
+    Arguments:
+        labware_barcodes (List[str]): the barcodes of the plates in the report.
 
-    labware_to_location_barcode_df = pd.DataFrame.from_records(labware_to_location_barcode)
+    Returns:
+        DataFrame: the plate_barcode and location_barcode of each plate known to LabWhere; "" is the location barcode
+        of a plate which is not in a location.
+    """
+    logger.info(f"Getting locations for {len(labware_barcodes)} barcodes")
+    locations = get_labware_locations(labware_barcodes)
+
+    # create a plate_barcode to location_barcode mapping to join with samples; plates which LabWhere does not know are
+    #   left out, so that the location barcode of their samples is None
+    labware_to_location_barcode_df = DataFrame(
+        [
+            (barcode, location_barcode)
+            for barcode, location_barcode in locations.items()
+            if location_barcode is not None
+        ],
+        columns=[FIELD_PLATE_BARCODE, "location_barcode"],
+    )
 
     logger.info(f"{len(labware_to_location_barcode_df.index)} locations for plate barcodes found")
 
@@ -129,53 +178,34 @@ def get_cherrypicked_samples(root_sample_ids, plate_barcodes, chunk_size=50000):
     # Returns dataframe with 4 columns: those needed to uniquely identify the sample
     # resulting dataframe only contains those samples that have been cherrypicked
     # (= those that have an entry for the relevant event type in the event warehouse)
-    # TODO: move into external method.
-
+    # The root sample ids are queried in chunks, several at a time, on the pooled connections of the app's MLWH engine
     try:
-        # Create an empty DataFrame to merge into
-        concat_frame = pd.DataFrame()
-
-        chunk_root_sample_ids = [
-            root_sample_ids[x : (x + chunk_size)] for x in range(0, len(root_sample_ids), chunk_size)  # noqa: E203
-        ]
-
-        mlwh_db = app.config["MLWH_DB"]
-
-        sql_engine = sqlalchemy.create_engine(
-            f"mysql+pymysql://{app.config['WAREHOUSES_RO_CONN_STRING']}/{mlwh_db}", pool_recycle=3600
+        return read_sql_in_chunks(
+            mlwh_engine(),
+            SQL_MLWH_GET_CP_SAMPLES,
+            chunk_param="root_sample_ids",
+            # the same root sample id would only retrieve the same rows again
+            values=list(dict.fromkeys(root_sample_ids)),
+            chunk_size=chunk_size,
+            params={"plate_barcodes": tuple(plate_barcodes)},
+            max_workers=app.config["MLWH_QUERY_MAX_WORKERS"],
         )
-        db_connection = sql_engine.connect()
-
-        for chunk_root_sample_id in chunk_root_sample_ids:
-            params = {
-                "root_sample_ids": tuple(chunk_root_sample_id),
-                "plate_barcodes": tuple(plate_barcodes),
-            }
-
-            cherrypicked_frame = pd.read_sql(SQL_MLWH_GET_CP_SAMPLES, db_connection, params=params)
-
-            # drop_duplicates is needed because the same 'root sample id' could pop up in two
-            # different batches, and then it would retrieve the same rows for that root sample id
-            # twice do reset_index after dropping duplicates to make sure the rows are numbered in
-            # a way that makes sense
-            concat_frame = concat((concat_frame, cherrypicked_frame)).drop_duplicates().reset_index(drop=True)
-
-        return concat_frame
     except Exception as e:
         logger.error("Error while connecting to MySQL")
         logger.exception(e)
         return None
-    finally:
-        if db_connection is not None:
-            logger.debug("Closing mlwh connection")
-            db_connection.close()
 
 
-def get_fit_to_pick_samples(samples_collection: Collection) -> DataFrame:
+def get_fit_to_pick_samples(samples_collection: Collection, test_dates: Optional[Iterable[date]] = None) -> DataFrame:
     """Get all the samples (documents) from mongo which meet the fit to pick rules and are from a specific date.
 
+    The cursor is read in batches of REPORT_INGEST_BATCH_SIZE documents which are converted to typed columns one at a
+    time, see `fit_to_pick_samples_frame`, so that the whole report window is never held as Python dicts.
+
     Args:
         samples_collection (Collection): the samples collection.
+        test_dates (Optional[Iterable[date]]): only get the samples tested on these days, e.g. those of the partitions
+            of the report which need to be recomputed. Defaults to None, for all the days of the report window.
 
     Returns:
         DataFrame: a pandas DataFrame with the fit to pick samples.
@@ -214,46 +244,249 @@ def get_fit_to_pick_samples(samples_collection: Collection) -> DataFrame:
         {"$project": projection},
     ]
 
+    if test_dates is not None:
+        # only the days asked for, as ranges of consecutive days; no days matches no samples
+        ranges = date_tested_ranges(test_dates)
+        pipeline.insert(2, {"$match": {"$or": ranges} if ranges else {FIELD_DATE_TESTED: {"$in": []}}})
+
+    batch_size = app.config["REPORT_INGEST_BATCH_SIZE"]
+
     # Perform an aggregation using the defined pipeline - this will run through the pipeline
     # "stages" in sequence
-    results = samples_collection.aggregate(pipeline)
+    results = samples_collection.aggregate(pipeline, batchSize=batch_size)
 
     # converting to a dataframe to make it easy to join with data from LabWhere
-    fit_to_pick_samples_df = pd.DataFrame.from_records(results)
+    fit_to_pick_samples_df = fit_to_pick_samples_frame(results, batch_size)
 
     logger.info(f"{len(fit_to_pick_samples_df.index)} fit to pick samples")
 
-    # strip zeros out of the well coordinates
-    fit_to_pick_samples_df[FIELD_COORDINATE] = fit_to_pick_samples_df[FIELD_COORDINATE].map(
-        lambda coord: unpad_coordinate(coord)
+    return fit_to_pick_samples_df
+
+
+def get_fit_to_pick_plate_barcodes(
+    samples_collection: Collection, test_dates: Optional[Iterable[date]] = None
+) -> List[str]:
+    """Get the distinct barcodes of the plates of the fit to pick samples which `get_fit_to_pick_samples` gets, with a
+    query of its own so that the plates can be located while the samples are read.
+
+    Args:
+        samples_collection (Collection): the samples collection.
+        test_dates (Optional[Iterable[date]]): only the plates of the samples tested on these days. Defaults to None,
+            for all the days of the report window.
+
+    Returns:
+        List[str]: the barcodes of the plates.
+    """
+    query: Dict[str, Any] = {
+        FIELD_FILTERED_POSITIVE: True,
+        FIELD_DATE_TESTED: {"$type": "date", "$gte": report_query_window_start()},
+        FIELD_PLATE_BARCODE: {"$nin": ["", None]},
+    }
+
+    if test_dates is not None:
+        if not (ranges := date_tested_ranges(test_dates)):
+            return []
+
+        query["$or"] = ranges
+
+    plate_barcodes: List[str] = samples_collection.distinct(FIELD_PLATE_BARCODE, query)
+
+    logger.info(f"{len(plate_barcodes)} plates with fit to pick samples")
+
+    return plate_barcodes
+
+
+def fit_to_pick_samples_frame(documents: Iterable[Dict[str, Any]], batch_size: int) -> DataFrame:
+    """Build the DataFrame of fit to pick samples from their documents, reading `batch_size` documents at a time.
+
+    Each batch is converted to typed columns before the next one is read: the columns with few distinct values
+    (FIT_TO_PICK_CATEGORICAL_COLUMNS) are categoricals, which store each value once, and the date tested is a datetime
+    column. The joined batches are then transformed by `transform_fit_to_pick_samples`.
+
+    Arguments:
+        documents (Iterable[Dict[str, Any]]): the documents, e.g. a cursor, with the FIT_TO_PICK_COLUMNS fields.
+        batch_size (int): the number of documents held as dicts at any time.
+
+    Returns:
+        DataFrame: the fit to pick samples, with the FIT_TO_PICK_COLUMNS columns and "plate and well" even when there
+        are none.
+    """
+    documents = iter(documents)
+
+    batches = []
+    while batch := list(islice(documents, batch_size)):
+        batches.append(DataFrame(_fit_to_pick_samples_batch_columns(batch)))
+
+    if not batches:
+        batches.append(DataFrame(_fit_to_pick_samples_batch_columns([])))
+
+    return transform_fit_to_pick_samples(concat_report_frames(batches))
+
+
+def transform_fit_to_pick_samples(fit_to_pick_samples: DataFrame) -> DataFrame:
+    """Derive the columns of the report from the fit to pick samples, working on the categories of their categorical
+    columns rather than on each row:
+
+    - the coordinates are unpadded, e.g. A01 => A1, once per distinct coordinate (see `remap_categories`)
+    - the "plate and well" column, e.g. DN1234:A1, is built from the codes of the plate barcodes and coordinates, so
+      that the string of each distinct plate and well is only built once
+
+    Arguments:
+        fit_to_pick_samples (DataFrame): the fit to pick samples, with categorical plate barcodes and coordinates.
+
+    Returns:
+        DataFrame: the fit to pick samples with unpadded coordinates and the "plate and well" column.
+    """
+    coordinates = remap_categories(fit_to_pick_samples[FIELD_COORDINATE], unpad_coordinate)
+
+    return fit_to_pick_samples.assign(
+        **{
+            FIELD_COORDINATE: coordinates,
+            # for copy-pasting into Sequencescape submission
+            "plate and well": _join_categories(fit_to_pick_samples[FIELD_PLATE_BARCODE], coordinates, ":"),
+        }
     )
 
-    # create 'plate and well' column for copy-pasting into Sequencescape submission, e.g. DN1234:A1
-    fit_to_pick_samples_df["plate and well"] = (
-        fit_to_pick_samples_df[FIELD_PLATE_BARCODE] + ":" + fit_to_pick_samples_df[FIELD_COORDINATE]
+
+def remap_categories(values: pd.Series, mapping: Callable[[Any], Any]) -> pd.Series:
+    """Map the values of a categorical column by mapping each of its categories once, instead of each of its rows.
+    Categories mapped to the same value are merged, and those mapped to NaN become missing values.
+
+    Arguments:
+        values (pd.Series): a categorical column.
+        mapping (Callable[[Any], Any]): the mapping of a value.
+
+    Returns:
+        pd.Series: the mapped categorical column.
+    """
+    codes = values.cat.codes.to_numpy()
+    categories = values.cat.categories
+
+    mapped = pd.Index([mapping(category) for category in categories], dtype=object)
+    mapped_codes, mapped_categories = pd.factorize(mapped)
+
+    # the codes of missing values (-1) are left as they are
+    new_codes = np.where(codes >= 0, mapped_codes[codes] if len(categories) else codes, -1)
+
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes, categories=mapped_categories), index=values.index, name=values.name
     )
 
-    return fit_to_pick_samples_df
+
+def date_tested_ranges(test_dates: Iterable[date]) -> List[Dict[str, Any]]:
+    """The conditions on the date tested which match the samples tested on the given days, one per range of consecutive
+    days so that the number of conditions stays small.
+
+    Arguments:
+        test_dates (Iterable[date]): the days.
+
+    Returns:
+        List[Dict[str, Any]]: the conditions, e.g. for an $or; empty when there are no days.
+    """
+    ranges: List[List[date]] = []
+    for day in sorted(set(test_dates)):
+        if ranges and day - ranges[-1][1] == timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+
+    return [
+        {
+            FIELD_DATE_TESTED: {
+                "$gte": datetime.combine(first, time.min),
+                "$lt": datetime.combine(last + timedelta(days=1), time.min),
+            }
+        }
+        for first, last in ranges
+    ]
+
+
+def concat_report_frames(frames: List[DataFrame]) -> DataFrame:
+    """Concatenate frames of the report, e.g. its partitions, keeping as categoricals the columns which are categoricals
+    in all of them; pd.concat would convert those whose categories differ to objects.
+
+    Arguments:
+        frames (List[DataFrame]): the frames, with the same columns.
+
+    Returns:
+        DataFrame: the rows of the frames, in order.
+    """
+    if not frames:
+        return DataFrame()
+
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+
+    return DataFrame(
+        {
+            column: (
+                pd.Series(union_categoricals([frame[column].array for frame in frames]))
+                if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames)
+                else concat([frame[column] for frame in frames], ignore_index=True)
+            )
+            for column in frames[0].columns
+        }
+    )
 
 
 def add_cherrypicked_column(existing_dataframe):
-    root_sample_ids = existing_dataframe[FIELD_ROOT_SAMPLE_ID].to_list()
-    plate_barcodes = existing_dataframe["plate_barcode"].unique()
+    return merge_cherrypicked_column(existing_dataframe, find_cherrypicked_samples(existing_dataframe))
+
+
+def find_cherrypicked_samples(fit_to_pick_samples: DataFrame) -> Optional[DataFrame]:
+    """Find which of the fit to pick samples have been cherrypicked, see `get_cherrypicked_samples`. Only the samples
+    are needed, so this can run while their locations are looked up.
+
+    Arguments:
+        fit_to_pick_samples (DataFrame): the fit to pick samples of the report.
+
+    Returns:
+        Optional[DataFrame]: the cherrypicked samples, None if there are no samples to look for.
+    """
+    if fit_to_pick_samples.empty:
+        # there is nothing to look for in the MLWH
+        return None
+
+    root_sample_ids = fit_to_pick_samples[FIELD_ROOT_SAMPLE_ID].to_list()
+    plate_barcodes = fit_to_pick_samples["plate_barcode"].unique()
 
     cherrypicked_samples_df = get_cherrypicked_samples(root_sample_ids, plate_barcodes)
     cherrypicked_samples_df["LIMS submission"] = "Yes"
 
     logger.info(f"{len(cherrypicked_samples_df.index)} cherrypicked samples")
 
+    return cherrypicked_samples_df
+
+
+def merge_cherrypicked_column(existing_dataframe: DataFrame, cherrypicked_samples_df: Optional[DataFrame]) -> DataFrame:
+    """Add the "LIMS submission" column to the report: "Yes" for the cherrypicked samples, "No" for the others.
+
+    Arguments:
+        existing_dataframe (DataFrame): the samples of the report.
+        cherrypicked_samples_df (Optional[DataFrame]): the cherrypicked samples, see `find_cherrypicked_samples`.
+
+    Returns:
+        DataFrame: the samples of the report with the "LIMS submission" column.
+    """
+    if existing_dataframe.empty:
+        return existing_dataframe.assign(**{"LIMS submission": pd.Series(dtype=object)})
+
     # The result value in the phenotype in MLWH.sample is all lowercase,
     # because it is converted in create_post_body in helpers/plates.py,
     # whereas in the original data in MongoDB and MLWH.lighthouse_sample it is capitalised
-    existing_dataframe["Result_lower"] = existing_dataframe["Result"].str.lower()
+    if isinstance(existing_dataframe[FIELD_RESULT].dtype, pd.CategoricalDtype):
+        result_lower = remap_categories(
+            existing_dataframe[FIELD_RESULT], lambda result: result.lower() if isinstance(result, str) else np.nan
+        )
+    else:
+        result_lower = existing_dataframe[FIELD_RESULT].str.lower()
+
+    existing_dataframe = existing_dataframe.assign(Result_lower=result_lower)
 
     existing_dataframe = existing_dataframe.merge(
-        cherrypicked_samples_df,
+        _with_categories_of(cherrypicked_samples_df, existing_dataframe, CHERRYPICKED_MERGE_KEYS),
         how="left",
-        on=[FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE, "Result_lower", FIELD_COORDINATE],
+        on=CHERRYPICKED_MERGE_KEYS,
     )
     # Fill any empty cells for the column with 'No' (those that do not have cherrypicking events)
     existing_dataframe = existing_dataframe.fillna({"LIMS submission": "No"})
@@ -264,6 +497,65 @@ def add_cherrypicked_column(existing_dataframe):
     return existing_dataframe
 
 
+def write_report(report: DataFrame, report_path: pathlib.PurePath, columns: List[str]) -> Dict[str, int]:
+    """Write the report to an Excel workbook in openpyxl's write-only mode, which streams the rows of each sheet to a
+    temporary file instead of holding the workbook in memory.
+
+    The report is read once, `REPORT_WRITE_CHUNK_SIZE` rows at a time, and each row is written to the
+    "ALL FIT TO PICK SAMPLES" sheet and, when the plate has a location barcode, to the "FIT TO PICK WITH LOCATION"
+    sheet; the report is not copied to filter on the location barcode.
+
+    Arguments:
+        report (DataFrame): the fit to pick samples, with their location barcodes.
+        report_path (pathlib.PurePath): the path of the workbook to create.
+        columns (List[str]): the columns of the report to write, in order.
+
+    Returns:
+        Dict[str, int]: the number of rows written to each sheet, keyed on the sheet name.
+    """
+    workbook = Workbook(write_only=True)
+
+    with_location_sheet = workbook.create_sheet(REPORT_SHEET_WITH_LOCATION)
+    all_sheet = workbook.create_sheet(REPORT_SHEET_ALL)
+
+    # bold, as written by pandas
+    header = []
+    for column in columns:
+        cell = WriteOnlyCell(all_sheet, value=column)
+        cell.font = Font(bold=True)
+        header.append(cell)
+
+    with_location_sheet.append(header)
+    all_sheet.append(header)
+
+    locations = report["location_barcode"]
+
+    rows_with_location = 0
+    for start in range(0, len(report.index), REPORT_WRITE_CHUNK_SIZE):
+        chunk = slice(start, start + REPORT_WRITE_CHUNK_SIZE)
+        chunk_locations = locations.iloc[chunk].notna().to_numpy()
+
+        for has_location, row in zip(
+            chunk_locations, zip(*(report[column].iloc[chunk].to_numpy(dtype=object) for column in columns))
+        ):
+            cells = [None if _is_null(value) else value for value in row]
+
+            all_sheet.append(cells)
+            if has_location:
+                with_location_sheet.append(cells)
+                rows_with_location += 1
+
+    workbook.save(report_path)
+
+    return {REPORT_SHEET_WITH_LOCATION: rows_with_location, REPORT_SHEET_ALL: len(report.index)}
+
+
+def peak_memory_mb() -> float:
+    """The peak resident memory of the process, in MB."""
+    # ru_maxrss is in KB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
 def get_distinct_plate_barcodes(samples_collection: Collection) -> List[str]:
     logger.debug("Getting list of distinct plate barcodes")
 
@@ -295,6 +587,63 @@ def report_query_window_start() -> datetime:
 # Private, not explicitly tested methods
 
 
+def _fit_to_pick_samples_batch_columns(batch: List[Dict[str, Any]]) -> Dict[str, pd.Series]:
+    values = {column: [document.get(column) for document in batch] for column in FIT_TO_PICK_COLUMNS}
+
+    columns = {}
+    for column in FIT_TO_PICK_COLUMNS:
+        if column in FIT_TO_PICK_CATEGORICAL_COLUMNS:
+            columns[column] = pd.Series(values[column], dtype="category")
+        elif column == FIELD_DATE_TESTED:
+            columns[column] = pd.Series(values[column], dtype="datetime64[ns]")
+        else:
+            columns[column] = pd.Series(values[column], dtype=object)
+
+    return columns
+
+
+def _join_categories(left: pd.Series, right: pd.Series, separator: str) -> pd.Series:
+    # each pair of codes identifies a distinct pair of values; a row missing either value has a missing pair
+    left_codes = left.cat.codes.to_numpy().astype(np.int64)
+    right_codes = right.cat.codes.to_numpy().astype(np.int64)
+    present = (left_codes >= 0) & (right_codes >= 0)
+
+    pair_codes = np.full(len(left_codes), -1, dtype=np.int64)
+    pair_codes[present], pairs = pd.factorize(left_codes[present] * len(right.cat.categories) + right_codes[present])
+
+    left_values = left.cat.categories.to_numpy(dtype=object)[pairs // max(len(right.cat.categories), 1)]
+    right_values = right.cat.categories.to_numpy(dtype=object)[pairs % max(len(right.cat.categories), 1)]
+
+    # pairs of different values could still join to the same string, e.g. "a:" + "b" and "a" + ":b"
+    string_codes, strings = pd.factorize(left_values + separator + right_values)
+    codes = np.where(pair_codes >= 0, string_codes[pair_codes] if len(pairs) else -1, -1)
+
+    return pd.Series(pd.Categorical.from_codes(codes, categories=strings), index=left.index)
+
+
+def _with_categories_of(frame: Optional[DataFrame], report: DataFrame, keys: List[str]) -> Optional[DataFrame]:
+    # the keys of the frame are given the categories of the categorical keys of the report, so that the two are joined
+    #   on the codes of the categories rather than on strings; the rows of the frame with values which are not in the
+    #   report cannot match any of its rows and are dropped
+    if frame is None:
+        return None
+
+    categorical_keys = [key for key in keys if isinstance(report[key].dtype, pd.CategoricalDtype)]
+    if not categorical_keys:
+        return frame
+
+    frame = frame.assign(
+        **{key: pd.Categorical(frame[key], categories=report[key].cat.categories) for key in categorical_keys}
+    )
+
+    return frame.dropna(subset=categorical_keys)
+
+
+def _is_null(value: Any) -> bool:
+    # NaN, NaT and None; pd.isna would also test the elements of a list
+    return value is None or value is pd.NaT or (isinstance(value, float) and math.isnan(value))
+
+
 def __get_file_size(file_path: pathlib.PurePath) -> str:
     """Get the size of a file in a human friendly format.
 
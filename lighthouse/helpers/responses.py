@@ -24,3 +24,7 @@ def ok(**kwargs: Any) -> FlaskResponse:
 
 def created(**kwargs: Any) -> FlaskResponse:
     return {**kwargs}, HTTPStatus.CREATED
+
+
+def accepted(**kwargs: Any) -> FlaskResponse:
+    return {**kwargs}, HTTPStatus.ACCEPTED
@@ -0,0 +1,50 @@
+"""Stream responses as newline delimited JSON (NDJSON), writing each document as soon as it is available instead of
+building the whole response in memory. A client asks for a streamed response with the `Accept: application/x-ndjson`
+header or the `_stream=1` query parameter.
+"""
+
+import logging
+from typing import Any, Callable, Iterable, Iterator
+
+from flask import Response, request, stream_with_context
+
+from lighthouse.constants.general import ARG_STREAM, MIMETYPE_NDJSON
+
+logger = logging.getLogger(__name__)
+
+
+def streaming_requested() -> bool:
+    """Determine whether the current request asks for a streamed response.
+
+    Returns:
+        bool: True if the request has `_stream=1` (or `true`) or prefers NDJSON over JSON.
+    """
+    if request.args.get(ARG_STREAM, "").lower() in ("1", "true"):
+        return True
+
+    return request.accept_mimetypes.best_match(["application/json", MIMETYPE_NDJSON]) == MIMETYPE_NDJSON
+
+
+def ndjson_response(documents: Iterable[Any], dumps: Callable[[Any], str]) -> Response:
+    """Create a response which streams the documents as NDJSON, consuming them lazily.
+
+    The status code is sent before the first document so an error while generating the documents cannot change it;
+    instead, an `{"errors": [...]}` line is written and the stream ends.
+
+    Arguments:
+        documents (Iterable[Any]): the documents to stream, e.g. a generator or a mongo cursor.
+        dumps (Callable[[Any], str]): serialises a document to a single line of JSON.
+
+    Returns:
+        Response: the streamed response.
+    """
+
+    def generate() -> Iterator[str]:
+        try:
+            for document in documents:
+                yield dumps(document) + "\n"
+        except Exception as e:
+            logger.exception(e)
+            yield dumps({"errors": [f"Failed to stream the response: {type(e).__name__}"]}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype=MIMETYPE_NDJSON)
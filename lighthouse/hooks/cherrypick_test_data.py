@@ -3,13 +3,14 @@ import logging
 from http import HTTPStatus
 from typing import Any, Dict, List
 
-import requests
 from flask import abort
 from flask import current_app as app
 from flask import json, jsonify, make_response
 from requests.models import HTTPError
 
+from lighthouse.classes.http_clients import http_client
 from lighthouse.constants.cherrypick_test_data import FIELD_CRAWLER_RUN_ID
+from lighthouse.constants.config import HTTP_SERVICE_CRAWLER
 from lighthouse.constants.error_messages import ERROR_CRAWLER_HTTP_ERROR
 from lighthouse.constants.fields import FIELD_MONGO_ID
 
@@ -24,7 +25,7 @@ def inserted_cherrypick_test_data_hook(runs: List[Dict[str, Any]]) -> None:
     try:
         crawler_url = f"{app.config['CRAWLER_BASE_URL']}/v1/cherrypick-test-data"
         logger.info(f"Calling Crawler's generate data endpoint with run ID '{run_id}'")
-        response = requests.post(crawler_url, json={FIELD_CRAWLER_RUN_ID: run_id})
+        response = http_client(HTTP_SERVICE_CRAWLER).post(crawler_url, json={FIELD_CRAWLER_RUN_ID: run_id})
         response.raise_for_status()  # Raise an exception if the status wasn't in the 200 range
     except HTTPError as error:
         errors_string = get_httperror_message(error)
@@ -0,0 +1,43 @@
+import json
+import logging
+from typing import Optional, cast
+
+from eve import Eve
+from eve.auth import requires_auth
+from eve.utils import parse_request
+from flask import Response
+from flask import current_app as app
+from flask import request
+
+from lighthouse.helpers.streaming import ndjson_response, streaming_requested
+
+logger = logging.getLogger(__name__)
+
+
+def stream_eve_resource_hook() -> Optional[Response]:
+    """A `before_request` hook which serves GET requests on Eve resource endpoints (e.g. /imports) as a stream of NDJSON
+    documents when the client asks for it. The resource's authentication, filtering (`where`), sorting, projection and
+    pagination (`max_results`, `page`) are applied as Eve would; each line holds a document as it is stored, without
+    Eve's meta fields (`_links`, `_meta`).
+
+    Returns:
+        Optional[Response]: the streamed response, or None to let Eve handle the request.
+    """
+    if request.method != "GET" or request.url_rule is None or not streaming_requested():
+        return None
+
+    resource, _, endpoint_type = request.url_rule.endpoint.partition("|")
+    if endpoint_type != "resource":
+        return None
+
+    return requires_auth("resource")(_stream_resource)(resource)
+
+
+def _stream_resource(resource: str) -> Response:
+    logger.info(f"Streaming the documents of resource '{resource}'")
+
+    data_layer = cast(Eve, app).data
+
+    documents, _ = data_layer.find(resource, parse_request(resource), {}, perform_count=False)
+
+    return ndjson_response(documents, lambda document: json.dumps(document, cls=data_layer.json_encoder_class))
@@ -1,29 +1,66 @@
 import logging
 import time
-from typing import cast
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set, Tuple, cast
 
 import pandas as pd
 from eve import Eve
 from flask import current_app as app
 
 from lighthouse import scheduler
+from lighthouse.classes.background_jobs import (
+    JOB_STATUS_COMPLETED,
+    BackgroundJobs,
+    JobQueueFullError,
+    job_stage,
+    wait_for_background_job,
+)
+from lighthouse.classes.report_partitions import (
+    REPORT_PARTITIONS_DIR,
+    ReportPartitions,
+    count_samples_by_test_date,
+    find_touched_test_dates,
+)
+from lighthouse.classes.stage_graph import StageGraph
+from lighthouse.constants.error_messages import ERROR_UNEXPECTED
 from lighthouse.constants.fields import FIELD_PLATE_BARCODE
 from lighthouse.constants.general import REPORT_COLUMNS
 from lighthouse.helpers.reports import (
-    add_cherrypicked_column,
-    get_distinct_plate_barcodes,
+    PROJECT_ROOT,
+    find_cherrypicked_samples,
+    get_fit_to_pick_plate_barcodes,
     get_fit_to_pick_samples,
     get_new_report_name_and_path,
+    get_report_manifest,
+    get_reports_details,
     map_labware_to_location,
+    merge_cherrypicked_column,
+    peak_memory_mb,
+    report_query_window_start,
+    write_report,
 )
+from lighthouse.helpers.responses import created, internal_server_error
+from lighthouse.types import FlaskResponse
 
 logger = logging.getLogger(__name__)
 
+REPORT_JOB_TYPE = "report"
+
+# The stages of a report, whose progress is recorded when it is created by a background job
+REPORT_STAGE_MONGO = "mongo"
+REPORT_STAGE_LABWHERE = "labwhere"
+REPORT_STAGE_MLWH = "mlwh"
+REPORT_STAGE_WRITE = "write"
 
-def create_report() -> str:
+
+def create_report(full: bool = False) -> str:
     """Creates a report for fit to pick samples which are on site. It uses the samples and priority_samples collection
     as well as retrieving location information from LabWhere.
 
+    Arguments:
+        full {bool} -- recompute all the partitions of the report window instead of only those touched since the last
+        run, see `get_report_data` (default: {False})
+
     Returns:
         str -- filename of the report created.
     """
@@ -31,52 +68,224 @@ def create_report() -> str:
 
     start = time.time()
 
+    merged = get_report_data(full)
+
+    logger.info(f"Report data ready in {round(time.time() - start, 2)}s, peak memory {peak_memory_mb()}MB")
+
+    report_name, report_path = get_new_report_name_and_path()
+
+    logger.info(f"Writing results to {report_path}")
+
+    # Get the list (and order) of columns for the report from config otherwise fall back to pre-defined list
+    columns = app.config.get("REPORT_COLUMNS", REPORT_COLUMNS)
+
+    write_start = time.time()
+
+    # Sheet 1 contains all fit to pick samples WITH location barcodes, sheet 2 all fit to pick samples with AND without
+    #   location barcodes
+    with job_stage(REPORT_STAGE_WRITE):
+        rows_written = write_report(merged, report_path, columns)
+
+    logger.info(
+        f"Report written in {round(time.time() - write_start, 2)}s ({rows_written}), peak memory {peak_memory_mb()}MB"
+    )
+
+    if app.config["REPORT_MANIFEST_ENABLED"]:
+        get_report_manifest().add(report_path, rows_written)
+
+    logger.info(f"Report creation complete in {round(time.time() - start, 2)}s")
+
+    return report_name
+
+
+def get_report_data(full: bool = False) -> pd.DataFrame:
+    """Get the joined data of the report: the fit to pick samples of the report window with their locations and
+    cherrypicked status.
+
+    The sources are queried as a graph of stages (see StageGraph): the plates are located in LabWhere while the samples
+    are read (see `get_report_samples`), and the cherrypicked samples are looked up in the MLWH once the samples have
+    been read; only the final join needs all of them. Locations and cherrypicked status change outside of mongo, so
+    they are looked up on every run; the locations of recently located plates are read from the labware_locations
+    cache.
+
+    Arguments:
+        full {bool} -- read all the partitions of the report window from mongo (default: {False})
+
+    Returns:
+        pd.DataFrame -- the fit to pick samples with their location barcodes and cherrypicked status.
+    """
     # get samples collection
     samples_collection = cast(Eve, app).data.driver.db.samples
-    fit_to_pick_samples_df = get_fit_to_pick_samples(samples_collection)
 
-    logger.info("Getting location barcodes from LabWhere")
-    labware_to_location_barcode_df = map_labware_to_location(get_distinct_plate_barcodes(samples_collection))
+    def locations() -> pd.DataFrame:
+        # only the plates in the report window are located, rather than every plate ever imported
+        logger.info("Getting location barcodes from LabWhere")
+
+        return map_labware_to_location(get_fit_to_pick_plate_barcodes(samples_collection))
+
+    stages = StageGraph("report")
+    stages.add(REPORT_STAGE_MONGO, lambda: get_report_samples(full))
+    stages.add(REPORT_STAGE_LABWHERE, locations)
+    stages.add(REPORT_STAGE_MLWH, find_cherrypicked_samples, depends_on=[REPORT_STAGE_MONGO])
+
+    results = stages.run()
 
     logger.debug("Joining location data from LabWhere")
-    merged = fit_to_pick_samples_df.merge(labware_to_location_barcode_df, how="left", on=FIELD_PLATE_BARCODE)
+    merged = results[REPORT_STAGE_MONGO].merge(results[REPORT_STAGE_LABWHERE], how="left", on=FIELD_PLATE_BARCODE)
 
-    merged = add_cherrypicked_column(merged)
+    return merge_cherrypicked_column(merged, results[REPORT_STAGE_MLWH])
 
-    report_name, report_path = get_new_report_name_and_path()
 
-    logger.info(f"Writing results to {report_path}")
+def get_report_samples(full: bool = False) -> pd.DataFrame:
+    """Get the fit to pick samples of the report window from mongo.
 
-    # Create a Pandas Excel writer using openpyxl as the engine
-    writer = pd.ExcelWriter(report_path, engine="openpyxl")
+    When REPORT_PARTITIONS_ENABLED, the samples are kept in partitions by test date (see ReportPartitions) and only the
+    partitions which are missing, touched since the last run, whose count of samples changed or older than
+    REPORT_PARTITION_MAX_AGE_SECONDS are read from mongo; the others are read as they are.
 
-    # Get the list (and order) of columns for the report from config otherwise fall back to pre-defined list
-    columns = app.config.get("REPORT_COLUMNS", REPORT_COLUMNS)
+    Arguments:
+        full {bool} -- read all the partitions of the report window from mongo (default: {False})
+
+    Returns:
+        pd.DataFrame -- the fit to pick samples of the report window.
+    """
+    db = cast(Eve, app).data.driver.db
+
+    if not app.config["REPORT_PARTITIONS_ENABLED"]:
+        return get_fit_to_pick_samples(db.samples)
 
-    # Sheet 2 contains all fit to pick samples WITH location barcodes
-    merged[merged.location_barcode.notnull()].to_excel(
-        writer, sheet_name="FIT TO PICK WITH LOCATION", columns=columns, index=False
+    partitions = ReportPartitions(
+        PROJECT_ROOT.joinpath(app.config["REPORTS_DIR"], REPORT_PARTITIONS_DIR),
+        max_age_seconds=app.config["REPORT_PARTITION_MAX_AGE_SECONDS"],
     )
 
-    # Convert the dataframe to an openpyxl Excel object
-    #  Sheet 1 contains all fit to pick samples with AND without location barcodes
-    merged.to_excel(writer, sheet_name="ALL FIT TO PICK SAMPLES", columns=columns, index=False)
+    # samples changed while this run reads its partitions are picked up by the next run
+    run_started_at = datetime.now(tz=timezone.utc)
 
-    # Close the Pandas Excel writer and output the Excel file
-    writer.close()
+    window_start = report_query_window_start()
+    window = [
+        window_start.date() + timedelta(days=days) for days in range((date.today() - window_start.date()).days + 1)
+    ]
 
-    logger.info(f"Report creation complete in {round(time.time() - start, 2)}s")
+    touched: Set[date] = set()
+    if not full and (last_run_at := partitions.last_run_at) is not None:
+        touched = find_touched_test_dates(db, last_run_at, window_start)
+        # deleted samples, and samples moved to another day, are only found by the counts of the days they left
+        touched |= partitions.dates_with_other_counts(window, count_samples_by_test_date(db, window_start))
 
-    return report_name
+    test_dates = partitions.dates_to_compute(window, touched, full)
 
+    logger.info(f"Reading {len(test_dates)} of the {len(window)} partitions of the report window from mongo")
+
+    if test_dates:
+        partitions.write(get_fit_to_pick_samples(db.samples, test_dates), test_dates, computed_at=run_started_at)
+
+    partitions.drop_before(window[0])
+    partitions.save(run_started_at)
+
+    return partitions.read(window)
+
+
+def submit_report_job(full: bool = False) -> Tuple[str, bool]:
+    """Create a report in a background job, unless a report job of the same kind (full or not) is already queued or
+    running in any process, in which case that job is returned instead (see BackgroundJobs.submit_coalesced). Every
+    report is created this way, whether asked for by the scheduler or by `POST /reports/new`, so that at most one full
+    and one incremental report read and write the partitions at a time. A full report is not coalesced onto an
+    incremental one, which would not compute all the partitions.
+
+    Arguments:
+        full {bool} -- see `create_report` (default: {False})
+
+    Raises:
+        JobQueueFullError -- if there are already as many jobs as the pool can hold.
+
+    Returns:
+        Tuple[str, bool] -- the id of the job and whether it is a report job which was already in progress.
+    """
+    jobs: BackgroundJobs = app.extensions["background_jobs"]
+
+    return jobs.submit_coalesced(
+        REPORT_JOB_TYPE,
+        report_job_key(full),
+        app.config["REPORT_JOB_LOCK_SECONDS"],
+        create_report_response,
+        full,
+        full=full,
+    )
 
-def create_report_job():
-    """Scheduler's job to create the report within the scheduler's app context.
+
+def report_job_key(full: bool = False) -> str:
+    """The key on which the report jobs are coalesced, see `submit_report_job`.
+
+    Arguments:
+        full {bool} -- whether the report job computes all the partitions (default: {False})
 
     Returns:
-        str -- filename of report created
+        str -- the key of the report jobs of that kind.
+    """
+    return f"{REPORT_JOB_TYPE}-full" if full else REPORT_JOB_TYPE
+
+
+def wait_for_report_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Wait for a report job to complete or fail, for at most REPORT_JOB_LOCK_SECONDS.
+
+    Arguments:
+        job_id {str} -- the id of the job.
+
+    Returns:
+        Optional[Dict[str, Any]] -- the job, see `wait_for_background_job`; None if it did not complete.
+    """
+    return wait_for_background_job(
+        cast(Eve, app),
+        job_id,
+        REPORT_JOB_TYPE,
+        timeout_seconds=app.config["REPORT_JOB_LOCK_SECONDS"],
+        poll_interval_seconds=app.config["REPORT_JOB_POLL_INTERVAL_SECONDS"],
+    )
+
+
+def create_report_response(full: bool = False) -> FlaskResponse:
+    """The report job: creates a report and answers with its details.
+
+    Arguments:
+        full {bool} -- see `create_report` (default: {False})
+
+    Returns:
+        FlaskResponse -- the details of the report created, or a list of errors with the corresponding HTTP status code.
+    """
+    logger.info("Creating a new report")
+    try:
+        report_name = create_report(full=full)
+
+        report_details = get_reports_details(report_name)
+
+        return created(reports=report_details)
+    except Exception as e:
+        msg = f"{ERROR_UNEXPECTED} ({type(e).__name__})"
+        logger.error(msg)
+        logger.exception(e)
+
+        return internal_server_error(msg)
+
+
+def create_report_job():
+    """Scheduler's job to create the report within the scheduler's app context. The report is created by a report job,
+    see `submit_report_job`, which this waits for.
     """
     logger.info("Starting create_report job")
 
     with scheduler.app.app_context():
-        create_report()
+        try:
+            job_id, coalesced = submit_report_job()
+        except JobQueueFullError as e:
+            logger.error(f"Unable to create the report: {e}")
+            return
+
+        if coalesced:
+            logger.info(f"A report is already being created by job {job_id}, waiting for it")
+
+        job = wait_for_report_job(job_id)
+        if job is None or job["status"] != JOB_STATUS_COMPLETED:
+            logger.error(f"The report job {job_id} did not complete")
+        else:
+            logger.info(f"The report job {job_id} completed with status {job['response_status']}")
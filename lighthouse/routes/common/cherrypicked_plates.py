@@ -1,8 +1,12 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, cast
 
+from eve import Eve
 from flask import current_app as app
 from flask import request
 
+from lighthouse.classes.dart_samples_join import DartSamplesJoin
 from lighthouse.constants.error_messages import (
     ERROR_CHERRYPICKED_CREATE,
     ERROR_CHERRYPICKED_FAILURE_RECORD,
@@ -14,34 +18,42 @@ from lighthouse.constants.error_messages import (
     ERROR_UNEXPECTED_CHERRYPICKING_FAILURE,
 )
 from lighthouse.constants.events import PE_BECKMAN_DESTINATION_FAILED
-from lighthouse.constants.general import ARG_BARCODE, ARG_FAILURE_TYPE, ARG_ROBOT_SERIAL, ARG_USER_ID
+from lighthouse.constants.fields import FIELD_BARCODE
+from lighthouse.constants.general import ARG_BARCODE, ARG_BARCODES, ARG_FAILURE_TYPE, ARG_ROBOT_SERIAL, ARG_USER_ID
+from lighthouse.helpers.dart import find_dart_source_samples_rows_for_barcodes
 from lighthouse.helpers.events import get_routing_key
+from lighthouse.helpers.idempotency import idempotent, run_idempotently
 from lighthouse.helpers.plates import (
-    add_controls_to_samples,
     centre_prefixes_for_samples,
-    check_matching_sample_numbers,
     construct_cherrypicking_plate_failed_message,
     create_cherrypicked_post_body,
     find_dart_source_samples_rows,
-    find_samples,
+    find_source_plates,
     get_source_plates_for_samples,
-    join_rows_with_samples,
+    get_unique_plate_barcodes,
     map_to_ss_columns,
-    query_for_cherrypicked_samples,
     send_to_ss_heron_plates,
 )
 from lighthouse.helpers.requests import get_required_params
 from lighthouse.helpers.responses import bad_request, internal_server_error, ok
 from lighthouse.messages.broker import Broker
-from lighthouse.types import FlaskResponse
+from lighthouse.types import FlaskResponse, SourcePlateDoc
 
 logger = logging.getLogger(__name__)
 
+CHERRYPICKED_PLATES_IDEMPOTENCY_SCOPE = "cherrypicked_plates"
 
-# TODO: Reduce the complexity of this method (C901) by splitting it up.
-def create_plate_from_barcode() -> FlaskResponse:  # noqa: C901
+
+def _cherrypicked_plate_idempotency_key() -> Optional[str]:
+    # without an Idempotency-Key header, a cherrypicked plate creation is identified by the barcode of the plate
+    return request.args.get(ARG_BARCODE) or None
+
+
+@idempotent(CHERRYPICKED_PLATES_IDEMPOTENCY_SCOPE, _cherrypicked_plate_idempotency_key)
+def create_plate_from_barcode() -> FlaskResponse:
     """This endpoint attempts to create a plate in Sequencescape. The arguments provided extract data from the DART
     and mongo databases, add COG UK barcodes and then call Sequencescape to attempt to create a plate and samples.
+    Retries of the request are answered with the response of the first, see lighthouse/helpers/idempotency.py.
 
     Note: This is the existing implementation, currently used for the v1 endpoint.
 
@@ -62,58 +74,24 @@ def create_plate_from_barcode() -> FlaskResponse:  # noqa: C901
         return bad_request(str(e))
 
     try:
-        dart_samples = find_dart_source_samples_rows(barcode)
-        if len(dart_samples) == 0:
-            msg = f"{ERROR_SAMPLE_DATA_MISSING} {barcode}"
-            logger.error(msg)
-
-            return internal_server_error(msg)
-
-        mongo_samples = find_samples(query_for_cherrypicked_samples(dart_samples))
-
-        if not mongo_samples:
-            return bad_request(f"No samples for this barcode: {barcode}")
-
-        if not check_matching_sample_numbers(dart_samples, mongo_samples):
-            msg = f"{ERROR_SAMPLE_DATA_MISMATCH} {barcode}"
-            logger.error(msg)
-
-            return internal_server_error(msg)
+        join = DartSamplesJoin(find_dart_source_samples_rows(barcode))
+        join.find_samples()
 
-        samples = join_rows_with_samples(dart_samples, mongo_samples)
+        if (error := _check_cherrypicked_plate_samples(barcode, join)) is not None:
+            return error
 
-        all_samples = add_controls_to_samples(dart_samples, samples)
-
-        mapped_samples = map_to_ss_columns(all_samples)
-
-        source_plates = get_source_plates_for_samples(mongo_samples)
+        source_plates = get_source_plates_for_samples(join.samples)
 
         if not source_plates:
             return bad_request(f"{ERROR_SAMPLES_MISSING_UUIDS} {barcode}")
 
-        body = create_cherrypicked_post_body(user_id, barcode, mapped_samples, robot_serial_number, source_plates)
-
-        response = send_to_ss_heron_plates(body)
-
-        if response.ok:
-            response_json = {
-                "data": {
-                    "plate_barcode": barcode,
-                    "centre": centre_prefixes_for_samples(mongo_samples),
-                    "number_of_fit_to_pick": len(samples),
-                }
-            }
-        else:
-            response_json = response.json()
+        body = create_cherrypicked_post_body(
+            user_id, barcode, map_to_ss_columns(join.joined_samples()), robot_serial_number, source_plates
+        )
 
-        # return the JSON and status code directly from Sequencescape (act as a proxy)
-        return response_json, response.status_code
+        return _send_cherrypicked_plate(barcode, body, join)
     except Exception as e:
-        msg = f"{ERROR_UNEXPECTED_CHERRYPICKING_CREATE} ({type(e).__name__})"
-        logger.error(msg)
-        logger.exception(e)
-
-        return internal_server_error(msg)
+        return _unexpected_cherrypicking_error(e)
 
 
 def fail_plate_from_barcode() -> FlaskResponse:
@@ -173,3 +151,183 @@ def fail_plate_from_barcode() -> FlaskResponse:
         logger.exception(e)
 
         return internal_server_error(msg)
+
+
+def create_plates_from_barcodes() -> FlaskResponse:
+    """This endpoint attempts to create several cherrypicked plates in Sequencescape, e.g. those of the end of a run.
+    It is given the destination barcodes, the user and the robot as JSON, e.g.
+    {"barcodes": ["DN1", "DN2"], "user_id": "user", "robot": "BKRB0001"}.
+
+    The samples of all the plates are found with a single DART query, a single query on the samples collection and a
+    single query on the source plates collection; the plates are then sent to Sequencescape concurrently, up to
+    CHERRYPICKED_BULK_MAX_WORKERS at a time. Each plate is idempotent as it is with
+    `GET /cherrypicked-plates/create`: a plate which was already created is answered with the response stored then.
+
+    Returns:
+        FlaskResponse: the result of each plate, in the order given, under "plates": its barcode, and the response and
+        status code it would have had from `GET /cherrypicked-plates/create`; or the errors and HTTP code of an invalid
+        request or of a failure common to all the plates.
+    """
+    logger.info("Attempting to create cherrypicked plates in Sequencescape")
+    try:
+        barcodes, user_id, robot_serial_number = _bulk_create_params(request.get_json(silent=True))
+    except ValueError as e:
+        logger.error(f"{ERROR_CHERRYPICKED_CREATE} {e}")
+
+        return bad_request(str(e))
+
+    try:
+        rows_by_barcode = find_dart_source_samples_rows_for_barcodes(barcodes)
+        joins = {barcode: DartSamplesJoin(rows_by_barcode[barcode]) for barcode in barcodes}
+        DartSamplesJoin.find_samples_of_joins(list(joins.values()))
+
+        bodies, results = _cherrypicked_plate_bodies(joins, user_id, robot_serial_number)
+        results.update(_send_cherrypicked_plates(bodies, joins))
+
+        return ok(
+            plates=[
+                {"barcode": barcode, "response": results[barcode][0], "response_status": int(results[barcode][1])}
+                for barcode in barcodes
+            ]
+        )
+    except Exception as e:
+        return _unexpected_cherrypicking_error(e)
+
+
+def _bulk_create_params(request_json: Any) -> Tuple[List[str], str, str]:
+    if not isinstance(request_json, dict):
+        raise ValueError(f"{ERROR_MISSING_PARAMETERS}: {ARG_BARCODES}, {ARG_USER_ID}, {ARG_ROBOT_SERIAL}")
+
+    missing_params = [param for param in (ARG_BARCODES, ARG_USER_ID, ARG_ROBOT_SERIAL) if not request_json.get(param)]
+    if missing_params:
+        raise ValueError(f"{ERROR_MISSING_PARAMETERS}: {', '.join(missing_params)}")
+
+    barcodes = request_json[ARG_BARCODES]
+    if not isinstance(barcodes, list) or not all(barcode and isinstance(barcode, str) for barcode in barcodes):
+        raise ValueError(f"'{ARG_BARCODES}' should be a list of barcodes")
+
+    # a barcode given twice is created once
+    barcodes = list(dict.fromkeys(barcodes))
+    if len(barcodes) > (max_barcodes := app.config["CHERRYPICKED_BULK_MAX_BARCODES"]):
+        raise ValueError(f"At most {max_barcodes} plates can be created at a time")
+
+    return barcodes, str(request_json[ARG_USER_ID]), str(request_json[ARG_ROBOT_SERIAL])
+
+
+def _check_cherrypicked_plate_samples(barcode: str, join: DartSamplesJoin) -> Optional[FlaskResponse]:
+    # the error response when the samples of a plate in DART and in mongo cannot make a plate, otherwise None
+    if not join.sample_rows and not join.control_rows:
+        msg = f"{ERROR_SAMPLE_DATA_MISSING} {barcode}"
+        logger.error(msg)
+
+        return internal_server_error(msg)
+
+    if not join.samples:
+        return bad_request(f"No samples for this barcode: {barcode}")
+
+    if not join.has_matching_sample_numbers():
+        msg = f"{ERROR_SAMPLE_DATA_MISMATCH} {barcode}"
+        logger.error(msg)
+
+        return internal_server_error(msg)
+
+    return None
+
+
+def _source_plates_by_barcode(joins: Iterable[DartSamplesJoin]) -> Dict[str, SourcePlateDoc]:
+    # the source plates of the samples of all the plates, found with a single query
+    source_barcodes = get_unique_plate_barcodes([sample for join in joins for sample in join.samples])
+    source_plates = find_source_plates({FIELD_BARCODE: {"$in": source_barcodes}}) if source_barcodes else []
+
+    return {source_plate[FIELD_BARCODE]: source_plate for source_plate in source_plates or []}
+
+
+def _cherrypicked_plate_bodies(
+    joins: Dict[str, DartSamplesJoin], user_id: str, robot_serial_number: str
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, FlaskResponse]]:
+    # the bodies to send to Sequencescape of the plates which can be created, and the error responses of the others
+    source_plates_by_barcode = _source_plates_by_barcode(joins.values())
+
+    bodies: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, FlaskResponse] = {}
+    for barcode, join in joins.items():
+        try:
+            if (error := _check_cherrypicked_plate_samples(barcode, join)) is not None:
+                errors[barcode] = error
+                continue
+
+            plate_source_plates = [
+                source_plates_by_barcode[source_barcode]
+                for source_barcode in get_unique_plate_barcodes(join.samples)
+                if source_barcode in source_plates_by_barcode
+            ]
+            if not plate_source_plates:
+                errors[barcode] = bad_request(f"{ERROR_SAMPLES_MISSING_UUIDS} {barcode}")
+                continue
+
+            bodies[barcode] = create_cherrypicked_post_body(
+                user_id, barcode, map_to_ss_columns(join.joined_samples()), robot_serial_number, plate_source_plates
+            )
+        except Exception as e:
+            errors[barcode] = _unexpected_cherrypicking_error(e)
+
+    return bodies, errors
+
+
+def _send_cherrypicked_plates(
+    bodies: Dict[str, Dict[str, Any]], joins: Dict[str, DartSamplesJoin]
+) -> Dict[str, FlaskResponse]:
+    # the plates are sent concurrently, up to CHERRYPICKED_BULK_MAX_WORKERS at a time
+    if not bodies:
+        return {}
+
+    # each plate is sent from a thread of its own, which needs the app context
+    flask_app = cast(Eve, app)._get_current_object()  # type: ignore
+
+    def create_plate(barcode: str) -> FlaskResponse:
+        with flask_app.app_context():
+            try:
+                return _send_cherrypicked_plate_idempotently(barcode, bodies[barcode], joins[barcode])
+            except Exception as e:
+                return _unexpected_cherrypicking_error(e)
+
+    max_workers = min(len(bodies), app.config["CHERRYPICKED_BULK_MAX_WORKERS"])
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cherrypicked-plate") as executor:
+        return dict(zip(bodies, executor.map(create_plate, bodies)))
+
+
+def _send_cherrypicked_plate(barcode: str, body: Dict[str, Any], join: DartSamplesJoin) -> FlaskResponse:
+    response = send_to_ss_heron_plates(body)
+
+    if response.ok:
+        response_json = {
+            "data": {
+                "plate_barcode": barcode,
+                "centre": centre_prefixes_for_samples(join.samples),
+                "number_of_fit_to_pick": len(join.sample_rows),
+            }
+        }
+    else:
+        response_json = response.json()
+
+    # return the JSON and status code directly from Sequencescape (act as a proxy)
+    return response_json, response.status_code
+
+
+def _send_cherrypicked_plate_idempotently(barcode: str, body: Dict[str, Any], join: DartSamplesJoin) -> FlaskResponse:
+    def send() -> FlaskResponse:
+        return _send_cherrypicked_plate(barcode, body, join)
+
+    if not app.config.get("IDEMPOTENCY_ENABLED", False):
+        return send()
+
+    # the same key as `GET /cherrypicked-plates/create` for the plate, so that either answers a retry of the other
+    return run_idempotently(f"{CHERRYPICKED_PLATES_IDEMPOTENCY_SCOPE}:{barcode}", None, send)
+
+
+def _unexpected_cherrypicking_error(e: Exception) -> FlaskResponse:
+    msg = f"{ERROR_UNEXPECTED_CHERRYPICKING_CREATE} ({type(e).__name__})"
+    logger.error(msg)
+    logger.exception(e)
+
+    return internal_server_error(msg)
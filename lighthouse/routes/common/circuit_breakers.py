@@ -0,0 +1,17 @@
+from flask import current_app as app
+
+from lighthouse.helpers.responses import ok
+from lighthouse.types import FlaskResponse
+
+
+def get_breaker_states() -> FlaskResponse:
+    """A Flask route which reports the state of the circuit breaker of each downstream service, read from mongo; none
+    when the circuit breakers are disabled. It is not part of `GET /health` as an open circuit does not make Lighthouse
+    unhealthy, and the liveness check should not depend on mongo.
+
+    Returns:
+        FlaskResponse: the response body and HTTP status code
+    """
+    breakers = app.extensions.get("circuit_breakers")
+
+    return ok(circuit_breakers=breakers.states() if breakers is not None else {})
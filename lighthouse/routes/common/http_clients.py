@@ -0,0 +1,15 @@
+from flask import current_app as app
+
+from lighthouse.helpers.responses import ok
+from lighthouse.types import FlaskResponse
+
+
+def get_http_client_stats() -> FlaskResponse:
+    """A Flask route which reports, for each downstream service, the number of requests made to it, how many of them
+    failed (connection errors and timeouts, then responses with a 5xx status) and their latency. The counters are per
+    process.
+
+    Returns:
+        FlaskResponse: the response body and HTTP status code
+    """
+    return ok(services=app.extensions["http_clients"].stats())
@@ -1,15 +1,21 @@
 import logging
 from http import HTTPStatus
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, cast
 
+from eve import Eve
+from flask import Response
 from flask import current_app as app
-from flask import request
+from flask import request, url_for
 
+from lighthouse.classes.background_jobs import JOB_STATUS_QUEUED, BackgroundJobs, JobQueueFullError, get_background_job
 from lighthouse.constants.config import SS_FILTER_FIT_TO_PICK, SS_ONLY_SUBMIT_NEW_SAMPLES, SS_PLATE_TYPE_DEFAULT
 from lighthouse.constants.error_messages import ERROR_UNEXPECTED_PLATES_CREATE
 from lighthouse.constants.fields import FIELD_PLATE_BARCODE
 from lighthouse.constants.general import (
+    ARG_ASYNC,
     ARG_BARCODE,
     ARG_EXCLUDE,
+    ARG_FIELDS,
     ARG_ROBOT_SERIAL,
     ARG_TYPE,
     ARG_TYPE_DESTINATION,
@@ -21,23 +27,27 @@ from lighthouse.helpers.cherrytrack import (
     get_wells_from_destination_barcode_from_cherrytrack,
 )
 from lighthouse.helpers.general import get_fit_to_pick_samples_and_counts
+from lighthouse.helpers.idempotency import current_idempotency_claim, idempotent, release_idempotency_claim
 from lighthouse.helpers.mongo import get_all_samples_for_source_plate, get_source_plate_uuid
 from lighthouse.helpers.plates import (
     centre_prefixes_for_samples,
     convert_json_response_into_dict,
     create_post_body,
     filter_for_new_samples,
-    format_plate,
+    format_plates,
     get_from_ss_plates_samples_info,
     plate_exists_in_ss_with_barcode,
     send_to_ss_heron_plates,
 )
-from lighthouse.helpers.responses import bad_request, internal_server_error, ok
+from lighthouse.helpers.responses import accepted, bad_request, internal_server_error, ok
+from lighthouse.helpers.streaming import ndjson_response, streaming_requested
 from lighthouse.types import FlaskResponse
 from lighthouse.utils import pretty
 
 LOGGER = logging.getLogger(__name__)
 
+PLATE_JOB_TYPE = "plate"
+
 
 def get_control_locations() -> FlaskResponse:
     """
@@ -82,8 +92,28 @@ def get_control_locations() -> FlaskResponse:
     return response_dict["data"], HTTPStatus.OK
 
 
+def _new_plate_idempotency_key() -> Optional[str]:
+    # without an Idempotency-Key header, a plate creation is identified by the barcode and type of the plate
+    if not isinstance(request_json := request.get_json(silent=True), dict) or request_json.get("barcode") is None:
+        return None
+
+    key = f"{request_json['barcode']}:{request_json.get('type') or SS_PLATE_TYPE_DEFAULT}"
+
+    # an async request is answered with a job rather than the plate, so it must not answer the retry of a sync request
+    return f"{key}:async" if _is_async_request() else key
+
+
+def _is_async_request() -> bool:
+    return request.args.get(ARG_ASYNC, "").lower() in ("1", "true")
+
+
+@idempotent("plates_new", _new_plate_idempotency_key)
 def create_plate_from_barcode() -> FlaskResponse:
-    """This endpoint attempts to create a plate in Sequencescape.
+    """This endpoint attempts to create a plate in Sequencescape. Retries of the request are answered with the response
+    of the first, see lighthouse/helpers/idempotency.py.
+
+    With `async=1` in the query string, the plate is created in the background: the endpoint answers 202 with the id of
+    a job whose result can be read from `GET /plates/jobs/<job_id>`, or 503 if too many jobs are already in progress.
 
     Note: This is the existing implementation, currently used for the v1 endpoint.
 
@@ -107,8 +137,72 @@ def create_plate_from_barcode() -> FlaskResponse:
     if plate_type not in plate_configs.keys():
         return bad_request(f"POST request 'type' must be from the list: {', '.join(plate_configs.keys())}")
 
+    if _is_async_request():
+        return _submit_plate_job(barcode, plate_type)
+
+    return _create_plate(barcode, plate_configs[plate_type])
+
+
+def get_plate_job(job_id: str) -> FlaskResponse:
+    """A Flask route which reports the state of a plate creation job submitted with `POST /plates/new?async=1`: queued,
+    running, failed or completed. A completed job includes the response of the plate creation under "response" and its
+    status code under "response_status".
+
+    Arguments:
+        job_id (str): the id of the job.
+
+    Returns:
+        FlaskResponse: the job and HTTP status code, 404 if there is no such job
+    """
+    if (job := get_background_job(cast(Eve, app), job_id, PLATE_JOB_TYPE)) is None:
+        return {"errors": [f"No plate job with id: {job_id}"]}, HTTPStatus.NOT_FOUND
+
+    return ok(job=job)
+
+
+def _submit_plate_job(barcode: str, plate_type: str) -> FlaskResponse:
+    jobs: BackgroundJobs = app.extensions["background_jobs"]
+
+    try:
+        plate_config = app.config["SS_PLATE_CONFIG"][plate_type]
+        job_id = jobs.submit(
+            PLATE_JOB_TYPE,
+            _create_plate_in_job,
+            barcode,
+            plate_config,
+            current_idempotency_claim(),
+            barcode=barcode,
+            type=plate_type,
+        )
+    except JobQueueFullError as e:
+        LOGGER.warning(str(e))
+
+        return {"errors": [str(e)]}, HTTPStatus.SERVICE_UNAVAILABLE
+
+    return accepted(
+        job={
+            "id": job_id,
+            "status": JOB_STATUS_QUEUED,
+            "href": url_for(f"{request.blueprint}.get_plate_job_endpoint", job_id=job_id),
+        }
+    )
+
+
+def _create_plate_in_job(
+    barcode: str, plate_config: dict, idempotency_claim: Optional[Tuple[str, str]]
+) -> FlaskResponse:
+    body, status = _create_plate(barcode, plate_config)
+
+    # the 202 stored for the request points at this job, so release it when the plate was not created for a retry of
+    #   the request to run again
+    if idempotency_claim is not None and not HTTPStatus.OK <= status < HTTPStatus.MULTIPLE_CHOICES:
+        release_idempotency_claim(*idempotency_claim)
+
+    return body, status
+
+
+def _create_plate(barcode: str, plate_config: dict) -> FlaskResponse:
     try:
-        plate_config = plate_configs[plate_type]
         if plate_config[SS_FILTER_FIT_TO_PICK]:
             return _create_fit_to_pick_plate_from_barcode(barcode, plate_config)
         else:
@@ -185,10 +279,11 @@ def _create_plate_from_barcode(barcode: str, plate_config: dict) -> FlaskRespons
         return response.json(), response.status_code
 
 
-def find_plate_from_barcode() -> FlaskResponse:
+def find_plate_from_barcode() -> Union[FlaskResponse, Response]:
     """A route which returns information about a list of comma separated plates as specified
     in the 'barcodes' parameters. Default fields can be excluded from the response using the url
-    param '_exclude'.
+    param '_exclude', or the response can be limited to the fields listed in the url param '_fields'. Only the queries
+    needed for the fields in the response are run.
 
     Note: This is the existing implementation, currently used for the v1 endpoint.
 
@@ -225,6 +320,29 @@ def find_plate_from_barcode() -> FlaskResponse:
     }
     ```
 
+    To only check whether the source plates have plate map data (this does not run the fit to pick aggregation):
+
+    #### Query:
+    ```
+    GET /plates?barcodes=123,456&_fields=plate_barcode,has_plate_map
+    ```
+
+    ### Streaming example
+    To stream the plates as newline delimited JSON, one plate per line written as soon as it is formatted, use the
+    `Accept: application/x-ndjson` header or the `_stream=1` param. The plates are formatted in batches of
+    PLATES_STREAM_BATCH_SIZE, in the order of the barcodes:
+
+    #### Query:
+    ```
+    GET /plates?barcodes=123,456&_stream=1
+    ```
+
+    #### Response:
+    ```
+    {"plate_barcode": "123", "has_plate_map": true, ...}
+    {"plate_barcode": "456", "has_plate_map": false, ...}
+    ```
+
     ### Destination plate example
     To fetch data for the destination plates with barcodes 'destination_123' and 'destination_456':
 
@@ -250,7 +368,7 @@ def find_plate_from_barcode() -> FlaskResponse:
     ```
 
     Returns:
-        FlaskResponse: the response body and HTTP status code
+        Union[FlaskResponse, Response]: the response body and HTTP status code, or the streamed response
     """
     LOGGER.info("Finding plate from barcode")
     try:
@@ -268,11 +386,18 @@ def find_plate_from_barcode() -> FlaskResponse:
         exclude_props_arg = request.args.get(ARG_EXCLUDE)
         exclude_props = exclude_props_arg.split(",") if exclude_props_arg else []
 
+        fields_arg = request.args.get(ARG_FIELDS)
+        fields = fields_arg.split(",") if fields_arg else None
+
         LOGGER.debug(f"{plate_type} plate(s) barcodes to look for: {barcodes_arg}")
 
-        plates = [
-            format_plate(barcode, exclude_props=exclude_props, plate_type=plate_type) for barcode in barcodes_list
-        ]
+        if streaming_requested():
+            return ndjson_response(
+                _generate_plates(barcodes_list, exclude_props=exclude_props, plate_type=plate_type, fields=fields),
+                app.json.dumps,
+            )
+
+        plates = format_plates(barcodes_list, exclude_props=exclude_props, plate_type=plate_type, fields=fields)
 
         pretty(LOGGER, plates)
 
@@ -286,6 +411,33 @@ def find_plate_from_barcode() -> FlaskResponse:
         return internal_server_error(f"Failed to lookup plates: {type(e).__name__}")
 
 
+def _generate_plates(
+    barcodes: List[str], exclude_props: List[str], plate_type: str, fields: Optional[List[str]]
+) -> Iterator[Dict[str, Any]]:
+    batch_size = app.config["PLATES_STREAM_BATCH_SIZE"]
+
+    for start in range(0, len(barcodes), batch_size):
+        yield from format_plates(
+            barcodes[start : (start + batch_size)],  # noqa: E203
+            exclude_props=exclude_props,
+            plate_type=plate_type,
+            fields=fields,
+        )
+
+
+def get_plate_cache_stats() -> FlaskResponse:
+    """A Flask route which reports the state of the in-process cache of plate lookups: whether it is enabled and in
+    use, its size and its hit, miss, eviction and invalidation counters. The counters are per process.
+
+    Returns:
+        FlaskResponse: the response body and HTTP status code
+    """
+    if (cache := app.extensions.get("plate_cache")) is None:
+        return ok(enabled=False)
+
+    return ok(enabled=True, **cache.stats())
+
+
 def find_cherrytrack_plate_from_barcode() -> FlaskResponse:
     LOGGER.info("Finding cherry track plate from barcode")
     try:
@@ -1,60 +1,155 @@
 import logging
-
-from flask import request
-
+from http import HTTPStatus
+from typing import cast
+
+from eve import Eve
+from flask import Response
+from flask import current_app as app
+from flask import make_response, request, url_for
+
+from lighthouse.classes.background_jobs import (
+    JOB_STATUS_COMPLETED,
+    JOB_STATUS_QUEUED,
+    JobQueueFullError,
+    get_background_job,
+)
 from lighthouse.constants.error_messages import ERROR_UNEXPECTED
+from lighthouse.constants.general import ARG_ASYNC, ARG_FULL, ARG_MAX_RESULTS, ARG_PAGE
 from lighthouse.helpers.reports import delete_reports as delete_reports_helper
-from lighthouse.helpers.reports import get_reports_details
-from lighthouse.helpers.responses import created, internal_server_error, ok
-from lighthouse.jobs.reports import create_report as create_report_job
+from lighthouse.helpers.reports import list_reports_details
+from lighthouse.helpers.responses import accepted, bad_request, internal_server_error, ok
+from lighthouse.jobs.reports import REPORT_JOB_TYPE, submit_report_job, wait_for_report_job
 from lighthouse.types import FlaskResponse
 
 logger = logging.getLogger(__name__)
 
 
-def get_reports() -> FlaskResponse:
-    """Gets a list of all the available reports.
+def get_reports() -> Response:
+    """Gets a list of all the available reports, newest first (see `list_reports_details`).
+
+    With the `page` or `max_results` query parameters, only that page of the reports is returned (`max_results` defaults
+    to REPORTS_PAGE_SIZE), with the page, page size and total number of reports under "_meta". The response has an
+    ETag, so a client sending it back in `If-None-Match` is answered 304 while the reports have not changed.
 
     Note: This is the existing implementation, currently used for the v1 endpoint.
 
     Returns:
-        FlaskResponse: list of report details and an HTTP status code.
+        Response: list of report details and an HTTP status code.
     """
     logger.info("Getting reports")
     try:
-        reports = get_reports_details()
-
-        return ok(reports=reports)
+        paginated = ARG_PAGE in request.args or ARG_MAX_RESULTS in request.args
+        try:
+            page = int(request.args.get(ARG_PAGE, 1))
+            max_results = int(request.args.get(ARG_MAX_RESULTS, app.config["REPORTS_PAGE_SIZE"]))
+        except ValueError:
+            return make_response(*bad_request(f"'{ARG_PAGE}' and '{ARG_MAX_RESULTS}' must be whole numbers"))
+
+        if page < 1 or max_results < 1:
+            return make_response(*bad_request(f"'{ARG_PAGE}' and '{ARG_MAX_RESULTS}' must be at least 1"))
+
+        reports = list_reports_details()
+
+        if not paginated:
+            body, status = ok(reports=reports)
+        else:
+            body, status = ok(
+                reports=reports[(page - 1) * max_results : page * max_results],  # noqa: E203
+                _meta={"page": page, "max_results": max_results, "total": len(reports)},
+            )
+
+        response = make_response(body, status)
+        response.add_etag()
+        # answered 304 without a body when the client already has this ETag
+        response.make_conditional(request)
+
+        return response
     except Exception as e:
         msg = f"{ERROR_UNEXPECTED} ({type(e).__name__})"
         logger.error(msg)
         logger.exception(e)
 
-        return internal_server_error(msg)
+        return make_response(*internal_server_error(msg))
 
 
 def create_report() -> FlaskResponse:
-    """Creates a new report.
+    """Creates a new report. Only the partitions of the report touched since the last one was created are computed,
+    unless the `full` query parameter is "1" or "true".
+
+    The report is created by a background job, see `submit_report_job`. While a report job is queued or running, in any
+    process, a request is answered with that job rather than creating another report. With `async=1` in the query
+    string, the endpoint answers 202 with the id of the job whose progress and result can be read from
+    `GET /reports/jobs/<job_id>`; otherwise it waits for the job and answers with its response. It answers 503 if too
+    many jobs are already in progress.
 
     Note: This is the existing implementation, currently used for the v1 endpoint.
 
     Returns:
         FlaskResponse: details of the report just created or a list of errors with the corresponding HTTP status code.
     """
-    logger.info("Creating a new report")
+    full = request.args.get(ARG_FULL, "").lower() in ("1", "true")
+
+    if request.args.get(ARG_ASYNC, "").lower() in ("1", "true"):
+        return _submit_report_job(full)
+
+    return _create_report(full)
+
+
+def get_report_job(job_id: str) -> FlaskResponse:
+    """A Flask route which reports the state of a report creation job submitted with `POST /reports/new?async=1`:
+    queued, running, failed or completed, with the progress of each stage of the report under "progress". A completed
+    job includes the response of the report creation under "response" and its status code under "response_status".
+
+    Arguments:
+        job_id (str): the id of the job.
+
+    Returns:
+        FlaskResponse: the job and HTTP status code, 404 if there is no such job
+    """
+    if (job := get_background_job(cast(Eve, app), job_id, REPORT_JOB_TYPE)) is None:
+        return {"errors": [f"No report job with id: {job_id}"]}, HTTPStatus.NOT_FOUND
+
+    return ok(job=job)
+
+
+def _submit_report_job(full: bool) -> FlaskResponse:
     try:
-        report_name = create_report_job()
+        job_id, coalesced = submit_report_job(full)
+    except JobQueueFullError as e:
+        logger.warning(str(e))
 
-        report_details = get_reports_details(report_name)
+        return {"errors": [str(e)]}, HTTPStatus.SERVICE_UNAVAILABLE
 
-        return created(reports=report_details)
-    except Exception as e:
-        msg = f"{ERROR_UNEXPECTED} ({type(e).__name__})"
+    status = JOB_STATUS_QUEUED
+    if coalesced and (job := get_background_job(cast(Eve, app), job_id, REPORT_JOB_TYPE)) is not None:
+        status = job["status"]
+
+    return accepted(
+        job={
+            "id": job_id,
+            "status": status,
+            "coalesced": coalesced,
+            "href": url_for(f"{request.blueprint}.get_report_job_endpoint", job_id=job_id),
+        }
+    )
+
+
+def _create_report(full: bool) -> FlaskResponse:
+    try:
+        job_id, _ = submit_report_job(full)
+    except JobQueueFullError as e:
+        logger.warning(str(e))
+
+        return {"errors": [str(e)]}, HTTPStatus.SERVICE_UNAVAILABLE
+
+    if (job := wait_for_report_job(job_id)) is None or job["status"] != JOB_STATUS_COMPLETED:
+        msg = f"The report job {job_id} did not complete"
         logger.error(msg)
-        logger.exception(e)
 
         return internal_server_error(msg)
 
+    return job["response"], job["response_status"]
+
 
 def delete_reports() -> FlaskResponse:
     """A route which accepts a list of report filenames and then deletes them from the reports path.
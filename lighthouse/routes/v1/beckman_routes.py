@@ -2,7 +2,11 @@ from flask import Blueprint
 from flask_cors import CORS
 
 from lighthouse.routes.common.beckman import get_failure_types, get_robots
-from lighthouse.routes.common.cherrypicked_plates import create_plate_from_barcode, fail_plate_from_barcode
+from lighthouse.routes.common.cherrypicked_plates import (
+    create_plate_from_barcode,
+    create_plates_from_barcodes,
+    fail_plate_from_barcode,
+)
 from lighthouse.routes.common.plate_events import create_plate_event
 from lighthouse.types import FlaskResponse
 
@@ -25,6 +29,11 @@ def create_plate_from_barcode_endpoint() -> FlaskResponse:
     return create_plate_from_barcode()
 
 
+@bp.post("/cherrypicked-plates/bulk-create")
+def create_plates_from_barcodes_endpoint() -> FlaskResponse:
+    return create_plates_from_barcodes()
+
+
 @bp.get("/cherrypicked-plates/fail")
 def fail_plate_from_barcode_endpoint() -> FlaskResponse:
     return fail_plate_from_barcode()
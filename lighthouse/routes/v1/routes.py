@@ -1,13 +1,19 @@
-from flask import Blueprint
+from typing import Union
+
+from flask import Blueprint, Response
 from flask_cors import CORS
 
+from lighthouse.routes.common.circuit_breakers import get_breaker_states
+from lighthouse.routes.common.http_clients import get_http_client_stats
 from lighthouse.routes.common.plates import (
     create_plate_from_barcode,
     find_plate_from_barcode,
     find_cherrytrack_plate_from_barcode,
     get_control_locations,
+    get_plate_cache_stats,
+    get_plate_job,
 )
-from lighthouse.routes.common.reports import create_report, delete_reports, get_reports
+from lighthouse.routes.common.reports import create_report, delete_reports, get_report_job, get_reports
 from lighthouse.types import FlaskResponse
 
 bp = Blueprint("v1_routes", __name__)
@@ -20,17 +26,37 @@ def create_plate_from_barcode_endpoint() -> FlaskResponse:
 
 
 @bp.get("/plates")
-def find_plate_from_barcode_endpoint() -> FlaskResponse:
+def find_plate_from_barcode_endpoint() -> Union[FlaskResponse, Response]:
     return find_plate_from_barcode()
 
 
+@bp.get("/plates/cache")
+def get_plate_cache_stats_endpoint() -> FlaskResponse:
+    return get_plate_cache_stats()
+
+
+@bp.get("/plates/jobs/<job_id>")
+def get_plate_job_endpoint(job_id: str) -> FlaskResponse:
+    return get_plate_job(job_id)
+
+
+@bp.get("/http-clients")
+def get_http_client_stats_endpoint() -> FlaskResponse:
+    return get_http_client_stats()
+
+
+@bp.get("/circuit-breakers")
+def get_breaker_states_endpoint() -> FlaskResponse:
+    return get_breaker_states()
+
+
 @bp.get("/plates/cherrytrack")
 def find_cherrytrack_plate_from_barcode_endpoint() -> FlaskResponse:
     return find_cherrytrack_plate_from_barcode()
 
 
 @bp.get("/reports")
-def get_reports_endpoint() -> FlaskResponse:
+def get_reports_endpoint() -> Response:
     return get_reports()
 
 
@@ -39,6 +65,11 @@ def create_report_endpoint() -> FlaskResponse:
     return create_report()
 
 
+@bp.get("/reports/jobs/<job_id>")
+def get_report_job_endpoint(job_id: str) -> FlaskResponse:
+    return get_report_job(job_id)
+
+
 @bp.post("/delete_reports")
 def delete_reports_endpoint() -> FlaskResponse:
     return delete_reports()
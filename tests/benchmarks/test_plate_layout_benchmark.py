@@ -0,0 +1,31 @@
+import re
+import timeit
+
+import pytest
+
+from lighthouse.classes.plate_layout import PLATE_LAYOUT_96, unpad_coordinate
+
+# the coordinates of 100 96 well plates, as stored on the samples
+COORDINATES = list(PLATE_LAYOUT_96.padded_coordinates) * 100
+
+
+def regex_unpad_coordinate(coordinate):
+    # the implementation replaced by the PlateLayout tables
+    return re.sub(r"0(\d+)$", r"\1", coordinate) if (coordinate and isinstance(coordinate, str)) else coordinate
+
+
+def best_of(statement, number=10):
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number
+
+
+@pytest.mark.benchmark
+def test_benchmark_unpad_coordinate():
+    regex_seconds = best_of(lambda: [regex_unpad_coordinate(coordinate) for coordinate in COORDINATES])
+    table_seconds = best_of(lambda: [unpad_coordinate(coordinate) for coordinate in COORDINATES])
+
+    print(
+        f"\nunpad {len(COORDINATES)} coordinates: regex {regex_seconds * 1000:.2f}ms, "
+        f"table {table_seconds * 1000:.2f}ms ({regex_seconds / table_seconds:.1f}x)"
+    )
+
+    assert table_seconds < regex_seconds
@@ -0,0 +1,98 @@
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from lighthouse.classes.report_partitions import FIELD_SAMPLE_UPDATED_AT
+from lighthouse.constants.fields import (
+    FIELD_COORDINATE,
+    FIELD_DATE_TESTED,
+    FIELD_FILTERED_POSITIVE,
+    FIELD_PLATE_BARCODE,
+    FIELD_RESULT,
+    FIELD_ROOT_SAMPLE_ID,
+    FIELD_SOURCE,
+)
+from lighthouse.helpers.reports import get_fit_to_pick_samples
+from lighthouse.jobs.reports import get_report_data
+
+# 5 96 well plates tested on each day of the report window
+PLATES_PER_DAY = 5
+
+
+def window_samples(window_size):
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    last_run = today - timedelta(days=1)
+    for day in range(window_size):
+        tested = today - timedelta(days=day, hours=-9)
+        for plate in range(PLATES_PER_DAY):
+            for well in range(96):
+                yield {
+                    FIELD_SOURCE: f"centre_{plate}",
+                    FIELD_PLATE_BARCODE: f"plate_{day:02}_{plate}",
+                    FIELD_ROOT_SAMPLE_ID: f"sample_{day:02}_{plate}_{well:02}",
+                    FIELD_RESULT: "Positive",
+                    FIELD_DATE_TESTED: tested,
+                    FIELD_COORDINATE: f"{'ABCDEFGH'[well // 12]}{well % 12 + 1:02}",
+                    FIELD_FILTERED_POSITIVE: True,
+                    FIELD_SAMPLE_UPDATED_AT: last_run,
+                }
+
+
+def no_locations(labware_barcodes):
+    return pd.DataFrame(columns=[FIELD_PLATE_BARCODE, "location_barcode"])
+
+
+def no_cherrypicked_samples(root_sample_ids, plate_barcodes):
+    return pd.DataFrame(columns=[FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE, "Result_lower", FIELD_COORDINATE])
+
+
+@pytest.mark.benchmark
+def test_benchmark_full_and_incremental_report_data(app, tmp_path):
+    app.config["REPORTS_DIR"] = str(tmp_path)
+
+    with app.app_context():
+        samples_collection = app.data.driver.db.samples
+        samples_collection.insert_many(list(window_samples(app.config["REPORT_WINDOW_SIZE"])))
+        try:
+            # LabWhere and the MLWH are left out, so this only compares the work done in Lighthouse; the samples read
+            #   from mongo are counted
+            samples_read = []
+
+            def read_samples(*args):
+                samples = get_fit_to_pick_samples(*args)
+                samples_read.append(len(samples.index))
+
+                return samples
+
+            with patch("lighthouse.jobs.reports.map_labware_to_location", side_effect=no_locations), patch(
+                "lighthouse.helpers.reports.get_cherrypicked_samples", side_effect=no_cherrypicked_samples
+            ), patch("lighthouse.jobs.reports.get_fit_to_pick_samples", side_effect=read_samples):
+                started_at = time.perf_counter()
+                full = get_report_data(full=True)
+                full_seconds = time.perf_counter() - started_at
+                full_samples = samples_read[-1]
+
+                # a sample of today's plates changes
+                samples_collection.update_one(
+                    {FIELD_DATE_TESTED: {"$gte": datetime.combine(datetime.now().date(), datetime.min.time())}},
+                    {"$set": {FIELD_RESULT: "Positive", FIELD_SAMPLE_UPDATED_AT: datetime.now()}},
+                )
+
+                started_at = time.perf_counter()
+                incremental = get_report_data()
+                incremental_seconds = time.perf_counter() - started_at
+                incremental_samples = samples_read[-1]
+        finally:
+            samples_collection.delete_many({})
+
+    print(
+        f"\nreport data for {len(full.index)} samples: full {full_seconds:.2f}s ({full_samples} samples read from "
+        f"mongo), incremental {incremental_seconds:.2f}s ({incremental_samples} samples read from mongo, "
+        f"{full_seconds / incremental_seconds:.1f}x)"
+    )
+
+    assert len(incremental.index) == len(full.index)
+    assert incremental_samples < full_samples
@@ -0,0 +1,91 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lighthouse.classes.plate_layout import PLATE_LAYOUT_96, unpad_coordinate
+from lighthouse.constants.fields import (
+    FIELD_COORDINATE,
+    FIELD_PLATE_BARCODE,
+    FIELD_RESULT,
+    FIELD_ROOT_SAMPLE_ID,
+    FIELD_SOURCE,
+)
+from lighthouse.helpers.reports import CHERRYPICKED_MERGE_KEYS, merge_cherrypicked_column, transform_fit_to_pick_samples
+
+# 1M fit to pick samples: the wells of 10417 96 well plates, and about 1 in 10 of them cherrypicked
+NUMBER_OF_PLATES = 10417
+CHERRYPICKED_EVERY = 10
+
+
+def synthetic_report():
+    plates = np.repeat([f"plate_{plate:06}" for plate in range(NUMBER_OF_PLATES)], PLATE_LAYOUT_96.size)
+    coordinates = np.tile(PLATE_LAYOUT_96.padded_coordinates, NUMBER_OF_PLATES)
+
+    return pd.DataFrame(
+        {
+            FIELD_SOURCE: pd.Categorical(np.resize(["centre_1", "centre_2", "centre_3"], len(plates))),
+            FIELD_PLATE_BARCODE: pd.Categorical(plates),
+            FIELD_ROOT_SAMPLE_ID: pd.Series([f"sample_{row:07}" for row in range(len(plates))], dtype=object),
+            FIELD_RESULT: pd.Categorical(np.resize(["Positive"], len(plates))),
+            FIELD_COORDINATE: pd.Categorical(coordinates),
+        }
+    )
+
+
+def synthetic_cherrypicked_samples(report):
+    # as read from the MLWH: object columns, unpadded coordinates and lower case results
+    cherrypicked = report.iloc[::CHERRYPICKED_EVERY]
+
+    return pd.DataFrame(
+        {
+            FIELD_ROOT_SAMPLE_ID: cherrypicked[FIELD_ROOT_SAMPLE_ID].to_numpy(dtype=object),
+            FIELD_PLATE_BARCODE: cherrypicked[FIELD_PLATE_BARCODE].to_numpy(dtype=object),
+            "Result_lower": "positive",
+            FIELD_COORDINATE: [unpad_coordinate(coordinate) for coordinate in cherrypicked[FIELD_COORDINATE]],
+            "LIMS submission": "Yes",
+        }
+    )
+
+
+def row_by_row(report, cherrypicked_samples):
+    # the post-processing replaced by the transform stage, on object columns
+    report = report.astype(object)
+    report[FIELD_COORDINATE] = report[FIELD_COORDINATE].map(lambda coordinate: unpad_coordinate(coordinate))
+    report["plate and well"] = report[FIELD_PLATE_BARCODE] + ":" + report[FIELD_COORDINATE]
+    report["Result_lower"] = report[FIELD_RESULT].str.lower()
+
+    report = report.merge(cherrypicked_samples, how="left", on=CHERRYPICKED_MERGE_KEYS)
+
+    return report.fillna({"LIMS submission": "No"}).drop(columns=["Result_lower"])
+
+
+def vectorised(report, cherrypicked_samples):
+    return merge_cherrypicked_column(transform_fit_to_pick_samples(report), cherrypicked_samples)
+
+
+def timed(transform, report, cherrypicked_samples):
+    started_at = time.perf_counter()
+    transformed = transform(report, cherrypicked_samples)
+
+    return transformed, time.perf_counter() - started_at
+
+
+@pytest.mark.benchmark
+def test_benchmark_report_transform():
+    report = synthetic_report()
+    cherrypicked_samples = synthetic_cherrypicked_samples(report)
+
+    row_by_row_report, row_by_row_seconds = timed(row_by_row, report, cherrypicked_samples)
+    vectorised_report, vectorised_seconds = timed(vectorised, report, cherrypicked_samples)
+
+    print(
+        f"\ntransform of {len(report.index)} samples: row by row {row_by_row_seconds:.2f}s, vectorised "
+        f"{vectorised_seconds:.2f}s ({row_by_row_seconds / vectorised_seconds:.1f}x)"
+    )
+
+    pd.testing.assert_frame_equal(
+        vectorised_report.astype(object), row_by_row_report[vectorised_report.columns].astype(object)
+    )
+    assert vectorised_seconds < row_by_row_seconds
@@ -0,0 +1,68 @@
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from lighthouse.classes.plate_layout import PLATE_LAYOUT_96, unpad_coordinate
+from lighthouse.constants.fields import (
+    FIELD_COORDINATE,
+    FIELD_DATE_TESTED,
+    FIELD_PLATE_BARCODE,
+    FIELD_RESULT,
+    FIELD_ROOT_SAMPLE_ID,
+    FIELD_SOURCE,
+)
+from lighthouse.helpers.reports import fit_to_pick_samples_frame
+
+# the fit to pick samples of 2000 96 well plates, as read from the cursor of the report aggregation
+NUMBER_OF_PLATES = 2000
+
+
+def fit_to_pick_documents():
+    tested = datetime(2020, 5, 1)
+    for plate in range(NUMBER_OF_PLATES):
+        for well, coordinate in enumerate(PLATE_LAYOUT_96.padded_coordinates):
+            yield {
+                FIELD_SOURCE: f"centre_{plate % 8}",
+                FIELD_PLATE_BARCODE: f"plate_{plate:06}",
+                FIELD_ROOT_SAMPLE_ID: f"sample_{plate:06}_{well:02}",
+                FIELD_RESULT: "Positive",
+                FIELD_DATE_TESTED: tested + timedelta(minutes=plate),
+                FIELD_COORDINATE: coordinate,
+            }
+
+
+def from_records():
+    # the implementation replaced by the batched ingest
+    frame = pd.DataFrame.from_records(fit_to_pick_documents())
+    frame[FIELD_COORDINATE] = frame[FIELD_COORDINATE].map(unpad_coordinate)
+
+    return frame
+
+
+def peak_memory(ingest):
+    tracemalloc.start()
+    try:
+        frame = ingest()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return frame, peak
+
+
+@pytest.mark.benchmark
+def test_benchmark_fit_to_pick_samples_ingest():
+    records_frame, records_peak = peak_memory(from_records)
+    batched_frame, batched_peak = peak_memory(lambda: fit_to_pick_samples_frame(fit_to_pick_documents(), 10000))
+
+    print(
+        f"\ningest {len(batched_frame.index)} fit to pick samples: from_records peak {records_peak / 2**20:.1f}MB, "
+        f"batched peak {batched_peak / 2**20:.1f}MB ({records_peak / batched_peak:.1f}x); frame "
+        f"{records_frame.memory_usage(deep=True).sum() / 2**20:.1f}MB vs "
+        f"{batched_frame.memory_usage(deep=True).sum() / 2**20:.1f}MB"
+    )
+
+    assert batched_frame[FIELD_COORDINATE].to_list() == records_frame[FIELD_COORDINATE].to_list()
+    assert batched_peak < records_peak
@@ -0,0 +1,205 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+import pytest
+
+from lighthouse.classes.background_jobs import (
+    BACKGROUND_JOB_LOCKS_COLLECTION,
+    BACKGROUND_JOBS_COLLECTION,
+    JOB_STATUS_COMPLETED,
+    JOB_STATUS_FAILED,
+    JOB_STATUS_QUEUED,
+    JOB_STATUS_RUNNING,
+    BackgroundJobs,
+    JobQueueFullError,
+    get_background_job,
+    job_stage,
+    wait_for_background_job,
+)
+
+
+@pytest.fixture
+def background_jobs_collection(app):
+    with app.app_context():
+        collection = app.data.driver.db[BACKGROUND_JOBS_COLLECTION]
+        collection.delete_many({})
+        try:
+            yield collection
+        finally:
+            collection.delete_many({})
+
+
+@pytest.fixture
+def background_job_locks_collection(app):
+    with app.app_context():
+        collection = app.data.driver.db[BACKGROUND_JOB_LOCKS_COLLECTION]
+        collection.delete_many({})
+        try:
+            yield collection
+        finally:
+            collection.delete_many({})
+
+
+@pytest.fixture
+def background_jobs(app, background_jobs_collection, background_job_locks_collection):
+    jobs = BackgroundJobs(app, max_workers=1, max_pending=1, ttl_seconds=60)
+    try:
+        yield jobs
+    finally:
+        jobs.shutdown()
+
+
+def test_background_jobs_stores_the_response_of_a_job(app, background_jobs):
+    job_id = background_jobs.submit("test", lambda value: ({"value": value}, HTTPStatus.CREATED), 1, name="job")
+    background_jobs.shutdown()
+
+    job = get_background_job(app, job_id, "test")
+
+    assert job["status"] == JOB_STATUS_COMPLETED
+    assert job["details"] == {"name": "job"}
+    assert job["response"] == {"value": 1}
+    assert job["response_status"] == HTTPStatus.CREATED
+    assert "completed_at" in job
+
+
+def test_background_jobs_records_a_failed_job(app, background_jobs):
+    def failing_job():
+        raise ValueError("boom")
+
+    job_id = background_jobs.submit("test", failing_job)
+    background_jobs.shutdown()
+
+    job = get_background_job(app, job_id, "test")
+
+    assert job["status"] == JOB_STATUS_FAILED
+    assert job["errors"] == ["ValueError: boom"]
+    assert "response" not in job
+
+
+def test_background_jobs_rejects_jobs_when_full(app, background_jobs):
+    release = threading.Event()
+
+    def blocking_job():
+        release.wait(5)
+        return {}, HTTPStatus.OK
+
+    running_id = background_jobs.submit("test", blocking_job)
+    queued_id = background_jobs.submit("test", blocking_job)
+
+    with pytest.raises(JobQueueFullError):
+        background_jobs.submit("test", blocking_job)
+
+    assert get_background_job(app, queued_id, "test")["status"] == JOB_STATUS_QUEUED
+
+    release.set()
+    background_jobs.shutdown()
+
+    assert get_background_job(app, running_id, "test")["status"] == JOB_STATUS_COMPLETED
+    assert get_background_job(app, queued_id, "test")["status"] == JOB_STATUS_COMPLETED
+
+
+def test_get_background_job_checks_the_type(app, background_jobs):
+    job_id = background_jobs.submit("test", lambda: ({}, HTTPStatus.OK))
+    background_jobs.shutdown()
+
+    assert get_background_job(app, job_id, "other") is None
+    assert get_background_job(app, "unknown", "test") is None
+
+
+def test_wait_for_background_job(app, background_jobs):
+    release = threading.Event()
+
+    def blocking_job():
+        release.wait(5)
+        return {}, HTTPStatus.OK
+
+    job_id = background_jobs.submit("test", blocking_job)
+
+    # the job does not complete in time
+    assert wait_for_background_job(app, job_id, "test", timeout_seconds=0, poll_interval_seconds=0) is None
+
+    release.set()
+
+    job = wait_for_background_job(app, job_id, "test", timeout_seconds=5, poll_interval_seconds=0.01)
+
+    assert job["status"] == JOB_STATUS_COMPLETED
+    assert wait_for_background_job(app, "unknown", "test", timeout_seconds=5, poll_interval_seconds=0.01) is None
+
+
+def test_background_jobs_coalesces_jobs_with_the_same_key(app, background_jobs, background_job_locks_collection):
+    release = threading.Event()
+
+    def blocking_job():
+        release.wait(5)
+        return {}, HTTPStatus.OK
+
+    with app.app_context():
+        job_id, coalesced = background_jobs.submit_coalesced("test", "key", 60, blocking_job)
+
+        assert not coalesced
+        assert background_jobs.submit_coalesced("test", "key", 60, blocking_job) == (job_id, True)
+        assert background_jobs.submit_coalesced("test", "other", 60, blocking_job)[0] != job_id
+
+    release.set()
+    background_jobs.shutdown()
+
+    assert get_background_job(app, job_id, "test")["status"] == JOB_STATUS_COMPLETED
+    # the lock is released once the job completes
+    assert background_job_locks_collection.count_documents({}) == 0
+
+
+def test_background_jobs_takes_over_an_expired_lock(app, background_jobs, background_job_locks_collection):
+    background_job_locks_collection.insert_one(
+        {"_id": "key", "job_id": "abandoned", "expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}
+    )
+
+    with app.app_context():
+        job_id, coalesced = background_jobs.submit_coalesced("test", "key", 60, lambda: ({}, HTTPStatus.OK))
+
+    background_jobs.shutdown()
+
+    assert not coalesced
+    assert job_id != "abandoned"
+    assert get_background_job(app, job_id, "test")["status"] == JOB_STATUS_COMPLETED
+
+
+def test_job_stage_records_the_progress_of_a_job(app, background_jobs):
+    def staged_job():
+        with job_stage("first"):
+            pass
+        with job_stage("second"):
+            raise ValueError("boom")
+
+    job_id = background_jobs.submit("test", staged_job)
+    background_jobs.shutdown()
+
+    progress = get_background_job(app, job_id, "test")["progress"]
+
+    assert list(progress) == ["first", "second"]
+    assert progress["first"]["status"] == JOB_STATUS_COMPLETED
+    assert progress["second"]["status"] == JOB_STATUS_FAILED
+    assert "started_at" in progress["second"] and "completed_at" in progress["second"]
+
+
+def test_job_stage_outside_of_a_job():
+    with job_stage("stage"):
+        pass
+
+
+def test_job_stage_records_a_running_stage(app, background_jobs):
+    running = threading.Event()
+    release = threading.Event()
+
+    def staged_job():
+        with job_stage("stage"):
+            running.set()
+            release.wait(5)
+        return {}, HTTPStatus.OK
+
+    job_id = background_jobs.submit("test", staged_job)
+    running.wait(5)
+
+    assert get_background_job(app, job_id, "test")["progress"]["stage"]["status"] == JOB_STATUS_RUNNING
+
+    release.set()
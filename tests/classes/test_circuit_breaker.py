@@ -0,0 +1,203 @@
+from http import HTTPStatus
+from unittest.mock import patch
+
+import pytest
+import requests
+import responses
+from pymongo.errors import PyMongoError
+
+from lighthouse.classes.circuit_breaker import (
+    CIRCUIT_BREAKERS_COLLECTION,
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    CircuitBreaker,
+    CircuitBreakers,
+    CircuitOpenError,
+    circuit_breaker_guard,
+)
+from lighthouse.classes.http_clients import ServiceClient
+from lighthouse.constants.config import SERVICE_DART
+
+SERVICE_URL = "http://service.test/api"
+NOW = 1_000_000.0
+
+
+@pytest.fixture
+def circuit_breakers_collection(app):
+    with app.app_context():
+        yield app.data.driver.db[CIRCUIT_BREAKERS_COLLECTION]
+
+
+@pytest.fixture
+def breaker(app, circuit_breakers_collection):
+    return CircuitBreaker(app, "service", failure_threshold=2, reset_timeout_seconds=30, state_cache_seconds=0)
+
+
+@pytest.fixture
+def frozen_time():
+    with patch("lighthouse.classes.circuit_breaker.time.time", return_value=NOW) as mock_time:
+        yield mock_time
+
+
+def open_circuit(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow_request() is True
+        breaker.record_failure()
+
+
+def test_circuit_breaker_opens_after_consecutive_failures(breaker, frozen_time):
+    assert breaker.allow_request() is True
+    breaker.record_failure()
+
+    assert breaker.state() == {"state": CIRCUIT_CLOSED, "failures": 1}
+
+    breaker.record_failure()
+
+    assert breaker.state() == {"state": CIRCUIT_OPEN, "failures": 2, "retry_in_seconds": 30}
+    assert breaker.allow_request() is False
+
+
+def test_circuit_breaker_success_resets_the_failures(breaker):
+    breaker.allow_request()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state() == {"state": CIRCUIT_CLOSED, "failures": 1}
+
+
+def test_circuit_breaker_allows_a_single_probe_once_reset(breaker, frozen_time):
+    open_circuit(breaker)
+
+    frozen_time.return_value = NOW + 30
+
+    assert breaker.allow_request() is True
+    assert breaker.state()["state"] == CIRCUIT_HALF_OPEN
+    # another call while the probe is in progress fails fast
+    assert breaker.allow_request() is False
+
+
+def test_circuit_breaker_closes_after_a_successful_probe(breaker, frozen_time):
+    open_circuit(breaker)
+    frozen_time.return_value = NOW + 30
+
+    assert breaker.allow_request() is True
+    breaker.record_success()
+
+    assert breaker.state() == {"state": CIRCUIT_CLOSED, "failures": 0}
+    assert breaker.allow_request() is True
+
+
+def test_circuit_breaker_reopens_after_a_failed_probe(breaker, frozen_time):
+    open_circuit(breaker)
+    frozen_time.return_value = NOW + 30
+
+    assert breaker.allow_request() is True
+    breaker.record_failure()
+
+    assert breaker.state()["state"] == CIRCUIT_OPEN
+    assert breaker.allow_request() is False
+
+
+def test_circuit_breaker_replaces_a_probe_which_did_not_complete(breaker, frozen_time):
+    open_circuit(breaker)
+    frozen_time.return_value = NOW + 30
+    assert breaker.allow_request() is True
+
+    frozen_time.return_value = NOW + 60
+
+    assert breaker.allow_request() is True
+
+
+def test_circuit_breaker_state_is_shared(app, breaker):
+    other_process_breaker = CircuitBreaker(
+        app, "service", failure_threshold=2, reset_timeout_seconds=30, state_cache_seconds=0
+    )
+
+    open_circuit(breaker)
+
+    assert other_process_breaker.allow_request() is False
+
+
+def test_circuit_breaker_allows_calls_when_mongo_fails(breaker):
+    with patch.object(breaker, "_state", side_effect=PyMongoError()):
+        assert breaker.allow_request() is True
+
+
+def test_guard_records_the_outcome_of_the_call(breaker):
+    with pytest.raises(ValueError):
+        with breaker.guard(failures=(ValueError,)):
+            raise ValueError()
+
+    with pytest.raises(KeyError):
+        with breaker.guard(failures=(ValueError,)):
+            raise KeyError()
+
+    assert breaker.state()["failures"] == 1
+
+    with pytest.raises(ValueError):
+        with breaker.guard(failures=(ValueError,)):
+            raise ValueError()
+
+    with pytest.raises(CircuitOpenError):
+        with breaker.guard():
+            pass
+
+
+def test_circuit_breaker_guard_is_a_no_op_when_disabled(app):
+    # the registry of the breakers is only created when CIRCUIT_BREAKERS_ENABLED
+    app.extensions.pop("circuit_breakers")
+
+    with app.app_context():
+        with circuit_breaker_guard(SERVICE_DART):
+            pass
+
+
+def test_service_client_fails_fast_while_the_circuit_is_open(breaker, mocked_responses):
+    client = ServiceClient(
+        name="service",
+        connect_timeout=1,
+        read_timeout=1,
+        retries=0,
+        backoff_factor=0,
+        retry_statuses=(),
+        pool_maxsize=1,
+        breaker=breaker,
+    )
+    mocked_responses.add(responses.GET, SERVICE_URL, status=HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    client.get(SERVICE_URL)
+    client.get(SERVICE_URL)
+
+    with pytest.raises(requests.ConnectionError):
+        client.get(SERVICE_URL)
+
+    assert len(mocked_responses.calls) == 2
+    assert client.stats()["rejected"] == 1
+
+
+def test_get_breaker_states(app, client, circuit_breakers_collection):
+    app.extensions["circuit_breakers"] = CircuitBreakers(
+        app,
+        {
+            "CIRCUIT_BREAKER_DEFAULTS": {"failure_threshold": 1, "reset_timeout_seconds": 30, "state_cache_seconds": 0},
+            "CIRCUIT_BREAKERS": {"first": {}, "second": {}},
+        },
+    )
+    app.extensions["circuit_breakers"]["second"].record_failure()
+
+    response = client.get("/circuit-breakers")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json["circuit_breakers"]["first"] == {"state": CIRCUIT_CLOSED, "failures": 0}
+    assert response.json["circuit_breakers"]["second"]["state"] == CIRCUIT_OPEN
+
+
+def test_health_does_not_read_the_circuit_breakers(app, client):
+    with patch.object(CircuitBreakers, "states") as states:
+        response = client.get("/health")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_data(as_text=True) == "Factory working"
+    states.assert_not_called()
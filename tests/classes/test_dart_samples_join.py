@@ -0,0 +1,91 @@
+from unittest.mock import patch
+
+from lighthouse.classes.dart_samples_join import CHERRYPICKED_SAMPLE_PROJECTION, DartSamplesJoin
+from lighthouse.constants.fields import FIELD_LH_SAMPLE_UUID
+from lighthouse.helpers.dart import row_to_dict
+from tests.fixtures.data.dart import DartRow
+
+SAMPLE_UUID_1 = "0a53e7b6-7ce8-4ebc-95c3-02dd64942531"
+SAMPLE_UUID_2 = "1a53e7b6-7ce8-4ebc-95c3-02dd64942531"
+
+ROWS = [
+    DartRow.with_sample_uuid("DN1111", "A01", "plate_123", "A01", None, SAMPLE_UUID_1),
+    DartRow.with_sample_uuid("DN1111", "A02", "DN3333", "H12", "positive", None),
+    DartRow.with_sample_uuid("DN1111", "A03", "plate_123", "A02", None, SAMPLE_UUID_2),
+    DartRow.with_sample_uuid("DN1111", "A04", "DN3333", "H11", "negative", None),
+]
+
+
+def test_dart_samples_join_partitions_the_rows():
+    join = DartSamplesJoin(ROWS)
+
+    assert join.sample_rows == [ROWS[0], ROWS[2]]
+    assert join.control_rows == [ROWS[1], ROWS[3]]
+    assert join.control_rows_as_dicts() == [row_to_dict(ROWS[1]), row_to_dict(ROWS[3])]
+
+
+def test_dart_samples_join_finds_the_samples_with_a_single_query(app, samples):
+    with app.app_context():
+        join = DartSamplesJoin(ROWS)
+
+        with patch.object(app.data.driver.db, "samples", wraps=app.data.driver.db.samples) as samples_collection:
+            found = join.find_samples()
+
+        samples_collection.find.assert_called_once()
+        query, projection = samples_collection.find.call_args.args
+        assert sorted(query[FIELD_LH_SAMPLE_UUID]["$in"]) == [SAMPLE_UUID_1, SAMPLE_UUID_2]
+        assert projection == CHERRYPICKED_SAMPLE_PROJECTION
+
+        assert sorted(sample[FIELD_LH_SAMPLE_UUID] for sample in found) == [SAMPLE_UUID_1, SAMPLE_UUID_2]
+        assert join.has_matching_sample_numbers()
+
+
+def test_dart_samples_join_joins_the_rows_with_their_samples(app, samples):
+    with app.app_context():
+        join = DartSamplesJoin(ROWS)
+        join.find_samples()
+
+        joined = join.joined_samples()
+
+    assert [sample["row"] for sample in joined] == [row_to_dict(row) for row in (ROWS[0], ROWS[2], ROWS[1], ROWS[3])]
+    assert [sample["sample"] and sample["sample"][FIELD_LH_SAMPLE_UUID] for sample in joined] == [
+        SAMPLE_UUID_1,
+        SAMPLE_UUID_2,
+        None,
+        None,
+    ]
+
+
+def test_dart_samples_join_with_a_sample_missing_from_mongo(app, samples):
+    rows = [*ROWS, DartRow.with_sample_uuid("DN1111", "A05", "plate_123", "A03", None, "not-a-sample-uuid")]
+
+    with app.app_context():
+        join = DartSamplesJoin(rows)
+        join.find_samples()
+
+    assert not join.has_matching_sample_numbers()
+    assert join.sample_for_row(rows[-1]) is None
+
+
+def test_dart_samples_join_does_not_query_without_sample_rows(app):
+    with app.app_context():
+        join = DartSamplesJoin([ROWS[1], ROWS[3]])
+
+        with patch.object(app.data.driver.db, "samples") as samples_collection:
+            assert join.find_samples() == []
+
+        samples_collection.find.assert_not_called()
+        assert join.has_matching_sample_numbers()
+
+
+def test_dart_samples_join_finds_the_samples_of_several_joins_with_a_single_query(app, samples):
+    first, second = DartSamplesJoin(ROWS[:2]), DartSamplesJoin(ROWS[2:])
+
+    with app.app_context():
+        with patch.object(app.data.driver.db, "samples", wraps=app.data.driver.db.samples) as samples_collection:
+            DartSamplesJoin.find_samples_of_joins([first, second])
+
+        samples_collection.find.assert_called_once()
+
+    assert [sample[FIELD_LH_SAMPLE_UUID] for sample in first.samples] == [SAMPLE_UUID_1]
+    assert [sample[FIELD_LH_SAMPLE_UUID] for sample in second.samples] == [SAMPLE_UUID_2]
@@ -0,0 +1,124 @@
+from http import HTTPStatus
+
+import pytest
+import requests
+import responses
+
+from lighthouse.classes.http_clients import HttpClients, ServiceClient, http_client
+from lighthouse.constants.config import HTTP_SERVICE_LABWHERE, HTTP_SERVICE_SEQUENCESCAPE
+
+SERVICE_URL = "http://service.test/api"
+
+
+@pytest.fixture
+def service_client():
+    client = ServiceClient(
+        name="service",
+        connect_timeout=1,
+        read_timeout=2,
+        retries=2,
+        backoff_factor=0,
+        retry_statuses=(HTTPStatus.SERVICE_UNAVAILABLE,),
+        pool_maxsize=4,
+    )
+    try:
+        yield client
+    finally:
+        client.close()
+
+
+def test_service_client_sets_the_timeouts(service_client, mocked_responses):
+    mocked_responses.add(responses.GET, SERVICE_URL, json={}, status=HTTPStatus.OK)
+
+    service_client.get(SERVICE_URL)
+    service_client.get(SERVICE_URL, timeout=10)
+
+    assert mocked_responses.calls[0].request.req_kwargs["timeout"] == (1, 2)
+    assert mocked_responses.calls[1].request.req_kwargs["timeout"] == 10
+
+
+def test_service_client_reuses_its_session(service_client, mocked_responses):
+    mocked_responses.add(responses.GET, SERVICE_URL, json={}, status=HTTPStatus.OK)
+
+    session = service_client.session
+    service_client.get(SERVICE_URL)
+    service_client.get(SERVICE_URL)
+
+    assert service_client.session is session
+    assert service_client.session.get_adapter(SERVICE_URL).max_retries.total == 2
+
+
+def test_service_client_retries_idempotent_requests(service_client, mocked_responses):
+    mocked_responses.add(responses.GET, SERVICE_URL, status=HTTPStatus.SERVICE_UNAVAILABLE)
+    mocked_responses.add(responses.GET, SERVICE_URL, json={}, status=HTTPStatus.OK)
+
+    response = service_client.get(SERVICE_URL)
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(mocked_responses.calls) == 2
+
+
+def test_service_client_does_not_retry_posts_on_a_failed_response(service_client, mocked_responses):
+    mocked_responses.add(responses.POST, SERVICE_URL, status=HTTPStatus.SERVICE_UNAVAILABLE)
+
+    response = service_client.post(SERVICE_URL, json={})
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert len(mocked_responses.calls) == 1
+
+
+def test_service_client_counts_requests_and_errors(service_client, mocked_responses):
+    mocked_responses.add(responses.POST, SERVICE_URL, json={}, status=HTTPStatus.OK)
+    mocked_responses.add(responses.POST, SERVICE_URL, status=HTTPStatus.INTERNAL_SERVER_ERROR)
+    mocked_responses.add(responses.POST, SERVICE_URL, body=requests.ConnectionError())
+
+    service_client.post(SERVICE_URL)
+    service_client.post(SERVICE_URL)
+    with pytest.raises(requests.ConnectionError):
+        service_client.post(SERVICE_URL)
+
+    stats = service_client.stats()
+    assert stats["requests"] == 3
+    assert stats["errors"] == 1
+    assert stats["server_errors"] == 1
+    assert stats["max_seconds"] >= stats["mean_seconds"] >= 0
+
+
+def test_http_clients_applies_the_service_settings():
+    http_clients = HttpClients(
+        {
+            "HTTP_CLIENT_DEFAULTS": {
+                "connect_timeout": 1,
+                "read_timeout": 2,
+                "retries": 0,
+                "backoff_factor": 0,
+                "retry_statuses": (),
+                "pool_maxsize": 4,
+            },
+            "HTTP_CLIENTS": {"first": {}, "second": {"read_timeout": 20}},
+        }
+    )
+
+    assert http_clients["first"].timeout == (1, 2)
+    assert http_clients["second"].timeout == (1, 20)
+    assert list(http_clients.stats().keys()) == ["first", "second"]
+
+
+def test_http_client_returns_the_client_of_the_app(app):
+    with app.app_context():
+        assert http_client(HTTP_SERVICE_SEQUENCESCAPE) is app.extensions["http_clients"][HTTP_SERVICE_SEQUENCESCAPE]
+        assert http_client(HTTP_SERVICE_LABWHERE).name == HTTP_SERVICE_LABWHERE
+
+
+def test_get_http_client_stats(app, client, mocked_responses):
+    with app.app_context():
+        labwhere_url = f"{app.config['LABWHERE_URL']}/api/scans"
+        mocked_responses.add(responses.POST, labwhere_url, json={}, status=HTTPStatus.OK)
+
+        http_client(HTTP_SERVICE_LABWHERE).post(labwhere_url)
+
+    response = client.get("/http-clients")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json["services"][HTTP_SERVICE_LABWHERE]["requests"] >= 1
+    assert set(response.json["services"].keys()) == set(app.config["HTTP_CLIENTS"].keys())
@@ -0,0 +1,191 @@
+from unittest.mock import patch
+
+import pytest
+
+from lighthouse.classes.plate_cache import PlateCache, deep_sizeof, plate_barcodes_for_cache_change
+from lighthouse.helpers.plates import format_plates
+
+PLATE = {"plate_barcode": "plate_123", "has_plate_map": True}
+VARIANT = ("source", ("plate_barcode", "has_plate_map"))
+
+
+@pytest.fixture
+def plate_cache():
+    cache = PlateCache(max_size_bytes=10 * deep_sizeof(PLATE))
+    cache.activate()
+
+    return cache
+
+
+@pytest.fixture
+def app_plate_cache(app, plate_cache):
+    app.extensions["plate_cache"] = plate_cache
+    try:
+        yield plate_cache
+    finally:
+        del app.extensions["plate_cache"]
+
+
+def test_plate_cache_get_and_put(plate_cache):
+    assert plate_cache.get("plate_123", VARIANT) is None
+
+    assert plate_cache.put("plate_123", VARIANT, PLATE, plate_cache.generation()) is True
+
+    assert plate_cache.get("plate_123", VARIANT) == PLATE
+    assert plate_cache.get("plate_123", ("source", ("plate_barcode",))) is None
+
+    stats = plate_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["entries"] == 1
+    assert stats["size_bytes"] == deep_sizeof(PLATE)
+
+
+def test_plate_cache_does_not_store_when_inactive():
+    cache = PlateCache(max_size_bytes=1024 * 1024)
+
+    assert cache.put("plate_123", VARIANT, PLATE, cache.generation()) is False
+    assert cache.stats()["entries"] == 0
+
+
+def test_plate_cache_evicts_least_recently_used(plate_cache):
+    for index in range(10):
+        plate_cache.put(f"plate_{index}", VARIANT, PLATE, plate_cache.generation())
+
+    # plate_0 is now the most recently used
+    assert plate_cache.get("plate_0", VARIANT) == PLATE
+
+    plate_cache.put("plate_10", VARIANT, PLATE, plate_cache.generation())
+
+    assert plate_cache.get("plate_1", VARIANT) is None
+    assert plate_cache.get("plate_0", VARIANT) == PLATE
+
+    stats = plate_cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["size_bytes"] <= stats["max_size_bytes"]
+
+
+def test_plate_cache_does_not_store_plates_bigger_than_the_cache(plate_cache):
+    big_plate = {"pickable_samples": [PLATE] * 100}
+
+    assert plate_cache.put("plate_123", VARIANT, big_plate, plate_cache.generation()) is False
+
+
+def test_plate_cache_invalidate_removes_every_variant(plate_cache):
+    plate_cache.put("plate_123", VARIANT, PLATE, plate_cache.generation())
+    plate_cache.put(
+        "plate_123", ("source", ("plate_barcode",)), {"plate_barcode": "plate_123"}, plate_cache.generation()
+    )
+    plate_cache.put("plate_456", VARIANT, PLATE, plate_cache.generation())
+
+    plate_cache.invalidate(["plate_123"])
+
+    assert plate_cache.get("plate_123", VARIANT) is None
+    assert plate_cache.get("plate_123", ("source", ("plate_barcode",))) is None
+    assert plate_cache.get("plate_456", VARIANT) == PLATE
+    assert plate_cache.stats()["invalidations"] == 2
+
+
+def test_plate_cache_does_not_store_plates_invalidated_while_computed(plate_cache):
+    generation = plate_cache.generation()
+
+    plate_cache.invalidate(["plate_123"])
+
+    assert plate_cache.put("plate_123", VARIANT, PLATE, generation) is False
+    assert plate_cache.put("plate_456", VARIANT, PLATE, generation) is True
+    assert plate_cache.put("plate_123", VARIANT, PLATE, plate_cache.generation()) is True
+
+
+def test_plate_cache_does_not_store_plates_computed_before_clear(plate_cache):
+    generation = plate_cache.generation()
+
+    plate_cache.clear()
+
+    assert plate_cache.put("plate_123", VARIANT, PLATE, generation) is False
+    assert plate_cache.put("plate_123", VARIANT, PLATE, plate_cache.generation()) is True
+
+
+def test_plate_cache_deactivate_empties_the_cache(plate_cache):
+    plate_cache.put("plate_123", VARIANT, PLATE, plate_cache.generation())
+
+    plate_cache.deactivate()
+
+    assert plate_cache.active is False
+    assert plate_cache.stats()["entries"] == 0
+
+
+@pytest.mark.parametrize(
+    "change, expected",
+    [
+        [{"operationType": "insert", "ns": {"coll": "samples"}, "fullDocument": {"plate_barcode": "abc"}}, {"abc"}],
+        [{"operationType": "insert", "ns": {"coll": "source_plates"}, "fullDocument": {"barcode": "abc"}}, {"abc"}],
+        [{"operationType": "delete", "ns": {"coll": "plate_summaries"}, "documentKey": {"_id": "abc"}}, {"abc"}],
+        [
+            {
+                "operationType": "delete",
+                "ns": {"coll": "samples"},
+                "fullDocumentBeforeChange": {"plate_barcode": "abc"},
+            },
+            {"abc"},
+        ],
+        [
+            {
+                "operationType": "update",
+                "ns": {"coll": "samples"},
+                "fullDocument": {"plate_barcode": "abc"},
+                "updateDescription": {"updatedFields": {"filtered_positive": True}},
+            },
+            {"abc"},
+        ],
+        # the plate the document belonged to cannot be determined
+        [{"operationType": "delete", "ns": {"coll": "samples"}}, None],
+        [
+            {
+                "operationType": "update",
+                "ns": {"coll": "samples"},
+                "fullDocument": {"plate_barcode": "abc"},
+                "updateDescription": {"updatedFields": {"plate_barcode": "abc"}},
+            },
+            None,
+        ],
+        [{"operationType": "drop", "ns": {"coll": "samples"}}, None],
+    ],
+)
+def test_plate_barcodes_for_cache_change(app, change, expected):
+    with app.app_context():
+        assert plate_barcodes_for_cache_change(change) == expected
+
+
+def test_format_plates_uses_the_cache(app, samples, priority_samples, app_plate_cache):
+    with app.app_context():
+        expected = format_plates(["plate_123", "abc"], fields=["plate_barcode", "has_plate_map"])
+
+        with patch("lighthouse.helpers.plates.fetch_source_plates_data") as fetch_source_plates_data:
+            assert format_plates(["plate_123", "abc"], fields=["plate_barcode", "has_plate_map"]) == expected
+
+            fetch_source_plates_data.assert_not_called()
+
+        assert app_plate_cache.stats()["hits"] == 2
+
+
+def test_format_plates_refetches_invalidated_plates(app, samples, priority_samples, app_plate_cache):
+    with app.app_context():
+        format_plates(["plate_123", "abc"], fields=["plate_barcode", "has_plate_map"])
+
+        app_plate_cache.invalidate(["plate_123"])
+
+        with patch("lighthouse.helpers.plates.fetch_source_plates_data", return_value={}) as fetch_source_plates_data:
+            format_plates(["plate_123", "abc"], fields=["plate_barcode", "has_plate_map"])
+
+            fetch_source_plates_data.assert_called_once_with(["plate_123"], ["plate_barcode", "has_plate_map"])
+
+
+def test_format_plates_bypasses_an_inactive_cache(app, samples, priority_samples, app_plate_cache):
+    app_plate_cache.deactivate()
+
+    with app.app_context():
+        format_plates(["plate_123"])
+        format_plates(["plate_123"])
+
+        assert app_plate_cache.stats()["hits"] == 0
+        assert app_plate_cache.stats()["misses"] == 0
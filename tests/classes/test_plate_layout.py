@@ -0,0 +1,50 @@
+import re
+
+import pytest
+
+from lighthouse.classes.plate_layout import PLATE_LAYOUT_96, PLATE_LAYOUT_384, PlateLayout, unpad_coordinate
+
+
+@pytest.mark.parametrize("layout, size", [[PLATE_LAYOUT_96, 96], [PLATE_LAYOUT_384, 384]])
+def test_plate_layout_coordinates(layout, size):
+    assert layout.size == size
+    assert len(layout.padded_coordinates) == size
+    assert len(layout.unpadded_coordinates) == size
+    assert len(set(layout.index_by_coordinate.values())) == size
+
+
+def test_plate_layout_96_lookups():
+    assert PLATE_LAYOUT_96.padded_coordinates[:3] == ("A01", "A02", "A03")
+    assert PLATE_LAYOUT_96.unpadded_coordinates[-1] == "H12"
+
+    assert PLATE_LAYOUT_96.index("A1") == PLATE_LAYOUT_96.index("A01") == 0
+    assert PLATE_LAYOUT_96.index("B1") == 12
+    assert PLATE_LAYOUT_96.index("H12") == 95
+    assert PLATE_LAYOUT_96.index("I1") is None
+
+    assert PLATE_LAYOUT_96.unpad("A01") == "A1"
+    assert PLATE_LAYOUT_96.unpad("A10") == "A10"
+    assert PLATE_LAYOUT_96.pad("A1") == "A01"
+    assert PLATE_LAYOUT_96.pad("A13") is None
+
+
+def test_plate_layout_384_lookups():
+    assert PLATE_LAYOUT_384.index("P24") == 383
+    assert PLATE_LAYOUT_384.pad("P4") == "P04"
+    assert PLATE_LAYOUT_384.unpad("A024") is None
+
+
+def test_plate_layout_repr():
+    assert repr(PlateLayout(rows=2, columns=3)) == "PlateLayout(rows=2, columns=3)"
+
+
+@pytest.mark.parametrize(
+    "coordinate", [*PLATE_LAYOUT_384.padded_coordinates, *PLATE_LAYOUT_384.unpadded_coordinates, "B01010", "A010", "x"]
+)
+def test_unpad_coordinate_matches_the_regex(coordinate):
+    assert unpad_coordinate(coordinate) == re.sub(r"0(\d+)$", r"\1", coordinate)
+
+
+@pytest.mark.parametrize("coordinate", [None, "", 1.0])
+def test_unpad_coordinate_not_a_coordinate(coordinate):
+    assert unpad_coordinate(coordinate) == coordinate
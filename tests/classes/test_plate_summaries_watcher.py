@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from lighthouse.classes.plate_summaries_watcher import PlateSummariesWatcher
+from lighthouse.constants.fields import FIELD_PLATE_BARCODE
+
+
+class FakeChangeStream:
+    def __init__(self, watcher, changes):
+        self._watcher = watcher
+        self._changes = list(changes)
+        self.alive = True
+        self.resume_token = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def try_next(self):
+        if self._changes:
+            return self._changes.pop(0)
+
+        # stop the watcher once the changes have been processed
+        self._watcher._stop_event.set()
+        return None
+
+
+@pytest.fixture
+def watch_changes():
+    def _watch_changes(changes):
+        app = MagicMock()
+        watcher = PlateSummariesWatcher(app)
+        app.data.driver.db.watch.return_value = FakeChangeStream(watcher, changes)
+
+        with patch.object(watcher, "_load_resume_token", return_value=None):
+            watcher._watch()
+
+    return _watch_changes
+
+
+def test_watcher_refreshes_the_plates_touched_by_a_change(watch_changes):
+    change = {"operationType": "update", "ns": {"coll": "samples"}, "fullDocument": {FIELD_PLATE_BARCODE: "plate_123"}}
+
+    with patch("lighthouse.classes.plate_summaries_watcher.refresh_plate_summaries") as refresh, patch(
+        "lighthouse.classes.plate_summaries_watcher.rebuild_plate_summaries"
+    ) as rebuild:
+        watch_changes([change])
+
+    refresh.assert_called_once_with({"plate_123"})
+    rebuild.assert_not_called()
+
+
+def test_watcher_rebuilds_the_summaries_after_a_delete_without_a_pre_image(watch_changes):
+    changes = [
+        {"operationType": "update", "ns": {"coll": "samples"}, "fullDocument": {FIELD_PLATE_BARCODE: "plate_123"}},
+        {"operationType": "delete", "ns": {"coll": "samples"}, "documentKey": {"_id": 1}},
+    ]
+
+    with patch("lighthouse.classes.plate_summaries_watcher.refresh_plate_summaries") as refresh, patch(
+        "lighthouse.classes.plate_summaries_watcher.rebuild_plate_summaries"
+    ) as rebuild:
+        watch_changes(changes)
+
+    rebuild.assert_called_once_with()
+    refresh.assert_not_called()
+
+
+def test_watcher_refreshes_the_plate_of_a_delete_with_a_pre_image(watch_changes):
+    change = {
+        "operationType": "delete",
+        "ns": {"coll": "samples"},
+        "documentKey": {"_id": 1},
+        "fullDocumentBeforeChange": {FIELD_PLATE_BARCODE: "plate_123"},
+    }
+
+    with patch("lighthouse.classes.plate_summaries_watcher.refresh_plate_summaries") as refresh, patch(
+        "lighthouse.classes.plate_summaries_watcher.rebuild_plate_summaries"
+    ) as rebuild:
+        watch_changes([change])
+
+    refresh.assert_called_once_with({"plate_123"})
+    rebuild.assert_not_called()
@@ -0,0 +1,127 @@
+import os
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from lighthouse.classes.report_manifest import REPORT_MANIFEST, ReportManifest
+from lighthouse.constants.fields import FIELD_COORDINATE, FIELD_PLATE_BARCODE, FIELD_ROOT_SAMPLE_ID
+from lighthouse.helpers.reports import delete_reports, list_reports_details
+from lighthouse.jobs.reports import create_report
+
+OLDER_REPORT = "200716_1345_fit_to_pick_with_locations.xlsx"
+NEWER_REPORT = "200716_1642_fit_to_pick_with_locations.xlsx"
+
+
+def write_workbook(path, rows_per_sheet):
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for title, rows in rows_per_sheet.items():
+        sheet = workbook.create_sheet(title)
+        sheet.append(["header"])
+        for row in range(rows):
+            sheet.append([row])
+
+    workbook.save(path)
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return ReportManifest(tmp_path)
+
+
+def test_reports_are_listed_newest_first(tmp_path, manifest):
+    for filename, mtime in ((OLDER_REPORT, 1_000_000), (NEWER_REPORT, 2_000_000)):
+        tmp_path.joinpath(filename).write_bytes(b"report")
+        os.utime(tmp_path.joinpath(filename), (mtime, mtime))
+
+        manifest.add(tmp_path.joinpath(filename), {"sheet": 1})
+
+    reports = ReportManifest(tmp_path).reports()
+
+    assert [report["filename"] for report in reports] == [NEWER_REPORT, OLDER_REPORT]
+    assert reports[0]["size"] == 6
+    assert reports[0]["rows"] == {"sheet": 1}
+
+
+def test_reports_are_removed(tmp_path, manifest):
+    tmp_path.joinpath(OLDER_REPORT).write_bytes(b"report")
+    manifest.add(tmp_path.joinpath(OLDER_REPORT), {})
+
+    manifest.remove([OLDER_REPORT, "unknown.xlsx"])
+
+    assert manifest.reports() == []
+
+
+def test_reconcile_rebuilds_the_manifest_from_disk(tmp_path, manifest):
+    write_workbook(tmp_path.joinpath(OLDER_REPORT), {"with location": 2, "all": 3})
+    write_workbook(tmp_path.joinpath(NEWER_REPORT), {"with location": 0, "all": 1})
+    tmp_path.joinpath("not_a_report.xlsx").write_bytes(b"")
+
+    # a report which was deleted by hand, and one whose rows are already known
+    tmp_path.joinpath("200101_0000_fit_to_pick_with_locations.xlsx").write_bytes(b"report")
+    manifest.add(tmp_path.joinpath("200101_0000_fit_to_pick_with_locations.xlsx"), {})
+    tmp_path.joinpath("200101_0000_fit_to_pick_with_locations.xlsx").unlink()
+    manifest.add(tmp_path.joinpath(NEWER_REPORT), {"known": 10})
+
+    assert manifest.reconcile() == 2
+
+    rows = {report["filename"]: report["rows"] for report in manifest.reports()}
+    assert rows == {OLDER_REPORT: {"with location": 2, "all": 3}, NEWER_REPORT: {"known": 10}}
+    assert tmp_path.joinpath(REPORT_MANIFEST).exists()
+
+
+def test_a_missing_manifest_is_rebuilt_from_disk(tmp_path, manifest):
+    write_workbook(tmp_path.joinpath(OLDER_REPORT), {"with location": 2, "all": 3})
+
+    reports = manifest.reports()
+
+    assert [report["filename"] for report in reports] == [OLDER_REPORT]
+    assert reports[0]["rows"] == {"with location": 2, "all": 3}
+    assert tmp_path.joinpath(REPORT_MANIFEST).exists()
+
+
+def test_a_missing_manifest_is_rebuilt_from_disk_before_it_is_updated(tmp_path, manifest):
+    write_workbook(tmp_path.joinpath(OLDER_REPORT), {"all": 1})
+    tmp_path.joinpath(NEWER_REPORT).write_bytes(b"report")
+
+    manifest.add(tmp_path.joinpath(NEWER_REPORT), {"all": 2})
+
+    rows = {report["filename"]: report["rows"] for report in manifest.reports()}
+    assert rows == {OLDER_REPORT: {"all": 1}, NEWER_REPORT: {"all": 2}}
+
+
+def test_a_missing_manifest_is_rebuilt_when_the_reports_are_listed(app, tmp_path):
+    app.config["REPORT_MANIFEST_ENABLED"] = True
+    app.config["REPORTS_DIR"] = str(tmp_path)
+    write_workbook(tmp_path.joinpath(OLDER_REPORT), {"all": 1})
+
+    with app.app_context():
+        reports = list_reports_details()
+
+    assert [report["filename"] for report in reports] == [OLDER_REPORT]
+    assert reports[0]["rows"] == {"all": 1}
+    assert tmp_path.joinpath(REPORT_MANIFEST).exists()
+
+
+def test_the_manifest_is_kept_up_to_date_by_the_app(app, tmp_path, samples, labwhere_samples_simple):
+    app.config["REPORT_MANIFEST_ENABLED"] = True
+    app.config["REPORTS_DIR"] = str(tmp_path)
+
+    with app.app_context():
+        cherrypicked_samples = pd.DataFrame(
+            columns=[FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE, "Result_lower", FIELD_COORDINATE]
+        )
+        with patch("lighthouse.helpers.reports.get_cherrypicked_samples", return_value=cherrypicked_samples):
+            report_name = create_report()
+
+        reports = list_reports_details()
+
+        assert [report["filename"] for report in reports] == [report_name]
+        assert reports[0]["download_url"] == f"{app.config['DOWNLOAD_REPORTS_URL']}/{report_name}"
+        assert set(reports[0]["rows"]) == {"FIT TO PICK WITH LOCATION", "ALL FIT TO PICK SAMPLES"}
+
+        delete_reports([report_name])
+
+        assert list_reports_details() == []
@@ -0,0 +1,295 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from lighthouse.classes.report_partitions import (
+    FIELD_EVE_UPDATED,
+    FIELD_SAMPLE_UPDATED_AT,
+    REPORT_PARTITIONS_DIR,
+    REPORT_PARTITIONS_VERSION,
+    ReportPartitions,
+    count_samples_by_test_date,
+    find_touched_test_dates,
+)
+from lighthouse.constants.fields import (
+    FIELD_COORDINATE,
+    FIELD_DATE_TESTED,
+    FIELD_FILTERED_POSITIVE,
+    FIELD_PLATE_BARCODE,
+    FIELD_RESULT,
+    FIELD_ROOT_SAMPLE_ID,
+    FIELD_SAMPLE_ID,
+)
+from lighthouse.jobs.reports import get_report_data, get_report_samples
+
+DAY_1 = date(2020, 5, 1)
+DAY_2 = date(2020, 5, 2)
+DAY_3 = date(2020, 5, 3)
+NOW = datetime(2020, 5, 4, tzinfo=timezone.utc)
+
+
+def report_data(rows):
+    return pd.DataFrame(
+        {
+            FIELD_ROOT_SAMPLE_ID: [root_sample_id for root_sample_id, _, _ in rows],
+            FIELD_PLATE_BARCODE: pd.Categorical([plate_barcode for _, plate_barcode, _ in rows]),
+            FIELD_DATE_TESTED: pd.Series([tested for _, _, tested in rows], dtype="datetime64[ns]"),
+        }
+    )
+
+
+@pytest.fixture
+def partitions(tmp_path):
+    return ReportPartitions(tmp_path, max_age_seconds=3600)
+
+
+def test_partitions_are_written_and_read_by_day(partitions):
+    report = report_data(
+        [
+            ("sample_1", "plate_1", datetime(2020, 5, 1, 9)),
+            ("sample_2", "plate_2", datetime(2020, 5, 3, 10)),
+            ("sample_3", "plate_1", datetime(2020, 5, 1, 11)),
+        ]
+    )
+
+    partitions.write(report, [DAY_1, DAY_2, DAY_3], computed_at=NOW)
+
+    read = partitions.read([DAY_1, DAY_2, DAY_3])
+    assert read[FIELD_ROOT_SAMPLE_ID].to_list() == ["sample_1", "sample_3", "sample_2"]
+    assert isinstance(read[FIELD_PLATE_BARCODE].dtype, pd.CategoricalDtype)
+    # a day without samples has an empty partition
+    assert partitions.read([DAY_2]).empty
+    assert list(partitions.read([DAY_3])[FIELD_PLATE_BARCODE].cat.categories) == ["plate_2"]
+
+
+def test_partitions_to_compute(partitions):
+    window = [DAY_1, DAY_2, DAY_3]
+
+    assert partitions.dates_to_compute(window, touched=set()) == window
+
+    partitions.write(report_data([]), [DAY_1, DAY_2], computed_at=datetime.now(tz=timezone.utc))
+
+    assert partitions.dates_to_compute(window, touched=set()) == [DAY_3]
+    assert partitions.dates_to_compute(window, touched={DAY_1}) == [DAY_1, DAY_3]
+    assert partitions.dates_to_compute(window, touched=set(), full=True) == window
+
+
+def test_old_partitions_are_computed_again(partitions):
+    partitions.write(report_data([]), [DAY_1], computed_at=datetime.now(tz=timezone.utc) - timedelta(hours=2))
+
+    assert partitions.dates_to_compute([DAY_1], touched=set()) == [DAY_1]
+
+
+def test_partitions_manifest_is_saved(tmp_path, partitions):
+    partitions.write(report_data([]), [DAY_1, DAY_2], computed_at=datetime.now(tz=timezone.utc))
+    partitions.drop_before(DAY_2)
+    partitions.save(NOW)
+
+    saved = ReportPartitions(tmp_path, max_age_seconds=3600)
+
+    assert saved.last_run_at == NOW
+    assert saved.dates_to_compute([DAY_1, DAY_2], touched=set()) == [DAY_1]
+    assert not tmp_path.joinpath(f"{DAY_1.isoformat()}.pkl").exists()
+
+
+def test_partitions_with_other_counts(partitions):
+    report = report_data(
+        [("sample_1", "plate_1", datetime(2020, 5, 1, 9)), ("sample_2", "plate_1", datetime(2020, 5, 2, 9))]
+    )
+    partitions.write(report, [DAY_1, DAY_2], computed_at=datetime.now(tz=timezone.utc))
+
+    # DAY_3 has no partition, so it is computed anyway
+    assert partitions.dates_with_other_counts([DAY_1, DAY_2, DAY_3], {DAY_1: 1, DAY_2: 1, DAY_3: 4}) == set()
+    assert partitions.dates_with_other_counts([DAY_1, DAY_2, DAY_3], {DAY_1: 1, DAY_3: 4}) == {DAY_2}
+    assert partitions.dates_with_other_counts([DAY_1, DAY_2], {DAY_1: 2, DAY_2: 1}) == {DAY_1}
+
+
+def test_count_samples_by_test_date(app):
+    window_start = datetime(2020, 5, 1)
+
+    with app.app_context():
+        db = app.data.driver.db
+        db.samples.insert_many(
+            [
+                {FIELD_DATE_TESTED: datetime(2020, 5, 2, 9), FIELD_FILTERED_POSITIVE: True},
+                {FIELD_DATE_TESTED: datetime(2020, 5, 2, 23), FIELD_FILTERED_POSITIVE: True},
+                {FIELD_DATE_TESTED: datetime(2020, 5, 3, 9), FIELD_FILTERED_POSITIVE: True},
+                # not fit to pick
+                {FIELD_DATE_TESTED: datetime(2020, 5, 3, 9), FIELD_FILTERED_POSITIVE: False},
+                # tested before the report window
+                {FIELD_DATE_TESTED: datetime(2020, 4, 1, 9), FIELD_FILTERED_POSITIVE: True},
+            ]
+        )
+        try:
+            assert count_samples_by_test_date(db, window_start) == {DAY_2: 2, DAY_3: 1}
+        finally:
+            db.samples.delete_many({})
+
+
+def test_find_touched_test_dates(app):
+    since = datetime(2020, 5, 10, tzinfo=timezone.utc)
+    window_start = datetime(2020, 5, 1)
+
+    with app.app_context():
+        db = app.data.driver.db
+        inserted = db.samples.insert_many(
+            [
+                # changed since the last run
+                {FIELD_DATE_TESTED: datetime(2020, 5, 2, 9), FIELD_SAMPLE_UPDATED_AT: datetime(2020, 5, 11)},
+                # not changed since the last run, but its priority sample was
+                {FIELD_DATE_TESTED: datetime(2020, 5, 3, 9), FIELD_SAMPLE_UPDATED_AT: datetime(2020, 5, 9)},
+                # not changed since the last run
+                {FIELD_DATE_TESTED: datetime(2020, 5, 4, 9), FIELD_SAMPLE_UPDATED_AT: datetime(2020, 5, 9)},
+                # changed, but tested before the report window
+                {FIELD_DATE_TESTED: datetime(2020, 4, 1, 9), FIELD_SAMPLE_UPDATED_AT: datetime(2020, 5, 11)},
+            ]
+        )
+        db.priority_samples.insert_one(
+            {FIELD_SAMPLE_ID: inserted.inserted_ids[1], FIELD_EVE_UPDATED: datetime(2020, 5, 11)}
+        )
+        try:
+            assert find_touched_test_dates(db, since, window_start) == {DAY_2, DAY_3}
+        finally:
+            db.samples.delete_many({})
+            db.priority_samples.delete_many({})
+
+
+def test_get_report_samples_only_reads_the_partitions_to_compute(app, tmp_path):
+    app.config["REPORTS_DIR"] = str(tmp_path)
+    today = datetime.combine(date.today(), datetime.min.time())
+
+    def get_fit_to_pick_samples(samples_collection, test_dates):
+        return report_data(
+            [(f"sample_{day.isoformat()}", "plate_1", datetime.combine(day, datetime.min.time())) for day in test_dates]
+        )
+
+    with app.app_context():
+        with patch("lighthouse.jobs.reports.get_fit_to_pick_samples", side_effect=get_fit_to_pick_samples) as read:
+            first = get_report_samples()
+
+            assert len(read.call_args.args[1]) == app.config["REPORT_WINDOW_SIZE"] + 1
+            assert len(first.index) == app.config["REPORT_WINDOW_SIZE"] + 1
+
+            # the partitions hold as many samples as mongo has for each day
+            counts = {day: 1 for day in read.call_args.args[1]}
+            with patch("lighthouse.jobs.reports.find_touched_test_dates", return_value={today.date()}) as touched:
+                with patch("lighthouse.jobs.reports.count_samples_by_test_date", return_value=counts):
+                    second = get_report_samples()
+
+            assert touched.call_count == 1
+            assert read.call_args.args[1] == [today.date()]
+            pd.testing.assert_frame_equal(first, second)
+
+            get_report_samples(full=True)
+
+            assert len(read.call_args.args[1]) == app.config["REPORT_WINDOW_SIZE"] + 1
+
+    assert tmp_path.joinpath(REPORT_PARTITIONS_DIR, "manifest.json").exists()
+
+
+def test_partitions_of_another_version_are_computed_again(tmp_path, partitions):
+    partitions.write(report_data([]), [DAY_1], computed_at=datetime.now(tz=timezone.utc))
+    partitions.save(NOW)
+
+    manifest_path = tmp_path.joinpath("manifest.json")
+    manifest = json.loads(manifest_path.read_text())
+    assert manifest["version"] == REPORT_PARTITIONS_VERSION
+    manifest_path.write_text(json.dumps({**manifest, "version": REPORT_PARTITIONS_VERSION - 1}))
+
+    saved = ReportPartitions(tmp_path, max_age_seconds=3600)
+
+    assert saved.last_run_at is None
+    assert saved.dates_to_compute([DAY_1], touched=set()) == [DAY_1]
+
+
+def test_get_report_data_joins_the_locations_and_cherrypicked_status_of_every_run(app, tmp_path):
+    app.config["REPORTS_DIR"] = str(tmp_path)
+    today = datetime.combine(date.today(), datetime.min.time())
+
+    def get_fit_to_pick_samples(samples_collection, test_dates):
+        tested = [today] if today.date() in test_dates else []
+
+        return pd.DataFrame(
+            {
+                FIELD_ROOT_SAMPLE_ID: ["sample_1"] * len(tested),
+                FIELD_PLATE_BARCODE: pd.Categorical(["plate_1"] * len(tested)),
+                FIELD_RESULT: pd.Categorical(["Positive"] * len(tested)),
+                FIELD_COORDINATE: pd.Categorical(["A1"] * len(tested)),
+                FIELD_DATE_TESTED: pd.Series(tested, dtype="datetime64[ns]"),
+            }
+        )
+
+    def located(location_barcode):
+        return pd.DataFrame({FIELD_PLATE_BARCODE: ["plate_1"], "location_barcode": [location_barcode]})
+
+    cherrypicked = pd.DataFrame(
+        {
+            FIELD_ROOT_SAMPLE_ID: ["sample_1"],
+            FIELD_PLATE_BARCODE: ["plate_1"],
+            "Result_lower": ["positive"],
+            FIELD_COORDINATE: ["A1"],
+            "LIMS submission": ["Yes"],
+        }
+    )
+    not_cherrypicked = cherrypicked.iloc[0:0]
+
+    with app.app_context():
+        with patch("lighthouse.jobs.reports.get_fit_to_pick_samples", side_effect=get_fit_to_pick_samples) as read:
+            with patch("lighthouse.jobs.reports.get_fit_to_pick_plate_barcodes", return_value=["plate_1"]):
+                with patch("lighthouse.jobs.reports.map_labware_to_location", return_value=located("lw-1")):
+                    with patch("lighthouse.jobs.reports.find_cherrypicked_samples", return_value=not_cherrypicked):
+                        first = get_report_data()
+
+                # the plate is moved and its sample cherrypicked, without any change in mongo
+                with patch("lighthouse.jobs.reports.map_labware_to_location", return_value=located("lw-2")):
+                    with patch("lighthouse.jobs.reports.find_cherrypicked_samples", return_value=cherrypicked):
+                        with patch("lighthouse.jobs.reports.find_touched_test_dates", return_value=set()):
+                            with patch(
+                                "lighthouse.jobs.reports.count_samples_by_test_date", return_value={today.date(): 1}
+                            ):
+                                second = get_report_data()
+
+    assert read.call_count == 1
+    assert first[["location_barcode", "LIMS submission"]].values.tolist() == [["lw-1", "No"]]
+    assert second[["location_barcode", "LIMS submission"]].values.tolist() == [["lw-2", "Yes"]]
+
+
+def test_get_report_samples_drops_deleted_samples(app, tmp_path, samples):
+    app.config["REPORTS_DIR"] = str(tmp_path)
+
+    with app.app_context():
+        db = app.data.driver.db
+        first = get_report_samples()
+
+        # a delete leaves no trace to find its day by, other than the count of the day
+        db.samples.delete_one({FIELD_ROOT_SAMPLE_ID: "sample_001"})
+        second = get_report_samples()
+
+    assert len(second.index) == len(first.index) - 1
+    assert "sample_001" not in second[FIELD_ROOT_SAMPLE_ID].to_list()
+
+
+def test_get_report_samples_moves_samples_tested_on_another_day(app, tmp_path, samples):
+    app.config["REPORTS_DIR"] = str(tmp_path)
+
+    with app.app_context():
+        db = app.data.driver.db
+        first = get_report_samples()
+
+        tested = db.samples.find_one({FIELD_ROOT_SAMPLE_ID: "sample_001"})[FIELD_DATE_TESTED]
+        db.samples.update_one(
+            {FIELD_ROOT_SAMPLE_ID: "sample_001"},
+            {
+                "$set": {
+                    FIELD_DATE_TESTED: tested - timedelta(days=1),
+                    FIELD_SAMPLE_UPDATED_AT: datetime.now(tz=timezone.utc),
+                }
+            },
+        )
+        second = get_report_samples()
+
+    assert len(second.index) == len(first.index)
+    assert second[FIELD_ROOT_SAMPLE_ID].to_list().count("sample_001") == 1
@@ -0,0 +1,90 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from flask import current_app
+
+from lighthouse.classes.background_jobs import JOB_STATUS_COMPLETED, BackgroundJobs, get_background_job
+from lighthouse.classes.stage_graph import StageGraph
+
+
+def test_stage_graph_passes_the_results_of_the_stages_depended_on(app):
+    stages = StageGraph("test")
+    stages.add("first", lambda: 1)
+    stages.add("second", lambda: 2)
+    stages.add("sum", lambda first, second: first + second, depends_on=["first", "second"])
+
+    with app.app_context():
+        assert stages.run() == {"first": 1, "second": 2, "sum": 3}
+
+    assert set(stages.timings) == {"first", "second", "sum"}
+
+
+def test_stage_graph_runs_independent_stages_concurrently(app):
+    # each stage waits for the other, which only completes if they run at the same time
+    barrier = threading.Barrier(2, timeout=5)
+
+    def stage():
+        barrier.wait()
+        return current_app.config["REPORT_WINDOW_SIZE"]
+
+    stages = StageGraph("test")
+    stages.add("first", stage)
+    stages.add("second", stage)
+
+    with app.app_context():
+        results = stages.run()
+
+    assert results == {"first": app.config["REPORT_WINDOW_SIZE"], "second": app.config["REPORT_WINDOW_SIZE"]}
+
+
+def test_stage_graph_raises_the_exception_of_a_stage(app):
+    def failing_stage():
+        raise ValueError("boom")
+
+    dependent_stage_ran = threading.Event()
+
+    stages = StageGraph("test")
+    stages.add("failing", failing_stage)
+    stages.add("dependent", lambda _: dependent_stage_ran.set(), depends_on=["failing"])
+
+    with app.app_context():
+        with pytest.raises(ValueError, match="boom"):
+            stages.run()
+
+    assert not dependent_stage_ran.is_set()
+
+
+def test_stage_graph_checks_the_stages_added():
+    stages = StageGraph("test")
+    stages.add("first", lambda: 1)
+
+    with pytest.raises(ValueError):
+        stages.add("first", lambda: 1)
+
+    with pytest.raises(ValueError):
+        stages.add("second", lambda unknown: 1, depends_on=["unknown"])
+
+
+def test_stage_graph_records_the_progress_of_its_stages_in_a_job(app):
+    def job():
+        stages = StageGraph("test")
+        stages.add("first", lambda: 1)
+        stages.add("second", lambda first: first + 1, depends_on=["first"])
+        stages.run()
+
+        return {}, HTTPStatus.OK
+
+    jobs = BackgroundJobs(app, max_workers=1, max_pending=0, ttl_seconds=60)
+    with app.app_context():
+        job_id = jobs.submit("test", job)
+    jobs.shutdown()
+
+    with app.app_context():
+        progress = get_background_job(app, job_id, "test")["progress"]
+        app.data.driver.db.background_jobs.delete_many({})
+
+    assert {stage: state["status"] for stage, state in progress.items()} == {
+        "first": JOB_STATUS_COMPLETED,
+        "second": JOB_STATUS_COMPLETED,
+    }
@@ -1,5 +1,6 @@
 import copy
 import os
+import shutil
 from http import HTTPStatus
 from unittest.mock import MagicMock, patch
 
@@ -7,6 +8,8 @@ import pytest
 import responses
 
 from lighthouse import create_app
+from lighthouse.classes.circuit_breaker import CIRCUIT_BREAKERS_COLLECTION
+from lighthouse.classes.report_partitions import REPORT_PARTITIONS_DIR
 from lighthouse.constants.events import PE_BECKMAN_SOURCE_ALL_NEGATIVES, PE_BECKMAN_SOURCE_COMPLETED
 from lighthouse.constants.fields import (
     FIELD_CHERRYTRACK_AUTOMATION_SYSTEM_MANUFACTURER,
@@ -16,9 +19,11 @@ from lighthouse.constants.fields import (
     FIELD_COG_BARCODE,
     FIELD_SAMPLE_ID,
 )
-from lighthouse.db.dart import load_sql_server_script
-from lighthouse.helpers.dart import create_dart_connection
+from lighthouse.db.dart import create_dart_connection, load_sql_server_script
+from lighthouse.helpers.idempotency import IDEMPOTENCY_KEYS_COLLECTION
+from lighthouse.helpers.labwhere import LABWARE_LOCATIONS_COLLECTION
 from lighthouse.helpers.mysql import create_mysql_connection_engine, get_table
+from lighthouse.helpers.reports import PROJECT_ROOT
 from lighthouse.messages.message import Message
 from lighthouse.types import EventMessage
 from tests.fixtures.data.biosero.destination_plate_wells import build_cherrytrack_destination_plate_response
@@ -43,6 +48,21 @@ from tests.fixtures.data.samples import SAMPLES, rows_for_samples_in_cherrytrack
 from tests.fixtures.data.source_plates import SOURCE_PLATES
 
 
+def pytest_addoption(parser):
+    parser.addoption("--benchmarks", action="store_true", default=False, help="run the benchmarks in tests/benchmarks")
+
+
+def pytest_collection_modifyitems(config, items):
+    # benchmarks are slow and only meaningful when run on their own, so they are skipped unless asked for
+    if config.getoption("--benchmarks"):
+        return
+
+    skip_benchmark = pytest.mark.skip(reason="benchmarks only run with --benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
 @pytest.fixture
 def app():
     # set the 'EVE_SETTINGS' env variable to easily switch to the testing environment when creating an app
@@ -58,6 +78,31 @@ def client(app):
     return app.test_client()
 
 
+@pytest.fixture(autouse=True)
+def clear_app_state(request):
+    """The app keeps state between requests in mongo and on disk: idempotency keys, circuit breakers, cached labware
+    locations and report partitions. Clear it around every test which uses the app, so that the tests run with these
+    enabled as in production without one test seeing the state of another."""
+    if "app" not in request.fixturenames:
+        yield
+        return
+
+    app = request.getfixturevalue("app")
+
+    def clear():
+        with app.app_context():
+            for collection in (IDEMPOTENCY_KEYS_COLLECTION, CIRCUIT_BREAKERS_COLLECTION, LABWARE_LOCATIONS_COLLECTION):
+                app.data.driver.db[collection].delete_many({})
+
+        shutil.rmtree(PROJECT_ROOT.joinpath(app.config["REPORTS_DIR"], REPORT_PARTITIONS_DIR), ignore_errors=True)
+
+    clear()
+    try:
+        yield
+    finally:
+        clear()
+
+
 @pytest.fixture
 def biosero_auth_headers(app):
     with app.app_context():
@@ -0,0 +1,101 @@
+from unittest.mock import MagicMock, patch
+
+import pyodbc
+import pytest
+
+from lighthouse.db.dart import DartConnectionPool
+
+
+@pytest.fixture
+def mock_connect():
+    with patch("lighthouse.db.dart.pyodbc.connect", side_effect=lambda *_, **__: MagicMock()) as connect:
+        yield connect
+
+
+@pytest.fixture
+def pool(mock_connect):
+    return DartConnectionPool("connection string", max_size=2, timeout_seconds=0, health_check_seconds=60)
+
+
+def test_pool_reuses_connections(pool, mock_connect):
+    with pool.connection() as first:
+        pass
+
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    mock_connect.assert_called_once_with("connection string", autocommit=True)
+    assert pool.stats()["connections_opened"] == 1
+    assert pool.stats()["queries"] == 2
+    assert pool.stats()["idle_connections"] == 1
+
+
+def test_pool_opens_a_connection_per_concurrent_use(pool, mock_connect):
+    with pool.connection() as first:
+        with pool.connection() as second:
+            assert first is not second
+
+    assert mock_connect.call_count == 2
+
+
+def test_pool_is_bounded(pool):
+    with pool.connection(), pool.connection():
+        with pytest.raises(pyodbc.OperationalError):
+            with pool.connection():
+                pass
+
+
+def test_pool_discards_a_connection_which_raised(pool, mock_connect):
+    with pytest.raises(pyodbc.Error):
+        with pool.connection() as broken:
+            raise pyodbc.Error("connection lost")
+
+    with pool.connection() as connection:
+        assert connection is not broken
+
+    broken.close.assert_called_once()
+    assert pool.stats()["connections_discarded"] == 1
+
+
+def test_pool_returns_a_connection_after_other_exceptions(pool):
+    with pytest.raises(ValueError):
+        with pool.connection() as first:
+            raise ValueError()
+
+    with pool.connection() as second:
+        assert first is second
+
+
+def test_pool_health_checks_idle_connections(mock_connect):
+    pool = DartConnectionPool("connection string", max_size=1, timeout_seconds=0, health_check_seconds=0)
+
+    with pool.connection() as stale:
+        stale.cursor.return_value.__enter__.return_value.execute.side_effect = pyodbc.Error("connection lost")
+
+    with pool.connection() as connection:
+        assert connection is not stale
+
+    assert pool.stats()["health_check_failures"] == 1
+    assert mock_connect.call_count == 2
+
+
+def test_pool_records_connect_and_query_time_separately(pool):
+    with patch("lighthouse.db.dart.time.perf_counter", side_effect=[0.0, 2.0, 2.0, 2.5]):
+        with pool.connection():
+            pass
+
+    stats = pool.stats()
+
+    assert stats["connect_seconds"] == 2.0
+    assert stats["query_seconds"] == 0.5
+
+
+def test_close_closes_the_idle_connections(pool):
+    with pool.connection() as connection:
+        pass
+
+    pool.close()
+
+    connection.close.assert_called_once()
+    assert pool.stats()["idle_connections"] == 0
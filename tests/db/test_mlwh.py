@@ -0,0 +1,70 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from lighthouse.db.mlwh import read_sql_in_chunks, read_sql_streamed
+
+
+def test_mlwh_engine_is_pooled(app):
+    engine = app.extensions["mlwh_engine"]
+
+    assert engine.pool.size() == app.config["MLWH_POOL_SIZE"]
+    assert engine.url.database == app.config["MLWH_DB"]
+
+
+def test_read_sql_streamed_fetches_the_rows_in_batches():
+    connection = MagicMock()
+    result = connection.execution_options.return_value.exec_driver_sql.return_value
+    result.keys.return_value = ["root_sample_id"]
+    result.fetchmany.side_effect = [[("root_1",), ("root_2",)], [("root_3",)], []]
+
+    frame = read_sql_streamed(connection, "SELECT", {"root_sample_ids": ("root_1",)}, fetch_size=2)
+
+    connection.execution_options.assert_called_once_with(stream_results=True)
+    assert frame["root_sample_id"].to_list() == ["root_1", "root_2", "root_3"]
+    result.fetchmany.assert_called_with(2)
+
+
+def test_read_sql_streamed_without_rows():
+    connection = MagicMock()
+    result = connection.execution_options.return_value.exec_driver_sql.return_value
+    result.keys.return_value = ["root_sample_id"]
+    result.fetchmany.return_value = []
+
+    frame = read_sql_streamed(connection, "SELECT", {}, fetch_size=2)
+
+    assert frame.empty
+    assert frame.columns.to_list() == ["root_sample_id"]
+
+
+def test_read_sql_in_chunks_runs_the_chunks_concurrently():
+    threads = set()
+
+    def read_chunk(connection, sql, params, fetch_size):
+        threads.add(threading.current_thread().name)
+        assert params["plate_barcodes"] == ("pb_1",)
+        # each root sample id is also found by the next chunk
+        return pd.DataFrame({"root_sample_id": list(params["root_sample_ids"]) + ["root_0"]})
+
+    with patch("lighthouse.db.mlwh.read_sql_streamed", side_effect=read_chunk):
+        frame = read_sql_in_chunks(
+            MagicMock(),
+            "SELECT",
+            chunk_param="root_sample_ids",
+            values=["root_1", "root_2", "root_3", "root_4", "root_5"],
+            chunk_size=2,
+            params={"plate_barcodes": ("pb_1",)},
+            max_workers=3,
+        )
+
+    assert frame["root_sample_id"].to_list() == ["root_1", "root_2", "root_0", "root_3", "root_4", "root_5"]
+    assert frame.index.to_list() == list(range(6))
+    assert all(name.startswith("mlwh-chunk") for name in threads)
+
+
+def test_read_sql_in_chunks_without_values():
+    engine = MagicMock()
+
+    assert read_sql_in_chunks(engine, "SELECT", "root_sample_ids", [], chunk_size=2).empty
+    engine.connect.assert_not_called()
@@ -0,0 +1,93 @@
+from unittest.mock import MagicMock
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from lighthouse.db.mongo import (
+    MONGO_INDEXES,
+    MONGO_QUERY_SHAPES,
+    PRE_IMAGE_COLLECTIONS,
+    enable_change_stream_pre_images,
+    ensure_indexes,
+    explain_query_shape,
+    find_collection_scans,
+)
+
+
+def test_ensure_indexes_creates_the_indexes(app):
+    with app.app_context():
+        db = app.data.driver.db
+
+        index_names = ensure_indexes(db)
+
+        assert len(index_names) == sum(len(indexes) for indexes in MONGO_INDEXES.values())
+        for collection_name, indexes in MONGO_INDEXES.items():
+            existing_keys = [list(index["key"].items()) for index in db[collection_name].list_indexes()]
+            for index in indexes:
+                assert index["keys"] in existing_keys
+
+
+def test_ensure_indexes_is_idempotent(app):
+    with app.app_context():
+        db = app.data.driver.db
+
+        assert ensure_indexes(db) == ensure_indexes(db)
+
+
+def test_ensure_indexes_skips_conflicting_indexes():
+    db = MagicMock()
+    db.__getitem__.return_value.create_index.side_effect = OperationFailure("Index already exists", code=85)
+
+    assert ensure_indexes(db) == []
+
+
+def test_ensure_indexes_raises_other_failures():
+    db = MagicMock()
+    db.__getitem__.return_value.create_index.side_effect = OperationFailure("Unauthorized", code=13)
+
+    with pytest.raises(OperationFailure):
+        ensure_indexes(db)
+
+
+def test_enable_change_stream_pre_images():
+    db = MagicMock()
+
+    assert enable_change_stream_pre_images(db) == list(PRE_IMAGE_COLLECTIONS)
+    db.command.assert_any_call("collMod", "samples", changeStreamPreAndPostImages={"enabled": True})
+
+
+def test_enable_change_stream_pre_images_skips_unsupported_servers():
+    db = MagicMock()
+    db.command.side_effect = OperationFailure("unknown option to collMod", code=72)
+
+    assert enable_change_stream_pre_images(db) == []
+
+
+def test_no_query_shapes_use_a_collection_scan(app, samples, priority_samples, source_plates, centres):
+    with app.app_context():
+        db = app.data.driver.db
+
+        ensure_indexes(db)
+
+        assert find_collection_scans(db) == []
+
+
+@pytest.mark.parametrize("query_shape", MONGO_QUERY_SHAPES, ids=lambda query_shape: query_shape["name"])
+def test_explain_query_shape_uses_an_index(app, query_shape):
+    with app.app_context():
+        db = app.data.driver.db
+
+        ensure_indexes(db)
+
+        assert "IXSCAN" in explain_query_shape(db, query_shape)
+
+
+def test_explain_query_shape_finds_collection_scans(app):
+    with app.app_context():
+        db = app.data.driver.db
+
+        ensure_indexes(db)
+
+        stages = explain_query_shape(db, {"collection": "samples", "filter": {"not_indexed": "value"}})
+
+        assert "COLLSCAN" in stages
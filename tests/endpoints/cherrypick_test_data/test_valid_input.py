@@ -24,7 +24,7 @@ def valid_json_object(plate_specs: Optional[List[List[int]]] = None) -> dict:
 
 @pytest.mark.parametrize("plate_specs", [[[1, 0], [2, 96]], [[100, 48], [100, 96]]])
 def test_create_run_successful(client, plate_specs):
-    with patch("requests.post"):
+    with patch("lighthouse.hooks.cherrypick_test_data.http_client"):
         post_response = client.post(ENDPOINT_PATH, json=valid_json_object(plate_specs))
 
     assert post_response.status_code == HTTPStatus.CREATED
@@ -40,7 +40,7 @@ def test_create_run_successful(client, plate_specs):
 def test_plate_spec_validator_called(client):
     json_object = valid_json_object()
 
-    with patch("requests.post"):
+    with patch("lighthouse.hooks.cherrypick_test_data.http_client"):
         with patch("lighthouse.validator.LighthouseValidator._check_with_validate_cptd_plate_specs") as validate_method:
             client.post(ENDPOINT_PATH, json=json_object)
 
@@ -18,6 +18,7 @@ from lighthouse.constants.fields import (
     FIELD_ROOT_SAMPLE_ID,
     FIELD_SOURCE,
 )
+from lighthouse.helpers.dart import DART_SAMPLES_COLUMNS
 
 DART_MONGO_MERGED_SAMPLES = [
     {  # Control sample
@@ -59,3 +60,73 @@ DART_MONGO_MERGED_SAMPLES = [
         },
     },
 ]
+
+
+class DartRow:
+    """Builds the rows of samples found in DART, i.e. tuples in the order of DART_SAMPLES_COLUMNS."""
+
+    def __new__(
+        cls,
+        destination_barcode,
+        destination_coordinate,
+        source_barcode,
+        source_coordinate,
+        control,
+        root_sample_id,
+        rna_id,
+        lab_id,
+        lh_sample_uuid,
+    ):
+        values = {
+            FIELD_DART_DESTINATION_BARCODE: destination_barcode,
+            FIELD_DART_DESTINATION_COORDINATE: destination_coordinate,
+            FIELD_DART_SOURCE_BARCODE: source_barcode,
+            FIELD_DART_SOURCE_COORDINATE: source_coordinate,
+            FIELD_DART_CONTROL: control,
+            FIELD_DART_ROOT_SAMPLE_ID: root_sample_id,
+            FIELD_DART_RNA_ID: rna_id,
+            FIELD_DART_LAB_ID: lab_id,
+            FIELD_DART_LH_SAMPLE_UUID: lh_sample_uuid,
+        }
+
+        return tuple(values[column] for column in DART_SAMPLES_COLUMNS)
+
+    @classmethod
+    def with_id_fields(
+        self,
+        destination_barcode,
+        destination_coordinate,
+        source_barcode,
+        source_coordinate,
+        control,
+        root_sample_id,
+        rna_id,
+        lab_id,
+    ):
+        return self(
+            destination_barcode,
+            destination_coordinate,
+            source_barcode,
+            source_coordinate,
+            control,
+            root_sample_id,
+            rna_id,
+            lab_id,
+            None,
+        )
+
+    @classmethod
+    def with_sample_uuid(
+        self, destination_barcode, destination_coordinate, source_barcode, source_coordinate, control, sample_uuid
+    ):
+        return self(
+            destination_barcode,
+            destination_coordinate,
+            source_barcode,
+            source_coordinate,
+            control,
+            None,
+            None,
+            None,
+            sample_uuid,
+        )
@@ -2,17 +2,33 @@ from unittest.mock import patch
 
 from pytest import raises
 
-from lighthouse.constants.fields import FIELD_DART_CONTROL, FIELD_DART_SOURCE_BARCODE
-from lighthouse.helpers.dart import find_dart_source_samples_rows
+from lighthouse.constants.fields import (
+    FIELD_DART_CONTROL,
+    FIELD_DART_DESTINATION_BARCODE,
+    FIELD_DART_DESTINATION_COORDINATE,
+    FIELD_DART_LAB_ID,
+    FIELD_DART_RNA_ID,
+    FIELD_DART_ROOT_SAMPLE_ID,
+    FIELD_DART_SOURCE_BARCODE,
+    FIELD_DART_SOURCE_COORDINATE,
+)
+from lighthouse.helpers.dart import (
+    DART_SAMPLES_COLUMN_INDEX,
+    destination_samples_query,
+    find_dart_source_samples_rows,
+    find_dart_source_samples_rows_for_barcodes,
+    row_is_normal_sample,
+    row_to_dict,
+)
+from tests.fixtures.data.dart import DartRow
 
 
 def test_find_dart_source_samples_rows(app, dart_samples):
     with app.app_context():
         found = find_dart_source_samples_rows("des_plate_1")
-        print(found)
         assert len(found) == 6
-        assert getattr(found[0], FIELD_DART_SOURCE_BARCODE) == "plate_123"
-        assert getattr(found[4], FIELD_DART_CONTROL) == "positive"
+        assert found[0][DART_SAMPLES_COLUMN_INDEX[FIELD_DART_SOURCE_BARCODE]] == "plate_123"
+        assert found[4][DART_SAMPLES_COLUMN_INDEX[FIELD_DART_CONTROL]] == "positive"
 
 
 def test_find_dart_source_samples_rows_not_found_barcode(app, dart_samples):
@@ -21,8 +37,69 @@ def test_find_dart_source_samples_rows_not_found_barcode(app, dart_samples):
         assert found == []
 
 
+def test_find_dart_source_samples_rows_reuses_a_pooled_connection(app, dart_samples):
+    with app.app_context():
+        pool = app.extensions["dart_connection_pool"]
+        opened = pool.stats()["connections_opened"]
+
+        find_dart_source_samples_rows("des_plate_1")
+        find_dart_source_samples_rows("des_plate_1")
+
+        assert pool.stats()["connections_opened"] <= opened + 1
+
+
+def test_find_dart_source_samples_rows_for_barcodes(app, dart_samples):
+    with app.app_context():
+        found = find_dart_source_samples_rows_for_barcodes(["des_plate_1", "unknown"])
+
+        assert len(found["des_plate_1"]) == 6
+        assert found["unknown"] == []
+
+
+def test_destination_samples_query_for_several_barcodes():
+    assert "IN (?, ?, ?)" in destination_samples_query("CherrypickingInfo", 3)
+
+
+def test_destination_samples_query_is_parameterised():
+    query = destination_samples_query("CherrypickingInfo")
+
+    assert "SELECT *" not in query
+    assert query.count("?") == 1
+    assert "FROM CherrypickingInfo" in query
+
+
 def test_exceptions_are_propagated_up(app, dart_samples):
     with app.app_context():
-        with patch("lighthouse.helpers.dart.create_dart_connection", side_effect=Exception("test exception")):
+        with patch("lighthouse.helpers.dart.dart_connection_pool", side_effect=Exception("test exception")):
             with raises(Exception, match="test exception"):
                 find_dart_source_samples_rows("unknown")
+
+
+def test_row_is_normal_sample_detects_if_sample_is_control():
+    assert not row_is_normal_sample(
+        DartRow.with_id_fields("DN1111", "A01", "DN2222", "C03", "positive", "sample_1", "plate1:A01", "ABC")
+    )
+    assert not row_is_normal_sample(
+        DartRow.with_id_fields("DN1111", "A01", "DN2222", "C03", "negative", "sample_1", "plate1:A01", "ABC")
+    )
+    assert row_is_normal_sample(
+        DartRow.with_id_fields("DN1111", "A01", "DN2222", "C03", "", "sample_1", "plate1:A01", "ABC")
+    )
+    assert row_is_normal_sample(
+        DartRow.with_id_fields("DN1111", "A01", "DN2222", "C03", None, "sample_1", "plate1:A01", "ABC")
+    )
+
+
+def test_row_to_dict():
+    row = DartRow("DN1111", "A01", "DN2222", "C03", None, "sample_1", "rna_1", "lab_1", "uuid_1")
+
+    assert row_to_dict(row) == {
+        FIELD_DART_DESTINATION_BARCODE: "DN1111",
+        FIELD_DART_DESTINATION_COORDINATE: "A01",
+        FIELD_DART_SOURCE_BARCODE: "DN2222",
+        FIELD_DART_SOURCE_COORDINATE: "C03",
+        FIELD_DART_CONTROL: None,
+        FIELD_DART_ROOT_SAMPLE_ID: "sample_1",
+        FIELD_DART_RNA_ID: "rna_1",
+        FIELD_DART_LAB_ID: "lab_1",
+    }
@@ -1,4 +1,9 @@
-from lighthouse.helpers.general import get_fit_to_pick_samples_and_counts, has_plate_map_data, is_integer
+from lighthouse.helpers.general import (
+    get_fit_to_pick_samples_and_counts,
+    get_fit_to_pick_samples_and_counts_for_plates,
+    has_plate_map_data,
+    is_integer,
+)
 
 
 def test_get_fit_to_pick_samples_count_valid_barcode(app, samples, priority_samples):
@@ -26,6 +31,31 @@ def test_get_fit_to_pick_samples_count_invalid_barcode(app, samples):
         assert get_fit_to_pick_samples_and_counts("abc") == ([], None, None, None, None)
 
 
+def test_get_fit_to_pick_samples_and_counts_for_plates(app, samples, priority_samples):
+    with app.app_context():
+        results = get_fit_to_pick_samples_and_counts_for_plates(["plate_123", "abc"])
+
+        # plates without samples are not returned
+        assert "abc" not in results
+
+        plate_results = results["plate_123"]
+        (fit_to_pick_samples, *counts) = get_fit_to_pick_samples_and_counts("plate_123")
+
+        # the results for a single plate should match the results for many plates
+        assert plate_results["fit_to_pick_samples"] == fit_to_pick_samples
+        assert [
+            plate_results["count_fit_to_pick_samples"],
+            plate_results["count_must_sequence"],
+            plate_results["count_preferentially_sequence"],
+            plate_results["count_filtered_positive"],
+        ] == counts
+
+
+def test_get_fit_to_pick_samples_and_counts_for_plates_no_barcodes(app):
+    with app.app_context():
+        assert get_fit_to_pick_samples_and_counts_for_plates([]) == {}
+
+
 def test_has_plate_map_data(app, samples):
     with app.app_context():
         assert has_plate_map_data("no_plate_barcode") is False
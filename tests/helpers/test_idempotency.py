@@ -0,0 +1,227 @@
+import time
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from unittest.mock import MagicMock, patch
+
+import pytest
+import responses
+from pymongo.errors import PyMongoError
+
+from lighthouse.classes.background_jobs import JOB_STATUS_COMPLETED, JOB_STATUS_FAILED
+from lighthouse.constants.general import HEADER_IDEMPOTENCY_KEY
+from lighthouse.helpers.idempotency import (
+    IDEMPOTENCY_STATUS_COMPLETED,
+    IDEMPOTENCY_STATUS_IN_PROGRESS,
+    idempotency_keys_collection,
+    idempotent,
+    run_idempotently,
+)
+
+NEW_PLATE_ENDPOINT = "/plates/new"
+NEW_PLATE_BODY = {"barcode": "plate_123"}
+CREATED_PLATE_JSON = {"data": {"plate_barcode": "plate_123", "centre": "centre_1", "count_fit_to_pick_samples": 5}}
+
+
+@pytest.fixture
+def idempotency_keys(app):
+    with app.app_context():
+        yield idempotency_keys_collection()
+
+
+def mock_plate_create(app, mocked_responses, status=HTTPStatus.CREATED):
+    mocked_responses.add(responses.POST, f"{app.config['SS_URL']}/api/v2/heron/plates", json={}, status=status)
+
+
+def plate_create_calls(mocked_responses):
+    return [call for call in mocked_responses.calls if call.request.url.endswith("/api/v2/heron/plates")]
+
+
+def wait_for_job(client, href, timeout=10):
+    deadline = time.monotonic() + timeout
+    while (job := client.get(href).json["job"])["status"] not in (JOB_STATUS_COMPLETED, JOB_STATUS_FAILED):
+        assert time.monotonic() < deadline, f"The job {job['id']} did not complete"
+        time.sleep(0.05)
+
+    return job
+
+
+def key_document(key, status, **fields):
+    now = datetime.now(timezone.utc)
+
+    return {
+        "_id": key,
+        "status": status,
+        "owner": "another request",
+        "fingerprint": None,
+        "lease_expires_at": now + timedelta(minutes=5),
+        "expires_at": now + timedelta(hours=1),
+        **fields,
+    }
+
+
+def test_post_plates_returns_the_stored_response_for_a_retry(
+    app, client, samples, source_plates, priority_samples, mocked_responses, mlwh_lh_samples, idempotency_keys
+):
+    mock_plate_create(app, mocked_responses)
+
+    first_response = client.post(NEW_PLATE_ENDPOINT, json=NEW_PLATE_BODY)
+    retry_response = client.post(NEW_PLATE_ENDPOINT, json=NEW_PLATE_BODY)
+
+    assert first_response.status_code == retry_response.status_code == HTTPStatus.CREATED
+    assert first_response.json == retry_response.json == CREATED_PLATE_JSON
+    assert len(plate_create_calls(mocked_responses)) == 1
+
+    stored = idempotency_keys.find_one({"_id": "plates_new:plate_123:heron"})
+    assert stored["status"] == IDEMPOTENCY_STATUS_COMPLETED
+    assert stored["response_status"] == HTTPStatus.CREATED
+
+
+def test_post_plates_with_an_idempotency_key(
+    app, client, samples, source_plates, priority_samples, mocked_responses, mlwh_lh_samples, idempotency_keys
+):
+    mock_plate_create(app, mocked_responses)
+    headers = {HEADER_IDEMPOTENCY_KEY: "a-client-key"}
+
+    client.post(NEW_PLATE_ENDPOINT, json=NEW_PLATE_BODY, headers=headers)
+    retry_response = client.post(NEW_PLATE_ENDPOINT, json=NEW_PLATE_BODY, headers=headers)
+    other_response = client.post(NEW_PLATE_ENDPOINT, json={"barcode": "plate_abc"}, headers=headers)
+
+    assert retry_response.status_code == HTTPStatus.CREATED
+    assert other_response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert len(plate_create_calls(mocked_responses)) == 1
+    assert idempotency_keys.count_documents({"_id": "plates_new:a-client-key"}) == 1
+
+
+def test_post_plates_does_not_store_failed_responses(
+    app, client, samples, source_plates, priority_samples, mocked_responses, idempotency_keys
+):
+    mock_plate_create(app, mocked_responses, status=HTTPStatus.UNPROCESSABLE_ENTITY)
+
+    client.post(NEW_PLATE_ENDPOINT, json=NEW_PLATE_BODY)
+    retry_response = client.post(NEW_PLATE_ENDPOINT, json=NEW_PLATE_BODY)
+
+    assert retry_response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert len(plate_create_calls(mocked_responses)) == 2
+    assert idempotency_keys.count_documents({}) == 0
+
+
+def test_post_plates_async_answers_a_retry_with_the_same_job(
+    app, client, samples, source_plates, priority_samples, mocked_responses, mlwh_lh_samples, idempotency_keys
+):
+    mock_plate_create(app, mocked_responses)
+
+    first_response = client.post(f"{NEW_PLATE_ENDPOINT}?async=1", json=NEW_PLATE_BODY)
+    wait_for_job(client, first_response.json["job"]["href"])
+    retry_response = client.post(f"{NEW_PLATE_ENDPOINT}?async=1", json=NEW_PLATE_BODY)
+
+    assert first_response.status_code == retry_response.status_code == HTTPStatus.ACCEPTED
+    assert retry_response.json["job"]["id"] == first_response.json["job"]["id"]
+    assert len(plate_create_calls(mocked_responses)) == 1
+    assert idempotency_keys.count_documents({"_id": "plates_new:plate_123:heron:async"}) == 1
+
+
+def test_post_plates_async_runs_a_retry_again_when_the_job_failed(
+    app, client, samples, source_plates, priority_samples, mocked_responses, mlwh_lh_samples, idempotency_keys
+):
+    mock_plate_create(app, mocked_responses, status=HTTPStatus.UNPROCESSABLE_ENTITY)
+
+    first_response = client.post(f"{NEW_PLATE_ENDPOINT}?async=1", json=NEW_PLATE_BODY)
+    first_job = wait_for_job(client, first_response.json["job"]["href"])
+
+    assert first_job["response_status"] == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert idempotency_keys.count_documents({}) == 0
+
+    retry_response = client.post(f"{NEW_PLATE_ENDPOINT}?async=1", json=NEW_PLATE_BODY)
+    retry_job = wait_for_job(client, retry_response.json["job"]["href"])
+
+    assert retry_response.status_code == HTTPStatus.ACCEPTED
+    assert retry_job["id"] != first_job["id"]
+    assert len(plate_create_calls(mocked_responses)) == 2
+
+
+def test_post_plates_sync_is_not_answered_by_an_async_request(
+    app, client, samples, source_plates, priority_samples, mocked_responses, mlwh_lh_samples, idempotency_keys
+):
+    mock_plate_create(app, mocked_responses)
+
+    async_response = client.post(f"{NEW_PLATE_ENDPOINT}?async=1", json=NEW_PLATE_BODY)
+    wait_for_job(client, async_response.json["job"]["href"])
+
+    sync_response = client.post(NEW_PLATE_ENDPOINT, json=NEW_PLATE_BODY)
+
+    assert sync_response.status_code == HTTPStatus.CREATED
+    assert sync_response.json == CREATED_PLATE_JSON
+
+
+def test_post_plates_conflicts_with_a_request_in_progress(app, client, idempotency_keys):
+    idempotency_keys.insert_one(key_document("plates_new:plate_123:heron", IDEMPOTENCY_STATUS_IN_PROGRESS))
+
+    response = client.post(NEW_PLATE_ENDPOINT, json=NEW_PLATE_BODY)
+
+    assert response.status_code == HTTPStatus.CONFLICT
+
+
+def test_post_plates_without_a_barcode_is_not_idempotent(app, client, idempotency_keys):
+    response = client.post(NEW_PLATE_ENDPOINT, json={})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert idempotency_keys.count_documents({}) == 0
+
+
+def test_run_idempotently_waits_for_the_request_in_progress(app, idempotency_keys):
+    app.config["IDEMPOTENCY_WAIT_SECONDS"] = 5
+    idempotency_keys.insert_one(key_document("scope:key", IDEMPOTENCY_STATUS_IN_PROGRESS))
+    route = MagicMock()
+
+    def complete_in_progress(_):
+        idempotency_keys.update_one(
+            {"_id": "scope:key"},
+            {"$set": {"status": IDEMPOTENCY_STATUS_COMPLETED, "response_body": '{"data": 1}', "response_status": 201}},
+        )
+
+    with patch("lighthouse.helpers.idempotency.time.sleep", side_effect=complete_in_progress) as sleep:
+        assert run_idempotently("scope:key", None, route) == ({"data": 1}, 201)
+
+    sleep.assert_called_once()
+    route.assert_not_called()
+
+
+def test_run_idempotently_claims_an_expired_lease(app, idempotency_keys):
+    expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+    idempotency_keys.insert_one(key_document("scope:key", IDEMPOTENCY_STATUS_IN_PROGRESS, lease_expires_at=expired))
+    route = MagicMock(return_value=({"data": 2}, HTTPStatus.CREATED))
+
+    assert run_idempotently("scope:key", None, route) == ({"data": 2}, HTTPStatus.CREATED)
+
+    route.assert_called_once()
+    assert idempotency_keys.find_one({"_id": "scope:key"})["status"] == IDEMPOTENCY_STATUS_COMPLETED
+
+
+def test_run_idempotently_releases_the_key_when_the_route_raises(app, idempotency_keys):
+    route = MagicMock(side_effect=ValueError("boom"))
+
+    with pytest.raises(ValueError):
+        run_idempotently("scope:key", None, route)
+
+    assert idempotency_keys.count_documents({}) == 0
+
+
+def test_run_idempotently_runs_the_route_when_mongo_fails(app, idempotency_keys):
+    route = MagicMock(return_value=({"data": 3}, HTTPStatus.CREATED))
+
+    with patch("lighthouse.helpers.idempotency._claim", side_effect=PyMongoError()):
+        assert run_idempotently("scope:key", None, route) == ({"data": 3}, HTTPStatus.CREATED)
+
+    route.assert_called_once()
+
+
+def test_idempotent_is_disabled_by_config(app):
+    app.config["IDEMPOTENCY_ENABLED"] = False
+    route = MagicMock(return_value=({}, HTTPStatus.OK))
+    derive_key = MagicMock(return_value="key")
+
+    with app.test_request_context():
+        idempotent("scope", derive_key)(route)()
+
+    route.assert_called_once()
+    derive_key.assert_not_called()
@@ -1,8 +1,44 @@
+import json
+from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
 
+import pytest
 import responses
 
-from lighthouse.helpers.labwhere import get_locations_from_labwhere, set_locations_in_labwhere
+from lighthouse.exceptions import ReportCreationError
+from lighthouse.helpers.labwhere import (
+    FIELD_LOCATION_BARCODE,
+    FIELD_LOCATION_EXPIRES_AT,
+    LABWARE_LOCATIONS_COLLECTION,
+    get_labware_locations,
+    get_locations_from_labwhere,
+    set_locations_in_labwhere,
+)
+
+
+@pytest.fixture
+def labware_locations_collection(app):
+    with app.app_context():
+        yield app.data.driver.db[LABWARE_LOCATIONS_COLLECTION]
+
+
+@pytest.fixture
+def labwhere_locations(app, mocked_responses):
+    # answers each request with the location of the barcodes requested, except unknown_plate
+    def locate(request):
+        barcodes = json.loads(request.body)["barcodes"]
+        body = [
+            {"barcode": barcode, "location_barcode": f"location_{barcode}" if barcode != "unlocated_plate" else None}
+            for barcode in barcodes
+            if barcode != "unknown_plate"
+        ]
+        return (HTTPStatus.OK, {}, json.dumps(body))
+
+    mocked_responses.add_callback(
+        responses.POST, f"{app.config['LABWHERE_URL']}/api/labwares_by_barcode", callback=locate
+    )
+
+    return mocked_responses
 
 
 def test_get_locations_from_labwhere(app, labwhere_samples_simple):
@@ -40,3 +76,55 @@ def test_set_locations_in_labwhere(app, mocked_responses):
         response = set_locations_in_labwhere(["123"], "location-1-1", "robot-1")
 
         assert response
+
+
+def test_get_labware_locations_in_batches(app, labwhere_locations):
+    app.config["LABWHERE_LOCATIONS_BATCH_SIZE"] = 2
+    with app.app_context():
+        locations = get_labware_locations(["plate_1", "plate_2", "unknown_plate", "unlocated_plate", "plate_1"])
+
+    assert locations == {
+        "plate_1": "location_plate_1",
+        "plate_2": "location_plate_2",
+        "unknown_plate": None,
+        "unlocated_plate": "",
+    }
+    assert len(labwhere_locations.calls) == 2
+
+
+def test_get_labware_locations_not_ok(app, mocked_responses):
+    mocked_responses.add(
+        responses.POST,
+        f"{app.config['LABWHERE_URL']}/api/labwares_by_barcode",
+        status=HTTPStatus.INTERNAL_SERVER_ERROR,
+    )
+    with app.app_context():
+        with pytest.raises(ReportCreationError):
+            get_labware_locations(["plate_1"])
+
+
+def test_get_labware_locations_are_cached(app, labwhere_locations, labware_locations_collection):
+    with app.app_context():
+        get_labware_locations(["plate_1", "unknown_plate"])
+        locations = get_labware_locations(["plate_1", "unknown_plate", "plate_2"])
+
+    assert locations == {"plate_1": "location_plate_1", "unknown_plate": None, "plate_2": "location_plate_2"}
+    # only plate_2 is requested by the second call
+    assert len(labwhere_locations.calls) == 2
+    assert json.loads(labwhere_locations.calls[1].request.body) == {"barcodes": ["plate_2"]}
+    assert labware_locations_collection.count_documents({}) == 3
+
+
+def test_get_labware_locations_ignores_expired_locations(app, labwhere_locations, labware_locations_collection):
+    labware_locations_collection.insert_one(
+        {
+            "_id": "plate_1",
+            FIELD_LOCATION_BARCODE: "old_location",
+            FIELD_LOCATION_EXPIRES_AT: datetime.now(tz=timezone.utc) - timedelta(minutes=1),
+        }
+    )
+    with app.app_context():
+        locations = get_labware_locations(["plate_1"])
+
+    assert locations == {"plate_1": "location_plate_1"}
+    assert len(labwhere_locations.calls) == 1
@@ -0,0 +1,120 @@
+from unittest.mock import patch
+
+import pytest
+
+from lighthouse.constants.fields import FIELD_MONGO_ID, FIELD_PLATE_BARCODE, FIELD_SAMPLE_ID
+from lighthouse.helpers.plate_summaries import (
+    get_plate_summaries,
+    plate_barcodes_for_change,
+    plate_summaries_collection,
+    rebuild_plate_summaries,
+    refresh_plate_summaries,
+)
+
+
+@pytest.fixture
+def clear_plate_summaries(app):
+    try:
+        yield
+    finally:
+        with app.app_context():
+            plate_summaries_collection().delete_many({})
+
+
+def test_refresh_plate_summaries(app, samples, priority_samples, plates_lookup_with_samples, clear_plate_summaries):
+    with app.app_context():
+        assert refresh_plate_summaries(["plate_123", "abc"]) == 2
+
+        summaries = get_plate_summaries(["plate_123", "abc"])
+
+        # plates without samples do not have a summary
+        assert list(summaries.keys()) == ["plate_123"]
+
+        expected = plates_lookup_with_samples["plate_123"]
+        summary = summaries["plate_123"]
+        for field in expected:
+            if field != "plate_barcode":
+                assert summary[field] == expected[field]
+
+
+def test_refresh_plate_summaries_removes_plates_without_samples(app, clear_plate_summaries):
+    with app.app_context():
+        plate_summaries_collection().insert_one({FIELD_MONGO_ID: "abc", "has_plate_map": True})
+
+        refresh_plate_summaries(["abc"])
+
+        assert get_plate_summaries(["abc"]) == {}
+
+
+def test_rebuild_plate_summaries(app, samples, priority_samples, clear_plate_summaries):
+    with app.app_context():
+        plate_summaries_collection().insert_one({FIELD_MONGO_ID: "stale", "has_plate_map": True})
+
+        count = rebuild_plate_summaries(batch_size=1)
+
+        samples, _ = samples
+        barcodes = {sample[FIELD_PLATE_BARCODE] for sample in samples if sample.get(FIELD_PLATE_BARCODE)}
+
+        assert count == len(barcodes)
+        assert set(get_plate_summaries(list(barcodes) + ["stale"]).keys()) == barcodes
+
+
+def test_get_plate_summaries_with_fields(app, samples, priority_samples, clear_plate_summaries):
+    with app.app_context():
+        refresh_plate_summaries(["plate_123"])
+
+        assert get_plate_summaries(["plate_123"], fields=["count_must_sequence"]) == {
+            "plate_123": {FIELD_MONGO_ID: "plate_123", "count_must_sequence": 2}
+        }
+
+
+def test_plate_barcodes_for_change_samples(app):
+    with app.app_context():
+        change = {
+            "ns": {"coll": "samples"},
+            "fullDocument": {FIELD_PLATE_BARCODE: "plate_123"},
+            "fullDocumentBeforeChange": {FIELD_PLATE_BARCODE: "plate_456"},
+        }
+        assert plate_barcodes_for_change(change) == {"plate_123", "plate_456"}
+
+        # a delete without a pre-image cannot be traced back to a plate
+        assert plate_barcodes_for_change({"ns": {"coll": "samples"}, "documentKey": {"_id": 1}}) == set()
+
+
+def test_plate_barcodes_for_change_priority_samples(app, samples):
+    with app.app_context():
+        _, inserted_samples = samples
+        change = {
+            "ns": {"coll": "priority_samples"},
+            "fullDocument": {FIELD_SAMPLE_ID: inserted_samples.inserted_ids[0]},
+        }
+
+        assert plate_barcodes_for_change(change) == {"plate_123"}
+
+
+def test_plate_barcodes_for_change_other_collection(app):
+    with app.app_context():
+        change = {"ns": {"coll": "events"}, "fullDocument": {FIELD_PLATE_BARCODE: "plate_123"}}
+
+        assert plate_barcodes_for_change(change) == set()
+
+
+def test_format_plates_reads_plate_summaries_when_enabled(
+    app, samples, priority_samples, plates_lookup_with_samples, clear_plate_summaries
+):
+    from lighthouse.helpers.plates import format_plates
+
+    with app.app_context():
+        refresh_plate_summaries(["plate_123"])
+
+        app.config["PLATE_SUMMARIES_ENABLED"] = True
+        try:
+            with patch("lighthouse.helpers.plates.fetch_source_plates_data") as mock_fetch_source_plates_data:
+                assert format_plates(["plate_123"]) == [plates_lookup_with_samples["plate_123"]]
+                assert format_plates(["abc"], fields=["plate_barcode", "has_plate_map"]) == [
+                    {"plate_barcode": "abc", "has_plate_map": False}
+                ]
+
+                mock_fetch_source_plates_data.assert_not_called()
+        finally:
+            app.config["PLATE_SUMMARIES_ENABLED"] = False
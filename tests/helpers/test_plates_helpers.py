@@ -2,7 +2,7 @@ import urllib.parse
 from datetime import datetime
 from http import HTTPStatus
 from typing import List
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from uuid import uuid4
 
 import pytest
@@ -10,19 +10,13 @@ import requests
 import responses
 from flask import current_app
 
+from lighthouse.classes.circuit_breaker import CircuitOpenError
 from lighthouse.constants.config import SS_FILTER_FIT_TO_PICK, SS_UUID_PLATE_PURPOSE, SS_UUID_STUDY
 from lighthouse.constants.events import PE_BECKMAN_DESTINATION_CREATED, PE_BECKMAN_DESTINATION_FAILED
 from lighthouse.constants.fields import (
     FIELD_BARCODE,
     FIELD_COG_BARCODE,
-    FIELD_DART_CONTROL,
-    FIELD_DART_DESTINATION_BARCODE,
     FIELD_DART_DESTINATION_COORDINATE,
-    FIELD_DART_LAB_ID,
-    FIELD_DART_RNA_ID,
-    FIELD_DART_ROOT_SAMPLE_ID,
-    FIELD_DART_SOURCE_BARCODE,
-    FIELD_DART_SOURCE_COORDINATE,
     FIELD_FILTERED_POSITIVE,
     FIELD_LH_SAMPLE_UUID,
     FIELD_LH_SOURCE_PLATE_UUID,
@@ -41,33 +35,29 @@ from lighthouse.constants.fields import (
 from lighthouse.constants.general import ARG_TYPE_DESTINATION, ARG_TYPE_SOURCE
 from lighthouse.helpers.plates import (
     ControlLocations,
-    add_controls_to_samples,
     centre_prefixes_for_samples,
-    check_matching_sample_numbers,
     classify_samples_by_centre,
     construct_cherrypicking_plate_failed_message,
     convert_json_response_into_dict,
     create_cherrypicked_post_body,
     create_post_body,
     destination_plate_field_generators,
-    equal_row_and_sample,
-    find_sample_matching_row,
+    fetch_source_plates_data,
+    filter_for_new_samples,
     find_samples,
     find_source_plates,
     format_plate,
+    format_plates,
     get_centre_prefix,
     get_from_ss_plates_samples_info,
     get_source_plates_for_samples,
     get_unique_plate_barcodes,
-    join_rows_with_samples,
     map_to_ss_columns,
     plate_exists_in_ss_with_barcode,
-    query_for_cherrypicked_samples,
+    plates_exist_in_ss_with_barcodes,
     query_for_source_plate_uuids,
-    row_is_normal_sample,
-    row_to_dict,
-    rows_with_controls,
-    rows_without_controls,
+    request_with_retries,
+    select_plate_fields,
     source_plate_field_generators,
 )
 
@@ -271,267 +261,6 @@ def test_create_post_body_raises_without_cog_uk_id(app, samples):
             create_post_body(barcode, plate_config, filtered_positive_samples)
 
 
-class DartRow:
-    def __init__(
-        self,
-        destination_barcode,
-        destination_coordinate,
-        source_barcode,
-        source_coordinate,
-        control,
-        root_sample_id,
-        rna_id,
-        lab_id,
-        lh_sample_uuid,
-    ):
-        setattr(self, FIELD_DART_DESTINATION_BARCODE, destination_barcode)
-        setattr(self, FIELD_DART_DESTINATION_COORDINATE, destination_coordinate)
-        setattr(self, FIELD_DART_SOURCE_BARCODE, source_barcode)
-        setattr(self, FIELD_DART_SOURCE_COORDINATE, source_coordinate)
-        setattr(self, FIELD_DART_CONTROL, control)
-        setattr(self, FIELD_DART_ROOT_SAMPLE_ID, root_sample_id)
-        setattr(self, FIELD_DART_RNA_ID, rna_id)
-        setattr(self, FIELD_DART_LAB_ID, lab_id)
-        setattr(self, FIELD_LH_SAMPLE_UUID, lh_sample_uuid)
-
-    @classmethod
-    def with_id_fields(
-        self,
-        destination_barcode,
-        destination_coordinate,
-        source_barcode,
-        source_coordinate,
-        control,
-        root_sample_id,
-        rna_id,
-        lab_id,
-    ):
-        return self(
-            destination_barcode,
-            destination_coordinate,
-            source_barcode,
-            source_coordinate,
-            control,
-            root_sample_id,
-            rna_id,
-            lab_id,
-            None,
-        )
-
-    @classmethod
-    def with_sample_uuid(
-        self, destination_barcode, destination_coordinate, source_barcode, source_coordinate, control, sample_uuid
-    ):
-        return self(
-            destination_barcode,
-            destination_coordinate,
-            source_barcode,
-            source_coordinate,
-            control,
-            None,
-            None,
-            None,
-            sample_uuid,
-        )
-
-
-def test_query_for_cherrypicked_samples_generates_list():
-    test = [
-        DartRow.with_sample_uuid("DN1111", "A01", "DN2222", "C03", None, "UUID001"),
-        DartRow.with_sample_uuid("DN3333", "A02", "DN2222", "C01", "positive", "UUID002"),
-        DartRow.with_sample_uuid("DN1111", "A02", "DN2222", "C04", None, "UUID003"),
-        DartRow.with_sample_uuid("DN3333", "A03", "DN2222", "C05", "negative", "UUID004"),
-        DartRow.with_sample_uuid("DN1111", "A03", "DN2222", "C06", None, "UUID005"),
-    ]
-
-    assert query_for_cherrypicked_samples(test) == {
-        "$or": [
-            {FIELD_LH_SAMPLE_UUID: "UUID001"},
-            {FIELD_LH_SAMPLE_UUID: "UUID003"},
-            {FIELD_LH_SAMPLE_UUID: "UUID005"},
-        ]
-    }
-
-
-def test_query_for_cherrypicked_samples_returns_empty_if_none():
-    assert query_for_cherrypicked_samples([]) is None
-    assert query_for_cherrypicked_samples(None) is None
-
-
-def test_row_is_normal_sample_detects_if_sample_is_control():
-    assert not row_is_normal_sample(
-        DartRow.with_id_fields("DN1111", "A01", "DN2222", "C03", "positive", "sample_1", "plate1:A01", "ABC")
-    )
-    assert not row_is_normal_sample(
-        DartRow.with_id_fields("DN1111", "A01", "DN2222", "C03", "negative", "sample_1", "plate1:A01", "ABC")
-    )
-    assert not row_is_normal_sample(
-        DartRow.with_id_fields("DN1111", "A01", "DN2222", "C03", "control", "sample_1", "plate1:A01", "ABC")
-    )
-    assert row_is_normal_sample(
-        DartRow.with_id_fields("DN1111", "A01", "DN2222", "C03", "", "sample_1", "plate1:A01", "ABC")
-    )
-    assert row_is_normal_sample(
-        DartRow.with_id_fields("DN1111", "A01", "DN2222", "C03", None, "sample_1", "plate1:A01", "ABC")
-    )
-
-
-def test_rows_without_controls_filters_out_controls():
-    test = [
-        DartRow.with_id_fields("DN1111", "A01", "DN2222", "C03", None, "sample_1", "plate1:A01", "ABC"),
-        DartRow.with_id_fields("DN1111", "A02", "DN2222", "C04", None, "sample_1", "plate1:A02", "ABC"),
-        DartRow.with_id_fields("DN1111", "A03", "DN2222", "C06", None, "sample_2", "plate1:A03", "ABC"),
-        DartRow.with_id_fields("DN3333", "A02", "DN2222", "C01", "positive", None, None, None),
-        DartRow.with_id_fields("DN3333", "A03", "DN2222", "C05", "negative", None, None, None),
-    ]
-
-    assert rows_without_controls(test) == [test[0], test[1], test[2]]
-
-
-def test_rows_with_controls_returns_controls():
-    test = [
-        DartRow.with_id_fields("DN1111", "A01", "DN2222", "C03", None, "sample_1", "plate1:A01", "ABC"),
-        DartRow.with_id_fields("DN1111", "A02", "DN2222", "C04", None, "sample_1", "plate1:A02", "ABC"),
-        DartRow.with_id_fields("DN1111", "A03", "DN2222", "C06", None, "sample_2", "plate1:A03", "ABC"),
-        DartRow.with_id_fields("DN3333", "A02", "DN2222", "C01", "positive", None, None, None),
-        DartRow.with_id_fields("DN3333", "A03", "DN2222", "C05", "negative", None, None, None),
-    ]
-
-    assert rows_with_controls(test) == [test[3], test[4]]
-
-
-def test_equal_row_and_sample_compares_row_and_sample(samples):
-    samples, _ = samples
-    # Different UUID
-    row = DartRow.with_sample_uuid("DN1111", "A01", "plate_123", "A01", None, "not-the-uuid-you-are-looking-for")
-    assert not equal_row_and_sample(row, samples[0])
-
-    # Matching UUID
-    row = DartRow.with_sample_uuid("DN1111", "A01", "plate_123", "A01", None, "0a53e7b6-7ce8-4ebc-95c3-02dd64942531")
-    assert equal_row_and_sample(row, samples[0])
-
-
-def test_find_sample_matching_row(samples):
-    samples, _ = samples
-    row = DartRow.with_sample_uuid(
-        "DN1111",
-        "A01",
-        "plate_123",
-        "A01",
-        None,
-        "1a53e7b6-7ce8-4ebc-95c3-02dd64942531",
-    )
-
-    assert find_sample_matching_row(row, samples) == samples[1]
-
-
-def test_find_sample_matching_row_returns_none_if_not_found(app, samples):
-    samples, _ = samples
-    row = DartRow.with_id_fields("DN1111", "A01", "plate_123", "A01", None, "MCM002", "rna_2", "Lab 3")
-
-    assert find_sample_matching_row(row, samples) is None
-
-
-def test_join_rows_with_samples(samples):
-    samples, _ = samples
-    rows = [
-        DartRow.with_sample_uuid("DN1111", "A01", "plate_123", "A01", None, "0a53e7b6-7ce8-4ebc-95c3-02dd64942531"),
-        DartRow.with_sample_uuid("DN1111", "A01", "plate_123", "A01", None, "1a53e7b6-7ce8-4ebc-95c3-02dd64942531"),
-    ]
-
-    assert join_rows_with_samples(rows, samples) == [
-        {"row": row_to_dict(rows[0]), "sample": samples[0]},
-        {"row": row_to_dict(rows[1]), "sample": samples[1]},
-    ]
-
-
-def test_join_rows_with_samples_joins_with_empty_sample_if_not_found(samples):
-    samples, _ = samples
-    rows = [
-        DartRow.with_sample_uuid("DN1111", "A01", "plate_123", "A01", None, "0a53e7b6-7ce8-4ebc-95c3-02dd64942531"),
-        DartRow.with_sample_uuid("DN1111", "A01", "plate_123", "A01", None, "NOT-FOUND-UUID"),
-    ]
-
-    assert join_rows_with_samples(rows, samples) == [
-        {"row": row_to_dict(rows[0]), "sample": samples[0]},
-        {"row": row_to_dict(rows[1]), "sample": None},
-    ]
-
-
-def test_join_rows_with_samples_filters_out_controls(samples):
-    samples, _ = samples
-    rows = [
-        DartRow.with_sample_uuid(
-            "DN1111", "A01", "plate_123", "A01", "positive", "0a53e7b6-7ce8-4ebc-95c3-02dd64942531"
-        ),
-        DartRow.with_sample_uuid("DN1111", "A01", "plate_456", "A01", None, "243910d9-74bc-4da0-8f55-8606ed97b33a"),
-    ]
-
-    assert join_rows_with_samples(rows, samples) == [
-        {"row": row_to_dict(rows[1]), "sample": samples[7]},
-    ]
-
-
-def test_add_controls_to_samples(samples):
-    samples, _ = samples
-    rows = [
-        DartRow.with_id_fields("DN1111", "A01", "plate_123", "A01", "positive", "MCM001", "rna_1", "lab_1"),
-        DartRow.with_id_fields("DN1111", "A01", "plate_123", "A01", "negative", "MCM002", "rna_2", "Lab 2"),
-    ]
-
-    samples_without_controls = [
-        {"row": row_to_dict(rows[0]), "sample": samples[0]},
-        {"row": row_to_dict(rows[1]), "sample": samples[1]},
-    ]
-
-    assert add_controls_to_samples(rows, samples_without_controls) == [
-        {"row": row_to_dict(rows[0]), "sample": samples[0]},
-        {"row": row_to_dict(rows[1]), "sample": samples[1]},
-        {"row": row_to_dict(rows[0]), "sample": None},
-        {"row": row_to_dict(rows[1]), "sample": None},
-    ]
-
-
-def test_check_matching_sample_numbers_returns_false_mismatch(samples):
-    samples, _ = samples
-    rows = [
-        DartRow.with_id_fields("DN1111", "A01", "DN2222", "C03", None, "sample_1", "plate1:A01", "ABC"),
-        DartRow.with_id_fields("DN1111", "A02", "DN2222", "C04", None, "sample_1", "plate1:A02", "ABC"),
-        DartRow.with_id_fields("DN1111", "A03", "DN2222", "C06", None, "sample_2", "plate1:A03", "ABC"),
-        DartRow.with_id_fields("DN1111", "A04", "DN2222", "C07", None, "sample_2", "plate1:A03", "ABC"),
-        DartRow.with_id_fields("DN1111", "A05", "DN2222", "C08", None, "sample_2", "plate1:A03", "ABC"),
-        DartRow.with_id_fields("DN3333", "A04", "DN2222", "C01", "positive", None, None, None),
-        DartRow.with_id_fields("DN3333", "A04", "DN2222", "C01", "negative", None, None, None),
-    ]
-
-    result = check_matching_sample_numbers(rows, samples)
-    assert result is False
-
-
-def test_check_matching_sample_numbers_returns_true_match(samples):
-    samples, _ = samples
-    rows = [
-        DartRow.with_id_fields("DN1111", "A01", "DN2222", "C03", None, "sample_1", "plate1:A01", "ABC"),
-        DartRow.with_id_fields("DN1111", "A02", "DN2222", "C03", None, "sample_1", "plate1:A01", "ABC"),
-        DartRow.with_id_fields("DN1111", "A03", "DN2222", "C03", None, "sample_1", "plate1:A01", "ABC"),
-        DartRow.with_id_fields("DN1111", "A04", "DN2222", "C03", None, "sample_1", "plate1:A01", "ABC"),
-        DartRow.with_id_fields("DN1111", "A05", "DN2222", "C03", None, "sample_1", "plate1:A01", "ABC"),
-        DartRow.with_id_fields("DN1111", "A06", "DN2222", "C04", None, "sample_1", "plate1:A02", "ABC"),
-        DartRow.with_id_fields("DN1111", "A07", "DN2222", "C04", None, "sample_1", "plate1:A02", "ABC"),
-        DartRow.with_id_fields("DN1111", "A08", "DN2222", "C04", None, "sample_1", "plate1:A02", "ABC"),
-        DartRow.with_id_fields("DN1111", "A09", "DN2222", "C04", None, "sample_1", "plate1:A02", "ABC"),
-        DartRow.with_id_fields("DN1111", "A10", "DN2222", "C04", None, "sample_1", "plate1:A02", "ABC"),
-        DartRow.with_id_fields("DN1111", "A11", "DN2222", "C04", None, "sample_1", "plate1:A02", "ABC"),
-        DartRow.with_id_fields("DN1111", "A12", "DN2222", "C04", None, "sample_1", "plate1:A02", "ABC"),
-        DartRow.with_id_fields("DN3333", "A04", "DN2222", "C01", "positive", None, None, None),
-        DartRow.with_id_fields("DN3333", "A04", "DN2222", "C01", "negative", None, None, None),
-    ]
-
-    #  here we just need the same number of samples as there are rows without controls
-    result = check_matching_sample_numbers(rows, samples)
-    assert result is True
-
-
 def test_map_to_ss_columns(app, dart_mongo_merged_samples):
     with app.app_context():
         correct_mapped_samples = [
@@ -966,19 +695,6 @@ def test_construct_cherrypicking_plate_failed_message_mongo_samples_fetch_failur
             assert msg in errors[0]
 
 
-def test_construct_cherrypicking_plate_failed_message_none_mongo_samples(app, dart_samples, mock_event_helpers):
-    with app.app_context():
-        with patch("lighthouse.helpers.plates.query_for_cherrypicked_samples", return_value=None):
-            barcode = "des_plate_1"
-            errors, message = construct_cherrypicking_plate_failed_message(
-                barcode, "test_user", "12345", "robot_crashed"
-            )
-
-            assert message is None
-            assert len(errors) == 1
-            assert f"No sample data found in Mongo matching DART samples in plate '{barcode}'" in errors
-
-
 def test_construct_cherrypicking_plate_failed_message_samples_not_in_mongo(app, dart_samples, mock_event_helpers):
     with app.app_context():
         with patch("lighthouse.helpers.plates.app.data.driver.db.samples") as samples_collection:
@@ -1068,6 +784,112 @@ def test_format_plate_destination(app, mocked_responses):
         assert format_plate(barcode=plate_barcode, plate_type=ARG_TYPE_DESTINATION) == response
 
 
+def test_format_plates_source(app, plates_lookup_without_samples, plates_lookup_with_samples):
+    with app.app_context():
+        assert format_plates(["plate_123", "abc"], exclude_props=["pickable_samples"]) == [
+            plates_lookup_without_samples["plate_123"],
+            {
+                "plate_barcode": "abc",
+                "has_plate_map": False,
+                "count_fit_to_pick_samples": 0,
+                "count_filtered_positive": 0,
+                "count_must_sequence": 0,
+                "count_preferentially_sequence": 0,
+            },
+        ]
+        assert format_plates(["plate_123"]) == [plates_lookup_with_samples["plate_123"]]
+
+
+def test_format_plates_destination(app):
+    with app.app_context():
+        with patch(
+            "lighthouse.helpers.plates.plates_exist_in_ss_with_barcodes",
+            return_value={"dest_123": True, "dest_456": False},
+        ) as plates_exist:
+            assert format_plates(["dest_123", "dest_456"], plate_type=ARG_TYPE_DESTINATION) == [
+                {"plate_barcode": "dest_123", "plate_exists": True},
+                {"plate_barcode": "dest_456", "plate_exists": False},
+            ]
+
+            plates_exist.assert_called_once_with(["dest_123", "dest_456"])
+
+            # Sequencescape is not queried when the plate_exists field is not needed
+            assert format_plates(["dest_123"], plate_type=ARG_TYPE_DESTINATION, fields=["plate_barcode"]) == [
+                {"plate_barcode": "dest_123"}
+            ]
+            plates_exist.assert_called_once()
+
+
+def test_format_plate_source_only_runs_queries_for_requested_fields(app):
+    with app.app_context():
+        with patch("lighthouse.helpers.plates.get_fit_to_pick_samples_and_counts") as mock_fit_to_pick:
+            with patch("lighthouse.helpers.plates.has_plate_map_data", return_value=True) as mock_has_plate_map_data:
+                assert format_plate("plate_123", fields=["plate_barcode", "has_plate_map"]) == {
+                    "plate_barcode": "plate_123",
+                    "has_plate_map": True,
+                }
+
+                mock_fit_to_pick.assert_not_called()
+                mock_has_plate_map_data.assert_called_once_with("plate_123")
+
+
+def test_format_plates_source_with_fields(app, plates_lookup_without_samples):
+    with app.app_context():
+        assert format_plates(["plate_123", "abc"], fields=["has_plate_map", "count_fit_to_pick_samples"]) == [
+            {"has_plate_map": True, "count_fit_to_pick_samples": 5},
+            {"has_plate_map": False, "count_fit_to_pick_samples": 0},
+        ]
+        assert format_plates(["plate_123", "abc"], fields=["plate_barcode", "has_plate_map"]) == [
+            {"plate_barcode": "plate_123", "has_plate_map": True},
+            {"plate_barcode": "abc", "has_plate_map": False},
+        ]
+
+
+@pytest.mark.parametrize(
+    "fields, expected_call",
+    [
+        [["plate_barcode", "pickable_samples"], "samples"],
+        [["has_plate_map", "count_must_sequence"], "counts"],
+        [["has_plate_map"], "plate_map"],
+        [["plate_barcode"], None],
+    ],
+)
+def test_fetch_source_plates_data_runs_cheapest_query(app, fields, expected_call):
+    barcodes = ["plate_123", "456"]
+    with app.app_context():
+        with patch("lighthouse.helpers.plates.get_fit_to_pick_samples_and_counts_for_plates") as mock_fit_to_pick:
+            with patch(
+                "lighthouse.helpers.plates.get_plate_barcodes_with_plate_map_data", return_value=["plate_123"]
+            ) as mock_plate_map:
+                results = fetch_source_plates_data(barcodes, fields)
+
+                if expected_call == "samples":
+                    mock_fit_to_pick.assert_called_once_with(barcodes)
+                elif expected_call == "counts":
+                    mock_fit_to_pick.assert_called_once_with(barcodes, include_samples=False)
+                else:
+                    mock_fit_to_pick.assert_not_called()
+
+                if expected_call == "plate_map":
+                    mock_plate_map.assert_called_once_with(barcodes)
+                    assert results == {"plate_123": {}}
+                else:
+                    mock_plate_map.assert_not_called()
+
+                if expected_call is None:
+                    assert results == {}
+
+
+def test_select_plate_fields():
+    available_fields = ["a", "b", "c"]
+
+    assert select_plate_fields(available_fields) == ["a", "b", "c"]
+    assert select_plate_fields(available_fields, exclude_props=["b"]) == ["a", "c"]
+    # the order of the available fields is kept
+    assert select_plate_fields(available_fields, fields=["c", "a"]) == ["a", "c"]
+    assert select_plate_fields(available_fields, fields=["c", "a", "unknown"], exclude_props=["a"]) == ["c"]
+
+
 def test_source_plate_field_generators(app, plates_lookup_with_samples):
     with app.app_context():
         assert source_plate_field_generators("plate_123")["plate_barcode"] is not None
@@ -1112,6 +934,161 @@ def test_plate_exists_in_ss_with_barcode(app, mocked_responses):
         assert plate_exists_in_ss_with_barcode(barcode=second_plate_barcode) is False
 
 
+def test_filter_for_new_samples_batches_the_lookups(app, mocked_responses):
+    with app.app_context():
+        app.config["SS_SAMPLES_LOOKUP_BATCH_SIZE"] = 2
+        ss_url = f"{app.config['SS_URL']}/api/v2/samples"
+        samples = [{FIELD_LH_SAMPLE_UUID: f"uuid_{index}"} for index in range(5)]
+
+        def add_lookup(uuids, found_uuids):
+            mocked_responses.add(
+                responses.GET,
+                ss_url,
+                json={"data": [{"type": "samples", "attributes": {"uuid": uuid}} for uuid in found_uuids]},
+                status=HTTPStatus.OK,
+                match=[
+                    responses.matchers.query_param_matcher(
+                        {"filter[uuid]": ",".join(uuids), "fields[samples]": "uuid", "page[size]": str(len(uuids))}
+                    ),
+                    SS_AUTH_HEADER_MATCHER,
+                ],
+            )
+
+        add_lookup(["uuid_0", "uuid_1"], ["uuid_1"])
+        add_lookup(["uuid_2", "uuid_3"], [])
+        add_lookup(["uuid_4"], ["uuid_4"])
+
+        assert filter_for_new_samples(samples) == [samples[0], samples[2], samples[3]]
+        assert len(mocked_responses.calls) == 3
+
+
+def test_filter_for_new_samples_leaves_retries_to_the_client(app, mocked_responses):
+    with app.app_context():
+        mocked_responses.add(
+            responses.GET, f"{app.config['SS_URL']}/api/v2/samples", status=HTTPStatus.SERVICE_UNAVAILABLE
+        )
+
+        with pytest.raises(requests.ConnectionError, match="Unable to access Sequencescape"):
+            filter_for_new_samples([{FIELD_LH_SAMPLE_UUID: "uuid_0"}])
+
+        # the status retries are made by the client's adapter, which the mocked responses replace
+        assert len(mocked_responses.calls) == 1
+
+
+def test_filter_for_new_samples_no_samples(app, mocked_responses):
+    with app.app_context():
+        assert filter_for_new_samples([]) == []
+        assert len(mocked_responses.calls) == 0
+
+
+def test_request_with_retries_backs_off_exponentially():
+    failed_response = MagicMock(status_code=HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    with patch("lighthouse.helpers.plates.sleep") as mock_sleep:
+        with patch("lighthouse.helpers.plates.random.uniform", side_effect=lambda low, high: high):
+            with pytest.raises(requests.ConnectionError):
+                request_with_retries(
+                    request_func=lambda: failed_response, response_func=lambda r: r, max_retries=4, backoff_seconds=1
+                )
+
+    # no pause after the last attempt
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [1, 2, 4]
+
+
+def test_request_with_retries_returns_the_response_of_a_successful_retry():
+    responses_returned = [MagicMock(status_code=HTTPStatus.BAD_GATEWAY), MagicMock(status_code=HTTPStatus.OK)]
+
+    with patch("lighthouse.helpers.plates.sleep"):
+        assert (
+            request_with_retries(request_func=lambda: responses_returned.pop(0), response_func=lambda r: "success")
+            == "success"
+        )
+
+
+def test_request_with_retries_does_not_retry_an_open_circuit():
+    request_func = MagicMock(side_effect=CircuitOpenError("The circuit of sequencescape is open"))
+
+    with patch("lighthouse.helpers.plates.sleep") as mock_sleep:
+        with pytest.raises(requests.ConnectionError, match="Unable to access Sequencescape"):
+            request_with_retries(request_func=request_func, response_func=lambda r: r)
+
+    request_func.assert_called_once()
+    mock_sleep.assert_not_called()
+
+
+def labware_json(*barcodes):
+    return {
+        "data": [
+            {
+                "type": "plates",
+                "attributes": {
+                    "labware_barcode": {"ean13_barcode": None, "machine_barcode": barcode, "human_barcode": barcode}
+                },
+            }
+            for barcode in barcodes
+        ]
+    }
+
+
+def test_plates_exist_in_ss_with_barcodes_batches_the_lookups(app, mocked_responses):
+    with app.app_context():
+        app.config["SS_LABWARE_LOOKUP_BATCH_SIZE"] = 2
+        ss_url = f"{app.config['SS_URL']}/api/v2/labware"
+
+        mocked_responses.add(
+            responses.GET,
+            ss_url,
+            json=labware_json("plate_1"),
+            status=HTTPStatus.OK,
+            match=[
+                responses.matchers.query_param_matcher({"filter[barcode]": "plate_1,plate_2"}),
+                SS_AUTH_HEADER_MATCHER,
+            ],
+        )
+        mocked_responses.add(
+            responses.GET,
+            ss_url,
+            json=labware_json("plate_3"),
+            status=HTTPStatus.OK,
+            match=[responses.matchers.query_param_matcher({"filter[barcode]": "plate_3"}), SS_AUTH_HEADER_MATCHER],
+        )
+
+        assert plates_exist_in_ss_with_barcodes(["plate_1", "plate_2", "plate_3", "plate_1"]) == {
+            "plate_1": True,
+            "plate_2": False,
+            "plate_3": True,
+        }
+        assert len(mocked_responses.calls) == 2
+
+
+def test_plates_exist_in_ss_with_barcodes_no_barcodes(app, mocked_responses):
+    with app.app_context():
+        assert plates_exist_in_ss_with_barcodes([]) == {}
+        assert len(mocked_responses.calls) == 0
+
+
+def test_plates_exist_in_ss_with_barcodes_unexpected_response(app, mocked_responses):
+    with app.app_context():
+        mocked_responses.add(
+            responses.GET,
+            f"{app.config['SS_URL']}/api/v2/labware",
+            json={"errors": ["Something went wrong"]},
+            status=HTTPStatus.UNPROCESSABLE_ENTITY,
+        )
+
+        with pytest.raises(AssertionError):
+            plates_exist_in_ss_with_barcodes(["plate_1", "plate_2"])
+
+
+def test_plates_exist_in_ss_with_barcodes_connection_error(app):
+    with app.app_context():
+        with patch("lighthouse.helpers.plates.http_client") as http_client:
+            http_client.return_value.get.side_effect = requests.ConnectionError()
+
+            with pytest.raises(requests.ConnectionError, match="Unable to access Sequencescape"):
+                plates_exist_in_ss_with_barcodes(["plate_1"])
+
+
 # def test_construct_cherrypicking_plate_failed_message_success(
 #     app, dart_samples, samples, source_plates, mock_event_helpers
 # ):
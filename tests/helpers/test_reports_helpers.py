@@ -1,27 +1,38 @@
 import os
 from datetime import datetime, timedelta
 from shutil import copy
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, patch
 
 import numpy as np
 import pandas as pd
 
 from lighthouse.constants.fields import (
     FIELD_COORDINATE,
+    FIELD_DATE_TESTED,
     FIELD_PLATE_BARCODE,
     FIELD_RESULT,
     FIELD_ROOT_SAMPLE_ID,
     FIELD_SOURCE,
 )
 from lighthouse.helpers.reports import (
+    REPORT_SHEET_ALL,
+    REPORT_SHEET_WITH_LOCATION,
     add_cherrypicked_column,
+    concat_report_frames,
+    date_tested_ranges,
     delete_reports,
+    fit_to_pick_samples_frame,
     get_cherrypicked_samples,
     get_distinct_plate_barcodes,
+    get_fit_to_pick_plate_barcodes,
     get_fit_to_pick_samples,
     get_new_report_name_and_path,
+    merge_cherrypicked_column,
+    remap_categories,
     report_query_window_start,
+    transform_fit_to_pick_samples,
     unpad_coordinate,
+    write_report,
 )
 
 # ----- get_new_report_name_and_path tests -----
@@ -85,37 +96,34 @@ def test_delete_reports(app):
 def test_get_cherrypicked_samples_test_db_connection_close(app):
     """
     Test Scenario
-    - Check that connection is close when we call get_cherrypicked_samples
+    - Check that the connection is returned to the pool when we call get_cherrypicked_samples
     """
     samples = ["MCM001", "MCM002", "MCM003", "MCM004", "MCM005"]
     plate_barcodes = ["123", "456"]
 
     with app.app_context():
-        with patch("sqlalchemy.create_engine") as mock_sql_engine:
-            mock_db_connection = Mock()
-            mock_sql_engine().connect.return_value = mock_db_connection
-            get_cherrypicked_samples(samples, plate_barcodes)
-            mock_db_connection.close.assert_called_once()
+        with patch("lighthouse.helpers.reports.mlwh_engine") as mock_sql_engine:
+            with patch("lighthouse.db.mlwh.read_sql_streamed", return_value=pd.DataFrame()):
+                get_cherrypicked_samples(samples, plate_barcodes)
+                mock_sql_engine().connect().__exit__.assert_called_once()
 
 
 def test_get_cherrypicked_samples_test_db_connection_close_on_exception(app):
     """
     Test Scenario
-    - Check that connection is close when we call get_cherrypicked_samples
+    - Check that the connection is returned to the pool when we call get_cherrypicked_samples and the query fails
     """
     samples = ["MCM001", "MCM002", "MCM003", "MCM004", "MCM005"]
     plate_barcodes = ["123", "456"]
 
     with app.app_context():
-        with patch("sqlalchemy.create_engine") as mock_sql_engine:
+        with patch("lighthouse.helpers.reports.mlwh_engine") as mock_sql_engine:
             with patch(
-                "pandas.read_sql",
+                "lighthouse.db.mlwh.read_sql_streamed",
                 side_effect=Exception("Boom!"),
             ):
-                mock_db_connection = Mock()
-                mock_sql_engine().connect.return_value = mock_db_connection
-                get_cherrypicked_samples(samples, plate_barcodes)
-                mock_db_connection.close.assert_called_once()
+                assert get_cherrypicked_samples(samples, plate_barcodes) is None
+                mock_sql_engine().connect().__exit__.assert_called_once()
 
 
 # Test Scenario
@@ -133,9 +141,9 @@ def test_get_cherrypicked_samples_no_beckman(app):
     plate_barcodes = ["123", "456"]
 
     with app.app_context():
-        with patch("sqlalchemy.create_engine", return_value=Mock()):
+        with patch("lighthouse.helpers.reports.mlwh_engine", return_value=MagicMock()):
             with patch(
-                "pandas.read_sql",
+                "lighthouse.db.mlwh.read_sql_streamed",
                 side_effect=expected,
             ):
                 returned_samples = get_cherrypicked_samples(samples, plate_barcodes)
@@ -164,9 +172,9 @@ def test_get_cherrypicked_samples_chunking_no_beckman(app):
     plate_barcodes = ["123", "456"]
 
     with app.app_context():
-        with patch("sqlalchemy.create_engine", return_value=Mock()):
+        with patch("lighthouse.helpers.reports.mlwh_engine", return_value=MagicMock()):
             with patch(
-                "pandas.read_sql",
+                "lighthouse.db.mlwh.read_sql_streamed",
                 side_effect=query_results,
             ):
                 returned_samples = get_cherrypicked_samples(samples, plate_barcodes, 2)
@@ -213,9 +221,9 @@ def test_get_cherrypicked_samples_no_sentinel(app):
     plate_barcodes = ["123", "456"]
 
     with app.app_context():
-        with patch("sqlalchemy.create_engine", return_value=Mock()):
+        with patch("lighthouse.helpers.reports.mlwh_engine", return_value=MagicMock()):
             with patch(
-                "pandas.read_sql",
+                "lighthouse.db.mlwh.read_sql_streamed",
                 side_effect=expected,
             ):
                 returned_samples = get_cherrypicked_samples(samples, plate_barcodes)
@@ -244,9 +252,9 @@ def test_get_cherrypicked_samples_chunking_no_sentinel(app):
     plate_barcodes = ["123", "456"]
 
     with app.app_context():
-        with patch("sqlalchemy.create_engine", return_value=Mock()):
+        with patch("lighthouse.helpers.reports.mlwh_engine", return_value=MagicMock()):
             with patch(
-                "pandas.read_sql",
+                "lighthouse.db.mlwh.read_sql_streamed",
                 side_effect=query_results,
             ):
                 returned_samples = get_cherrypicked_samples(samples, plate_barcodes, 2)
@@ -307,9 +315,9 @@ def test_get_cherrypicked_samples_sentinel_and_beckman(app):
     plate_barcodes = ["123", "456"]
 
     with app.app_context():
-        with patch("sqlalchemy.create_engine", return_value=Mock()):
+        with patch("lighthouse.helpers.reports.mlwh_engine", return_value=MagicMock()):
             with patch(
-                "pandas.read_sql",
+                "lighthouse.db.mlwh.read_sql_streamed",
                 side_effect=expected,
             ):
                 returned_samples = get_cherrypicked_samples(samples, plate_barcodes)
@@ -373,9 +381,9 @@ def test_get_cherrypicked_samples_chunking_sentinel_and_beckman(app):
     plate_barcodes = ["123", "456"]
 
     with app.app_context():
-        with patch("sqlalchemy.create_engine", return_value=Mock()):
+        with patch("lighthouse.helpers.reports.mlwh_engine", return_value=MagicMock()):
             with patch(
-                "pandas.read_sql",
+                "lighthouse.db.mlwh.read_sql_streamed",
                 side_effect=query_results,
             ):
                 returned_samples = get_cherrypicked_samples(samples, plate_barcodes, 2)
@@ -436,6 +444,156 @@ def test_get_fit_to_pick_samples(app, freezer, samples, priority_samples):
         assert fit_to_pick_samples.at[2, FIELD_ROOT_SAMPLE_ID] == "sample_101"
 
 
+def test_get_fit_to_pick_samples_has_typed_columns(app, freezer, samples, priority_samples):
+    with app.app_context():
+        fit_to_pick_samples = get_fit_to_pick_samples(app.data.driver.db.samples)
+
+        for column in (FIELD_SOURCE, FIELD_PLATE_BARCODE, FIELD_RESULT, FIELD_COORDINATE):
+            assert isinstance(fit_to_pick_samples[column].dtype, pd.CategoricalDtype)
+
+        assert pd.api.types.is_datetime64_any_dtype(fit_to_pick_samples[FIELD_DATE_TESTED])
+
+
+def test_fit_to_pick_samples_frame_joins_the_batches():
+    documents = [
+        {
+            FIELD_SOURCE: f"centre_{i % 2}",
+            FIELD_PLATE_BARCODE: f"plate_{i // 3}",
+            FIELD_ROOT_SAMPLE_ID: f"sample_{i}",
+            FIELD_RESULT: "Positive",
+            FIELD_DATE_TESTED: datetime(2020, 5, 1 + i),
+            FIELD_COORDINATE: f"A0{i + 1}",
+        }
+        for i in range(7)
+    ]
+
+    frame = fit_to_pick_samples_frame(iter(documents), batch_size=3)
+
+    assert frame[FIELD_ROOT_SAMPLE_ID].to_list() == [f"sample_{i}" for i in range(7)]
+    assert frame[FIELD_PLATE_BARCODE].to_list() == ["plate_0"] * 3 + ["plate_1"] * 3 + ["plate_2"]
+    assert frame[FIELD_COORDINATE].to_list() == [f"A{i + 1}" for i in range(7)]
+    assert list(frame[FIELD_SOURCE].cat.categories) == ["centre_0", "centre_1"]
+    assert frame.at[6, FIELD_DATE_TESTED] == pd.Timestamp(2020, 5, 7)
+
+
+def test_get_fit_to_pick_samples_of_test_dates(app, freezer, samples, priority_samples):
+    with app.app_context():
+        samples_collection = app.data.driver.db.samples
+
+        assert len(get_fit_to_pick_samples(samples_collection, [datetime.now().date()])) == 7
+        assert get_fit_to_pick_samples(samples_collection, [datetime.now().date() - timedelta(days=1)]).empty
+        assert get_fit_to_pick_samples(samples_collection, []).empty
+
+
+def test_get_fit_to_pick_plate_barcodes(app, freezer, samples, priority_samples):
+    with app.app_context():
+        samples_collection = app.data.driver.db.samples
+        fit_to_pick_samples = get_fit_to_pick_samples(samples_collection)
+
+        assert sorted(get_fit_to_pick_plate_barcodes(samples_collection)) == sorted(
+            fit_to_pick_samples[FIELD_PLATE_BARCODE].dropna().unique()
+        )
+        assert sorted(get_fit_to_pick_plate_barcodes(samples_collection, [datetime.now().date()])) == sorted(
+            fit_to_pick_samples[FIELD_PLATE_BARCODE].dropna().unique()
+        )
+        assert get_fit_to_pick_plate_barcodes(samples_collection, [datetime.now().date() - timedelta(days=1)]) == []
+        assert get_fit_to_pick_plate_barcodes(samples_collection, []) == []
+
+
+def test_date_tested_ranges():
+    days = [datetime(2020, 5, day).date() for day in (4, 1, 2, 3, 6)]
+
+    assert date_tested_ranges(days) == [
+        {FIELD_DATE_TESTED: {"$gte": datetime(2020, 5, 1), "$lt": datetime(2020, 5, 5)}},
+        {FIELD_DATE_TESTED: {"$gte": datetime(2020, 5, 6), "$lt": datetime(2020, 5, 7)}},
+    ]
+    assert date_tested_ranges([]) == []
+
+
+def test_concat_report_frames_keeps_the_categoricals():
+    frames = [
+        pd.DataFrame({FIELD_PLATE_BARCODE: pd.Categorical(["plate_1"]), "location_barcode": ["lw-1"]}),
+        pd.DataFrame({FIELD_PLATE_BARCODE: pd.Categorical(["plate_2"]), "location_barcode": [None]}, index=[5]),
+    ]
+
+    concatenated = concat_report_frames(frames)
+
+    assert isinstance(concatenated[FIELD_PLATE_BARCODE].dtype, pd.CategoricalDtype)
+    assert concatenated[FIELD_PLATE_BARCODE].to_list() == ["plate_1", "plate_2"]
+    assert concatenated.index.to_list() == [0, 1]
+
+
+def test_fit_to_pick_samples_frame_without_documents():
+    frame = fit_to_pick_samples_frame([], batch_size=3)
+
+    assert frame.empty
+    assert FIELD_PLATE_BARCODE in frame.columns
+
+
+def test_remap_categories_maps_each_category_once():
+    values = pd.Series(["A01", "A1", None, "B02", "A01"], dtype="category", name=FIELD_COORDINATE)
+    mapping = MagicMock(side_effect=unpad_coordinate)
+
+    remapped = remap_categories(values, mapping)
+
+    assert mapping.call_count == 3
+    assert remapped.name == FIELD_COORDINATE
+    assert remapped.to_list()[:2] == ["A1", "A1"]
+    assert pd.isna(remapped[2])
+    assert remapped.to_list()[3:] == ["B2", "A1"]
+    # the categories mapped to the same value are merged
+    assert sorted(remapped.cat.categories) == ["A1", "B2"]
+
+
+def test_remap_categories_without_values():
+    assert remap_categories(pd.Series([], dtype="category"), unpad_coordinate).empty
+
+
+def test_transform_fit_to_pick_samples():
+    samples = pd.DataFrame(
+        {
+            FIELD_PLATE_BARCODE: pd.Series(["plate_1", "plate_1", "plate_2", None, "plate_1"], dtype="category"),
+            FIELD_COORDINATE: pd.Series(["A01", "A1", "H12", "A02", "B01"], dtype="category"),
+        }
+    )
+
+    transformed = transform_fit_to_pick_samples(samples)
+
+    assert transformed[FIELD_COORDINATE].to_list() == ["A1", "A1", "H12", "A2", "B1"]
+    assert transformed["plate and well"].to_list()[:3] == ["plate_1:A1", "plate_1:A1", "plate_2:H12"]
+    assert pd.isna(transformed.at[3, "plate and well"])
+    assert transformed.at[4, "plate and well"] == "plate_1:B1"
+    assert isinstance(transformed["plate and well"].dtype, pd.CategoricalDtype)
+    assert len(transformed["plate and well"].cat.categories) == 3
+
+
+def test_merge_cherrypicked_column_on_categorical_keys():
+    report = transform_fit_to_pick_samples(
+        pd.DataFrame(
+            {
+                FIELD_ROOT_SAMPLE_ID: pd.Series(["MCM001", "MCM002", "MCM003"], dtype=object),
+                FIELD_PLATE_BARCODE: pd.Series(["123", "123", "456"], dtype="category"),
+                FIELD_RESULT: pd.Series(["Positive", "Positive", "Positive"], dtype="category"),
+                FIELD_COORDINATE: pd.Series(["A01", "A02", "A01"], dtype="category"),
+            }
+        )
+    )
+    cherrypicked_samples = pd.DataFrame(
+        [
+            ["MCM001", "123", "positive", "A1", "Yes"],
+            # a plate which is not in the report
+            ["MCM003", "789", "positive", "A1", "Yes"],
+        ],
+        columns=[FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE, "Result_lower", FIELD_COORDINATE, "LIMS submission"],
+    )
+
+    merged = merge_cherrypicked_column(report, cherrypicked_samples)
+
+    assert merged["LIMS submission"].to_list() == ["Yes", "No", "No"]
+    assert isinstance(merged[FIELD_PLATE_BARCODE].dtype, pd.CategoricalDtype)
+    assert "Result_lower" not in merged.columns
+
+
 # ----- add_cherrypicked_column tests -----
 
 
@@ -507,7 +665,7 @@ def test_add_cherrypicked_column(app):
     ]
 
     with app.app_context():
-        with patch("sqlalchemy.create_engine", return_value=Mock()):
+        with patch("lighthouse.helpers.reports.mlwh_engine", return_value=MagicMock()):
             with patch(
                 "lighthouse.helpers.reports.get_cherrypicked_samples",
                 return_value=mock_get_cherrypicked_samples,
@@ -575,7 +733,7 @@ def test_add_cherrypicked_column_duplicates(app):
     ]
 
     with app.app_context():
-        with patch("sqlalchemy.create_engine", return_value=Mock()):
+        with patch("lighthouse.helpers.reports.mlwh_engine", return_value=MagicMock()):
             with patch(
                 "lighthouse.helpers.reports.get_cherrypicked_samples",
                 return_value=mock_get_cherrypicked_samples,
@@ -621,7 +779,7 @@ def test_add_cherrypicked_column_no_rows(app):
     ]
 
     with app.app_context():
-        with patch("sqlalchemy.create_engine", return_value=Mock()):
+        with patch("lighthouse.helpers.reports.mlwh_engine", return_value=MagicMock()):
             with patch(
                 "lighthouse.helpers.reports.get_cherrypicked_samples",
                 return_value=mock_get_cherrypicked_samples,
@@ -632,6 +790,62 @@ def test_add_cherrypicked_column_no_rows(app):
     assert np.array_equal(new_dataframe.to_numpy(), expected_data)
 
 
+def test_add_cherrypicked_column_without_samples(app):
+    existing_dataframe = pd.DataFrame(columns=[FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE, FIELD_RESULT])
+
+    with app.app_context():
+        with patch("lighthouse.helpers.reports.get_cherrypicked_samples") as get_cherrypicked_samples:
+            new_dataframe = add_cherrypicked_column(existing_dataframe)
+
+    get_cherrypicked_samples.assert_not_called()
+    assert new_dataframe.columns.to_list() == [
+        FIELD_ROOT_SAMPLE_ID,
+        FIELD_PLATE_BARCODE,
+        FIELD_RESULT,
+        "LIMS submission",
+    ]
+
+
+# ----- write_report tests -----
+
+
+def test_write_report_streams_rows_to_both_sheets(tmp_path):
+    columns = [FIELD_DATE_TESTED, FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE, "location_barcode"]
+    report = pd.DataFrame(
+        {
+            FIELD_DATE_TESTED: pd.Series([datetime(2020, 5, 1), datetime(2020, 5, 2), None], dtype="datetime64[ns]"),
+            FIELD_ROOT_SAMPLE_ID: ["sample_1", "sample_2", "sample_3"],
+            FIELD_PLATE_BARCODE: pd.Categorical(["plate_1", "plate_2", "plate_1"]),
+            "location_barcode": ["lw-1", np.nan, "lw-1"],
+            "ignored": [1, 2, 3],
+        }
+    )
+    report_path = tmp_path.joinpath("report.xlsx")
+
+    rows_written = write_report(report, report_path, columns)
+
+    assert rows_written == {REPORT_SHEET_WITH_LOCATION: 2, REPORT_SHEET_ALL: 3}
+
+    sheets = pd.read_excel(report_path, sheet_name=None)
+    assert list(sheets) == [REPORT_SHEET_WITH_LOCATION, REPORT_SHEET_ALL]
+    assert sheets[REPORT_SHEET_ALL].columns.to_list() == columns
+    assert sheets[REPORT_SHEET_ALL][FIELD_ROOT_SAMPLE_ID].to_list() == ["sample_1", "sample_2", "sample_3"]
+    assert sheets[REPORT_SHEET_ALL]["location_barcode"].isna().to_list() == [False, True, False]
+    assert sheets[REPORT_SHEET_ALL][FIELD_DATE_TESTED].isna().to_list() == [False, False, True]
+    assert sheets[REPORT_SHEET_WITH_LOCATION][FIELD_ROOT_SAMPLE_ID].to_list() == ["sample_1", "sample_3"]
+
+
+def test_write_report_in_chunks(tmp_path):
+    report = pd.DataFrame({FIELD_ROOT_SAMPLE_ID: [f"sample_{i}" for i in range(5)], "location_barcode": ["lw-1"] * 5})
+    report_path = tmp_path.joinpath("report.xlsx")
+
+    with patch("lighthouse.helpers.reports.REPORT_WRITE_CHUNK_SIZE", 2):
+        write_report(report, report_path, [FIELD_ROOT_SAMPLE_ID])
+
+    written = pd.read_excel(report_path, sheet_name=REPORT_SHEET_WITH_LOCATION)
+    assert written[FIELD_ROOT_SAMPLE_ID].to_list() == [f"sample_{i}" for i in range(5)]
+
+
 # ----- get_distinct_plate_barcodes tests -----
 
 
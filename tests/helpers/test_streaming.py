@@ -0,0 +1,73 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from lighthouse.constants.general import MIMETYPE_NDJSON
+from lighthouse.helpers.streaming import ndjson_response, streaming_requested
+
+
+@pytest.mark.parametrize(
+    "query_string, headers, expected",
+    [
+        [{}, {}, False],
+        [{"_stream": "1"}, {}, True],
+        [{"_stream": "true"}, {}, True],
+        [{"_stream": "0"}, {}, False],
+        [{}, {"Accept": MIMETYPE_NDJSON}, True],
+        [{}, {"Accept": "application/json"}, False],
+        [{}, {"Accept": "*/*"}, False],
+    ],
+)
+def test_streaming_requested(app, query_string, headers, expected):
+    with app.test_request_context("/plates", query_string=query_string, headers=headers):
+        assert streaming_requested() is expected
+
+
+def test_ndjson_response(app):
+    with app.test_request_context("/plates"):
+        response = ndjson_response(iter([{"a": 1}, {"b": 2}]), json.dumps)
+
+        assert response.mimetype == MIMETYPE_NDJSON
+        assert response.get_data(as_text=True) == '{"a": 1}\n{"b": 2}\n'
+
+
+def test_ndjson_response_writes_errors_to_the_stream(app):
+    def documents():
+        yield {"a": 1}
+        raise KeyError("b")
+
+    with app.test_request_context("/plates"):
+        response = ndjson_response(documents(), json.dumps)
+
+        assert response.get_data(as_text=True) == (
+            '{"a": 1}\n{"errors": ["Failed to stream the response: KeyError"]}\n'
+        )
+
+
+def test_stream_eve_resource(client, priority_samples):
+    response = client.get("/priority_samples", query_string={"_stream": "1"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == MIMETYPE_NDJSON
+
+    documents = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(documents) == len(priority_samples)
+    assert {document["_id"] for document in documents} == {
+        str(priority_sample["_id"]) for priority_sample in priority_samples
+    }
+
+
+def test_stream_eve_resource_applies_eve_query_params(client, priority_samples):
+    response = client.get("/priority_samples", query_string={"max_results": 1}, headers={"Accept": MIMETYPE_NDJSON})
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.get_data(as_text=True).splitlines()) == 1
+
+
+def test_eve_resource_is_not_streamed_by_default(client, priority_samples):
+    response = client.get("/priority_samples")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == "application/json"
+    assert len(response.json["_items"]) == len(priority_samples)
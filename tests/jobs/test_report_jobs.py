@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from lighthouse.classes.background_jobs import BACKGROUND_JOB_LOCKS_COLLECTION, JOB_STATUS_COMPLETED
+from lighthouse.jobs.reports import create_report_job, report_job_key
+
+
+@pytest.fixture
+def scheduler_locks(app):
+    with app.app_context():
+        locks = app.data.driver.db[BACKGROUND_JOB_LOCKS_COLLECTION]
+        locks.delete_many({})
+        try:
+            with patch("lighthouse.jobs.reports.scheduler", MagicMock(app=app)):
+                yield locks
+        finally:
+            locks.delete_many({})
+
+
+def test_create_report_job_creates_the_report_in_a_report_job(scheduler_locks):
+    with patch("lighthouse.jobs.reports.create_report", return_value="test.xlsx") as create_report:
+        with patch("lighthouse.jobs.reports.get_reports_details"):
+            create_report_job()
+
+    create_report.assert_called_once_with(full=False)
+    # the lock is released once the report is created
+    assert scheduler_locks.count_documents({}) == 0
+
+
+def test_create_report_job_waits_for_the_report_in_progress(scheduler_locks):
+    now = datetime.now(timezone.utc)
+    scheduler_locks.insert_one(
+        {"_id": report_job_key(), "job_id": "job_1", "created_at": now, "expires_at": now + timedelta(hours=1)}
+    )
+    completed = {"status": JOB_STATUS_COMPLETED, "response_status": HTTPStatus.CREATED}
+
+    with patch("lighthouse.jobs.reports.create_report") as create_report:
+        with patch("lighthouse.jobs.reports.wait_for_report_job", return_value=completed) as wait_for_report_job:
+            create_report_job()
+
+    create_report.assert_not_called()
+    wait_for_report_job.assert_called_once_with("job_1")
+
+
+def test_report_job_key():
+    assert report_job_key() == report_job_key(full=False)
+    assert report_job_key(full=True) != report_job_key()
@@ -16,9 +16,11 @@ from lighthouse.messages.message import Message
 
 ENDPOINT_PREFIXES = ["", "/v1"]
 CREATE_PLATE_ENDPOINT = "/cherrypicked-plates/create"
+BULK_CREATE_PLATE_ENDPOINT = "/cherrypicked-plates/bulk-create"
 FAIL_PLATE_ENDPOINT = "/cherrypicked-plates/fail"
 
 CREATE_PLATE_BASE_URLS = [prefix + CREATE_PLATE_ENDPOINT for prefix in ENDPOINT_PREFIXES]
+BULK_CREATE_PLATE_BASE_URLS = [prefix + BULK_CREATE_PLATE_ENDPOINT for prefix in ENDPOINT_PREFIXES]
 FAIL_PLATE_BASE_URLS = [prefix + FAIL_PLATE_ENDPOINT for prefix in ENDPOINT_PREFIXES]
 
 
@@ -132,7 +134,7 @@ def test_get_cherrypicked_plates_endpoint_ss_failure(
 @pytest.mark.parametrize("base_url", CREATE_PLATE_BASE_URLS)
 def test_post_plates_endpoint_mismatched_sample_numbers(app, client, dart_samples, samples, base_url):
     with patch(
-        "lighthouse.routes.common.cherrypicked_plates.check_matching_sample_numbers",
+        "lighthouse.routes.common.cherrypicked_plates.DartSamplesJoin.has_matching_sample_numbers",
         return_value=False,
     ):
         barcode = "des_plate_1"
@@ -176,6 +178,100 @@ def test_post_cherrypicked_plates_endpoint_missing_source_plate_uuids(
     assert response.json == {"errors": [f"{ERROR_SAMPLES_MISSING_UUIDS} {barcode}"]}
 
 
+# ---------- cherrypicked-plates/bulk-create tests ----------
+
+
+@pytest.mark.parametrize("base_url", BULK_CREATE_PLATE_BASE_URLS)
+def test_bulk_create_cherrypicked_plates_successful(
+    app,
+    client,
+    dart_samples,
+    samples_with_cog_barcodes,
+    mocked_responses,
+    centres,
+    mlwh_lh_samples,
+    source_plates,
+    base_url,
+):
+    mock_sequencescape(mocked_responses, app)
+
+    response = client.post(
+        base_url, json={"barcodes": ["des_plate_1", "unknown", "des_plate_1"], "user_id": "test", "robot": "BKRB0001"}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json == {
+        "plates": [
+            {
+                "barcode": "des_plate_1",
+                "response": {
+                    "data": {"plate_barcode": "des_plate_1", "centre": ["centre_1"], "number_of_fit_to_pick": 5}
+                },
+                "response_status": HTTPStatus.OK,
+            },
+            {
+                "barcode": "unknown",
+                "response": {"errors": [f"{ERROR_SAMPLE_DATA_MISSING} unknown"]},
+                "response_status": HTTPStatus.INTERNAL_SERVER_ERROR,
+            },
+        ]
+    }
+    assert len(mocked_responses.calls) == 1
+
+
+@pytest.mark.parametrize("base_url", BULK_CREATE_PLATE_BASE_URLS)
+def test_bulk_create_cherrypicked_plates_queries_dart_once(app, client, base_url):
+    with patch(
+        "lighthouse.routes.common.cherrypicked_plates.find_dart_source_samples_rows_for_barcodes",
+        return_value={"plate_1": [], "plate_2": []},
+    ) as find_rows:
+        response = client.post(base_url, json={"barcodes": ["plate_1", "plate_2"], "user_id": "test", "robot": "1"})
+
+    find_rows.assert_called_once_with(["plate_1", "plate_2"])
+    assert response.status_code == HTTPStatus.OK
+    assert [plate["response_status"] for plate in response.json["plates"]] == [HTTPStatus.INTERNAL_SERVER_ERROR] * 2
+
+
+@pytest.mark.parametrize("base_url", BULK_CREATE_PLATE_BASE_URLS)
+@pytest.mark.parametrize(
+    "body",
+    [
+        None,
+        {"user_id": "test", "robot": "BKRB0001"},
+        {"barcodes": [], "user_id": "test", "robot": "BKRB0001"},
+        {"barcodes": "des_plate_1", "user_id": "test", "robot": "BKRB0001"},
+        {"barcodes": ["des_plate_1", ""], "user_id": "test", "robot": "BKRB0001"},
+        {"barcodes": ["des_plate_1"], "robot": "BKRB0001"},
+        {"barcodes": ["des_plate_1"], "user_id": "test"},
+    ],
+)
+def test_bulk_create_cherrypicked_plates_bad_request(client, base_url, body):
+    response = client.post(base_url, json=body)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert len(response.json["errors"]) == 1
+
+
+@pytest.mark.parametrize("base_url", BULK_CREATE_PLATE_BASE_URLS)
+def test_bulk_create_cherrypicked_plates_too_many_barcodes(app, client, base_url):
+    barcodes = [f"plate_{index}" for index in range(app.config["CHERRYPICKED_BULK_MAX_BARCODES"] + 1)]
+
+    response = client.post(base_url, json={"barcodes": barcodes, "user_id": "test", "robot": "BKRB0001"})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize("base_url", BULK_CREATE_PLATE_BASE_URLS)
+def test_bulk_create_cherrypicked_plates_dart_failure(client, base_url):
+    with patch(
+        "lighthouse.routes.common.cherrypicked_plates.find_dart_source_samples_rows_for_barcodes",
+        side_effect=Exception("DART is down"),
+    ):
+        response = client.post(base_url, json={"barcodes": ["des_plate_1"], "user_id": "test", "robot": "BKRB0001"})
+
+    assert response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+
+
 # ---------- cherrypicked-plates/fail tests ----------
 
 
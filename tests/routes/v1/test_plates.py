@@ -1,3 +1,4 @@
+import json
 from http import HTTPStatus
 from typing import List, Optional
 from unittest.mock import patch
@@ -6,8 +7,17 @@ import pytest
 import responses
 from responses.matchers import query_param_matcher
 
+from lighthouse.classes.background_jobs import JOB_STATUS_COMPLETED, JOB_STATUS_QUEUED, JobQueueFullError
+from lighthouse.classes.plate_cache import PlateCache
 from lighthouse.constants.config import SS_PLATE_TYPE_DEFAULT
-from lighthouse.constants.general import ARG_EXCLUDE, ARG_TYPE, ARG_TYPE_DESTINATION, ARG_TYPE_SOURCE
+from lighthouse.constants.general import (
+    ARG_EXCLUDE,
+    ARG_FIELDS,
+    ARG_TYPE,
+    ARG_TYPE_DESTINATION,
+    ARG_TYPE_SOURCE,
+    MIMETYPE_NDJSON,
+)
 
 ENDPOINT_PREFIXES = ["", "/v1"]
 NEW_PLATE_ENDPOINT = "/plates/new"
@@ -56,14 +66,21 @@ def mock_labware_lookup_failure(app, mocked_responses):
     mocked_responses.add(responses.GET, ss_url, json=LOOKUP_LABWARE_ERROR_JSON, status=HTTPStatus.UNPROCESSABLE_ENTITY)
 
 
-def mock_samples_lookup(app, mocked_responses, found_samples_count=0, mock_missing_samples=True):
+def mock_samples_lookup(app, mocked_responses, found_samples_count=0):
     ss_url = f"{app.config['SS_URL']}/api/v2/samples"
+    found_uuids = []
 
-    for _ in range(found_samples_count):
-        mocked_responses.add(responses.GET, ss_url, json={"data": [{"some sample": "data"}]}, status=HTTPStatus.OK)
+    # the first found_samples_count samples looked up are found in Sequencescape, whatever the batches they are in
+    def samples_callback(request):
+        data = []
+        for uuid in request.params["filter[uuid]"].split(","):
+            if len(found_uuids) < found_samples_count:
+                found_uuids.append(uuid)
+                data.append({"type": "samples", "attributes": {"uuid": uuid}})
 
-    if mock_missing_samples:
-        mocked_responses.add(responses.GET, ss_url, json={"data": []}, status=HTTPStatus.OK)
+        return HTTPStatus.OK, {}, json.dumps({"data": data})
+
+    mocked_responses.add_callback(responses.GET, ss_url, callback=samples_callback, content_type="application/json")
 
 
 def mock_samples_lookup_failure(app, mocked_responses):
@@ -199,7 +216,7 @@ def test_post_plates_endpoint_successful_with_all_new_samples_only_plate_type_al
 ):
     body = create_plate_body(VALID_PLATE_BARCODE, "all_new_samples_only")
     mock_labware_lookup(app, mocked_responses)
-    mock_samples_lookup(app, mocked_responses, found_samples_count=8, mock_missing_samples=False)
+    mock_samples_lookup(app, mocked_responses, found_samples_count=8)
 
     response = client.post(endpoint, json=body)
 
@@ -230,6 +247,51 @@ def test_post_plates_endpoint_plate_type_not_configured(app, client, endpoint):
     }
 
 
+@pytest.mark.parametrize("endpoint", NEW_PLATE_ENDPOINTS)
+def test_post_plates_endpoint_async_creates_the_plate_in_a_job(
+    app, client, samples, source_plates, priority_samples, mocked_responses, mlwh_lh_samples, endpoint
+):
+    body = create_plate_body(VALID_PLATE_BARCODE)
+    mock_plate_create(app, mocked_responses, body)
+
+    response = client.post(f"{endpoint}?async=1", json=body)
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    job = response.json["job"]
+    assert job["status"] == JOB_STATUS_QUEUED
+    assert job["href"] == endpoint.replace(NEW_PLATE_ENDPOINT, f"/plates/jobs/{job['id']}")
+
+    # wait for the job to complete
+    app.extensions["background_jobs"].shutdown()
+
+    job_response = client.get(job["href"])
+
+    assert job_response.status_code == HTTPStatus.OK
+    assert job_response.json["job"]["status"] == JOB_STATUS_COMPLETED
+    assert job_response.json["job"]["details"] == {"barcode": VALID_PLATE_BARCODE, "type": SS_PLATE_TYPE_DEFAULT}
+    assert job_response.json["job"]["response_status"] == HTTPStatus.CREATED
+    assert job_response.json["job"]["response"] == {
+        "data": {"plate_barcode": "plate_123", "centre": "centre_1", "count_fit_to_pick_samples": 5}
+    }
+
+
+@pytest.mark.parametrize("endpoint", NEW_PLATE_ENDPOINTS)
+def test_post_plates_endpoint_async_when_too_many_jobs_are_in_progress(app, client, endpoint):
+    with patch.object(app.extensions["background_jobs"], "submit", side_effect=JobQueueFullError("Too many jobs")):
+        response = client.post(f"{endpoint}?async=1", json=create_plate_body(VALID_PLATE_BARCODE))
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json == {"errors": ["Too many jobs"]}
+
+
+@pytest.mark.parametrize("endpoint", [prefix + "/plates/jobs/unknown" for prefix in ENDPOINT_PREFIXES])
+def test_get_plate_job_not_found(app, client, endpoint):
+    response = client.get(endpoint)
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json == {"errors": ["No plate job with id: unknown"]}
+
+
 @pytest.mark.parametrize("endpoint", NEW_PLATE_ENDPOINTS)
 @pytest.mark.parametrize("plate_type", ALL_SAMPLES_PLATE_TYPES)
 def test_post_plates_endpoint_exception_for_all_samples_plate_type_when_plate_already_in_ss(
@@ -420,16 +482,21 @@ def test_get_plates_endpoint_barcode_empty(client, endpoint):
 
 @pytest.mark.parametrize("endpoint", GET_PLATES_ENDPOINTS)
 def test_get_plates_endpoint_method_calls(app, client, samples, priority_samples, endpoint):
-    barcode = "plate_123"
-    with patch("lighthouse.helpers.plates.has_plate_map_data", return_value=True) as mock_has_plate_map_data:
-        response = client.get(endpoint, query_string={QUERY_PARAM_BARCODES: barcode}, content_type="application/json")
+    barcodes = ["plate_123", "456"]
+    with patch(
+        "lighthouse.helpers.plates.get_fit_to_pick_samples_and_counts_for_plates", return_value={}
+    ) as mock_get_fit_to_pick_samples_and_counts_for_plates:
+        response = client.get(
+            endpoint, query_string={QUERY_PARAM_BARCODES: ",".join(barcodes)}, content_type="application/json"
+        )
         assert response.status_code == HTTPStatus.OK
-        mock_has_plate_map_data.assert_called_once_with(barcode)
+        # all the plates are looked up with a single call
+        mock_get_fit_to_pick_samples_and_counts_for_plates.assert_called_once_with(barcodes)
 
 
 @pytest.mark.parametrize("endpoint", GET_PLATES_ENDPOINTS)
 def test_get_plates_endpoint_fail(app, client, samples, mocked_responses, endpoint):
-    with patch("lighthouse.helpers.plates.get_fit_to_pick_samples_and_counts", side_effect=Exception()):
+    with patch("lighthouse.helpers.plates.get_fit_to_pick_samples_and_counts_for_plates", side_effect=Exception()):
         response = client.get(endpoint, query_string={QUERY_PARAM_BARCODES: "123,456"}, content_type="application/json")
 
         assert response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
@@ -465,28 +532,99 @@ def test_get_plates_endpoint_exclude_props(
     }
 
 
+@pytest.mark.parametrize("endpoint", GET_PLATES_ENDPOINTS)
+def test_get_plates_endpoint_fields(app, client, samples, priority_samples, endpoint):
+    params = {QUERY_PARAM_BARCODES: "plate_123,456", ARG_FIELDS: "plate_barcode,has_plate_map"}
+    with patch("lighthouse.helpers.plates.get_fit_to_pick_samples_and_counts_for_plates") as mock_fit_to_pick:
+        response = client.get(endpoint, query_string=params)
+
+        # only the plate map data is needed so the fit to pick aggregation is not run
+        mock_fit_to_pick.assert_not_called()
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json == {
+        "plates": [
+            {"plate_barcode": "plate_123", "has_plate_map": True},
+            {"plate_barcode": "456", "has_plate_map": False},
+        ]
+    }
+
+
+@pytest.mark.parametrize("endpoint", GET_PLATES_ENDPOINTS)
+@pytest.mark.parametrize(
+    "stream_request", [{"query_string": {"_stream": "1"}}, {"headers": {"Accept": MIMETYPE_NDJSON}}]
+)
+def test_get_plates_endpoint_streams_plates(app, client, samples, priority_samples, endpoint, stream_request):
+    app.config["PLATES_STREAM_BATCH_SIZE"] = 1
+    params = {QUERY_PARAM_BARCODES: "plate_123,456", ARG_FIELDS: "plate_barcode,has_plate_map"}
+
+    response = client.get(
+        endpoint,
+        query_string={**params, **stream_request.get("query_string", {})},
+        headers=stream_request.get("headers", {}),
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == MIMETYPE_NDJSON
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == [
+        {"plate_barcode": "plate_123", "has_plate_map": True},
+        {"plate_barcode": "456", "has_plate_map": False},
+    ]
+
+
+@pytest.mark.parametrize("endpoint", [prefix + "/plates/cache" for prefix in ENDPOINT_PREFIXES])
+def test_get_plate_cache_stats(app, client, endpoint):
+    response = client.get(endpoint)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json == {"enabled": False}
+
+    app.extensions["plate_cache"] = PlateCache(max_size_bytes=1024)
+    try:
+        response = client.get(endpoint)
+    finally:
+        del app.extensions["plate_cache"]
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json == {
+        "enabled": True,
+        "active": False,
+        "entries": 0,
+        "size_bytes": 0,
+        "max_size_bytes": 1024,
+        "hits": 0,
+        "misses": 0,
+        "evictions": 0,
+        "invalidations": 0,
+    }
+
+
 @pytest.mark.parametrize("endpoint", GET_PLATES_ENDPOINTS)
 def test_get_plates_with_type(app, client, mocked_responses, endpoint):
     ss_url = f"{app.config['SS_URL']}/api/v2/labware"
     first_plate_barcode = "plate_123"
     second_plate_barcode = "plate_456"
 
-    first_plate_params = {"filter[barcode]": first_plate_barcode}
-    mocked_responses.add(
-        responses.GET,
-        ss_url,
-        json={"data": ["barcode exists!"]},
-        status=HTTPStatus.OK,
-        match=[query_param_matcher(first_plate_params)],
-    )
-
-    second_plate_params = {"filter[barcode]": second_plate_barcode}
+    # both plates are looked up with a single request
     mocked_responses.add(
         responses.GET,
         ss_url,
-        json={"data": []},
+        json={
+            "data": [
+                {
+                    "type": "plates",
+                    "attributes": {
+                        "labware_barcode": {
+                            "ean13_barcode": None,
+                            "machine_barcode": first_plate_barcode,
+                            "human_barcode": first_plate_barcode,
+                        }
+                    },
+                }
+            ]
+        },
         status=HTTPStatus.OK,
-        match=[query_param_matcher(second_plate_params)],
+        match=[query_param_matcher({"filter[barcode]": f"{first_plate_barcode},{second_plate_barcode}"})],
     )
 
     params = {QUERY_PARAM_BARCODES: f"{first_plate_barcode},{second_plate_barcode}", ARG_TYPE: ARG_TYPE_DESTINATION}
@@ -4,6 +4,13 @@ from unittest.mock import patch
 import pandas as pd
 import pytest
 
+from lighthouse.classes.background_jobs import (
+    BACKGROUND_JOB_LOCKS_COLLECTION,
+    JOB_STATUS_COMPLETED,
+    JOB_STATUS_FAILED,
+    JOB_STATUS_QUEUED,
+    JobQueueFullError,
+)
 from lighthouse.constants.fields import FIELD_COORDINATE, FIELD_PLATE_BARCODE, FIELD_ROOT_SAMPLE_ID
 from lighthouse.constants.general import REPORT_COLUMNS
 
@@ -20,7 +27,7 @@ DELETE_REPORTS_ENDPOINTS = [prefix + DELETE_REPORTS_ENDPOINT for prefix in ENDPO
 
 @pytest.mark.parametrize("endpoint", GET_REPORTS_ENDPOINTS)
 def test_get_reports_endpoint(client, endpoint):
-    with patch("lighthouse.routes.common.reports.get_reports_details", return_value=[]):
+    with patch("lighthouse.routes.common.reports.list_reports_details", return_value=[]):
         response = client.get(endpoint)
 
         assert response.status_code == HTTPStatus.OK
@@ -28,19 +35,66 @@ def test_get_reports_endpoint(client, endpoint):
 
 @pytest.mark.parametrize("endpoint", GET_REPORTS_ENDPOINTS)
 def test_get_reports_list(client, endpoint):
-    with patch("lighthouse.routes.common.reports.get_reports_details", return_value=[]):
+    with patch("lighthouse.routes.common.reports.list_reports_details", return_value=[]):
         response = client.get(endpoint)
 
         assert response.json == {"reports": []}
 
 
+REPORTS = [{"filename": f"report_{i}.xlsx"} for i in range(5)]
+
+
+@pytest.mark.parametrize("endpoint", GET_REPORTS_ENDPOINTS)
+def test_get_reports_page(client, endpoint):
+    with patch("lighthouse.routes.common.reports.list_reports_details", return_value=REPORTS):
+        response = client.get(f"{endpoint}?page=2&max_results=2")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json == {"reports": REPORTS[2:4], "_meta": {"page": 2, "max_results": 2, "total": 5}}
+
+
+@pytest.mark.parametrize("endpoint", GET_REPORTS_ENDPOINTS)
+def test_get_reports_page_with_the_default_page_size(app, client, endpoint):
+    app.config["REPORTS_PAGE_SIZE"] = 3
+
+    with patch("lighthouse.routes.common.reports.list_reports_details", return_value=REPORTS):
+        response = client.get(f"{endpoint}?page=2")
+
+    assert response.json == {"reports": REPORTS[3:], "_meta": {"page": 2, "max_results": 3, "total": 5}}
+
+
+@pytest.mark.parametrize("endpoint", GET_REPORTS_ENDPOINTS)
+@pytest.mark.parametrize("query", ["page=0", "max_results=none"])
+def test_get_reports_invalid_page(client, endpoint, query):
+    response = client.get(f"{endpoint}?{query}")
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize("endpoint", GET_REPORTS_ENDPOINTS)
+def test_get_reports_not_modified(client, endpoint):
+    with patch("lighthouse.routes.common.reports.list_reports_details", return_value=REPORTS):
+        response = client.get(endpoint)
+
+        assert response.headers["ETag"]
+
+        not_modified = client.get(endpoint, headers={"If-None-Match": response.headers["ETag"]})
+
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+        with patch("lighthouse.routes.common.reports.list_reports_details", return_value=REPORTS[1:]):
+            modified = client.get(endpoint, headers={"If-None-Match": response.headers["ETag"]})
+
+        assert modified.status_code == HTTPStatus.OK
+
+
 @pytest.mark.parametrize("endpoint", POST_NEW_REPORT_ENDPOINTS)
-def test_create_report(client, app, tmp_path, samples, labwhere_samples_simple, endpoint):
+def test_create_report(client, app, tmp_path, samples, labwhere_samples_simple, background_job_locks, endpoint):
     with app.app_context():
         with patch(
             "lighthouse.jobs.reports.get_new_report_name_and_path", return_value=["test.xlsx", f"{tmp_path}/test.xlsx"]
         ):
-            with patch("lighthouse.routes.common.reports.get_reports_details", return_value="Some details of a report"):
+            with patch("lighthouse.jobs.reports.get_reports_details", return_value="Some details of a report"):
                 cherrypicked_df = pd.DataFrame(
                     [["MCM001", "pb_1", "Positive", "A1"]],
                     columns=[FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE, "Result_lower", FIELD_COORDINATE],
@@ -53,13 +107,13 @@ def test_create_report(client, app, tmp_path, samples, labwhere_samples_simple,
 
 
 @pytest.mark.parametrize("endpoint", POST_NEW_REPORT_ENDPOINTS)
-def test_report_columns(client, app, tmp_path, samples, labwhere_samples_simple, endpoint):
+def test_report_columns(client, app, tmp_path, samples, labwhere_samples_simple, background_job_locks, endpoint):
     with app.app_context():
         test_xlsx = "test.xlsx"
         test_path = f"{tmp_path}/{test_xlsx}"
         with patch("lighthouse.jobs.reports.get_new_report_name_and_path", return_value=[test_xlsx, test_path]):
             with patch(
-                "lighthouse.routes.common.reports.get_reports_details",
+                "lighthouse.jobs.reports.get_reports_details",
                 return_value=(report_details := "Some details of a report"),
             ):
                 response = client.post(endpoint)
@@ -69,6 +123,123 @@ def test_report_columns(client, app, tmp_path, samples, labwhere_samples_simple,
                 assert sorted(data_frame.columns) == sorted(REPORT_COLUMNS)
 
 
+@pytest.fixture
+def background_job_locks(app):
+    with app.app_context():
+        locks = app.data.driver.db[BACKGROUND_JOB_LOCKS_COLLECTION]
+        locks.delete_many({})
+        try:
+            yield locks
+        finally:
+            locks.delete_many({})
+
+
+@pytest.mark.parametrize("endpoint", POST_NEW_REPORT_ENDPOINTS)
+def test_create_report_async_creates_the_report_in_a_job(client, app, background_job_locks, endpoint):
+    with patch("lighthouse.jobs.reports.create_report", return_value="test.xlsx") as create_report:
+        with patch("lighthouse.jobs.reports.get_reports_details", return_value="Some details of a report"):
+            response = client.post(f"{endpoint}?async=1&full=1")
+
+            assert response.status_code == HTTPStatus.ACCEPTED
+            job = response.json["job"]
+            assert job["status"] == JOB_STATUS_QUEUED
+            assert job["coalesced"] is False
+            assert job["href"] == endpoint.replace(POST_NEW_REPORT_ENDPOINT, f"/reports/jobs/{job['id']}")
+
+            # wait for the job to complete
+            app.extensions["background_jobs"].shutdown()
+
+    create_report.assert_called_once_with(full=True)
+
+    job_response = client.get(job["href"])
+
+    assert job_response.status_code == HTTPStatus.OK
+    assert job_response.json["job"]["status"] == JOB_STATUS_COMPLETED
+    assert job_response.json["job"]["details"] == {"full": True}
+    assert job_response.json["job"]["response_status"] == HTTPStatus.CREATED
+    assert job_response.json["job"]["response"] == {"reports": "Some details of a report"}
+
+
+@pytest.mark.parametrize("endpoint", POST_NEW_REPORT_ENDPOINTS)
+def test_create_report_async_coalesces_onto_the_report_in_progress(client, app, background_job_locks, endpoint):
+    with patch("lighthouse.jobs.reports.create_report", return_value="test.xlsx"):
+        with patch("lighthouse.jobs.reports.get_reports_details"):
+            # the job keeps its lock, as if it was still in progress
+            with patch.object(app.extensions["background_jobs"], "_release_lock"):
+                first = client.post(f"{endpoint}?async=1")
+                app.extensions["background_jobs"].shutdown()
+
+                second = client.post(f"{endpoint}?async=1")
+
+    assert second.status_code == HTTPStatus.ACCEPTED
+    assert second.json["job"]["id"] == first.json["job"]["id"]
+    assert second.json["job"]["coalesced"] is True
+    assert second.json["job"]["status"] == JOB_STATUS_COMPLETED
+
+
+@pytest.mark.parametrize("endpoint", POST_NEW_REPORT_ENDPOINTS)
+def test_create_report_async_full_is_not_coalesced_onto_an_incremental_report(
+    client, app, background_job_locks, endpoint
+):
+    with patch("lighthouse.jobs.reports.create_report", return_value="test.xlsx") as create_report:
+        with patch("lighthouse.jobs.reports.get_reports_details"):
+            # the jobs keep their locks, as if they were still in progress
+            with patch.object(app.extensions["background_jobs"], "_release_lock"):
+                incremental = client.post(f"{endpoint}?async=1")
+                full = client.post(f"{endpoint}?async=1&full=true")
+                app.extensions["background_jobs"].shutdown()
+
+    assert full.status_code == HTTPStatus.ACCEPTED
+    assert full.json["job"]["id"] != incremental.json["job"]["id"]
+    assert full.json["job"]["coalesced"] is False
+    assert sorted(call.kwargs["full"] for call in create_report.call_args_list) == [False, True]
+
+
+@pytest.mark.parametrize("endpoint", POST_NEW_REPORT_ENDPOINTS)
+def test_create_report_waits_for_the_report_in_progress(client, app, background_job_locks, endpoint):
+    with patch("lighthouse.jobs.reports.create_report", return_value="test.xlsx") as create_report:
+        with patch("lighthouse.jobs.reports.get_reports_details", return_value="Some details of a report"):
+            # the job keeps its lock, as if it was still in progress
+            with patch.object(app.extensions["background_jobs"], "_release_lock"):
+                client.post(f"{endpoint}?async=1")
+
+                response = client.post(endpoint)
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json == {"reports": "Some details of a report"}
+    create_report.assert_called_once()
+
+
+@pytest.mark.parametrize("endpoint", POST_NEW_REPORT_ENDPOINTS)
+def test_create_report_when_the_job_fails(client, endpoint):
+    with patch("lighthouse.routes.common.reports.submit_report_job", return_value=("job_1", False)):
+        with patch("lighthouse.routes.common.reports.wait_for_report_job", return_value={"status": JOB_STATUS_FAILED}):
+            response = client.post(endpoint)
+
+    assert response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+    assert response.json == {"errors": ["The report job job_1 did not complete"]}
+
+
+@pytest.mark.parametrize("endpoint", POST_NEW_REPORT_ENDPOINTS)
+@pytest.mark.parametrize("query", ["", "?async=1"])
+def test_create_report_when_too_many_jobs_are_in_progress(app, client, endpoint, query):
+    with patch.object(
+        app.extensions["background_jobs"], "submit_coalesced", side_effect=JobQueueFullError("Too many jobs")
+    ):
+        response = client.post(f"{endpoint}{query}")
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json == {"errors": ["Too many jobs"]}
+
+
+@pytest.mark.parametrize("endpoint", [prefix + "/reports/jobs/unknown" for prefix in ENDPOINT_PREFIXES])
+def test_get_report_job_not_found(client, endpoint):
+    response = client.get(endpoint)
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json == {"errors": ["No report job with id: unknown"]}
+
+
 @pytest.mark.parametrize("endpoint", DELETE_REPORTS_ENDPOINTS)
 def test_delete_reports_endpoint(client, endpoint):
     with patch("lighthouse.routes.common.reports.delete_reports", return_value=None):